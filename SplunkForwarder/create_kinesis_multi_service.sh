@@ -0,0 +1,69 @@
+#!/bin/bash
+# Kinesis Splunk Forwarder 통합 모드 systemd 서비스 등록
+# 계정별 서비스(create_kinesis_service.sh) 대신 한 프로세스가 계정 목록 파일의 모든 계정을 포워딩
+#
+# 계정 목록 파일 형식 (account_id, region 필수, enabled: false면 제외):
+#   {"accounts": [
+#     {"account_id": "253157413163", "region": "ap-northeast-2", "auth_mode": "role",
+#      "role_arn": "arn:aws:iam::253157413163:role/KinesisForwarderRole", "external_id": "..."},
+#     {"account_id": "111122223333", "region": "ap-northeast-2", "auth_mode": "accesskey",
+#      "access_key_id": "AKIA...", "secret_access_key": "..."}
+#   ]}
+#
+# 계정 목록을 고친 뒤 재시작 없이 반영: sudo systemctl reload kinesis-splunk-forwarder
+# (MANIFEST_RELOAD_INTERVAL마다 파일 변경도 확인)
+# 같은 계정의 계정별 서비스가 남아 있으면 두 프로세스가 같은 체크포인트를 쓰므로 먼저 중지/비활성화할 것
+
+SERVICE_NAME="kinesis-splunk-forwarder"
+SERVICE_FILE="/etc/systemd/system/${SERVICE_NAME}.service"
+MANIFEST_DIR="/etc/kinesis-splunk-forwarder"
+MANIFEST_FILE="${MANIFEST_DIR}/accounts.json"
+METRICS_PORT=${1:-9108}
+
+# 계정 목록 파일 (Access Key가 들어가므로 splunk 사용자만 읽기)
+sudo mkdir -p ${MANIFEST_DIR}
+if [ ! -f ${MANIFEST_FILE} ]; then
+    echo '{"accounts": []}' | sudo tee ${MANIFEST_FILE} > /dev/null
+fi
+sudo chown -R splunk:splunk ${MANIFEST_DIR}
+sudo chmod 700 ${MANIFEST_DIR}
+sudo chmod 600 ${MANIFEST_FILE}
+
+sudo tee ${SERVICE_FILE} > /dev/null << EOF
+[Unit]
+Description=Kinesis Splunk Forwarder Service (all accounts)
+After=network-online.target SplunkForwarder.service
+Wants=network-online.target
+Requires=SplunkForwarder.service
+
+[Service]
+Type=simple
+User=splunk
+Group=splunk
+WorkingDirectory=/opt
+StateDirectory=kinesis-splunk-forwarder
+Environment=ACCOUNTS_MANIFEST=${MANIFEST_FILE}
+Environment=METRICS_PORT=${METRICS_PORT}
+ExecStart=/usr/bin/python3 /opt/kinesis_splunk_forwarder.py
+ExecReload=/bin/kill -HUP \$MAINPID
+Restart=always
+RestartSec=10
+StandardOutput=journal
+StandardError=journal
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
+# 권한 설정
+sudo chmod 644 ${SERVICE_FILE}
+
+echo "서비스 파일 생성 완료: ${SERVICE_FILE} (계정 목록 ${MANIFEST_FILE}, 지표 포트 ${METRICS_PORT})"
+
+sudo systemctl daemon-reload
+
+sudo systemctl enable ${SERVICE_NAME}
+
+sudo systemctl restart ${SERVICE_NAME}
+
+sudo systemctl status ${SERVICE_NAME} --no-pager
@@ -71,6 +71,8 @@ Type=simple
 User=splunk
 Group=splunk
 WorkingDirectory=/opt
+StateDirectory=kinesis-splunk-forwarder
+Environment=CHECKPOINT_FILE=/var/lib/kinesis-splunk-forwarder/checkpoints-${ACCOUNT_ID}.json
 Environment=AWS_DEFAULT_REGION=${REGION}
 Environment=AWS_ACCOUNT_ID=${ACCOUNT_ID}
 Environment=AUTH_MODE=${MODE}
@@ -0,0 +1,57 @@
+#!/bin/bash
+# Forwarder 상태 에이전트 systemd 서비스 등록
+# WALB 웹 앱이 SSH 접속 후 127.0.0.1에서 조회하는 로그 파일/서비스 상태 JSON 제공
+
+SCRIPT_DIR=$(cd "$(dirname "$0")" && pwd)
+SERVICE_NAME="walb-status-agent"
+SERVICE_FILE="/etc/systemd/system/${SERVICE_NAME}.service"
+AGENT_SCRIPT="/opt/forwarder_status_agent.py"
+PORT=${1:-8765}
+
+# 에이전트 스크립트 배치
+if [ -f "${SCRIPT_DIR}/forwarder_status_agent.py" ]; then
+    sudo cp "${SCRIPT_DIR}/forwarder_status_agent.py" ${AGENT_SCRIPT}
+    sudo chmod 755 ${AGENT_SCRIPT}
+fi
+
+if [ ! -f ${AGENT_SCRIPT} ]; then
+    echo "error: ${AGENT_SCRIPT} 파일이 없습니다"
+    exit 1
+fi
+
+sudo tee ${SERVICE_FILE} > /dev/null << EOF
+[Unit]
+Description=WALB Forwarder Status Agent
+After=network-online.target
+Wants=network-online.target
+
+[Service]
+Type=simple
+User=splunk
+Group=splunk
+SupplementaryGroups=systemd-journal
+StateDirectory=walb-status-agent
+Environment=WALB_AGENT_PORT=${PORT}
+Environment=WALB_AGENT_STATE_FILE=/var/lib/walb-status-agent/state.json
+ExecStart=/usr/bin/python3 ${AGENT_SCRIPT}
+Restart=always
+RestartSec=10
+StandardOutput=journal
+StandardError=journal
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
+# 권한 설정
+sudo chmod 644 ${SERVICE_FILE}
+
+echo "서비스 파일 생성 완료: ${SERVICE_FILE} (포트 ${PORT})"
+
+sudo systemctl daemon-reload
+
+sudo systemctl enable ${SERVICE_NAME}
+
+sudo systemctl restart ${SERVICE_NAME}
+
+sudo systemctl status ${SERVICE_NAME} --no-pager
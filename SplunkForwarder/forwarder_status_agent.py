@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+Forwarder 상태 에이전트
+kinesis_splunk_forwarder.py와 같은 호스트에서 실행되며 WALB 웹 앱이 조회하는 상태를 JSON으로 제공
+
+- /var/log/splunk/<계정 ID>/*.log 파일별 (inode, 오프셋, 라인 수)를 주기적으로 갱신
+  * 지난 오프셋 이후 추가된 바이트만 읽어 줄바꿈 수를 더함 → 조회 비용이 파일 크기와 무관
+  * inode 변경(로테이션)이나 크기 감소(truncate)를 감지하면 해당 파일만 처음부터 다시 셈
+  * 상태를 파일로 저장하여 재시작 후에도 전체 파일을 다시 읽지 않음
+- 127.0.0.1에서만 HTTP로 응답 (웹 앱은 SSH로 접속한 뒤 로컬에서 조회)
+  * GET /status?account=<계정 ID>&tail=<줄 수>&logs=cloudtrail,guardduty
+  * GET /tail?account=<계정 ID>&log=<로그 종류>&lines=<줄 수>[&offset=<바이트>&inode=<inode>]
+    - offset 없이: 파일 끝에서 거꾸로 읽은 마지막 N줄과 다음 조회 기준 오프셋
+    - offset/inode 지정(follow): 그 오프셋 이후 추가된 완결된 줄만 반환,
+      inode가 바뀌었거나 파일이 줄었으면 rotated=true와 함께 새 파일의 마지막 N줄 반환
+  * GET /health
+- /status 응답에는 Forwarder 지표 엔드포인트(/metrics.json) 값을 metrics로 함께 담음
+  (주소는 Forwarder가 상태 디렉터리에 기록한 metrics-endpoint-<계정 ID>.json에서 찾음)
+- 계정별 서비스(kinesis-splunk-forwarder-<계정 ID>)가 없고 통합 모드 서비스(kinesis-splunk-forwarder)가
+  있으면 통합 모드 서비스 상태와 그중 이 계정의 로그만 반환
+
+표준 라이브러리만 사용합니다. (python3 기본 설치로 실행)
+"""
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+LOG_BASE_DIR = os.getenv('WALB_LOG_BASE_DIR', '/var/log/splunk')
+FORWARDER_SCRIPT = os.getenv('WALB_FORWARDER_SCRIPT', '/opt/kinesis_splunk_forwarder.py')
+FORWARDER_STATE_DIR = os.getenv('WALB_FORWARDER_STATE_DIR', '/var/lib/kinesis-splunk-forwarder')
+# 여러 계정을 한 프로세스에서 포워딩하는 통합 모드 서비스 (create_kinesis_multi_service.sh)
+CONSOLIDATED_SERVICE_NAME = 'kinesis-splunk-forwarder'
+METRICS_TIMEOUT = float(os.getenv('WALB_AGENT_METRICS_TIMEOUT', '3'))
+STATE_FILE = os.getenv('WALB_AGENT_STATE_FILE', '/var/lib/walb-status-agent/state.json')
+LISTEN_HOST = os.getenv('WALB_AGENT_HOST', '127.0.0.1')
+LISTEN_PORT = int(os.getenv('WALB_AGENT_PORT', '8765'))
+SCAN_INTERVAL = float(os.getenv('WALB_AGENT_SCAN_INTERVAL', '5'))
+
+LOG_TYPES = ('cloudtrail', 'guardduty', 'security-hub')
+
+_READ_BLOCK = 1 << 20
+_TAIL_BLOCK = 65536
+_MAX_TAIL_LINES = 1000
+_MAX_FOLLOW_BYTES = 256 * 1024
+
+
+def tail_lines(f, size, n):
+    """파일 끝에서부터 블록 단위로 거슬러 읽어 마지막 n줄만 디코딩"""
+    if n <= 0 or size == 0:
+        return []
+    pos, data = size, b''
+    while pos > 0 and data.count(b'\n') <= n:
+        step = min(_TAIL_BLOCK, pos)
+        pos -= step
+        f.seek(pos)
+        data = f.read(step) + data
+    return [line.decode('utf-8', 'replace') for line in data.splitlines()[-n:]]
+
+
+def complete_end(f, size):
+    """마지막 줄바꿈 바로 뒤 오프셋 (아직 쓰는 중인 마지막 줄 제외, 마지막 블록에 줄바꿈이 없으면 size)"""
+    if size == 0:
+        return 0
+    start = max(0, size - _TAIL_BLOCK)
+    f.seek(start)
+    block = f.read(size - start)
+    newline = block.rfind(b'\n')
+    return start + newline + 1 if newline >= 0 else size
+
+
+def read_tail(path, lines, offset=None, inode=None, max_bytes=_MAX_FOLLOW_BYTES):
+    """
+    로그 파일 tail / follow
+
+    offset이 없으면 마지막 lines줄, 있으면 offset 이후 추가된 완결된 줄(최대 max_bytes)을 반환합니다.
+    반환한 offset을 다음 조회에 그대로 넘기면 새로 추가된 부분만 받습니다.
+
+    Raises:
+        OSError: 파일이 없거나 읽을 수 없을 때
+    """
+    st = os.stat(path)
+    result = {'path': path, 'exists': True, 'inode': st.st_ino, 'size': st.st_size,
+              'mtime': int(st.st_mtime), 'rotated': False, 'more': False}
+
+    with open(path, 'rb') as f:
+        if offset is None or inode != st.st_ino or offset > st.st_size:
+            # 처음 조회이거나 로테이션/truncate → 새 파일 기준 tail
+            end = complete_end(f, st.st_size)
+            result.update(mode='tail', rotated=offset is not None,
+                          lines=tail_lines(f, end, lines), offset=end)
+            return result
+
+        f.seek(offset)
+        data = f.read(min(st.st_size - offset, max_bytes))
+        end = data.rfind(b'\n') + 1
+        if end == 0 and len(data) == max_bytes:
+            # 한 줄이 max_bytes보다 긴 경우 잘라서라도 진행
+            end = len(data)
+        result.update(mode='follow',
+                      lines=[line.decode('utf-8', 'replace') for line in data[:end].splitlines()],
+                      offset=offset + end,
+                      more=offset + end < st.st_size and len(data) == max_bytes)
+        return result
+
+
+class LineCounter:
+    """로그 파일별 누적 라인 수 (추가된 바이트만 읽어 갱신)"""
+
+    def __init__(self, base_dir, state_file=None):
+        self.base_dir = base_dir
+        self.state_file = state_file
+        self.files = {}         # 경로 → {'inode', 'offset', 'lines', 'size', 'mtime'}
+        self.scanned_at = 0.0
+        self._lock = threading.Lock()
+        self._load_state()
+
+    def _load_state(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self.files = json.load(f).get('files', {})
+            logger.info(f"상태 파일 로드: {len(self.files)}개 파일")
+        except (OSError, ValueError) as e:
+            logger.warning(f"상태 파일 로드 실패 (처음부터 다시 셈): {e}")
+            self.files = {}
+
+    def _save_state(self):
+        if not self.state_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            tmp_path = self.state_file + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'saved_at': time.time(), 'files': self.files}, f)
+            os.replace(tmp_path, self.state_file)
+        except OSError as e:
+            logger.warning(f"상태 파일 저장 실패: {e}")
+
+    def _update_file(self, path, entry):
+        """파일 하나 갱신 - 변경이 있으면 True"""
+        st = os.stat(path)
+        if entry is None or entry['inode'] != st.st_ino or st.st_size < entry['offset']:
+            # 새 파일, 로테이션, truncate → 처음부터
+            entry = {'inode': st.st_ino, 'offset': 0, 'lines': 0, 'size': 0, 'mtime': 0}
+        elif st.st_size == entry['offset'] and int(st.st_mtime) == entry['mtime']:
+            return entry, False
+
+        with open(path, 'rb') as f:
+            f.seek(entry['offset'])
+            remaining = st.st_size - entry['offset']
+            while remaining > 0:
+                block = f.read(min(_READ_BLOCK, remaining))
+                if not block:
+                    break
+                entry['lines'] += block.count(b'\n')
+                entry['offset'] += len(block)
+                remaining -= len(block)
+
+        entry['size'] = st.st_size
+        entry['mtime'] = int(st.st_mtime)
+        return entry, True
+
+    def scan(self):
+        """기준 디렉터리 아래 계정별 *.log 전체 갱신"""
+        seen = set()
+        changed = False
+        try:
+            account_dirs = [d for d in os.listdir(self.base_dir) if os.path.isdir(os.path.join(self.base_dir, d))]
+        except OSError:
+            account_dirs = []
+
+        for account_dir in account_dirs:
+            directory = os.path.join(self.base_dir, account_dir)
+            try:
+                names = [name for name in os.listdir(directory) if name.endswith('.log')]
+            except OSError:
+                continue
+            for name in names:
+                path = os.path.join(directory, name)
+                seen.add(path)
+                try:
+                    with self._lock:
+                        entry = self.files.get(path)
+                    entry, updated = self._update_file(path, dict(entry) if entry else None)
+                except OSError as e:
+                    logger.warning(f"로그 파일 갱신 실패 {path}: {e}")
+                    continue
+                if updated:
+                    changed = True
+                    with self._lock:
+                        self.files[path] = entry
+
+        with self._lock:
+            for path in list(self.files):
+                if path not in seen:
+                    del self.files[path]
+                    changed = True
+            self.scanned_at = time.time()
+
+        if changed:
+            self._save_state()
+
+    def get(self, path):
+        """
+        파일의 최신 (inode, 오프셋, 라인 수)
+
+        마지막 스캔 이후 크기나 inode가 바뀌었으면 그 자리에서 증분 갱신합니다.
+
+        Raises:
+            OSError: 파일이 없거나 읽을 수 없을 때
+        """
+        st = os.stat(path)
+        with self._lock:
+            entry = self.files.get(path)
+        if entry is not None and entry['inode'] == st.st_ino and entry['size'] == st.st_size:
+            return dict(entry)
+
+        entry, _ = self._update_file(path, dict(entry) if entry else None)
+        with self._lock:
+            self.files[path] = entry
+        return dict(entry)
+
+    def run_forever(self, interval):
+        while True:
+            try:
+                self.scan()
+            except Exception as e:
+                logger.error(f"로그 파일 스캔 중 오류: {e}")
+            time.sleep(interval)
+
+
+def _run(*cmd):
+    try:
+        return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                              universal_newlines=True, timeout=10).stdout
+    except Exception:
+        return ''
+
+
+def service_status(service_name):
+    """systemd 서비스 상태 (systemctl show 한 번)"""
+    props = {}
+    for line in _run('systemctl', 'show', service_name, '--no-pager',
+                     '-p', 'LoadState', '-p', 'ActiveState', '-p', 'SubState',
+                     '-p', 'UnitFileState', '-p', 'MainPID').splitlines():
+        key, _, value = line.partition('=')
+        props[key] = value.strip()
+
+    return {
+        'name': service_name,
+        'unit_file_exists': os.path.isfile('/etc/systemd/system/%s.service' % service_name),
+        'load_state': props.get('LoadState', ''),
+        'active_state': props.get('ActiveState', '') or 'inactive',
+        'sub_state': props.get('SubState', ''),
+        'unit_file_state': props.get('UnitFileState', '') or 'disabled',
+        'main_pid': int(props.get('MainPID') or 0),
+    }
+
+
+def forwarder_service_name(account_id):
+    """계정의 Forwarder 서비스 이름 (계정별 서비스가 없고 통합 모드 서비스가 있으면 통합 모드 서비스)"""
+    service_name = 'kinesis-splunk-forwarder-' + account_id
+    if not os.path.isfile('/etc/systemd/system/%s.service' % service_name) \
+            and os.path.isfile('/etc/systemd/system/%s.service' % CONSOLIDATED_SERVICE_NAME):
+        return CONSOLIDATED_SERVICE_NAME
+    return service_name
+
+
+def recent_journal(service_name, account_id, n=5):
+    """서비스의 최근 로그 n줄 (통합 모드 서비스는 이 계정 로그 - [계정 ID] 접두어 - 만)"""
+    if service_name != CONSOLIDATED_SERVICE_NAME:
+        return _run('journalctl', '-u', service_name, '--no-pager', '-n', str(n)).splitlines()
+    lines = _run('journalctl', '-u', service_name, '--no-pager', '-n', '500').splitlines()
+    return [line for line in lines if '[%s]' % account_id in line][-n:]
+
+
+def read_forwarder_metrics(account_id, log_dir):
+    """Forwarder 지표 엔드포인트의 /metrics.json (엔드포인트 파일이 없거나 응답이 없으면 None)"""
+    file_name = 'metrics-endpoint-%s.json' % account_id
+    for path in (os.path.join(FORWARDER_STATE_DIR, file_name), os.path.join(log_dir, file_name)):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                endpoint = json.load(f)
+            # 통합 모드는 계정별 문서 주소(json_url)를 기록
+            url = endpoint.get('json_url') or endpoint['url'] + '/metrics.json'
+        except (OSError, ValueError, KeyError, AttributeError):
+            continue
+        try:
+            with urllib.request.urlopen(url, timeout=METRICS_TIMEOUT) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except Exception as e:
+            logger.warning(f"Forwarder 지표 조회 실패 {url}: {e}")
+    return None
+
+
+def build_status(counter, account_id, tail, log_types):
+    """
+    계정 상태 스냅샷 (웹 앱 원격 수집기와 같은 JSON 형식)
+
+    라인 수는 카운터 값을 사용합니다. (파일 전체를 읽지 않음)
+    """
+    service_name = forwarder_service_name(account_id)
+    log_dir = os.path.join(counter.base_dir, account_id)
+    service = service_status(service_name)
+
+    logs = {}
+    for log_type in log_types:
+        path = '%s/%s.log' % (log_dir, log_type)
+        log = {'path': path, 'exists': False, 'size': 0, 'mtime': 0, 'lines': 0, 'tail': []}
+        try:
+            entry = counter.get(path)
+            log.update(exists=True, size=entry['size'], mtime=entry['mtime'], lines=entry['lines'])
+            if tail:
+                with open(path, 'rb') as f:
+                    log['tail'] = tail_lines(f, entry['size'], tail)
+        except OSError:
+            pass
+        logs[log_type] = log
+
+    recent_logs = []
+    if service['active_state'] == 'active':
+        recent_logs = recent_journal(service_name, account_id)
+
+    return {
+        'collected_at': time.time(),
+        'account_id': account_id,
+        'source': 'agent',
+        'service': service,
+        'script': {'path': FORWARDER_SCRIPT, 'exists': os.path.isfile(FORWARDER_SCRIPT)},
+        'log_dir': {'path': log_dir, 'exists': os.path.isdir(log_dir)},
+        'logs': logs,
+        'recent_logs': recent_logs,
+        'metrics': read_forwarder_metrics(account_id, log_dir) if service['active_state'] == 'active' else None,
+    }
+
+
+def make_handler(counter):
+    class StatusHandler(BaseHTTPRequestHandler):
+        server_version = 'WALBStatusAgent/1.0'
+
+        def _send_json(self, status, body):
+            payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            try:
+                if url.path == '/health':
+                    self._send_json(200, {'status': 'ok', 'files': len(counter.files),
+                                          'scanned_at': counter.scanned_at})
+                elif url.path == '/status':
+                    account_id = params.get('account', '')
+                    # 경로 조작 방지 - 계정 ID는 숫자만 허용
+                    if not account_id.isdigit():
+                        self._send_json(400, {'error': 'invalid account'})
+                        return
+                    tail = max(0, min(int(params.get('tail', 3)), _MAX_TAIL_LINES))
+                    log_types = [t for t in params.get('logs', ','.join(LOG_TYPES)).split(',') if t in LOG_TYPES]
+                    self._send_json(200, build_status(counter, account_id, tail, log_types))
+                elif url.path == '/tail':
+                    account_id = params.get('account', '')
+                    log_type = params.get('log', '')
+                    if not account_id.isdigit() or log_type not in LOG_TYPES:
+                        self._send_json(400, {'error': 'invalid account or log type'})
+                        return
+                    path = '%s/%s/%s.log' % (counter.base_dir, account_id, log_type)
+                    lines = max(0, min(int(params.get('lines', 50)), _MAX_TAIL_LINES))
+                    offset = int(params['offset']) if 'offset' in params else None
+                    inode = int(params['inode']) if 'inode' in params else None
+                    try:
+                        result = read_tail(path, lines, offset, inode)
+                        entry = counter.get(path)
+                        result['total_lines'] = entry['lines'] if entry['inode'] == result['inode'] else None
+                    except FileNotFoundError:
+                        result = {'path': path, 'exists': False}
+                    self._send_json(200, result)
+                else:
+                    self._send_json(404, {'error': 'not found'})
+            except ValueError as e:
+                self._send_json(400, {'error': str(e)})
+            except Exception as e:
+                logger.error(f"요청 처리 중 오류 {self.path}: {e}")
+                self._send_json(500, {'error': str(e)})
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return StatusHandler
+
+
+def main():
+    """메인 함수"""
+    counter = LineCounter(LOG_BASE_DIR, STATE_FILE)
+    counter.scan()
+    threading.Thread(target=counter.run_forever, args=(SCAN_INTERVAL,), daemon=True).start()
+
+    server = ThreadingHTTPServer((LISTEN_HOST, LISTEN_PORT), make_handler(counter))
+    logger.info(f"Forwarder 상태 에이전트 시작: http://{LISTEN_HOST}:{LISTEN_PORT} (로그 디렉터리 {LOG_BASE_DIR})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("종료 신호 받음")
+    finally:
+        server.server_close()
+        logger.info("Forwarder 상태 에이전트 종료")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+로컬 Splunk HEC 스텁 서버 (OUTPUT_SINK=hec 개발/점검용)
+
+/services/collector/event 요청을 실제 Splunk처럼 받아 이벤트를 메모리(또는 JSONL 파일)에 모읍니다.
+- Authorization: Splunk <토큰> 확인 (틀리면 401), Content-Encoding: gzip 해제
+- 한 요청에 이어 붙은 이벤트 JSON들을 나눠 파싱 (형식 오류면 400)
+- HTTP/1.1 keep-alive 유지 → 연결 재사용 여부를 connections로 확인
+- fail()로 다음 N개 요청에 오류 응답(503 등), delay로 응답 지연을 흉내냄
+
+사용법:
+    python3 hec_stub_server.py --port 8088 --token stub-token --output /tmp/hec-events.jsonl
+    HEC_URL=http://127.0.0.1:8088 HEC_TOKEN=stub-token OUTPUT_SINK=hec python3 kinesis_splunk_forwarder.py
+"""
+import argparse
+import gzip
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+HEC_ENDPOINT = '/services/collector/event'
+
+
+def parse_events(body):
+    """이어 붙은 이벤트 JSON 객체들 → 목록 (형식 오류면 ValueError)"""
+    decoder = json.JSONDecoder()
+    text = body.decode('utf-8')
+    events = []
+    index = 0
+    while True:
+        while index < len(text) and text[index].isspace():
+            index += 1
+        if index >= len(text):
+            return events
+        event, index = decoder.raw_decode(text, index)
+        if not isinstance(event, dict) or 'event' not in event:
+            raise ValueError("event 필드 없음")
+        events.append(event)
+
+
+class HecStubServer:
+    """스레드에서 도는 HEC 스텁 (port=0이면 빈 포트 자동 선택)"""
+
+    def __init__(self, token='stub-token', host='127.0.0.1', port=0, output=None):
+        self.token = token
+        self.output = output
+        self.events = []
+        self.requests = 0
+        self.connections = 0
+        self.delay = 0.0
+        self._failures = []  # 다음 요청들에 돌려줄 오류 상태 코드
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def fail(self, status=503, count=1):
+        """다음 count개 요청에 status로 응답"""
+        with self._lock:
+            self._failures.extend([status] * count)
+
+    def _record(self, body):
+        """
+        요청 하나 처리
+
+        Returns:
+            tuple: (상태 코드, 응답 JSON)
+        """
+        with self._lock:
+            self.requests += 1
+            if self._failures:
+                status = self._failures.pop(0)
+                return status, {'text': 'Server is busy', 'code': 9}
+        try:
+            events = parse_events(body)
+        except (UnicodeDecodeError, ValueError):
+            return 400, {'text': 'Invalid data format', 'code': 6}
+        with self._lock:
+            self.events.extend(events)
+            if self.output:
+                with open(self.output, 'a', encoding='utf-8') as f:
+                    for event in events:
+                        f.write(json.dumps(event, ensure_ascii=False) + '\n')
+        return 200, {'text': 'Success', 'code': 0}
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def _send(self, status, document):
+                body = json.dumps(document).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if self.path.split('?')[0] != HEC_ENDPOINT:
+                    self._send(404, {'text': 'The requested URL was not found on this server.', 'code': 404})
+                    return
+                if self.headers.get('Authorization') != f'Splunk {stub.token}':
+                    self._send(401, {'text': 'Invalid token', 'code': 4})
+                    return
+                if self.headers.get('Content-Encoding') == 'gzip':
+                    try:
+                        body = gzip.decompress(body)
+                    except (OSError, EOFError):
+                        self._send(400, {'text': 'Invalid data format', 'code': 6})
+                        return
+                if stub.delay:
+                    stub._stop_event.wait(stub.delay)
+                self._send(*stub._record(body))
+
+            def log_message(self, format, *args):
+                logger.debug(f"HEC 스텁 {self.address_string()} {format % args}")
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='hec-stub', daemon=True)
+        self._thread.start()
+        logger.info(f"HEC 스텁 서버 시작: {self.url}{HEC_ENDPOINT}")
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='로컬 Splunk HEC 스텁 서버')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8088)
+    parser.add_argument('--token', default='stub-token')
+    parser.add_argument('--output', help='받은 이벤트를 덧붙일 JSONL 파일')
+    parser.add_argument('--fail-status', type=int, default=503, help='--fail-count 요청에 돌려줄 상태 코드')
+    parser.add_argument('--fail-count', type=int, default=0, help='처음 N개 요청을 실패로 응답')
+    parser.add_argument('--delay', type=float, default=0.0, help='응답 지연 (초)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    stub = HecStubServer(token=args.token, host=args.host, port=args.port, output=args.output)
+    stub.delay = args.delay
+    if args.fail_count:
+        stub.fail(args.fail_status, args.fail_count)
+    stub.start()
+    try:
+        stub._thread.join()
+    except KeyboardInterrupt:
+        logger.info(f"종료: 요청 {stub.requests}건, 연결 {stub.connections}개, 이벤트 {len(stub.events)}건")
+        stub.stop()
+
+
+if __name__ == '__main__':
+    main()
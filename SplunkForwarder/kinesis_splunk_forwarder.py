@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
 import boto3
+import botocore.session
+from botocore.credentials import CredentialProvider, CredentialResolver, DeferredRefreshableCredentials
 import json
 import gzip
 import base64
@@ -7,8 +9,19 @@ import time
 import logging
 from datetime import datetime
 import os
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import multiprocessing
 import threading
+import signal
+import random
+import queue
+import collections
+import hashlib
+import math
+import http.client
+import ssl
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
 
 # 로깅 설정
 logging.basicConfig(
@@ -17,22 +30,1422 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-class KinesisSplunkForwarder:
-    def __init__(self, region_name=None):
-        # 환경변수에서 AWS 설정 읽기
-        self.region_name = region_name or os.getenv('AWS_DEFAULT_REGION', 'ap-northeast-2')
-        self.account_id = os.getenv('AWS_ACCOUNT_ID')
-        
-        # AWS 클라이언트 초기화
-        if os.getenv('AUTH_MODE') == 'accesskey':
-            self.kinesis_client = boto3.client(
-                'kinesis',
-                region_name=self.region_name,
-                aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-                aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
-            )
+# 체크포인트 파일 저장 주기 (초)
+CHECKPOINT_FLUSH_INTERVAL = float(os.getenv('CHECKPOINT_FLUSH_INTERVAL', '5'))
+
+# shard 목록 재조회 주기 (초) - 리샤딩으로 생긴 shard를 찾기 위함
+SHARD_DISCOVERY_INTERVAL = float(os.getenv('SHARD_DISCOVERY_INTERVAL', '60'))
+
+# GetRecords 폴링 설정
+GET_RECORDS_LIMIT = int(os.getenv('GET_RECORDS_LIMIT', '10000'))  # 호출당 최대 레코드 수 (Kinesis 상한 10000)
+MIN_POLL_INTERVAL = float(os.getenv('MIN_POLL_INTERVAL', '0.2'))  # shard당 초당 5회 GetRecords 제한
+MAX_IDLE_POLL_INTERVAL = float(os.getenv('MAX_IDLE_POLL_INTERVAL', '5'))  # 따라잡은 뒤 최대 폴링 간격
+CAUGHT_UP_MILLIS = int(os.getenv('CAUGHT_UP_MILLIS', '1000'))  # 이 이하로 뒤처져 있으면 따라잡은 것으로 봄
+MAX_ERROR_BACKOFF = float(os.getenv('MAX_ERROR_BACKOFF', '30'))  # 오류/처리량 초과 시 최대 대기
+
+
+# 디코딩 설정
+DECODE_WORKERS = int(os.getenv('DECODE_WORKERS', str(os.cpu_count() or 1)))  # 0이면 디코딩 단계 스레드에서 직접 디코딩
+DECODE_BATCH_SIZE = int(os.getenv('DECODE_BATCH_SIZE', '500'))  # 프로세스 풀 작업 하나에 넘길 레코드 수
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def event_dedup_key(service_name, data):
+    """
+    중복 판단용 이벤트 고유 ID (알 수 없으면 None)
+    
+    - CloudTrail: eventID
+    - GuardDuty: finding id + updatedAt, Security Hub: 포함된 finding들의 Id + UpdatedAt
+      (같은 finding이 갱신되어 다시 오는 것은 새 이벤트이므로 갱신 시각까지 포함)
+      EventBridge 이벤트(detail 안의 finding)와 finding 자체 형식 모두 처리
+    """
+    if not isinstance(data, dict):
+        return None
+    detail = data.get('detail') if isinstance(data.get('detail'), dict) else data
+    if service_name == 'cloudtrail':
+        key = data.get('eventID')
+    elif service_name == 'guardduty':
+        key = detail.get('id') and f"{detail['id']}@{detail.get('updatedAt')}"
+    elif service_name == 'security-hub':
+        findings = detail.get('findings') if isinstance(detail.get('findings'), list) else [detail]
+        key = '|'.join(f"{finding['Id']}@{finding.get('UpdatedAt')}" for finding in findings
+                       if isinstance(finding, dict) and finding.get('Id'))
+    else:
+        key = data.get('id')
+    return f"{service_name}:{key}" if key else None
+
+
+def decode_log_records(service_name, account_id, payloads):
+    """
+    Kinesis 레코드 묶음 → 로그 파일에 쓸 JSON 줄 목록 (프로세스 풀 작업 단위)
+    
+    CloudWatch Logs 구독 필터 레코드(gzip 압축 JSON)를 한 번씩만 압축 해제/파싱하고
+    logEvents의 message가 JSON이면 data, 아니면 message로 담아 직렬화합니다.
+    boto3는 Data를 이미 base64 디코딩된 bytes로 주므로 base64는 문자열일 때만 처리합니다.
+    파싱한 김에 줄마다 중복 판단용 이벤트 ID도 함께 돌려줍니다. (쓰기 단계에서 다시 파싱하지 않음)
+    
+    Returns:
+        tuple: (JSON 줄 목록, 줄별 이벤트 ID 목록, 디코딩 실패 레코드 수)
+    """
+    lines = []
+    keys = []
+    failed = 0
+    for data in payloads:
+        try:
+            if isinstance(data, str):
+                data = base64.b64decode(data)
+            if data[:2] == GZIP_MAGIC:
+                data = gzip.decompress(data)
+            envelope = json.loads(data)
+        except (OSError, EOFError, ValueError):
+            failed += 1
+            continue
+        
+        # 구독 필터 연결 확인용 메시지는 로그가 아님
+        if envelope.get('messageType') == 'CONTROL_MESSAGE':
+            continue
+        
+        for event in envelope.get('logEvents', []):
+            message = event.get('message', '')
+            if not message.strip():
+                continue
+            record = {
+                'timestamp': datetime.fromtimestamp(event['timestamp'] / 1000).isoformat(),
+                'service': service_name,
+                'account_id': account_id
+            }
+            try:
+                record['data'] = json.loads(message)
+            except ValueError:
+                # 일반 텍스트 로그인 경우
+                record['message'] = message
+            lines.append(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+            keys.append(event_dedup_key(service_name, record.get('data')))
+    return lines, keys, failed
+
+
+class RecordDecoder:
+    """
+    레코드 디코딩 실행기
+    
+    gzip 해제와 JSON 파싱/직렬화는 CPU 작업이라 GIL 때문에 shard 스레드를 늘려도 빨라지지 않으므로
+    DECODE_BATCH_SIZE 단위로 묶어 프로세스 풀에서 처리합니다.
+    풀을 쓸 수 없으면(DECODE_WORKERS=0, 풀 오류) 호출한 스레드에서 직접 디코딩합니다.
+    """
+    
+    def __init__(self, workers=DECODE_WORKERS, batch_size=DECODE_BATCH_SIZE):
+        self.batch_size = max(1, batch_size)
+        self.pool = None
+        if workers > 0:
+            # 스레드가 여러 개인 프로세스에서 fork하면 잠금 상태가 복제될 수 있으므로 forkserver/spawn 사용
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+            logger.info(f"디코딩 프로세스 풀 시작: {workers}개 ({method})")
+    
+    def decode(self, service_name, account_id, payloads):
+        """레코드 Data 목록 → (JSON 줄 목록, 줄별 이벤트 ID 목록, 실패 수), 입력 순서 유지"""
+        if self.pool is None:
+            return decode_log_records(service_name, account_id, payloads)
+        
+        batches = [payloads[i:i + self.batch_size] for i in range(0, len(payloads), self.batch_size)]
+        try:
+            futures = [self.pool.submit(decode_log_records, service_name, account_id, batch) for batch in batches]
+            lines, keys, failed = [], [], 0
+            for future in futures:
+                batch_lines, batch_keys, batch_failed = future.result()
+                lines.extend(batch_lines)
+                keys.extend(batch_keys)
+                failed += batch_failed
+            return lines, keys, failed
+        except Exception as e:
+            logger.error(f"디코딩 프로세스 풀 오류, 직접 디코딩으로 전환: {e}")
+            self.shutdown()
+            return decode_log_records(service_name, account_id, payloads)
+    
+    def shutdown(self):
+        pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+# 로그 파일 쓰기 설정
+WRITER_BUFFER_BYTES = int(os.getenv('WRITER_BUFFER_BYTES', str(1024 * 1024)))  # 이만큼 쌓이면 즉시 flush
+WRITER_FLUSH_INTERVAL = float(os.getenv('WRITER_FLUSH_INTERVAL', '1'))  # 최대 이 시간(초)마다 flush
+WRITER_FSYNC = os.getenv('WRITER_FSYNC', 'false').lower() == 'true'  # flush마다 fsync 여부
+
+
+class LogFileWriter:
+    """
+    로그 파일 하나에 대한 버퍼링 쓰기
+    
+    - 파일을 열어 둔 채로 직렬화된 줄을 메모리 버퍼에 모았다가 크기(WRITER_BUFFER_BYTES) 또는
+      시간(WRITER_FLUSH_INTERVAL) 기준으로 한 번에 기록 → 묶음마다 open/close와 작은 write 제거
+    - flush 전에 경로의 inode를 확인하여 외부에서 로테이션/삭제되었으면 새 파일을 열어 기록
+    - write에 넘긴 on_flushed 콜백은 해당 줄이 파일에 기록된 뒤 순서대로 호출 (체크포인트 갱신용)
+    - flush가 계속 실패해 버퍼가 상한(4배)을 넘으면 write를 거부 (쓰기 단계가 다시 시도하는 동안 앞 단계 큐가 차서 수신이 멈춤)
+    """
+    
+    def __init__(self, path, buffer_bytes=WRITER_BUFFER_BYTES, fsync=WRITER_FSYNC):
+        self.path = path
+        self.buffer_bytes = buffer_bytes
+        self.fsync = fsync
+        self._file = None
+        self._inode = None
+        self._buffer = []
+        self._buffered = 0
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._last_flush = time.time()
+        self.stats = {'bytes': 0, 'lines': 0, 'flushes': 0, 'reopens': 0, 'errors': 0,
+                      'flush_seconds_total': 0.0, 'flush_seconds_max': 0.0}
+        self._rate_mark = (time.time(), 0)
+    
+    def _open(self):
+        self._file = open(self.path, 'ab')
+        self._inode = os.fstat(self._file.fileno()).st_ino
+    
+    def _ensure_open(self):
+        """열린 파일이 경로의 현재 파일과 다르면(로테이션/삭제) 다시 열기"""
+        if self._file is not None:
+            try:
+                if os.stat(self.path).st_ino == self._inode:
+                    return
+            except FileNotFoundError:
+                pass
+            logger.info(f"로그 파일 교체 감지, 다시 엶: {self.path}")
+            self.stats['reopens'] += 1
+            self._file.close()
+            self._file = None
+        self._open()
+    
+    def write(self, lines, on_flushed=None):
+        """
+        줄 목록을 버퍼에 추가 (버퍼가 WRITER_BUFFER_BYTES 이상이면 즉시 flush)
+        
+        Returns:
+            bool: 버퍼에 받았으면 True, flush 실패가 누적되어 거부했으면 False
+        """
+        with self._lock:
+            if self._buffered >= self.buffer_bytes * 4:
+                return False
+            self._append_locked(lines, on_flushed)
+            if self._buffered >= self.buffer_bytes:
+                self._flush_locked()
+        return True
+    
+    def _append_locked(self, lines, on_flushed):
+        if lines:
+            data = ('\n'.join(lines) + '\n').encode('utf-8')
+            self._buffer.append(data)
+            self._buffered += len(data)
+            self.stats['lines'] += len(lines)
+        if on_flushed is not None:
+            self._callbacks.append(on_flushed)
+    
+    def flush(self, force=False):
+        """WRITER_FLUSH_INTERVAL이 지났거나 force이면 버퍼 기록"""
+        with self._lock:
+            if force or time.time() - self._last_flush >= WRITER_FLUSH_INTERVAL:
+                self._flush_locked()
+    
+    def _flush_locked(self):
+        self._last_flush = time.time()
+        if self._buffer:
+            started = time.time()
+            try:
+                self._ensure_open()
+                self._file.write(b''.join(self._buffer))
+                self._file.flush()
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+            except OSError as e:
+                self.stats['errors'] += 1
+                logger.error(f"로그 파일 쓰기 오류 {self.path}: {e}")
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                return
+            elapsed = time.time() - started
+            self.stats['bytes'] += self._buffered
+            self.stats['flushes'] += 1
+            self.stats['flush_seconds_total'] += elapsed
+            self.stats['flush_seconds_max'] = max(self.stats['flush_seconds_max'], elapsed)
+            self._buffer = []
+            self._buffered = 0
+        
+        self._run_callbacks()
+    
+    def _run_callbacks(self, callbacks=None):
+        if callbacks is None:
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"flush 후 콜백 오류 {self.path}: {e}")
+    
+    def get_stats(self, mark_rate=True):
+        """누적 통계 + 직전 조회 이후 초당 바이트, 평균 flush 지연(ms) (mark_rate=False면 기준 시점 유지)"""
+        with self._lock:
+            now = time.time()
+            mark_time, mark_bytes = self._rate_mark
+            if mark_rate:
+                self._rate_mark = (now, self.stats['bytes'])
+            stats = dict(self.stats, path=self.path, buffered_bytes=self._buffered)
+        elapsed = max(now - mark_time, 1e-6)
+        stats['bytes_per_second'] = round((stats['bytes'] - mark_bytes) / elapsed, 1)
+        stats['flush_latency_avg_ms'] = round(
+            stats['flush_seconds_total'] / stats['flushes'] * 1000, 2) if stats['flushes'] else 0.0
+        stats['flush_latency_max_ms'] = round(stats['flush_seconds_max'] * 1000, 2)
+        return stats
+    
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+# 출력 방식: file(로그 파일 → Universal Forwarder monitor) 또는 hec(Splunk HTTP Event Collector로 직접 전송)
+OUTPUT_SINK = os.getenv('OUTPUT_SINK', 'file').lower()
+
+# HEC 설정 (OUTPUT_SINK=hec)
+HEC_URL = os.getenv('HEC_URL', '').rstrip('/')  # 예: https://splunk.example.com:8088
+HEC_TOKEN = os.getenv('HEC_TOKEN', '')
+HEC_INDEX = os.getenv('HEC_INDEX', '')  # 비우면 토큰의 기본 인덱스
+HEC_EVENT_HOST = os.getenv('HEC_EVENT_HOST', 'splunk-forwarder')  # inputs.conf의 host와 같게
+HEC_VERIFY_TLS = os.getenv('HEC_VERIFY_TLS', 'true').lower() == 'true'
+HEC_CA_FILE = os.getenv('HEC_CA_FILE') or None
+HEC_TIMEOUT = float(os.getenv('HEC_TIMEOUT', '10'))
+HEC_BATCH_BYTES = int(os.getenv('HEC_BATCH_BYTES', str(1024 * 1024)))  # 압축 전 기준, 이만큼 쌓이면 즉시 전송
+HEC_GZIP_LEVEL = int(os.getenv('HEC_GZIP_LEVEL', '6'))
+HEC_MAX_RETRIES = int(os.getenv('HEC_MAX_RETRIES', '3'))  # 묶음 하나를 spill하기 전 재시도 횟수
+HEC_RETRY_INTERVAL = float(os.getenv('HEC_RETRY_INTERVAL', '30'))  # 전송 실패 후 다시 시도하기까지 바로 spill하는 시간 (초)
+HEC_SPILL_DIR = os.getenv('HEC_SPILL_DIR')  # 기본: 체크포인트 옆 hec-spill/<계정 ID>/<스트림>
+HEC_SPILL_MAX_BYTES = int(os.getenv('HEC_SPILL_MAX_BYTES', str(512 * 1024 * 1024)))  # 스트림별 spill 상한 (압축 후)
+HEC_REPLAY_BATCHES = int(os.getenv('HEC_REPLAY_BATCHES', '4'))  # flush 한 번에 다시 보낼 spill 묶음 수
+
+# 로그 종류 → sourcetype (inputs.conf와 같게)
+HEC_SOURCETYPES = {
+    'cloudtrail': 'aws:cloudtrail',
+    'guardduty': 'aws:guardduty',
+    'security-hub': 'aws:securityhub',
+}
+
+
+def _event_time(line):
+    """decode_log_records가 만든 줄의 timestamp(맨 앞 키) → epoch 초 (줄 전체를 다시 파싱하지 않음)"""
+    if line.startswith('{"timestamp":"'):
+        try:
+            return datetime.fromisoformat(line[14:line.index('"', 14)]).timestamp()
+        except ValueError:
+            pass
+    return None
+
+
+class HecWriter(LogFileWriter):
+    """
+    Splunk HTTP Event Collector로 보내는 쓰기 (OUTPUT_SINK=hec)
+    
+    LogFileWriter와 같은 버퍼링/콜백 규칙을 따르되, flush 때 파일 대신 이벤트 묶음을 gzip으로 압축해
+    /services/collector/event로 POST 합니다. (로그 파일 기록 → Universal Forwarder tail 단계 생략)
+    
+    - 이벤트마다 host, source, sourcetype, index와 계정 ID(fields.account_id, 인덱스 필드) 지정
+    - 연결 하나를 열어 두고 재사용 (끊기면 다시 연결)
+    - 연결 오류, 5xx, 429는 지터 백오프로 HEC_MAX_RETRIES번까지 재시도하고, 그래도 실패하면 압축한 묶음을
+      spill 디렉터리에 저장한 뒤 체크포인트를 진행 → HEC_RETRY_INTERVAL 동안은 바로 spill하고,
+      이후 전송이 성공하면 spill된 묶음을 오래된 것부터 다시 보냄
+    - 잘못된 요청(400, 413)으로 거부된 묶음은 .rejected 파일로 남기고 다시 보내지 않음
+    - spill이 HEC_SPILL_MAX_BYTES를 넘으면 버퍼를 유지 → 버퍼 상한에서 write 거부(역압)
+    - 전송(재시도 대기, spill 재전송 포함)은 버퍼를 꺼낸 뒤 버퍼 잠금 밖에서 하므로
+      HEC가 느려도 write()와 get_stats()(지표 엔드포인트)는 기다리지 않음. 전송끼리는 _send_lock으로 한 번에 하나
+    """
+    
+    def __init__(self, url, token, source, sourcetype, account_id, spill_dir, index=HEC_INDEX,
+                 batch_bytes=HEC_BATCH_BYTES):
+        super().__init__(f"{url} ({sourcetype})", buffer_bytes=batch_bytes, fsync=False)
+        parsed = urlparse(url)
+        self.url = url
+        self._scheme = parsed.scheme
+        self._host = parsed.hostname
+        self._port = parsed.port
+        self._endpoint = (parsed.path.rstrip('/') or '') + '/services/collector/event'
+        self._headers = {
+            'Authorization': f'Splunk {token}',
+            'Content-Type': 'application/json',
+            'Content-Encoding': 'gzip',
+        }
+        self._conn = None
+        self._connected = False
+        self._retry_at = 0.0
+        self._send_lock = threading.Lock()  # 연결, spill 목록, 콜백 순서는 전송 중인 스레드 하나만 다룸
+        
+        # 이벤트 공통 부분 (줄마다 time, event만 붙임)
+        envelope = {'host': HEC_EVENT_HOST, 'source': source, 'sourcetype': sourcetype}
+        if index:
+            envelope['index'] = index
+        envelope['fields'] = {'account_id': account_id}
+        self._prefix = json.dumps(envelope, ensure_ascii=False, separators=(',', ':'))[:-1] + ','
+        
+        self.spill_dir = spill_dir
+        self._spilled = collections.deque()
+        self._spill_seq = 0
+        self.stats.update(posts=0, compressed_bytes=0, spilled=0, replayed=0, rejected=0,
+                          spill_files=0, spill_bytes=0)
+        self._load_spill()
+    
+    def _load_spill(self):
+        """이전 실행에서 spill된 묶음 (재시작 후 다시 보냄)"""
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            names = sorted(name for name in os.listdir(self.spill_dir) if name.endswith('.json.gz'))
+        except OSError as e:
+            logger.error(f"HEC spill 디렉터리를 사용할 수 없습니다 {self.spill_dir}: {e}")
+            return
+        for name in names:
+            path = os.path.join(self.spill_dir, name)
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            self._spilled.append((path, size))
+            self.stats['spill_bytes'] += size
+        self.stats['spill_files'] = len(self._spilled)
+        if self._spilled:
+            logger.info(f"HEC spill 묶음 {len(self._spilled)}개 ({self.stats['spill_bytes']}B) 다시 보낼 예정: {self.spill_dir}")
+    
+    def write(self, lines, on_flushed=None):
+        prefix = self._prefix
+        events = []
+        for line in lines:
+            event_time = _event_time(line)
+            if event_time is None:
+                events.append(f'{prefix}"event":{line}}}')
+            else:
+                events.append(f'{prefix}"time":{event_time:.3f},"event":{line}}}')
+        with self._lock:
+            if self._buffered >= self.buffer_bytes * 4:
+                return False
+            self._append_locked(events, on_flushed)
+            full = self._buffered >= self.buffer_bytes
+        if full:
+            self.flush(force=True)
+        return True
+    
+    def flush(self, force=False):
+        """WRITER_FLUSH_INTERVAL이 지났거나 force이면 버퍼를 꺼내 전송 (실패하면 버퍼 앞에 되돌림)"""
+        with self._send_lock:
+            with self._lock:
+                if not force and time.time() - self._last_flush < WRITER_FLUSH_INTERVAL:
+                    return
+                self._last_flush = time.time()
+                buffer, buffered, callbacks = self._buffer, self._buffered, self._callbacks
+                self._buffer, self._buffered, self._callbacks = [], 0, []
+            
+            if buffer:
+                payload = gzip.compress(b''.join(buffer), compresslevel=HEC_GZIP_LEVEL)
+                if not self._deliver(payload):
+                    with self._lock:
+                        self._buffer[:0] = buffer
+                        self._buffered += buffered
+                        self._callbacks[:0] = callbacks
+                    return
+                with self._lock:
+                    self.stats['bytes'] += buffered
+            
+            self._replay_spill()
+            self._run_callbacks(callbacks)
+    
+    def _connection(self):
+        if self._conn is None:
+            if self._scheme == 'https':
+                context = ssl.create_default_context(cafile=HEC_CA_FILE)
+                if not HEC_VERIFY_TLS:
+                    context.check_hostname = False
+                    context.verify_mode = ssl.CERT_NONE
+                self._conn = http.client.HTTPSConnection(self._host, self._port, timeout=HEC_TIMEOUT, context=context)
+            else:
+                self._conn = http.client.HTTPConnection(self._host, self._port, timeout=HEC_TIMEOUT)
+            if self._connected:
+                self.stats['reopens'] += 1
+            self._connected = True
+        return self._conn
+    
+    def _close_connection(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+    
+    def _post(self, payload):
+        """
+        압축된 묶음 POST 한 번
+        
+        Returns:
+            str: 'sent', 'rejected'(다시 보내도 안 되는 요청), 'failed'(다시 시도할 수 있는 실패)
+        """
+        started = time.time()
+        try:
+            conn = self._connection()
+            conn.request('POST', self._endpoint, body=payload, headers=self._headers)
+            response = conn.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            self._close_connection()
+            self.stats['errors'] += 1
+            logger.warning(f"HEC 전송 실패 {self.path}: {e}")
+            return 'failed'
+        if response.will_close:
+            self._close_connection()
+        
+        elapsed = time.time() - started
+        if response.status == 200:
+            self.stats['posts'] += 1
+            self.stats['flushes'] += 1
+            self.stats['compressed_bytes'] += len(payload)
+            self.stats['flush_seconds_total'] += elapsed
+            self.stats['flush_seconds_max'] = max(self.stats['flush_seconds_max'], elapsed)
+            return 'sent'
+        
+        self.stats['errors'] += 1
+        detail = body[:200].decode('utf-8', 'replace')
+        if response.status in (400, 413):
+            logger.error(f"HEC가 묶음을 거부했습니다 {self.path} ({response.status}): {detail}")
+            return 'rejected'
+        logger.warning(f"HEC 응답 오류 {self.path} ({response.status}): {detail}")
+        return 'failed'
+    
+    def _deliver(self, payload):
+        """
+        묶음 전송 (실패가 이어지면 spill)
+        
+        Returns:
+            bool: HEC가 받았거나 디스크에 저장했으면 True (체크포인트 진행 가능), 둘 다 못 했으면 False
+        """
+        if time.time() >= self._retry_at:
+            for attempt in range(HEC_MAX_RETRIES + 1):
+                if attempt:
+                    time.sleep(jittered_backoff(attempt - 1, base=1))
+                result = self._post(payload)
+                if result == 'sent':
+                    return True
+                if result == 'rejected':
+                    self._spill(payload, rejected=True)
+                    return True
+            self._retry_at = time.time() + HEC_RETRY_INTERVAL
+            logger.error(f"HEC 전송이 계속 실패하여 {HEC_RETRY_INTERVAL:.0f}초 동안 디스크에 저장: {self.spill_dir}")
+        return self._spill(payload)
+    
+    def _spill(self, payload, rejected=False):
+        """압축된 묶음을 spill 디렉터리에 저장 (임시 파일 + fsync + rename), 거부된 묶음은 .rejected로"""
+        if not rejected and self.stats['spill_bytes'] + len(payload) > HEC_SPILL_MAX_BYTES:
+            logger.error(f"HEC spill 상한({HEC_SPILL_MAX_BYTES}B) 초과, 전송 재개까지 대기: {self.spill_dir}")
+            return False
+        self._spill_seq += 1
+        name = f"{int(time.time() * 1000):013d}-{os.getpid()}-{self._spill_seq:06d}.json.gz"
+        path = os.path.join(self.spill_dir, name + ('.rejected' if rejected else ''))
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(f"{path}.tmp", 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            logger.error(f"HEC spill 저장 실패 {path}: {e}")
+            self.stats['errors'] += 1
+            # 거부된 묶음은 다시 보내도 소용없으므로 저장하지 못해도 버림
+            return rejected
+        if rejected:
+            self.stats['rejected'] += 1
         else:
-            self.kinesis_client = boto3.client('kinesis', region_name=self.region_name)
+            self._spilled.append((path, len(payload)))
+            self.stats['spilled'] += 1
+            self.stats['spill_files'] = len(self._spilled)
+            self.stats['spill_bytes'] += len(payload)
+        return True
+    
+    def _replay_spill(self):
+        """HEC가 정상이면 spill된 묶음을 오래된 것부터 HEC_REPLAY_BATCHES개까지 다시 보냄"""
+        for _ in range(HEC_REPLAY_BATCHES):
+            if not self._spilled or time.time() < self._retry_at:
+                return
+            path, size = self._spilled[0]
+            try:
+                with open(path, 'rb') as f:
+                    payload = f.read()
+                result = self._post(payload)
+                if result == 'failed':
+                    self._retry_at = time.time() + HEC_RETRY_INTERVAL
+                    return
+                if result == 'rejected':
+                    os.replace(path, path + '.rejected')
+                    self.stats['rejected'] += 1
+                else:
+                    os.remove(path)
+                    self.stats['replayed'] += 1
+            except OSError as e:
+                logger.error(f"HEC spill 묶음 처리 실패, 건너뜀 {path}: {e}")
+            self._spilled.popleft()
+            self.stats['spill_files'] = len(self._spilled)
+            self.stats['spill_bytes'] -= size
+            if not self._spilled:
+                logger.info(f"HEC spill 묶음을 모두 다시 보냈습니다: {self.spill_dir}")
+    
+    def close(self):
+        self.flush(force=True)
+        with self._send_lock:
+            self._close_connection()
+
+
+# 단계(shard 수신 → 디코딩 → 파일 쓰기) 사이 큐 설정
+# 메모리 상한 ≈ (DECODE_QUEUE_SIZE + DECODE_STAGE_THREADS) × GetRecords 응답(최대 10MB)
+#              + 스트림 수 × (WRITE_QUEUE_SIZE × 디코딩된 묶음 + WRITER_BUFFER_BYTES × 4)
+DECODE_QUEUE_SIZE = int(os.getenv('DECODE_QUEUE_SIZE', '8'))  # 디코딩 대기 레코드 묶음 수 (전체 shard 공유)
+DECODE_STAGE_THREADS = int(os.getenv('DECODE_STAGE_THREADS', '2'))  # 동시에 디코딩하는 묶음 수
+WRITE_QUEUE_SIZE = int(os.getenv('WRITE_QUEUE_SIZE', '8'))  # 로그 파일별 쓰기 대기 묶음 수
+# 계정 하나가 디코딩 단계에 올려 둘 수 있는 최대 묶음 수 (쓰기 큐가 가득 차 보류된 묶음 포함)
+# - 출력이 막힌 계정은 이 한도에서 수신만 멈추고 공유 디코딩 스레드와 다른 계정은 계속 진행
+DECODE_ACCOUNT_IN_FLIGHT = int(os.getenv('DECODE_ACCOUNT_IN_FLIGHT', str(DECODE_QUEUE_SIZE)))
+STATS_LOG_INTERVAL = float(os.getenv('STATS_LOG_INTERVAL', '60'))  # 쓰기/파이프라인 통계 로그 주기 (초)
+
+PIPELINE_STAGES = ('fetch', 'decode_wait', 'decode', 'write_wait', 'write', 'backpressure')
+
+
+class StageStats:
+    """파이프라인 단계별 처리 시간 누적 (건수, 평균/최대 ms)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {stage: [0, 0.0, 0.0] for stage in PIPELINE_STAGES}
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            entry = self._stats[stage]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def snapshot(self, reset=False):
+        """단계별 {'count', 'seconds_total', 'avg_ms', 'max_ms'} (reset이면 최대값을 다시 잼)"""
+        with self._lock:
+            snapshot = {
+                stage: {
+                    'count': count,
+                    'seconds_total': round(total, 6),
+                    'avg_ms': round(total / count * 1000, 2) if count else 0.0,
+                    'max_ms': round(peak * 1000, 2)
+                }
+                for stage, (count, total, peak) in self._stats.items()
+            }
+            if reset:
+                for entry in self._stats.values():
+                    entry[2] = 0.0
+        return snapshot
+
+
+class RecordBatch:
+    """
+    shard에서 받은 레코드 묶음 하나 (단계 사이 큐의 작업 단위)
+
+    seq는 shard 안에서의 순번으로, 쓰기 단계가 여러 디코딩 스레드를 거친 묶음을
+    shard별 수신 순서대로 기록하여 체크포인트가 앞질러 가지 않도록 합니다.
+    end는 닫힌 shard를 끝까지 읽었음을 알리는 빈 묶음입니다.
+    """
+    __slots__ = ('owner', 'stream_name', 'shard_id', 'seq', 'payloads', 'lines', 'keys', 'sequence_number',
+                 'end', 'on_end', 'queued_at')
+
+    def __init__(self, owner, stream_name, shard_id, seq, payloads=None, sequence_number=None, end=False,
+                 on_end=None):
+        self.owner = owner
+        self.stream_name = stream_name
+        self.shard_id = shard_id
+        self.seq = seq
+        self.payloads = payloads or []
+        self.lines = []
+        self.keys = []
+        self.sequence_number = sequence_number
+        self.end = end
+        self.on_end = on_end
+        self.queued_at = time.time()
+
+
+class DecodeStage:
+    """
+    디코딩 단계 (디코딩 큐 + 스레드 + 프로세스 풀)
+
+    묶음을 보낸 Forwarder(batch.owner)의 설정으로 디코딩하여 그 Forwarder의 쓰기 큐로 넘깁니다.
+    통합 모드에서는 모든 계정이 하나를 공유하므로 계정 수와 무관하게 프로세스 풀이 하나만 뜹니다.
+    쓰기 큐가 가득 차도 기다리지 않고 그 계정의 보류 목록에 두므로, 한 계정의 출력이 막혀도
+    디코딩 스레드는 멈추지 않습니다 (그 계정은 DECODE_ACCOUNT_IN_FLIGHT에서 수신이 멈춤).
+    """
+
+    def __init__(self, threads=DECODE_STAGE_THREADS, queue_size=DECODE_QUEUE_SIZE):
+        self.decoder = RecordDecoder()
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self._threads = [threading.Thread(target=self._run, name=f'decode-{i}', daemon=True)
+                         for i in range(max(1, threads))]
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"디코딩 단계 시작: {len(self._threads)}개 스레드 (큐 {self.queue.maxsize})")
+
+    def _run(self):
+        while True:
+            batch = self.queue.get()
+            if batch is None:
+                break
+            batch.owner.decode_batch(batch, self.decoder)
+
+    def stop(self):
+        """큐에 남은 묶음을 모두 처리한 뒤 스레드와 프로세스 풀 종료"""
+        for _ in self._threads:
+            self.queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout=60)
+        self.decoder.shutdown()
+
+
+def jittered_backoff(attempt, base=MIN_POLL_INTERVAL, cap=MAX_ERROR_BACKOFF):
+    """지수 백오프 + full jitter (shard들이 동시에 재시도하지 않도록)"""
+    return max(MIN_POLL_INTERVAL, random.uniform(0, min(cap, base * (2 ** attempt))))
+
+
+class CheckpointStore:
+    """
+    (스트림, shard)별 마지막으로 기록한 레코드의 시퀀스 번호 저장소
+
+    - 로그 파일 기록이 끝난 레코드만 체크포인트 (최소 1회 전달)
+    - 메모리에서 갱신하고 주기적으로 임시 파일 기록 → fsync → rename으로 교체 (부분 기록 파일 없음)
+    - 재시작 시 AFTER_SEQUENCE_NUMBER로 이어 읽어 중단 중 도착한 이벤트를 잃지 않음
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.checkpoints = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # 주기 저장과 종료 시 저장이 같은 임시 파일을 동시에 쓰지 않도록
+        self.flushed_at = None
+        self._load()
+
+    @staticmethod
+    def _key(stream_name, shard_id):
+        return f"{stream_name}/{shard_id}"
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            logger.info(f"체크포인트 파일 없음, 새로 시작: {self.path}")
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.checkpoints = json.load(f).get('shards', {})
+            logger.info(f"체크포인트 로드: {len(self.checkpoints)}개 shard ({self.path})")
+        except (OSError, ValueError) as e:
+            logger.error(f"체크포인트 파일 읽기 실패, 무시하고 시작: {e}")
+            self.checkpoints = {}
+
+    def get(self, stream_name, shard_id):
+        """마지막 체크포인트 ({'sequence_number', 'closed', 'updated_at'}) 또는 None"""
+        with self._lock:
+            checkpoint = self.checkpoints.get(self._key(stream_name, shard_id))
+            return dict(checkpoint) if checkpoint else None
+
+    def update(self, stream_name, shard_id, sequence_number):
+        with self._lock:
+            self.checkpoints[self._key(stream_name, shard_id)] = {
+                'sequence_number': sequence_number,
+                'closed': False,
+                'updated_at': time.time()
+            }
+            self._dirty = True
+
+    def snapshot(self, stream_name):
+        """스트림의 shard별 체크포인트 {shard_id: {...}}"""
+        prefix = f"{stream_name}/"
+        with self._lock:
+            return {key[len(prefix):]: dict(checkpoint) for key, checkpoint in self.checkpoints.items()
+                    if key.startswith(prefix)}
+
+    def is_closed(self, stream_name, shard_id):
+        """닫힌 shard를 끝까지 읽었는지 여부"""
+        checkpoint = self.get(stream_name, shard_id)
+        return bool(checkpoint and checkpoint.get('closed'))
+
+    def prune(self, stream_name, live_shard_ids):
+        """보존 기간이 지나 목록에서 사라진 닫힌 shard의 체크포인트 정리"""
+        prefix = f"{stream_name}/"
+        with self._lock:
+            for key in list(self.checkpoints):
+                if key.startswith(prefix) and key[len(prefix):] not in live_shard_ids \
+                        and self.checkpoints[key].get('closed'):
+                    del self.checkpoints[key]
+                    self._dirty = True
+
+    def mark_closed(self, stream_name, shard_id):
+        """닫힌 shard를 끝까지 읽었음을 기록"""
+        with self._lock:
+            checkpoint = self.checkpoints.setdefault(self._key(stream_name, shard_id), {'sequence_number': None})
+            checkpoint.update(closed=True, updated_at=time.time())
+            self._dirty = True
+
+    def flush(self, before_write=None):
+        """
+        변경이 있으면 파일로 저장 (임시 파일 + rename)
+        
+        before_write: 저장할 체크포인트를 확정한 뒤 파일을 쓰기 전에 호출 (False를 반환하면 이번 저장 생략)
+                      - 체크포인트보다 먼저 디스크에 남아야 하는 상태(중복 제거 저널)를 맞추는 데 사용
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                snapshot = {'version': 1, 'updated_at': time.time(), 'shards': dict(self.checkpoints)}
+                self._dirty = False
+
+            if before_write is not None and not before_write():
+                with self._lock:
+                    self._dirty = True
+                return
+
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f, indent=1)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+                self.flushed_at = time.time()
+            except OSError as e:
+                logger.error(f"체크포인트 저장 실패 {self.path}: {e}")
+                with self._lock:
+                    self._dirty = True
+
+
+# 중복 제거 설정 (Kinesis는 최소 1회 전달이라 재시작/재시도 후 같은 이벤트가 다시 올 수 있음)
+# 메모리 상한 ≈ DEDUP_GENERATIONS × DEDUP_CAPACITY × -ln(DEDUP_FP_RATE / DEDUP_GENERATIONS) / (ln 2)² 비트
+#             (기본값으로 계정당 약 3.2MB)
+DEDUP_ENABLED = os.getenv('DEDUP_ENABLED', 'true').lower() == 'true'
+DEDUP_WINDOW = float(os.getenv('DEDUP_WINDOW', '3600'))  # 이 시간(초) 안에 다시 온 같은 ID를 중복으로 봄
+DEDUP_GENERATIONS = int(os.getenv('DEDUP_GENERATIONS', '4'))  # 시간 창을 나눈 필터 수 (가장 오래된 것부터 버림)
+DEDUP_CAPACITY = int(os.getenv('DEDUP_CAPACITY', '200000'))  # 필터 하나(창 / 세대 수 동안)에 넣을 최대 ID 수
+DEDUP_FP_RATE = float(os.getenv('DEDUP_FP_RATE', '0.000001'))  # 처음 보는 이벤트를 중복으로 잘못 판단할 확률 상한
+DEDUP_SAVE_INTERVAL = float(os.getenv('DEDUP_SAVE_INTERVAL', '60'))  # 필터 파일 저장 주기 (초)
+
+
+class DedupFilter:
+    """
+    시간 창 Bloom 필터 - 이벤트 ID(event_dedup_key) 중복 제거
+    
+    - DEDUP_WINDOW를 DEDUP_GENERATIONS개 세대로 나누고 세대마다 같은 크기의 Bloom 필터를 둠.
+      새 ID는 현재 세대에 넣고 조회는 모든 세대에서 하며, 창을 벗어난 세대는 통째로 버림
+    - 세대 크기는 DEDUP_CAPACITY와 DEDUP_FP_RATE(세대 합)로 고정 → 메모리 상한 일정.
+      현재 세대가 가득 차면 시간이 되기 전에 넘김 (오탐률 유지, 대신 실제 창이 짧아짐)
+    - reserve()로 통과시킨 ID는 로그가 기록될 때까지 대기 목록(pending)에만 두고 commit() 때 필터에 넣음
+      → 기록하지 못한 이벤트가 필터에 남아 재시작 후 다시 읽을 때 중복으로 버려지는 일이 없음
+    - 파일(헤더 JSON 한 줄 + 세대별 비트 배열)로 저장하여 재시작 후에도 이어 씀.
+      전체 저장은 DEDUP_SAVE_INTERVAL마다지만, 그 사이 commit()한 ID는 저널 파일에 덧붙여
+      체크포인트를 저장하기 직전마다 fsync (sync_journal) → 저장된 체크포인트까지의 ID는 항상 디스크에 있음
+    """
+    
+    def __init__(self, path, window=DEDUP_WINDOW, generations=DEDUP_GENERATIONS,
+                 capacity=DEDUP_CAPACITY, fp_rate=DEDUP_FP_RATE):
+        self.path = path
+        self.window = window
+        self.max_generations = max(1, generations)
+        self.span = window / self.max_generations
+        self.capacity = max(1, capacity)
+        self.fp_rate = fp_rate
+        generation_fp = min(max(fp_rate / self.max_generations, 1e-12), 0.5)
+        self.bits = max(64, int(math.ceil(-self.capacity * math.log(generation_fp) / math.log(2) ** 2)))
+        self.hashes = max(1, int(round(self.bits / self.capacity * math.log(2))))
+        self._generations = collections.deque()  # [시작 시각, ID 수, 비트 배열]
+        self._pending = set()  # reserve() 후 아직 기록되지 않은 ID
+        self._journal = []  # 마지막 전체 저장 이후 commit()했지만 저널 파일에 아직 쓰지 않은 [시각, ID]
+        self.journal_path = f"{path}.journal"
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()  # 전체 저장과 저널 추가가 서로의 파일 교체/비우기와 겹치지 않도록
+        self._dirty = False
+        self.saved_at = None
+        self.stats = {'checked': 0, 'suppressed': 0, 'rotations': 0, 'early_rotations': 0}
+        self._load()
+    
+    def _new_generation(self, now):
+        self._generations.append([now, 0, bytearray((self.bits + 7) // 8)])
+        while len(self._generations) > self.max_generations:
+            self._generations.popleft()
+        self.stats['rotations'] += 1
+    
+    def _advance(self, now):
+        """현재 세대가 span을 넘었으면 새 세대 시작, 창을 벗어난 세대 제거"""
+        if not self._generations or now - self._generations[-1][0] >= self.span:
+            self._new_generation(now)
+        while len(self._generations) > 1 and now - self._generations[0][0] >= self.window + self.span:
+            self._generations.popleft()
+    
+    def _indexes(self, key):
+        # 128비트 해시 하나를 둘로 나눠 k개 위치 생성 (double hashing)
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+    
+    def _contains(self, indexes):
+        for generation in self._generations:
+            bits = generation[2]
+            if all(bits[i >> 3] & (1 << (i & 7)) for i in indexes):
+                return True
+        return False
+    
+    def reserve(self, keys):
+        """
+        ID 목록 중복 확인 (같은 목록 안의 중복 포함)
+        
+        처음 보는 ID는 기록 대기 목록에 올리며, 로그를 기록한 뒤 commit(), 기록을 포기하면 release()로 넘겨야 합니다.
+        
+        Returns:
+            list: ID별 새 이벤트 여부 (ID가 None이면 항상 True, 대기 목록에 올리지 않음)
+        """
+        hashed = [self._indexes(key) if key is not None else None for key in keys]
+        result = []
+        with self._lock:
+            self._advance(time.time())
+            for key, indexes in zip(keys, hashed):
+                if key is None:
+                    result.append(True)
+                    continue
+                self.stats['checked'] += 1
+                if key in self._pending or self._contains(indexes):
+                    self.stats['suppressed'] += 1
+                    result.append(False)
+                    continue
+                self._pending.add(key)
+                result.append(True)
+        return result
+    
+    def commit(self, keys):
+        """기록이 끝난 ID를 현재 세대에 넣음 (다음 sync_journal()에서 저널 파일에 기록)"""
+        hashed = [self._indexes(key) for key in keys]
+        with self._lock:
+            now = time.time()
+            self._advance(now)
+            for key, indexes in zip(keys, hashed):
+                self._pending.discard(key)
+                self._insert(indexes, now)
+                self._journal.append([now, key])
+            self._dirty = True
+    
+    def _insert(self, indexes, now):
+        current = self._generations[-1]
+        if current[1] >= self.capacity:
+            self.stats['early_rotations'] += 1
+            self._new_generation(now)
+            current = self._generations[-1]
+        bits = current[2]
+        for i in indexes:
+            bits[i >> 3] |= 1 << (i & 7)
+        current[1] += 1
+    
+    def sync_journal(self):
+        """
+        마지막 저장 이후 commit()한 ID를 저널 파일에 덧붙이고 fsync
+        
+        Returns:
+            bool: 디스크에 반영했으면 True (실패 시 ID는 다음 호출에서 다시 씀)
+        """
+        with self._io_lock:
+            with self._lock:
+                entries, self._journal = self._journal, []
+            if not entries:
+                return True
+            try:
+                with open(self.journal_path, 'a', encoding='utf-8') as f:
+                    f.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+                    f.flush()
+                    os.fsync(f.fileno())
+                return True
+            except OSError as e:
+                logger.error(f"중복 제거 저널 기록 실패 {self.journal_path}: {e}")
+                with self._lock:
+                    self._journal[:0] = entries
+                return False
+    
+    def release(self, keys):
+        """기록을 포기한 ID를 대기 목록에서 제거 (다시 받으면 새 이벤트로 처리)"""
+        with self._lock:
+            self._pending.difference_update(keys)
+    
+    def _load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                header = json.loads(f.readline())
+                if (header.get('version'), header.get('bits'), header.get('hashes')) != (1, self.bits, self.hashes):
+                    logger.info(f"중복 제거 필터 설정이 바뀌어 새로 시작: {self.path}")
+                    return
+                size = (self.bits + 7) // 8
+                now = time.time()
+                for started_at, count in header.get('generations', []):
+                    bits = f.read(size)
+                    if len(bits) != size:
+                        raise ValueError("비트 배열 길이 불일치")
+                    if now - started_at < self.window + self.span:
+                        self._generations.append([started_at, count, bytearray(bits)])
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError) as e:
+            logger.error(f"중복 제거 필터 파일 읽기 실패, 새로 시작: {e}")
+            self._generations.clear()
+        while len(self._generations) > self.max_generations:
+            self._generations.popleft()
+        replayed = self._replay_journal()
+        if self._generations:
+            logger.info(f"중복 제거 필터 로드: {len(self._generations)}개 세대, 저널 {replayed}건 ({self.path})")
+    
+    def _replay_journal(self):
+        """마지막 전체 저장 이후 저널에 남은 ID를 필터에 다시 넣음 (다음 전체 저장에 포함되도록 저널은 유지)"""
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return 0
+        except OSError as e:
+            logger.error(f"중복 제거 저널 읽기 실패 {self.journal_path}: {e}")
+            return 0
+        now = time.time()
+        replayed = 0
+        for line in lines:
+            try:
+                committed_at, key = json.loads(line)
+            except (ValueError, TypeError):
+                continue  # 기록 중 종료되어 잘린 마지막 줄
+            if now - committed_at >= self.window:
+                continue
+            self._advance(now)
+            self._insert(self._indexes(key), now)
+            replayed += 1
+        if replayed:
+            self._dirty = True
+        return replayed
+    
+    def save(self, force=False):
+        """변경이 있으면 파일로 저장하고 저널을 비움 (force가 아니면 DEDUP_SAVE_INTERVAL마다)"""
+        with self._io_lock:
+            with self._lock:
+                if not self._dirty or (not force and self.saved_at and time.time() - self.saved_at < DEDUP_SAVE_INTERVAL):
+                    return
+                header = {'version': 1, 'bits': self.bits, 'hashes': self.hashes,
+                          'generations': [[started_at, count] for started_at, count, _ in self._generations]}
+                arrays = [bytes(bits) for _, _, bits in self._generations]
+                # 스냅샷에 들어간 ID는 저널에 쓸 필요 없음 (저장 실패 시 되돌림)
+                entries, self._journal = self._journal, []
+                self._dirty = False
+            
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, 'wb') as f:
+                    f.write(json.dumps(header).encode('utf-8') + b'\n')
+                    for bits in arrays:
+                        f.write(bits)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+                self.saved_at = time.time()
+            except OSError as e:
+                logger.error(f"중복 제거 필터 저장 실패 {self.path}: {e}")
+                with self._lock:
+                    self._journal[:0] = entries
+                    self._dirty = True
+                return
+            
+            try:
+                os.truncate(self.journal_path, 0)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                # 저널이 남아도 다음 로드 때 같은 ID를 한 번 더 넣을 뿐
+                logger.warning(f"중복 제거 저널 비우기 실패 {self.journal_path}: {e}")
+    
+    def get_stats(self):
+        with self._lock:
+            now = time.time()
+            current = self._generations[-1] if self._generations else None
+            oldest = self._generations[0][0] if self._generations else now
+            return dict(
+                self.stats,
+                window_seconds=self.window,
+                covered_seconds=round(now - oldest, 1),
+                generations=len(self._generations),
+                capacity=self.capacity,
+                fp_rate=self.fp_rate,
+                bits=self.bits,
+                hashes=self.hashes,
+                memory_bytes=len(self._generations) * ((self.bits + 7) // 8),
+                current_fill=round(current[1] / self.capacity, 4) if current else 0.0,
+                pending=len(self._pending),
+            )
+
+
+# 지표 엔드포인트 설정
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))  # 0이면 빈 포트 자동 선택, 음수면 끔
+METRICS_RATE_WINDOW = float(os.getenv('METRICS_RATE_WINDOW', '60'))  # 초당 처리량 계산 구간 (초)
+
+
+class ForwarderMetrics:
+    """
+    스트림/shard별 처리 지표 (지표 엔드포인트용)
+
+    - shard별 누적 카운터(레코드, 이벤트, 디코딩 실패, 중복 제거)와 마지막 MillisBehindLatest, 수신 시각 보관
+    - 초당 처리량은 조회 시점의 카운터를 표본으로 쌓아 최근 METRICS_RATE_WINDOW초 증가분으로 계산
+    """
+
+    def __init__(self, rate_window=METRICS_RATE_WINDOW):
+        self.rate_window = rate_window
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._shards = {}
+        self._samples = collections.deque()
+
+    def _entry(self, stream_name, shard_id):
+        key = (stream_name, shard_id)
+        entry = self._shards.get(key)
+        if entry is None:
+            entry = self._shards[key] = {'records': 0, 'events': 0, 'decode_errors': 0, 'duplicates': 0,
+                                         'millis_behind_latest': None, 'last_fetch_at': None}
+        return entry
+
+    def record_fetch(self, stream_name, shard_id, records, millis_behind):
+        with self._lock:
+            entry = self._entry(stream_name, shard_id)
+            entry['records'] += records
+            entry['millis_behind_latest'] = millis_behind
+            entry['last_fetch_at'] = time.time()
+
+    def record_decode_errors(self, stream_name, shard_id, failed):
+        with self._lock:
+            self._entry(stream_name, shard_id)['decode_errors'] += failed
+
+    def record_duplicates(self, stream_name, shard_id, suppressed):
+        with self._lock:
+            self._entry(stream_name, shard_id)['duplicates'] += suppressed
+
+    def record_written(self, stream_name, shard_id, events):
+        with self._lock:
+            self._entry(stream_name, shard_id)['events'] += events
+
+    def snapshot(self, write_bytes):
+        """
+        shard별 카운터와 초당 처리량
+
+        Args:
+            write_bytes (dict): 스트림별 로그 파일 기록 누적 바이트 (같은 구간으로 초당 바이트 계산)
+
+        Returns:
+            tuple: ({(stream, shard): {...}}, {stream: 초당 기록 바이트})
+        """
+        now = time.time()
+        with self._lock:
+            shards = {key: dict(entry) for key, entry in self._shards.items()}
+            totals = {key: (entry['records'], entry['events'], entry['decode_errors'])
+                      for key, entry in shards.items()}
+            if not self._samples or now - self._samples[-1][0] >= self.rate_window / 12:
+                self._samples.append((now, totals, dict(write_bytes)))
+            # 가장 오래된 표본이 구간 시작 이전이 되도록 유지
+            while len(self._samples) > 1 and now - self._samples[1][0] >= self.rate_window:
+                self._samples.popleft()
+            base_time, base_totals, base_bytes = self._samples[0]
+        if now - base_time < 1:
+            base_time, base_totals, base_bytes = self.started_at, {}, {}
+        elapsed = max(now - base_time, 1e-6)
+
+        for key, entry in shards.items():
+            base = base_totals.get(key, (0, 0, 0))
+            entry['records_per_second'] = round((entry['records'] - base[0]) / elapsed, 2)
+            entry['events_per_second'] = round((entry['events'] - base[1]) / elapsed, 2)
+            entry['decode_errors_per_second'] = round((entry['decode_errors'] - base[2]) / elapsed, 4)
+        bytes_per_second = {stream_name: round((total - base_bytes.get(stream_name, 0)) / elapsed, 1)
+                            for stream_name, total in write_bytes.items()}
+        return shards, bytes_per_second
+
+
+def _prometheus_labels(**labels):
+    return ','.join('%s="%s"' % (key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                    for key, value in labels.items())
+
+
+def render_prometheus(documents):
+    """계정별 get_metrics() 결과 목록 → Prometheus 텍스트 형식 (지표 이름별로 계정을 모아 한 번씩 선언)"""
+    families = collections.OrderedDict()
+    for metrics in documents:
+        _add_prometheus_samples(families, metrics)
+
+    lines = []
+    for name, (metric_type, help_text, samples) in families.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        lines.extend(f'{name}{{{labels}}} {value}' for labels, value in samples)
+    return '\n'.join(lines) + '\n'
+
+
+def _add_prometheus_samples(families, metrics):
+    account = metrics['account_id']
+
+    def add(name, metric_type, help_text, value, **labels):
+        family = families.setdefault(name, (metric_type, help_text, []))
+        if value is not None:
+            family[2].append((_prometheus_labels(account=account, **labels), value))
+
+    add('kinesis_forwarder_uptime_seconds', 'gauge', 'Seconds since the forwarder started', metrics['uptime_seconds'])
+    add('kinesis_forwarder_checkpoint_flush_age_seconds', 'gauge', 'Seconds since checkpoints were last persisted',
+        metrics['checkpoint_flush_age_seconds'])
+    for stream_name, stream in metrics['streams'].items():
+        add('kinesis_forwarder_write_bytes_total', 'counter', 'Bytes appended to the stream log file',
+            stream['write_bytes_total'], stream=stream_name, file=stream['log_file'])
+        add('kinesis_forwarder_write_errors_total', 'counter', 'Failed log file flushes',
+            stream['write_errors_total'], stream=stream_name, file=stream['log_file'])
+        if stream.get('output') == 'hec':
+            add('kinesis_forwarder_hec_spill_bytes', 'gauge', 'Compressed HEC batches waiting on disk for replay',
+                stream['spill_bytes'], stream=stream_name)
+        for shard_id, shard in stream['shards'].items():
+            labels = {'stream': stream_name, 'shard': shard_id}
+            add('kinesis_forwarder_records_total', 'counter', 'Kinesis records received',
+                shard['records_total'], **labels)
+            add('kinesis_forwarder_events_total', 'counter', 'Log events written',
+                shard['events_total'], **labels)
+            add('kinesis_forwarder_decode_errors_total', 'counter', 'Records that failed to decode',
+                shard['decode_errors_total'], **labels)
+            add('kinesis_forwarder_duplicates_suppressed_total', 'counter', 'Events dropped as already-written duplicates',
+                shard['duplicates_suppressed_total'], **labels)
+            add('kinesis_forwarder_millis_behind_latest', 'gauge', 'MillisBehindLatest of the last GetRecords',
+                shard['millis_behind_latest'], **labels)
+            add('kinesis_forwarder_checkpoint_age_seconds', 'gauge', 'Seconds since the shard checkpoint advanced',
+                shard['checkpoint_age_seconds'], **labels)
+    if metrics.get('dedup'):
+        add('kinesis_forwarder_dedup_memory_bytes', 'gauge', 'Memory held by the duplicate filter generations',
+            metrics['dedup']['memory_bytes'])
+        add('kinesis_forwarder_dedup_fill_ratio', 'gauge', 'Fill of the current duplicate filter generation',
+            metrics['dedup']['current_fill'])
+    for queue_name, queue_stats in metrics['pipeline']['queues'].items():
+        add('kinesis_forwarder_queue_depth', 'gauge', 'Batches waiting between pipeline stages',
+            queue_stats['depth'], queue=queue_name)
+        add('kinesis_forwarder_queue_capacity', 'gauge', 'Pipeline queue bound',
+            queue_stats['capacity'], queue=queue_name)
+    for stage, stage_stats in metrics['pipeline']['stages'].items():
+        add('kinesis_forwarder_stage_seconds_sum', 'counter', 'Time spent in a pipeline stage',
+            stage_stats['seconds_total'], stage=stage)
+        add('kinesis_forwarder_stage_seconds_count', 'counter', 'Batches observed in a pipeline stage',
+            stage_stats['count'], stage=stage)
+
+
+def make_metrics_handler(provider):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        server_version = 'KinesisSplunkForwarder/1.0'
+
+        def _send(self, status, body, content_type='application/json; charset=utf-8'):
+            payload = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            account_id = parse_qs(url.query).get('account', [None])[-1]
+            try:
+                if url.path == '/metrics':
+                    self._send(200, render_prometheus(provider.collect_metrics()),
+                               'text/plain; version=0.0.4; charset=utf-8')
+                elif url.path == '/metrics.json':
+                    documents = provider.collect_metrics(account_id)
+                    if account_id and not documents:
+                        self._send(404, json.dumps({'error': 'unknown account'}))
+                    elif len(documents) == 1:
+                        self._send(200, json.dumps(documents[0], ensure_ascii=False))
+                    else:
+                        self._send(200, json.dumps({'accounts': {doc['account_id']: doc for doc in documents}},
+                                                   ensure_ascii=False))
+                else:
+                    self._send(404, json.dumps({'error': 'not found'}))
+            except Exception as e:
+                logger.error(f"지표 요청 처리 중 오류 {self.path}: {e}")
+                self._send(500, json.dumps({'error': str(e)}))
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return MetricsHandler
+
+
+class MetricsServer:
+    """
+    지표 HTTP 서버 (METRICS_HOST:METRICS_PORT의 /metrics, /metrics.json[?account=<계정 ID>])
+
+    provider.collect_metrics(account_id=None)는 계정별 get_metrics() 문서 목록을 돌려줍니다.
+    계정마다 프로세스가 따로 떠 있을 수 있으므로 실제로 연 주소를 계정별 엔드포인트 파일
+    (체크포인트 옆 metrics-endpoint-<계정 ID>.json)에 기록하여 상태 에이전트/웹 앱 수집기가 찾게 합니다.
+    """
+
+    def __init__(self, provider, host=METRICS_HOST, port=METRICS_PORT):
+        self.provider = provider
+        self.host = host
+        self.port = port
+        self.url = None
+        self._server = None
+        self._advertised = set()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """서버 시작 (포트가 음수면 끔) - 열었으면 True"""
+        if self.port < 0:
+            return False
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), make_metrics_handler(self.provider))
+        except OSError as e:
+            logger.error(f"지표 서버를 열 수 없습니다 ({self.host}:{self.port}): {e}")
+            return False
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='metrics-server', daemon=True).start()
+        host, port = self._server.server_address[:2]
+        self.url = f"http://{host}:{port}"
+        logger.info(f"지표 엔드포인트: {self.url}/metrics, {self.url}/metrics.json")
+        return True
+
+    def advertise(self, account_id, path):
+        """계정의 엔드포인트 파일 기록"""
+        if self.url is None:
+            return
+        try:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'url': self.url, 'json_url': f"{self.url}/metrics.json?account={account_id}",
+                           'pid': os.getpid(), 'account_id': account_id, 'started_at': time.time()}, f)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self._advertised.add(path)
+        except OSError as e:
+            logger.warning(f"지표 엔드포인트 파일 기록 실패 {path}: {e}")
+
+    def withdraw(self, path):
+        with self._lock:
+            self._advertised.discard(path)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def stop(self):
+        for path in list(self._advertised):
+            self.withdraw(path)
+        server, self._server = self._server, None
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+
+# 역할 위임(AssumeRole) 세션 이름
+ASSUME_ROLE_SESSION_NAME = os.getenv('ASSUME_ROLE_SESSION_NAME', 'kinesis-splunk-forwarder')
+
+_base_botocore_session = None
+_base_session_lock = threading.Lock()
+
+
+def _new_botocore_session():
+    """서비스 모델 로더를 공유하는 botocore 세션 (계정마다 모델 JSON을 다시 읽지 않음)"""
+    global _base_botocore_session
+    with _base_session_lock:
+        if _base_botocore_session is None:
+            _base_botocore_session = botocore.session.get_session()
+        session = botocore.session.get_session()
+        session.register_component('data_loader', _base_botocore_session.get_component('data_loader'))
+    return session
+
+
+def _assume_role_credentials(account):
+    """role_arn의 임시 자격 증명 (처음 사용할 때 발급, 만료 전에 자동 갱신)"""
+    sts = boto3.Session(botocore_session=_new_botocore_session()).client('sts', region_name=account['region'])
+    params = {'RoleArn': account['role_arn'], 'RoleSessionName': ASSUME_ROLE_SESSION_NAME}
+    if account.get('external_id'):
+        params['ExternalId'] = account['external_id']
+
+    def refresh():
+        credentials = sts.assume_role(**params)['Credentials']
+        return {
+            'access_key': credentials['AccessKeyId'],
+            'secret_key': credentials['SecretAccessKey'],
+            'token': credentials['SessionToken'],
+            'expiry_time': credentials['Expiration'].isoformat()
+        }
+    return DeferredRefreshableCredentials(refresh_using=refresh, method='sts-assume-role')
+
+
+class AssumeRoleCredentialProvider(CredentialProvider):
+    """계정 설정의 role_arn을 쓰는 botocore 자격 증명 제공자 (세션의 credential_provider에 등록)"""
+
+    METHOD = 'kinesis-forwarder-assume-role'
+
+    def __init__(self, account):
+        self._account = account
+
+    def load(self):
+        return _assume_role_credentials(self._account)
+
+
+def create_kinesis_client(account):
+    """
+    계정 설정 → Kinesis 클라이언트
+
+    - auth_mode가 accesskey이면 access_key_id/secret_access_key 사용
+    - role_arn이 있으면 STS AssumeRole 임시 자격 증명 사용
+    - 그 외에는 기본 자격 증명 체인 (EC2 인스턴스 역할 등)
+    """
+    session = _new_botocore_session()
+    if account.get('auth_mode') == 'accesskey':
+        session.set_credentials(account.get('access_key_id'), account.get('secret_access_key'))
+    elif account.get('role_arn'):
+        # 기본 체인(환경 변수, 인스턴스 역할 등) 대신 이 계정의 역할만 사용
+        session.register_component('credential_provider',
+                                   CredentialResolver([AssumeRoleCredentialProvider(account)]))
+    return boto3.Session(botocore_session=session).client('kinesis', region_name=account['region'])
+
+
+class AccountLoggerAdapter(logging.LoggerAdapter):
+    """통합 모드에서 계정 ID를 로그 앞에 붙임 (단일 계정 모드는 그대로)"""
+
+    def process(self, msg, kwargs):
+        if self.extra.get('account_id'):
+            return f"[{self.extra['account_id']}] {msg}", kwargs
+        return msg, kwargs
+
+
+class KinesisSplunkForwarder:
+    """
+    계정 하나의 Kinesis 스트림 포워딩
+    
+    단일 계정 모드(계정별 systemd 서비스)에서는 환경변수로 설정하고 디코딩 단계, 지표 서버,
+    체크포인트 저장/통계 로그 스레드를 직접 띄웁니다. 통합 모드에서는 MultiAccountForwarder가
+    계정 설정(account)과 공유 디코딩 단계(decode_stage)를 넘기고 나머지 공용 작업을 맡습니다.
+    """
+    
+    def __init__(self, region_name=None, account=None, decode_stage=None):
+        if account is None:
+            # 환경변수에서 AWS 설정 읽기
+            account = {
+                'account_id': os.getenv('AWS_ACCOUNT_ID'),
+                'region': region_name or os.getenv('AWS_DEFAULT_REGION', 'ap-northeast-2'),
+                'auth_mode': os.getenv('AUTH_MODE', 'default'),
+                'access_key_id': os.getenv('AWS_ACCESS_KEY_ID'),
+                'secret_access_key': os.getenv('AWS_SECRET_ACCESS_KEY'),
+                'checkpoint_file': os.getenv('CHECKPOINT_FILE'),
+            }
+        self.standalone = decode_stage is None
+        self.region_name = account['region']
+        self.account_id = account.get('account_id')
+        
+        # AWS 클라이언트 초기화 (계정별 자격 증명)
+        self.kinesis_client = create_kinesis_client(account)
         
         # 계정 ID가 없으면 STS에서 가져오기
         if not self.account_id:
@@ -42,11 +1455,13 @@ class KinesisSplunkForwarder:
             except Exception as e:
                 logger.error(f"AWS 계정 ID를 가져올 수 없습니다: {e}")
                 self.account_id = "unknown"
+        self.logger = AccountLoggerAdapter(logger, {'account_id': None if self.standalone else self.account_id})
         
         # 기본 로그 디렉토리 설정
         base_log_dir = f"/var/log/splunk/{self.account_id}"
         
         # 스트림별 설정 - 환경변수 기반으로 로그 경로 설정
+        # (모든 스트림이 같은 디코딩 파이프라인을 쓰며 service_name/log_file만 다름)
         self.streams_config = {
             'cloudtrail-stream': {
                 'log_file': f'{base_log_dir}/cloudtrail.log',
@@ -65,22 +1480,85 @@ class KinesisSplunkForwarder:
         # 로그 디렉토리 생성
         self._create_log_directories()
         
-        # 각 스트림별 shard iterator 저장
+        # 레코드 디코딩 단계 (프로세스 풀, 통합 모드에서는 계정 간 공유)
+        self.decode_stage = decode_stage or DecodeStage()
+        
+        # 단계 사이 큐 (shard 수신 → 디코딩 → 로그 파일별 쓰기), 가득 차면 앞 단계가 대기
+        # 디코딩 큐에 넣고 아직 쓰기 단계로 넘어가지 않은 묶음 수는 계정별 수신 한도와 종료 시 디코딩 완료 대기에 사용
+        self.decode_queue = self.decode_stage.queue
+        self._in_flight = 0
+        self._in_flight_cond = threading.Condition()
+        self.write_queues = {stream_name: queue.Queue(maxsize=max(1, WRITE_QUEUE_SIZE))
+                             for stream_name in self.streams_config}
+        # 쓰기 큐가 가득 차 디코딩 스레드가 맡겨 둔 묶음 (쓰기 단계가 큐보다 먼저 가져감)
+        self._parked = {stream_name: collections.deque() for stream_name in self.streams_config}
+        self._parked_lock = threading.Lock()
+        self.stage_stats = StageStats()
+        self._batch_seqs = {}
+        # 소비 스레드가 다시 시작될 때 쓸 시작 위치 유형과 마지막으로 받은 시퀀스 번호 ((스트림, shard) 기준)
+        self._shard_start_types = {}
+        self._resume_points = {}
+        
+        # shard별 체크포인트 (재시작 시 이어 읽기)
+        self.checkpoints = CheckpointStore(self._get_checkpoint_path(base_log_dir, account.get('checkpoint_file')))
+        
+        # 이벤트 ID 중복 제거 (재전달된 레코드가 Splunk에 두 번 색인되지 않도록, 필터 파일은 체크포인트 옆)
+        self.dedup = DedupFilter(os.path.join(os.path.dirname(self.checkpoints.path),
+                                              f"dedup-{self.account_id}.bin")) if DEDUP_ENABLED else None
+        
+        # 스트림별 출력 (로그 파일 버퍼링 쓰기 또는 HEC 전송)
+        self.writers = {stream_name: self._create_writer(stream_name, config)
+                        for stream_name, config in self.streams_config.items()}
+        
+        # 처리 지표 및 HTTP 지표 엔드포인트 (주소는 체크포인트 옆 파일로 알림)
+        self.metrics = ForwarderMetrics()
+        self.metrics_endpoint_file = os.path.join(os.path.dirname(self.checkpoints.path),
+                                                  f"metrics-endpoint-{self.account_id}.json")
+        
+        # 각 스트림별 shard iterator 저장 (소비 중인 shard 목록)
         self.shard_iterators = {}
+        self._wakeups = []
+        self._stop_event = threading.Event()
         self.running = True
         
-        logger.info(f"Kinesis Splunk Forwarder 초기화 완료")
-        logger.info(f"AWS Region: {self.region_name}")
-        logger.info(f"AWS Account ID: {self.account_id}")
-        logger.info(f"Base Log Directory: {base_log_dir}")
+        self.logger.info(f"Kinesis Splunk Forwarder 초기화 완료")
+        self.logger.info(f"AWS Region: {self.region_name}")
+        self.logger.info(f"AWS Account ID: {self.account_id}")
+        self.logger.info(f"Base Log Directory: {base_log_dir}")
         
+    def _get_checkpoint_path(self, base_log_dir, path=None):
+        """체크포인트 파일 경로 (CHECKPOINT_FILE 또는 systemd StateDirectory, 쓸 수 없으면 로그 디렉토리)"""
+        path = path or f"/var/lib/kinesis-splunk-forwarder/checkpoints-{self.account_id}.json"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if os.access(os.path.dirname(path), os.W_OK):
+                return path
+        except OSError:
+            pass
+        fallback = os.path.join(base_log_dir, '.kinesis-checkpoints.json')
+        self.logger.warning(f"체크포인트 디렉토리에 쓸 수 없어 로그 디렉토리 사용: {fallback}")
+        return fallback
+    
+    def _create_writer(self, stream_name, config):
+        """OUTPUT_SINK에 따른 스트림 출력 (hec면 spill 디렉터리는 체크포인트 옆 hec-spill/<계정 ID>/<스트림>)"""
+        if OUTPUT_SINK != 'hec':
+            return LogFileWriter(config['log_file'])
+        spill_base = HEC_SPILL_DIR or os.path.join(os.path.dirname(self.checkpoints.path), 'hec-spill')
+        return HecWriter(
+            HEC_URL, HEC_TOKEN,
+            source=f"kinesis:{stream_name}",
+            sourcetype=HEC_SOURCETYPES.get(config['service_name'], f"aws:{config['service_name']}"),
+            account_id=self.account_id,
+            spill_dir=os.path.join(spill_base, self.account_id, stream_name)
+        )
+    
     def _create_log_directories(self):
         """로그 디렉토리 생성"""
         try:
             for config in self.streams_config.values():
                 log_dir = os.path.dirname(config['log_file'])
                 os.makedirs(log_dir, exist_ok=True)
-                logger.info(f"로그 디렉토리 생성/확인: {log_dir}")
+                self.logger.info(f"로그 디렉토리 생성/확인: {log_dir}")
                 
                 # splunk 사용자 권한 설정 (splunk 사용자가 있는 경우)
                 try:
@@ -89,246 +1567,648 @@ class KinesisSplunkForwarder:
                     splunk_uid = pwd.getpwnam('splunk').pw_uid
                     splunk_gid = grp.getgrnam('splunk').gr_gid
                     os.chown(log_dir, splunk_uid, splunk_gid)
-                    logger.info(f"splunk 사용자 권한 설정 완료: {log_dir}")
+                    self.logger.info(f"splunk 사용자 권한 설정 완료: {log_dir}")
                 except (KeyError, OSError) as e:
-                    logger.warning(f"splunk 사용자 권한 설정 실패 (정상적일 수 있음): {e}")
+                    self.logger.warning(f"splunk 사용자 권한 설정 실패 (정상적일 수 있음): {e}")
                     
         except Exception as e:
-            logger.error(f"로그 디렉토리 생성 중 오류: {e}")
+            self.logger.error(f"로그 디렉토리 생성 중 오류: {e}")
             
-    def _get_initial_shard_iterator(self, stream_name, shard_id):
-        """초기 shard iterator 획득"""
+    def _get_initial_shard_iterator(self, stream_name, shard_id, default_type='LATEST', resume_after=None):
+        """
+        초기 shard iterator 획득
+        
+        resume_after(이미 받은 마지막 시퀀스 번호) 또는 체크포인트가 있으면 그 레코드 다음부터(AFTER_SEQUENCE_NUMBER),
+        없으면 default_type(LATEST: 최신 데이터부터, TRIM_HORIZON: shard 처음부터)으로 읽습니다.
+        """
+        checkpoint = self.checkpoints.get(stream_name, shard_id)
+        sequence_number = resume_after or (checkpoint or {}).get('sequence_number')
         try:
+            if sequence_number:
+                try:
+                    response = self.kinesis_client.get_shard_iterator(
+                        StreamName=stream_name,
+                        ShardId=shard_id,
+                        ShardIteratorType='AFTER_SEQUENCE_NUMBER',
+                        StartingSequenceNumber=sequence_number
+                    )
+                    self.logger.info(f"{stream_name}/{shard_id} {sequence_number} 다음부터 재개")
+                    return response['ShardIterator']
+                except self.kinesis_client.exceptions.InvalidArgumentException as e:
+                    # 보존 기간이 지나 체크포인트 레코드가 삭제된 경우 남아 있는 가장 오래된 레코드부터
+                    self.logger.warning(f"{stream_name}/{shard_id} 체크포인트 사용 불가, TRIM_HORIZON부터 읽음: {e}")
+                    response = self.kinesis_client.get_shard_iterator(
+                        StreamName=stream_name,
+                        ShardId=shard_id,
+                        ShardIteratorType='TRIM_HORIZON'
+                    )
+                    return response['ShardIterator']
+            
             response = self.kinesis_client.get_shard_iterator(
                 StreamName=stream_name,
                 ShardId=shard_id,
-                ShardIteratorType='LATEST'  # 최신 데이터부터 읽기
+                ShardIteratorType=default_type
             )
             return response['ShardIterator']
         except Exception as e:
-            logger.error(f"Error getting shard iterator for {stream_name}: {e}")
+            self.logger.error(f"Error getting shard iterator for {stream_name}: {e}")
             return None
     
+    def _acquire_shard_iterator(self, stream_name, shard_id, default_type='LATEST', resume_after=None):
+        """
+        shard iterator를 얻을 때까지 재시도 (지터를 둔 지수 백오프)
+        
+        실패할 때마다 소비 스레드가 끝나고 코디네이터가 곧바로 다시 띄우면
+        ListShards/GetShardIterator를 쉬지 않고 반복하게 되므로 소비 스레드 안에서 기다립니다.
+        
+        Returns:
+            str: shard iterator, 종료 중이면 None
+        """
+        attempt = 0
+        while self.running:
+            iterator = self._get_initial_shard_iterator(stream_name, shard_id, default_type, resume_after)
+            if iterator:
+                return iterator
+            delay = jittered_backoff(attempt, base=1)
+            attempt += 1
+            self.logger.warning(f"{stream_name}/{shard_id} iterator 획득 실패, {delay:.1f}초 후 재시도")
+            self._stop_event.wait(delay)
+        return None
+    
     def _get_stream_shards(self, stream_name):
-        """스트림의 모든 shard 조회"""
+        """
+        스트림의 모든 shard 조회 (list_shards 페이지네이션, 닫힌 shard 포함)
+        
+        Returns:
+            list: shard 목록, 조회 실패 시 None
+        """
         try:
-            response = self.kinesis_client.describe_stream(StreamName=stream_name)
-            return response['StreamDescription']['Shards']
+            shards = []
+            response = self.kinesis_client.list_shards(StreamName=stream_name)
+            shards.extend(response.get('Shards', []))
+            while response.get('NextToken'):
+                # NextToken을 쓸 때는 StreamName을 함께 보내면 안 됨
+                response = self.kinesis_client.list_shards(NextToken=response['NextToken'])
+                shards.extend(response.get('Shards', []))
+            return shards
         except Exception as e:
-            logger.error(f"Error describing stream {stream_name}: {e}")
-            return []
+            self.logger.error(f"Error listing shards for {stream_name}: {e}")
+            return None
     
-    def _decode_cloudwatch_logs(self, data):
-        """CloudWatch Logs 데이터 디코딩"""
-        try:
-            # Base64 디코딩 후 gzip 압축 해제
+    def _enqueue_decode(self, batch):
+        """
+        디코딩 큐에 넣기 (이 계정의 처리 중 묶음이 한도에 닿았거나 큐가 가득 차 있으면 자리가 날 때까지 대기 - 역압)
+        
+        Returns:
+            bool: 넣었으면 True, 기다리는 중 종료되었으면 False
+        """
+        started = time.time()
+        with self._in_flight_cond:
+            while self._in_flight >= max(1, DECODE_ACCOUNT_IN_FLIGHT):
+                if not self.running:
+                    return False
+                self._in_flight_cond.wait(0.5)
+            self._in_flight += 1
+        while True:
             try:
-                compressed_data = base64.b64decode(data)
-                decompressed_data = gzip.decompress(compressed_data)
-            except:
-                decompressed_data = gzip.decompress(data)
-
-            log_events = json.loads(decompressed_data.decode('utf-8'))
-            return log_events
-        except Exception as e:
-            logger.error(f"Error decoding CloudWatch logs data: {e}")
-            return None
+                self.decode_queue.put(batch, timeout=0.5)
+                break
+            except queue.Full:
+                if not self.running:
+                    self._batch_decoded()
+                    return False
+        self.stage_stats.observe('backpressure', time.time() - started)
+        return True
     
-    def _process_cloudtrail_record(self, record):
-        """CloudTrail 레코드 처리"""
-        try:
-            decoded_data = self._decode_cloudwatch_logs(record['Data'])
-            if decoded_data and 'logEvents' in decoded_data:
-                processed_events = []
-                for event in decoded_data['logEvents']:
-                    # CloudTrail 로그는 이미 JSON 형태
-                    if event['message'].strip():
-                        try:
-                            # JSON 파싱 시도
-                            log_data = json.loads(event['message'])
-                            processed_events.append({
-                                'timestamp': datetime.fromtimestamp(event['timestamp'] / 1000).isoformat(),
-                                'service': 'cloudtrail',
-                                'account_id': self.account_id,
-                                'data': log_data
-                            })
-                        except json.JSONDecodeError:
-                            # 일반 텍스트 로그인 경우
-                            processed_events.append({
-                                'timestamp': datetime.fromtimestamp(event['timestamp'] / 1000).isoformat(),
-                                'service': 'cloudtrail',
-                                'account_id': self.account_id,
-                                'message': event['message']
-                            })
-                return processed_events
-        except Exception as e:
-            logger.error(f"CloudTrail 레코드 처리 중 오류: {e}")
-        return []
+    def _batch_decoded(self):
+        with self._in_flight_cond:
+            self._in_flight -= 1
+            self._in_flight_cond.notify_all()
     
-    def _process_guardduty_record(self, record):
-        """GuardDuty 레코드 처리"""
-        try:
-            decoded_data = self._decode_cloudwatch_logs(record['Data'])
-            if decoded_data and 'logEvents' in decoded_data:
-                processed_events = []
-                for event in decoded_data['logEvents']:
-                    if event['message'].strip():
-                        try:
-                            log_data = json.loads(event['message'])
-                            processed_events.append({
-                                'timestamp': datetime.fromtimestamp(event['timestamp'] / 1000).isoformat(),
-                                'service': 'guardduty',
-                                'account_id': self.account_id,
-                                'data': log_data
-                            })
-                        except json.JSONDecodeError:
-                            processed_events.append({
-                                'timestamp': datetime.fromtimestamp(event['timestamp'] / 1000).isoformat(),
-                                'service': 'guardduty',
-                                'account_id': self.account_id,
-                                'message': event['message']
-                            })
-                return processed_events
-        except Exception as e:
-            logger.error(f"GuardDuty 레코드 처리 중 오류: {e}")
-        return []
+    def _wait_decoded(self, timeout=60):
+        """이 계정이 디코딩 큐에 넣은 묶음이 모두 쓰기 단계로 넘어갈 때까지 대기"""
+        with self._in_flight_cond:
+            if not self._in_flight_cond.wait_for(lambda: self._in_flight <= 0, timeout):
+                self.logger.warning(f"디코딩 대기 중인 묶음 {self._in_flight}개를 남기고 종료")
     
-    def _process_securityhub_record(self, record):
-        """Security Hub 레코드 처리"""
+    def decode_batch(self, batch, decoder):
+        """디코딩 단계 작업: 레코드 묶음을 줄 목록으로 바꿔 스트림의 쓰기 큐로 넘김"""
+        handed_off = True
         try:
-            decoded_data = self._decode_cloudwatch_logs(record['Data'])
-            if decoded_data and 'logEvents' in decoded_data:
-                processed_events = []
-                for event in decoded_data['logEvents']:
-                    if event['message'].strip():
-                        try:
-                            log_data = json.loads(event['message'])
-                            processed_events.append({
-                                'timestamp': datetime.fromtimestamp(event['timestamp'] / 1000).isoformat(),
-                                'service': 'security-hub',
-                                'account_id': self.account_id,
-                                'data': log_data
-                            })
-                        except json.JSONDecodeError:
-                            processed_events.append({
-                                'timestamp': datetime.fromtimestamp(event['timestamp'] / 1000).isoformat(),
-                                'service': 'security-hub',
-                                'account_id': self.account_id,
-                                'message': event['message']
-                            })
-                return processed_events
+            self.stage_stats.observe('decode_wait', time.time() - batch.queued_at)
+            
+            if batch.payloads:
+                started = time.time()
+                service_name = self.streams_config[batch.stream_name]['service_name']
+                batch.lines, batch.keys, failed = decoder.decode(service_name, self.account_id, batch.payloads)
+                batch.payloads = []
+                self.stage_stats.observe('decode', time.time() - started)
+                if failed:
+                    self.metrics.record_decode_errors(batch.stream_name, batch.shard_id, failed)
+                    self.logger.error(f"{batch.stream_name}에서 {failed}개 레코드 디코딩 실패 (건너뜀)")
+            
+            batch.queued_at = time.time()
+            handed_off = self._hand_off(batch)
         except Exception as e:
-            logger.error(f"Security Hub 레코드 처리 중 오류: {e}")
-        return []
+            self.logger.error(f"{batch.stream_name}/{batch.shard_id} 디코딩 단계 오류: {e}")
+        finally:
+            if handed_off:
+                self._batch_decoded()
     
-    def _write_to_log_file(self, log_file, events):
-        """로그 파일에 이벤트 쓰기"""
-        try:
-            with open(log_file, 'a', encoding='utf-8') as f:
-                for event in events:
-                    log_line = json.dumps(event, ensure_ascii=False, separators=(',', ':'))
-                    f.write(log_line + '\n')
-            logger.debug(f"{len(events)}개 이벤트를 {log_file}에 기록했습니다")
-        except Exception as e:
-            logger.error(f"로그 파일 쓰기 오류 {log_file}: {e}")
+    def _hand_off(self, batch):
+        """
+        디코딩한 묶음을 쓰기 큐에 넣기 (가득 차 있으면 기다리지 않고 보류 목록에 둠)
+        
+        Returns:
+            bool: 쓰기 큐에 넣었으면 True, 보류했으면 False (쓰기 단계가 가져갈 때 처리 완료로 셈)
+        """
+        with self._parked_lock:
+            parked = self._parked[batch.stream_name]
+            if not parked:
+                try:
+                    self.write_queues[batch.stream_name].put_nowait(batch)
+                    return True
+                except queue.Full:
+                    pass
+            parked.append(batch)
+            return False
     
-    def _process_stream_records(self, stream_name, records):
-        """스트림 레코드 처리"""
-        if not records:
-            return
+    def _next_write_batch(self, stream_name, write_queue):
+        """보류된 묶음을 먼저, 없으면 쓰기 큐에서 다음 묶음 (queue.Empty는 호출 측에서 처리)"""
+        with self._parked_lock:
+            batch = self._parked[stream_name].popleft() if self._parked[stream_name] else None
+        if batch is not None:
+            self._batch_decoded()
+            return batch
+        return write_queue.get(timeout=min(WRITER_FLUSH_INTERVAL, 1))
+    
+    def _write_batch(self, stream_name, writer, batch):
+        """
+        묶음 하나를 로그 파일 버퍼에 추가 (거부되면 flush가 성공할 때까지 재시도)
+        
+        중복 제거가 켜져 있으면 이미 기록한 이벤트 ID의 줄은 빼고 추가하며,
+        새 ID는 체크포인트와 함께 로그가 실제로 기록된 뒤 필터에 넣습니다.
+        
+        Returns:
+            bool: 버퍼에 추가했으면 True, 종료 중 재시도를 포기했으면 False
+        """
+        lines, new_keys = batch.lines, []
+        if self.dedup is not None and batch.lines:
+            fresh = self.dedup.reserve(batch.keys)
+            lines = [line for line, is_new in zip(batch.lines, fresh) if is_new]
+            new_keys = [key for key, is_new in zip(batch.keys, fresh) if is_new and key is not None]
+            if len(lines) < len(batch.lines):
+                self.metrics.record_duplicates(stream_name, batch.shard_id, len(batch.lines) - len(lines))
+        
+        if batch.end:
+            on_flushed = batch.on_end
+        else:
+            # 체크포인트(및 중복 제거 필터)는 로그 파일에 실제로 기록된 뒤 갱신
+            # (필터에 먼저 넣어야 체크포인트 저장 전 저널 동기화에 이 ID들이 포함됨)
+            def on_flushed(shard_id=batch.shard_id, sequence_number=batch.sequence_number, keys=new_keys):
+                if keys:
+                    self.dedup.commit(keys)
+                self.checkpoints.update(stream_name, shard_id, sequence_number)
+        
+        started = time.time()
+        attempt = 0
+        while not writer.write(lines, on_flushed):
+            if not self.running and attempt >= 3:
+                # 종료 중 - 체크포인트를 남기지 않으므로 재시작 후 다시 읽음
+                self.logger.error(f"{stream_name}/{batch.shard_id} 묶음 기록 실패, 종료 중이라 포기")
+                if new_keys:
+                    self.dedup.release(new_keys)
+                return False
+            time.sleep(jittered_backoff(attempt, base=1))
+            attempt += 1
+            writer.flush(force=True)
+        self.stage_stats.observe('write', time.time() - started)
+        self.metrics.record_written(stream_name, batch.shard_id, len(lines))
+        if lines:
+            self.logger.debug(f"{stream_name}에서 {len(lines)}개 이벤트 처리 완료")
+        return True
+    
+    def _run_write_stage(self, stream_name):
+        """
+        쓰기 단계: 로그 파일 하나를 전담하여 쓰기 큐의 묶음을 기록
+        
+        디코딩 스레드가 여러 개라 묶음이 순서 없이 도착할 수 있으므로
+        shard별 순번(seq) 순서대로만 기록합니다 (앞 묶음을 기다리는 묶음은 잠시 보관).
+        종료 중 기록을 포기한 shard는 이후 묶음도 기록/체크포인트하지 않습니다
+        (뒤 묶음의 체크포인트가 버린 레코드를 건너뛰지 않도록).
+        """
+        writer = self.writers[stream_name]
+        write_queue = self.write_queues[stream_name]
+        pending = {}   # shard_id -> {seq: batch}
+        next_seq = {}  # shard_id -> 다음에 기록할 seq
+        abandoned = set()  # 종료 중 기록을 포기한 shard_id
+        while True:
+            try:
+                batch = self._next_write_batch(stream_name, write_queue)
+            except queue.Empty:
+                writer.flush()
+                continue
+            if batch is None:
+                break
+            self.stage_stats.observe('write_wait', time.time() - batch.queued_at)
             
-        config = self.streams_config.get(stream_name)
-        if not config:
-            logger.warning(f"알 수 없는 스트림: {stream_name}")
-            return
+            if batch.shard_id in abandoned:
+                continue
             
-        all_events = []
-        
-        for record in records:
             try:
-                # 서비스별 레코드 처리
-                if 'cloudtrail' in stream_name:
-                    events = self._process_cloudtrail_record(record)
-                elif 'guardduty' in stream_name:
-                    events = self._process_guardduty_record(record)
-                elif 'security-hub' in stream_name:
-                    events = self._process_securityhub_record(record)
-                else:
-                    logger.warning(f"처리할 수 없는 스트림 타입: {stream_name}")
+                waiting = pending.setdefault(batch.shard_id, {})
+                waiting[batch.seq] = batch
+                seq = next_seq.get(batch.shard_id, 0)
+                while seq in waiting:
+                    if not self._write_batch(stream_name, writer, waiting.pop(seq)):
+                        abandoned.add(batch.shard_id)
+                        pending.pop(batch.shard_id, None)
+                        next_seq.pop(batch.shard_id, None)
+                        break
+                    seq += 1
+                if batch.shard_id in abandoned:
                     continue
-                    
-                all_events.extend(events)
-                
+                next_seq[batch.shard_id] = seq
+                if batch.end and not waiting:
+                    pending.pop(batch.shard_id, None)
+                    next_seq.pop(batch.shard_id, None)
+                writer.flush()
             except Exception as e:
-                logger.error(f"레코드 처리 중 오류 ({stream_name}): {e}")
+                self.logger.error(f"{stream_name} 쓰기 단계 오류: {e}")
         
-        if all_events:
-            self._write_to_log_file(config['log_file'], all_events)
-            logger.info(f"{stream_name}에서 {len(all_events)}개 이벤트 처리 완료")
+        # 버퍼에 남은 로그를 기록 (체크포인트 콜백 실행)
+        writer.close()
     
-    def _consume_stream(self, stream_name):
-        """개별 스트림 소비"""
-        logger.info(f"{stream_name} 스트림 소비 시작")
+    def _get_queue_depths(self):
+        return {
+            'decode': {'depth': self.decode_queue.qsize(), 'capacity': self.decode_queue.maxsize},
+            **{f'write:{stream_name}': {'depth': write_queue.qsize(), 'capacity': write_queue.maxsize,
+                                        'parked': len(self._parked[stream_name])}
+               for stream_name, write_queue in self.write_queues.items()}
+        }
+    
+    def get_pipeline_stats(self, reset_peaks=False):
+        """단계 사이 큐 깊이/상한, 단계별 처리 시간, 로그 파일별 쓰기 통계"""
+        return {
+            'queues': self._get_queue_depths(),
+            'stages': self.stage_stats.snapshot(reset=reset_peaks),
+            'writers': {stream_name: writer.get_stats() for stream_name, writer in self.writers.items()}
+        }
+    
+    def get_metrics(self):
+        """
+        지표 엔드포인트 문서 (/metrics.json, /metrics는 같은 값을 Prometheus 형식으로)
+        
+        스트림/shard별 초당 레코드·이벤트 수, 디코딩 실패, MillisBehindLatest, 체크포인트 경과 시간과
+        로그 파일 기록 바이트, 파이프라인 큐 깊이/단계 지연을 담습니다.
+        스트림 단위 지연은 소비 중인 shard 중 최대값, 체크포인트 경과는 가장 최근에 전진한 shard 기준입니다.
+        """
+        now = time.time()
+        writer_stats = {stream_name: writer.get_stats(mark_rate=False) for stream_name, writer in self.writers.items()}
+        shard_metrics, bytes_per_second = self.metrics.snapshot(
+            {stream_name: stats['bytes'] for stream_name, stats in writer_stats.items()}
+        )
+        
+        streams = {}
+        for stream_name, config in self.streams_config.items():
+            active = set(self.shard_iterators.get(stream_name, {}))
+            checkpoints = self.checkpoints.snapshot(stream_name)
+            shards = {}
+            for shard_id in sorted(active | {shard for stream, shard in shard_metrics if stream == stream_name}):
+                entry = shard_metrics.get((stream_name, shard_id), {})
+                checkpoint = checkpoints.get(shard_id) or {}
+                last_fetch_at = entry.get('last_fetch_at')
+                shards[shard_id] = {
+                    'active': shard_id in active,
+                    'closed': bool(checkpoint.get('closed')),
+                    'records_total': entry.get('records', 0),
+                    'events_total': entry.get('events', 0),
+                    'decode_errors_total': entry.get('decode_errors', 0),
+                    'duplicates_suppressed_total': entry.get('duplicates', 0),
+                    'records_per_second': entry.get('records_per_second', 0.0),
+                    'events_per_second': entry.get('events_per_second', 0.0),
+                    'decode_errors_per_second': entry.get('decode_errors_per_second', 0.0),
+                    'millis_behind_latest': entry.get('millis_behind_latest'),
+                    'last_fetch_age_seconds': round(now - last_fetch_at, 1) if last_fetch_at else None,
+                    'checkpoint_sequence_number': checkpoint.get('sequence_number'),
+                    'checkpoint_age_seconds': round(now - checkpoint['updated_at'], 1)
+                                              if checkpoint.get('updated_at') else None,
+                }
+            
+            active_shards = [shard for shard in shards.values() if shard['active']]
+            lags = [shard['millis_behind_latest'] for shard in active_shards if shard['millis_behind_latest'] is not None]
+            checkpoint_ages = [shard['checkpoint_age_seconds'] for shard in shards.values()
+                               if shard['checkpoint_age_seconds'] is not None]
+            stats = writer_stats[stream_name]
+            streams[stream_name] = {
+                'log_type': config['service_name'],
+                'log_file': config['log_file'],
+                'active_shards': len(active_shards),
+                'records_per_second': round(sum(shard['records_per_second'] for shard in shards.values()), 2),
+                'events_per_second': round(sum(shard['events_per_second'] for shard in shards.values()), 2),
+                'decode_errors_total': sum(shard['decode_errors_total'] for shard in shards.values()),
+                'decode_errors_per_second': round(sum(shard['decode_errors_per_second'] for shard in shards.values()), 4),
+                'duplicates_suppressed_total': sum(shard['duplicates_suppressed_total'] for shard in shards.values()),
+                'millis_behind_latest': max(lags) if lags else None,
+                'checkpoint_age_seconds': min(checkpoint_ages) if checkpoint_ages else None,
+                'write_bytes_total': stats['bytes'],
+                'write_bytes_per_second': bytes_per_second.get(stream_name, 0.0),
+                'write_errors_total': stats['errors'],
+                'flush_latency_avg_ms': stats['flush_latency_avg_ms'],
+                'output': 'hec' if isinstance(self.writers[stream_name], HecWriter) else 'file',
+                'spill_bytes': stats.get('spill_bytes', 0),
+                'shards': shards,
+            }
+        
+        return {
+            'account_id': self.account_id,
+            'collected_at': now,
+            'uptime_seconds': round(now - self.metrics.started_at, 1),
+            'rate_window_seconds': self.metrics.rate_window,
+            'checkpoint_flush_age_seconds': round(now - self.checkpoints.flushed_at, 1)
+                                            if self.checkpoints.flushed_at else None,
+            'streams': streams,
+            'pipeline': {'queues': self._get_queue_depths(), 'stages': self.stage_stats.snapshot()},
+            'dedup': self.dedup.get_stats() if self.dedup is not None else None,
+        }
+    
+    def flush_state(self, force=False):
+        """
+        체크포인트 저장 (CHECKPOINT_FLUSH_INTERVAL마다 호출), 중복 제거 필터는 DEDUP_SAVE_INTERVAL마다
         
-        # 스트림의 모든 shard 가져오기
-        shards = self._get_stream_shards(stream_name)
-        if not shards:
-            logger.warning(f"{stream_name} 스트림에 shard가 없습니다")
+        체크포인트 파일을 쓰기 직전에 중복 제거 저널을 동기화하므로, 저장된 체크포인트까지 기록한 이벤트의 ID는
+        모두 디스크에 있음 (비정상 종료 후 체크포인트부터 다시 읽은 이벤트도 중복으로 걸러짐)
+        """
+        if self.dedup is None:
+            self.checkpoints.flush()
             return
+        self.checkpoints.flush(before_write=self.dedup.sync_journal)
+        self.dedup.save(force=force)
+    
+    def _run_state_flusher(self):
+        while not self._stop_event.wait(CHECKPOINT_FLUSH_INTERVAL):
+            self.flush_state()
+    
+    def collect_metrics(self, account_id=None):
+        """지표 서버 제공자 인터페이스 (단일 계정 모드에서는 이 계정 문서 하나)"""
+        if account_id and account_id != self.account_id:
+            return []
+        return [self.get_metrics()]
+    
+    def log_pipeline_stats(self):
+        """큐 깊이, 단계별 지연, 쓰기 통계를 로그에 남김 (STATS_LOG_INTERVAL마다 호출)"""
+        stats = self.get_pipeline_stats(reset_peaks=True)
+        queues = ', '.join(f"{name} {queue_stats['depth']}/{queue_stats['capacity']}"
+                           for name, queue_stats in stats['queues'].items())
+        stages = ', '.join(f"{stage} 평균 {stage_stats['avg_ms']}ms / 최대 {stage_stats['max_ms']}ms"
+                           for stage, stage_stats in stats['stages'].items()
+                           if stage_stats['count'])
+        self.logger.info(f"파이프라인 큐: {queues}")
+        if stages:
+            self.logger.info(f"단계 지연: {stages}")
+        if self.dedup is not None:
+            dedup = self.dedup.get_stats()
+            self.logger.info(f"중복 제거: {dedup['suppressed']}/{dedup['checked']}건, 세대 {dedup['generations']}개 "
+                             f"({dedup['covered_seconds']:.0f}초, 현재 {dedup['current_fill'] * 100:.1f}%), "
+                             f"메모리 {dedup['memory_bytes']}B, 조기 교체 {dedup['early_rotations']}")
+        for writer_stats in stats['writers'].values():
+            self.logger.info(
+                f"쓰기 통계 {writer_stats['path']}: {writer_stats['bytes_per_second']} B/s, "
+                f"flush 평균 {writer_stats['flush_latency_avg_ms']}ms / 최대 {writer_stats['flush_latency_max_ms']}ms, "
+                f"버퍼 {writer_stats['buffered_bytes']}B, 재오픈 {writer_stats['reopens']}, 오류 {writer_stats['errors']}"
+                + (f", spill {writer_stats['spill_files']}개 {writer_stats['spill_bytes']}B "
+                   f"(재전송 {writer_stats['replayed']}, 거부 {writer_stats['rejected']})"
+                   if 'spill_bytes' in writer_stats else '')
+            )
+    
+    def _run_stats_logger(self):
+        while not self._stop_event.wait(STATS_LOG_INTERVAL):
+            self.log_pipeline_stats()
+    
+    def _select_shards_to_start(self, stream_name, shards, first_discovery):
+        """
+        새로 시작할 shard와 시작 위치 결정
         
-        # 각 shard에 대한 iterator 초기화
-        for shard in shards:
+        - 이미 읽는 중이거나 끝까지 읽은 shard는 제외
+        - 부모 shard(ParentShardId, AdjacentParentShardId)가 목록에 있고 아직 다 읽지 않았으면
+          순서 보장을 위해 부모가 끝날 때까지 대기
+        - 체크포인트가 있으면 이어 읽고, 리샤딩으로 생긴 자식 shard는 처음부터(TRIM_HORIZON)
+        - 체크포인트 없이 처음 시작할 때는 기존처럼 열린 shard를 최신 데이터부터(LATEST),
+          이미 닫힌 shard는 읽지 않고 끝난 것으로 기록
+        - 체크포인트가 생기기 전에 멈춘 shard는 처음 정한 위치 유형(LATEST 등)을 그대로 사용
+        
+        Returns:
+            list: [(shard_id, 시작 위치 유형)]
+        """
+        known = {shard['ShardId'] for shard in shards}
+        running = self.shard_iterators.get(stream_name, {})
+        selected = []
+        skipped = set()
+        
+        # 부모가 자식보다 먼저 판단되도록 시작 시퀀스 번호 순으로 처리
+        ordered = sorted(shards, key=lambda shard: int(shard.get('SequenceNumberRange', {}).get('StartingSequenceNumber', 0)))
+        for shard in ordered:
             shard_id = shard['ShardId']
-            iterator = self._get_initial_shard_iterator(stream_name, shard_id)
-            if iterator:
-                if stream_name not in self.shard_iterators:
-                    self.shard_iterators[stream_name] = {}
-                self.shard_iterators[stream_name][shard_id] = iterator
+            if shard_id in running or self.checkpoints.is_closed(stream_name, shard_id):
+                continue
+            
+            parents = [parent for parent in (shard.get('ParentShardId'), shard.get('AdjacentParentShardId'))
+                       if parent and parent in known]
+            if any(not self.checkpoints.is_closed(stream_name, parent) for parent in parents):
+                continue
+            
+            checkpoint = self.checkpoints.get(stream_name, shard_id)
+            parents_consumed = any(parent not in skipped for parent in parents)
+            start_type = self._shard_start_types.get((stream_name, shard_id))
+            if start_type and not (checkpoint and checkpoint.get('sequence_number')):
+                # 체크포인트 전에 멈춘 소비 스레드는 처음 정한 위치 유형으로 다시 시작
+                selected.append((shard_id, start_type))
+            elif (checkpoint and checkpoint.get('sequence_number')) or parents_consumed or not first_discovery:
+                selected.append((shard_id, 'TRIM_HORIZON'))
+            elif 'EndingSequenceNumber' in shard.get('SequenceNumberRange', {}):
+                self.checkpoints.mark_closed(stream_name, shard_id)
+                skipped.add(shard_id)
+            else:
+                selected.append((shard_id, 'LATEST'))
         
-        # 스트림 데이터 읽기 루프
-        while self.running:
-            try:
-                if stream_name not in self.shard_iterators:
-                    logger.warning(f"{stream_name}에 대한 shard iterator가 없습니다")
-                    time.sleep(10)
-                    continue
-                
-                for shard_id, iterator in list(self.shard_iterators[stream_name].items()):
+        return selected
+    
+    def _next_poll_delay(self, records, millis_behind, idle_delay):
+        """
+        다음 GetRecords까지 대기 시간 (적응형 폴링)
+        
+        - 뒤처져 있으면(MillisBehindLatest > CAUGHT_UP_MILLIS) 최소 간격으로 연속 읽기
+        - 따라잡았고 새 레코드가 없으면 MAX_IDLE_POLL_INTERVAL까지 간격을 두 배씩 늘림
+        
+        Returns:
+            tuple: (이번 대기 시간, 다음 유휴 대기 시간)
+        """
+        if millis_behind > CAUGHT_UP_MILLIS:
+            return MIN_POLL_INTERVAL, MIN_POLL_INTERVAL
+        if records:
+            return MIN_POLL_INTERVAL, MIN_POLL_INTERVAL * 2
+        return idle_delay, min(MAX_IDLE_POLL_INTERVAL, idle_delay * 2)
+    
+    def _consume_shard(self, stream_name, shard_id, default_type, shard_done):
+        """
+        shard 하나 수신 (shard가 닫힐 때까지 또는 종료 시까지)
+        
+        받은 레코드 묶음은 디코딩 큐에 넣기만 하고 바로 다음 GetRecords로 넘어갑니다.
+        큐가 가득 차면(디코딩/쓰기가 밀리면) 자리가 날 때까지 수신을 멈춥니다.
+        """
+        # shard별 묶음 순번과 받은 위치는 소비 스레드가 다시 시작되어도 이어 감 (쓰기 단계의 순서 맞춤 기준)
+        seq_key = (stream_name, shard_id)
+        self._shard_start_types.setdefault(seq_key, default_type)
+        last_fetched = self._resume_points.pop(seq_key, None)
+        iterator = self._acquire_shard_iterator(stream_name, shard_id, default_type, resume_after=last_fetched)
+        self.shard_iterators[stream_name][shard_id] = iterator
+        self.logger.info(f"{stream_name}의 {shard_id} shard 소비 시작 ({default_type})")
+        
+        ended = False
+        idle_delay = MIN_POLL_INTERVAL
+        error_attempt = 0
+        try:
+            while self.running and iterator:
+                try:
+                    started = time.time()
+                    response = self.kinesis_client.get_records(
+                        ShardIterator=iterator,
+                        Limit=GET_RECORDS_LIMIT
+                    )
+                    self.stage_stats.observe('fetch', time.time() - started)
+                    error_attempt = 0
+                    
+                    records = response.get('Records', [])
+                    self.metrics.record_fetch(stream_name, shard_id, len(records),
+                                              response.get('MillisBehindLatest', 0))
+                    if records:
+                        last_fetched = records[-1]['SequenceNumber']
+                        batch = RecordBatch(self, stream_name, shard_id, self._batch_seqs.get(seq_key, 0),
+                                            payloads=[record['Data'] for record in records],
+                                            sequence_number=last_fetched)
+                        if not self._enqueue_decode(batch):
+                            break
+                        self._batch_seqs[seq_key] = batch.seq + 1
+                    
+                    # 다음 iterator 업데이트
+                    iterator = response.get('NextShardIterator')
                     if not iterator:
-                        continue
-                        
-                    try:
-                        response = self.kinesis_client.get_records(
-                            ShardIterator=iterator,
-                            Limit=100  # 한 번에 처리할 레코드 수
-                        )
-                        
-                        records = response.get('Records', [])
-                        if records:
-                            self._process_stream_records(stream_name, records)
+                        # Shard가 닫힌 경우 - 앞선 묶음이 모두 기록된 뒤 끝까지 읽었음을 기록하여 자식 shard 소비를 시작
+                        # (그때까지는 소비 중으로 남겨 shard 재조회 시 다시 시작하지 않음)
+                        self.logger.info(f"{stream_name}의 {shard_id} shard가 닫혔습니다")
                         
-                        # 다음 iterator 업데이트
-                        next_iterator = response.get('NextShardIterator')
-                        if next_iterator:
-                            self.shard_iterators[stream_name][shard_id] = next_iterator
-                        else:
-                            # Shard가 닫힌 경우
-                            logger.info(f"{stream_name}의 {shard_id} shard가 닫혔습니다")
-                            del self.shard_iterators[stream_name][shard_id]
-                        
-                    except Exception as e:
-                        logger.error(f"{stream_name}의 {shard_id} 처리 중 오류: {e}")
-                        time.sleep(5)
-                
-                time.sleep(1)  # 1초 대기
+                        def on_shard_end():
+                            self.checkpoints.mark_closed(stream_name, shard_id)
+                            self.shard_iterators[stream_name].pop(shard_id, None)
+                            self._batch_seqs.pop(seq_key, None)
+                            self._shard_start_types.pop(seq_key, None)
+                            shard_done.set()
+                        ended = self._enqueue_decode(RecordBatch(
+                            self, stream_name, shard_id, self._batch_seqs.get(seq_key, 0), end=True, on_end=on_shard_end))
+                        break
+                    self.shard_iterators[stream_name][shard_id] = iterator
+                    
+                    delay, idle_delay = self._next_poll_delay(
+                        records, response.get('MillisBehindLatest', 0), idle_delay
+                    )
+                    
+                except self.kinesis_client.exceptions.ExpiredIteratorException:
+                    # iterator 유효 시간(5분) 초과 (큐가 오래 가득 찼던 경우 등)
+                    # 이미 큐에 넣은 레코드를 다시 받지 않도록 마지막으로 받은 레코드 다음부터 재획득
+                    self.logger.warning(f"{stream_name}의 {shard_id} iterator 만료, 재획득")
+                    iterator = self._acquire_shard_iterator(stream_name, shard_id, default_type,
+                                                            resume_after=last_fetched)
+                    delay = MIN_POLL_INTERVAL
+                except self.kinesis_client.exceptions.ProvisionedThroughputExceededException:
+                    # 이 shard만 지터를 둔 지수 백오프 (다른 shard는 계속 읽음)
+                    delay = jittered_backoff(error_attempt)
+                    error_attempt += 1
+                    self.logger.warning(f"{stream_name}의 {shard_id} 처리량 초과, {delay:.1f}초 후 재시도")
+                except Exception as e:
+                    delay = jittered_backoff(error_attempt, base=1)
+                    error_attempt += 1
+                    self.logger.error(f"{stream_name}의 {shard_id} 처리 중 오류 ({delay:.1f}초 후 재시도): {e}")
                 
-            except Exception as e:
-                logger.error(f"{stream_name} 스트림 소비 중 오류: {e}")
+                self._stop_event.wait(delay)
+        finally:
+            if not ended:
+                if last_fetched:
+                    self._resume_points[seq_key] = last_fetched
+                self.shard_iterators[stream_name].pop(shard_id, None)
+                shard_done.set()
+    
+    def _consume_stream(self, stream_name):
+        """
+        개별 스트림 소비 (shard 코디네이터)
+        
+        열린 shard마다 소비 스레드를 하나씩 두고, SHARD_DISCOVERY_INTERVAL마다 또는
+        shard 하나가 닫힐 때마다 shard 목록을 다시 조회하여 리샤딩으로 생긴 자식 shard를 이어 받습니다.
+        """
+        self.logger.info(f"{stream_name} 스트림 소비 시작")
+        self.shard_iterators.setdefault(stream_name, {})
+        shard_done = threading.Event()
+        self._wakeups.append(shard_done)
+        consumers = []
+        first_discovery = True
+        
+        while self.running:
+            shards = self._get_stream_shards(stream_name)
+            if shards is None:
                 time.sleep(10)
+                continue
+            if not shards:
+                self.logger.warning(f"{stream_name} 스트림에 shard가 없습니다")
+            
+            for shard_id, default_type in self._select_shards_to_start(stream_name, shards, first_discovery):
+                self.shard_iterators[stream_name][shard_id] = None
+                consumer = threading.Thread(
+                    target=self._consume_shard,
+                    args=(stream_name, shard_id, default_type, shard_done),
+                    name=f"{stream_name}-{shard_id}",
+                    daemon=True
+                )
+                consumer.start()
+                consumers.append(consumer)
+            consumers = [consumer for consumer in consumers if consumer.is_alive()]
+            
+            self.checkpoints.prune(stream_name, {shard['ShardId'] for shard in shards})
+            first_discovery = False
+            
+            # 주기적으로, 또는 shard가 닫히면 바로 다시 조회
+            shard_done.wait(SHARD_DISCOVERY_INTERVAL)
+            shard_done.clear()
+        
+        # 수신 중인 shard 스레드 종료 대기 (큐에 넣은 묶음은 디코딩/쓰기 단계가 마저 처리)
+        for consumer in consumers:
+            consumer.join(timeout=30)
+        self.logger.info(f"{stream_name} 스트림 소비 종료")
     
     def start_forwarding(self):
-        """모든 스트림에 대한 포워딩 시작"""
-        logger.info("Kinesis Splunk Forwarder 시작")
+        """
+        모든 스트림에 대한 포워딩 시작 (종료될 때까지 반환하지 않음)
+        
+        단일 계정 모드에서는 디코딩 단계, 체크포인트 저장/통계 로그 스레드, 지표 서버도 여기서 띄웁니다.
+        """
+        self.logger.info("Kinesis Splunk Forwarder 시작")
+        
+        metrics_server = None
+        if self.standalone:
+            # 체크포인트/중복 제거 필터 주기 저장, 큐 깊이/단계 지연 주기 기록
+            threading.Thread(target=self._run_state_flusher, name='state-flusher', daemon=True).start()
+            threading.Thread(target=self._run_stats_logger, name='pipeline-stats', daemon=True).start()
+            self.decode_stage.start()
+            
+            metrics_server = MetricsServer(self)
+            if metrics_server.start():
+                metrics_server.advertise(self.account_id, self.metrics_endpoint_file)
+        
+        # 로그 파일별 쓰기 단계
+        writers = [threading.Thread(target=self._run_write_stage, args=(stream_name,),
+                                    name=f'write-{self.account_id}-{stream_name}', daemon=True)
+                   for stream_name in self.streams_config]
+        for thread in writers:
+            thread.start()
+        self.logger.info(f"파이프라인 시작: 로그 파일 {len(writers)}개 (쓰기 큐 {WRITE_QUEUE_SIZE})")
         
         # 각 스트림에 대해 별도 스레드로 실행
         with ThreadPoolExecutor(max_workers=len(self.streams_config)) as executor:
@@ -342,19 +2222,249 @@ class KinesisSplunkForwarder:
                 for future in futures:
                     future.result()
             except KeyboardInterrupt:
-                logger.info("종료 신호 받음")
-                self.running = False
+                self.logger.info("종료 신호 받음")
+                self.stop()
             except Exception as e:
-                logger.error(f"포워딩 중 오류: {e}")
-                self.running = False
+                self.logger.error(f"포워딩 중 오류: {e}")
+                self.stop()
+            finally:
+                # 수신이 끝난 뒤 큐에 남은 묶음을 앞 단계부터 차례로 비움
+                # (공유 디코딩 단계는 계속 돌므로 이 계정 묶음이 모두 넘어갈 때까지만 대기,
+                #  쓰기 단계는 종료하며 버퍼를 기록하고 체크포인트 콜백 실행)
+                self._wait_decoded()
+                if self.standalone:
+                    self.decode_stage.stop()
+                for write_queue in self.write_queues.values():
+                    write_queue.put(None)
+                for thread in writers:
+                    thread.join(timeout=60)
+                self.flush_state(force=True)
+                if metrics_server is not None:
+                    metrics_server.stop()
     
     def stop(self):
         """포워딩 중지"""
-        logger.info("Kinesis Splunk Forwarder 중지")
+        self.logger.info("Kinesis Splunk Forwarder 중지")
         self.running = False
+        self._stop_event.set()
+        for wakeup in self._wakeups:
+            wakeup.set()
+        self.flush_state()
+
+
+# 통합 모드 - 설정하면 계정별 서비스 대신 한 프로세스가 계정 목록 파일의 모든 계정을 포워딩
+ACCOUNTS_MANIFEST = os.getenv('ACCOUNTS_MANIFEST')
+MANIFEST_RELOAD_INTERVAL = float(os.getenv('MANIFEST_RELOAD_INTERVAL', '30'))  # 계정 목록 파일 변경 확인 주기 (초)
+ACCOUNT_STOP_TIMEOUT = float(os.getenv('ACCOUNT_STOP_TIMEOUT', '120'))  # 계정 하나를 멈출 때 최대 대기 (초)
+
+_MANIFEST_ACCOUNT_KEYS = ('account_id', 'region', 'auth_mode', 'role_arn', 'external_id',
+                          'access_key_id', 'secret_access_key')
+
+
+def load_accounts_manifest(path):
+    """
+    계정 목록 파일 읽기
+    
+    형식: {"accounts": [{"account_id", "region", "auth_mode", "role_arn", "external_id",
+                          "access_key_id", "secret_access_key", "enabled"}]}
+    
+    Returns:
+        dict: {계정 ID: 계정 설정} (enabled가 false이거나 필수 값이 빠진 항목은 제외)
+    
+    Raises:
+        OSError, ValueError: 파일을 읽을 수 없거나 형식이 잘못된 경우
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get('accounts', []), list):
+        raise ValueError("accounts 목록이 없습니다")
+    
+    accounts = {}
+    for entry in data.get('accounts', []):
+        if not isinstance(entry, dict) or not entry.get('enabled', True):
+            continue
+        account = {key: entry.get(key) for key in _MANIFEST_ACCOUNT_KEYS}
+        account['account_id'] = str(account['account_id'] or '').strip()
+        if not account['account_id'] or not account['region']:
+            logger.warning(f"계정 목록 항목 건너뜀 (account_id/region 없음): {account['account_id'] or '-'}")
+            continue
+        if account['auth_mode'] == 'accesskey' and not (account['access_key_id'] and account['secret_access_key']):
+            logger.warning(f"계정 목록 항목 건너뜀 (Access Key 없음): {account['account_id']}")
+            continue
+        if account['account_id'] in accounts:
+            logger.warning(f"계정 목록에 중복된 계정, 마지막 항목 사용: {account['account_id']}")
+        accounts[account['account_id']] = account
+    return accounts
+
+
+class MultiAccountForwarder:
+    """
+    통합 모드 - 한 프로세스에서 여러 계정 포워딩
+    
+    계정마다 KinesisSplunkForwarder(스트림/shard 스레드, 쓰기 단계, 체크포인트)를 두고
+    디코딩 단계(프로세스 풀), 지표 서버, 체크포인트 저장/통계 로그 스레드는 모든 계정이 공유합니다.
+    계정 목록 파일이 바뀌거나 SIGHUP을 받으면 프로세스를 재시작하지 않고 계정을 추가/제외/재시작합니다.
+    """
+    
+    def __init__(self, manifest_path):
+        self.manifest_path = manifest_path
+        self.decode_stage = DecodeStage()
+        self.metrics_server = MetricsServer(self)
+        self._accounts = {}  # 계정 ID → {'account', 'forwarder', 'thread'}
+        self._lock = threading.Lock()
+        self._desired = {}
+        self._manifest_mtime = None
+        self._reload_event = threading.Event()
+        self._stop_event = threading.Event()
+    
+    def _forwarders(self, account_id=None):
+        with self._lock:
+            return [entry['forwarder'] for key, entry in sorted(self._accounts.items())
+                    if account_id in (None, key)]
+    
+    def collect_metrics(self, account_id=None):
+        """지표 서버 제공자 인터페이스 (계정별 get_metrics() 문서 목록)"""
+        return [forwarder.get_metrics() for forwarder in self._forwarders(account_id)]
+    
+    def request_reload(self):
+        """계정 목록 파일을 바로 다시 읽도록 요청 (SIGHUP, systemctl reload)"""
+        self._manifest_mtime = None
+        self._reload_event.set()
+    
+    def _run_account(self, forwarder):
+        try:
+            forwarder.start_forwarding()
+        except Exception as e:
+            forwarder.logger.error(f"포워딩 중단: {e}")
+    
+    def _start_account(self, account):
+        account_id = account['account_id']
+        try:
+            forwarder = KinesisSplunkForwarder(account=account, decode_stage=self.decode_stage)
+        except Exception as e:
+            logger.error(f"[{account_id}] 포워더 생성 실패 (다음 확인 때 재시도): {e}")
+            return
+        thread = threading.Thread(target=self._run_account, args=(forwarder,),
+                                  name=f'account-{account_id}', daemon=True)
+        with self._lock:
+            self._accounts[account_id] = {'account': account, 'forwarder': forwarder, 'thread': thread}
+        thread.start()
+        self.metrics_server.advertise(account_id, forwarder.metrics_endpoint_file)
+    
+    def _stop_accounts(self, account_ids):
+        """계정 포워딩 중지 (모두 중지 신호를 보낸 뒤 함께 대기 - 남은 묶음 기록, 체크포인트 저장)"""
+        with self._lock:
+            entries = [self._accounts.pop(account_id) for account_id in account_ids if account_id in self._accounts]
+        for entry in entries:
+            self.metrics_server.withdraw(entry['forwarder'].metrics_endpoint_file)
+            entry['forwarder'].stop()
+        for entry in entries:
+            entry['thread'].join(timeout=ACCOUNT_STOP_TIMEOUT)
+            if entry['thread'].is_alive():
+                entry['forwarder'].logger.warning(f"{ACCOUNT_STOP_TIMEOUT:.0f}초 안에 멈추지 않음")
+    
+    def _reconcile(self):
+        """계정 목록 파일이 바뀌었으면 다시 읽고, 실행 중인 계정을 목록에 맞춤"""
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime
+        except OSError as e:
+            logger.error(f"계정 목록 파일을 확인할 수 없습니다 (기존 계정 유지): {e}")
+            return
+        if mtime != self._manifest_mtime:
+            self._manifest_mtime = mtime
+            try:
+                self._desired = load_accounts_manifest(self.manifest_path)
+            except (OSError, ValueError) as e:
+                logger.error(f"계정 목록 파일 읽기 실패 (기존 계정 유지): {e}")
+                return
+            logger.info(f"계정 목록 로드: {len(self._desired)}개 계정 ({self.manifest_path})")
+        
+        with self._lock:
+            running = dict(self._accounts)
+        
+        # 목록에서 빠진 계정, 설정이 바뀌었거나 포워딩이 중단된 계정은 멈춘 뒤 다시 시작
+        restart = []
+        for account_id, entry in running.items():
+            account = self._desired.get(account_id)
+            if account is None:
+                logger.info(f"[{account_id}] 계정 목록에서 제외되어 중지")
+            elif account != entry['account']:
+                logger.info(f"[{account_id}] 계정 설정이 바뀌어 재시작")
+            elif not entry['thread'].is_alive():
+                logger.warning(f"[{account_id}] 포워딩이 중단되어 재시작")
+            else:
+                continue
+            restart.append(account_id)
+        self._stop_accounts(restart)
+        
+        for account_id, account in self._desired.items():
+            if account_id not in running or account_id in restart:
+                logger.info(f"[{account_id}] 포워딩 시작 ({account['region']})")
+                self._start_account(account)
+    
+    def _run_housekeeping(self):
+        """모든 계정의 체크포인트/중복 제거 필터 주기 저장 및 파이프라인 통계 로그 (계정마다 스레드를 두지 않음)"""
+        last_stats = time.time()
+        while not self._stop_event.wait(CHECKPOINT_FLUSH_INTERVAL):
+            forwarders = self._forwarders()
+            for forwarder in forwarders:
+                forwarder.flush_state()
+            if time.time() - last_stats < STATS_LOG_INTERVAL:
+                continue
+            last_stats = time.time()
+            logger.info(f"통합 모드: 계정 {len(forwarders)}개, 디코딩 큐 "
+                        f"{self.decode_stage.queue.qsize()}/{self.decode_stage.queue.maxsize}")
+            for forwarder in forwarders:
+                try:
+                    forwarder.log_pipeline_stats()
+                except Exception as e:
+                    forwarder.logger.error(f"파이프라인 통계 기록 실패: {e}")
+    
+    def run(self):
+        """stop()이 호출될 때까지 계정 목록을 주기적으로 맞추며 포워딩"""
+        logger.info(f"Kinesis Splunk Forwarder 통합 모드 시작 (계정 목록 {self.manifest_path})")
+        self.decode_stage.start()
+        self.metrics_server.start()
+        threading.Thread(target=self._run_housekeeping, name='housekeeping', daemon=True).start()
+        try:
+            while not self._stop_event.is_set():
+                self._reconcile()
+                self._reload_event.wait(MANIFEST_RELOAD_INTERVAL)
+                self._reload_event.clear()
+        finally:
+            with self._lock:
+                account_ids = list(self._accounts)
+            self._stop_accounts(account_ids)
+            self.decode_stage.stop()
+            self.metrics_server.stop()
+    
+    def stop(self):
+        """모든 계정 포워딩 중지"""
+        logger.info("Kinesis Splunk Forwarder 통합 모드 중지")
+        self._stop_event.set()
+        self._reload_event.set()
+
 
 def main():
     """메인 함수"""
+    if OUTPUT_SINK == 'hec' and not (HEC_URL and HEC_TOKEN):
+        logger.error("HEC 출력 모드이지만 HEC_URL 또는 HEC_TOKEN이 설정되지 않았습니다")
+        return
+    
+    # 통합 모드 (계정 목록 파일)
+    if ACCOUNTS_MANIFEST:
+        forwarder = MultiAccountForwarder(ACCOUNTS_MANIFEST)
+        # SIGTERM: 모든 계정 중지 후 종료, SIGHUP(systemctl reload): 계정 목록 다시 읽기
+        signal.signal(signal.SIGTERM, lambda signum, frame: forwarder.stop())
+        signal.signal(signal.SIGHUP, lambda signum, frame: forwarder.request_reload())
+        try:
+            forwarder.run()
+        except Exception as e:
+            logger.error(f"Forwarder 실행 중 오류: {e}")
+        finally:
+            logger.info("Kinesis Splunk Forwarder 종료")
+        return
+    
     # 환경변수 확인
     required_env_vars = ['AWS_DEFAULT_REGION', 'AWS_ACCOUNT_ID']
     for var in required_env_vars:
@@ -370,6 +2480,8 @@ def main():
     
     try:
         forwarder = KinesisSplunkForwarder()
+        # systemctl stop/restart(SIGTERM) 시 읽기를 멈추고 체크포인트를 저장한 뒤 종료
+        signal.signal(signal.SIGTERM, lambda signum, frame: forwarder.stop())
         forwarder.start_forwarding()
     except Exception as e:
         logger.error(f"Forwarder 실행 중 오류: {e}")
@@ -0,0 +1,116 @@
+"""
+HecWriter 점검 - 로컬 HEC 스텁 서버(hec_stub_server.py)로 전송, spill/재전송, 잠금 동작 확인
+
+실행: python3 -m unittest discover -s SplunkForwarder/tests
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import kinesis_splunk_forwarder as forwarder  # noqa: E402
+from hec_stub_server import HecStubServer  # noqa: E402
+
+
+def make_line(event_id):
+    return json.dumps({'timestamp': '2026-10-19T00:00:00', 'service': 'cloudtrail', 'account_id': '123456789012',
+                       'data': {'eventID': event_id}}, separators=(',', ':'))
+
+
+class HecWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stub = HecStubServer().start()
+        self.spill_dir = tempfile.mkdtemp()
+        self.patches = [mock.patch.object(forwarder, 'HEC_MAX_RETRIES', 0),
+                        mock.patch.object(forwarder, 'HEC_RETRY_INTERVAL', 60)]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.stub.stop()
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def make_writer(self):
+        return forwarder.HecWriter(self.stub.url, self.stub.token, '/var/log/splunk/123456789012/cloudtrail.log',
+                                   'aws:cloudtrail', '123456789012', self.spill_dir)
+
+    def test_delivers_events_over_one_connection(self):
+        writer = self.make_writer()
+        flushed = []
+        for i in range(3):
+            self.assertTrue(writer.write([make_line(f'e{i}')], lambda i=i: flushed.append(i)))
+            writer.flush(force=True)
+        writer.close()
+
+        self.assertEqual(flushed, [0, 1, 2])
+        self.assertEqual([event['event']['data']['eventID'] for event in self.stub.events], ['e0', 'e1', 'e2'])
+        event = self.stub.events[0]
+        self.assertEqual(event['sourcetype'], 'aws:cloudtrail')
+        self.assertEqual(event['fields'], {'account_id': '123456789012'})
+        self.assertIn('time', event)
+        self.assertEqual(self.stub.connections, 1)
+
+    def test_spills_while_unavailable_and_replays(self):
+        writer = self.make_writer()
+        flushed = []
+        self.stub.fail(503, count=1)
+        writer.write([make_line('a')], lambda: flushed.append('a'))
+        writer.flush(force=True)
+
+        # 저장한 뒤에는 체크포인트가 진행되고 묶음은 spill 디렉터리에 남음
+        self.assertEqual(flushed, ['a'])
+        self.assertEqual(writer.get_stats()['spill_files'], 1)
+        self.assertEqual(self.stub.events, [])
+
+        writer._retry_at = 0  # HEC_RETRY_INTERVAL 경과
+        writer.write([make_line('b')])
+        writer.flush(force=True)
+        writer.close()
+        self.assertEqual(sorted(event['event']['data']['eventID'] for event in self.stub.events), ['a', 'b'])
+        self.assertEqual(writer.get_stats()['spill_files'], 0)
+        self.assertEqual(os.listdir(self.spill_dir), [])
+
+    def test_rejected_batch_is_kept_aside(self):
+        writer = self.make_writer()
+        self.stub.fail(400, count=1)
+        writer.write([make_line('bad')])
+        writer.flush(force=True)
+        writer.close()
+
+        self.assertEqual(writer.get_stats()['rejected'], 1)
+        self.assertTrue(all(name.endswith('.rejected') for name in os.listdir(self.spill_dir)))
+
+    def test_stats_do_not_wait_for_slow_post(self):
+        writer = self.make_writer()
+        self.stub.delay = 1.5
+        writer.write([make_line('slow')])
+        sender = threading.Thread(target=writer.flush, kwargs={'force': True})
+        sender.start()
+        time.sleep(0.3)
+
+        started = time.time()
+        stats = writer.get_stats()
+        self.assertLess(time.time() - started, 0.5)
+        self.assertTrue(sender.is_alive())
+        # 전송 중에도 다음 묶음을 받을 수 있음
+        self.assertTrue(writer.write([make_line('next')]))
+        self.assertEqual(stats['posts'], 0)
+
+        sender.join()
+        self.stub.delay = 0
+        writer.close()
+        self.assertEqual(sorted(event['event']['data']['eventID'] for event in self.stub.events), ['next', 'slow'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+"""
+체크포인트/중복 제거 상태 점검 - CheckpointStore 재개와 원자적 저장, DedupFilter 예약/확정/해제와 저널 복구,
+flush_state 저장 순서(저널 fsync → 체크포인트)
+
+실행: python3 -m unittest discover -s SplunkForwarder/tests
+"""
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import kinesis_splunk_forwarder as forwarder  # noqa: E402
+
+
+class CheckpointStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.state_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.state_dir, 'checkpoints.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+
+    def test_resumes_from_saved_checkpoints(self):
+        store = forwarder.CheckpointStore(self.path)
+        store.update('cloudtrail-stream', 'shardId-0', '100')
+        store.mark_closed('cloudtrail-stream', 'shardId-1')
+        store.flush()
+
+        restarted = forwarder.CheckpointStore(self.path)
+        self.assertEqual(restarted.get('cloudtrail-stream', 'shardId-0')['sequence_number'], '100')
+        self.assertTrue(restarted.is_closed('cloudtrail-stream', 'shardId-1'))
+        self.assertIsNone(restarted.get('cloudtrail-stream', 'shardId-2'))
+
+    def test_failed_write_keeps_previous_file(self):
+        store = forwarder.CheckpointStore(self.path)
+        store.update('cloudtrail-stream', 'shardId-0', '100')
+        store.flush()
+
+        store.update('cloudtrail-stream', 'shardId-0', '200')
+        with mock.patch.object(forwarder.os, 'fsync', side_effect=OSError('disk full')):
+            store.flush()
+
+        # 기존 파일은 그대로이고 다음 저장에서 다시 씀
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['shards']['cloudtrail-stream/shardId-0']['sequence_number'], '100')
+        store.flush()
+        self.assertEqual(forwarder.CheckpointStore(self.path).get('cloudtrail-stream', 'shardId-0')['sequence_number'],
+                         '200')
+
+    def test_before_write_false_skips_write(self):
+        store = forwarder.CheckpointStore(self.path)
+        store.update('cloudtrail-stream', 'shardId-0', '100')
+        store.flush(before_write=lambda: False)
+        self.assertFalse(os.path.exists(self.path))
+
+        store.flush(before_write=lambda: True)
+        self.assertTrue(os.path.exists(self.path))
+
+
+class DedupFilterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.state_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.state_dir, 'dedup.bin')
+
+    def tearDown(self):
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+
+    def make_filter(self):
+        return forwarder.DedupFilter(self.path, window=3600, generations=4, capacity=1000, fp_rate=1e-6)
+
+    def test_reserve_commit_release(self):
+        dedup = self.make_filter()
+        self.assertEqual(dedup.reserve(['a', 'a', None, 'b']), [True, False, True, True])
+        # 기록 대기 중인 ID도 중복으로 봄
+        self.assertEqual(dedup.reserve(['a']), [False])
+
+        dedup.commit(['a'])
+        dedup.release(['b'])
+        self.assertEqual(dedup.reserve(['a', 'b']), [False, True])
+
+    def test_journal_replayed_after_restart(self):
+        dedup = self.make_filter()
+        dedup.reserve(['e1', 'e2'])
+        dedup.commit(['e1', 'e2'])
+        self.assertTrue(dedup.sync_journal())
+
+        # 전체 저장 없이 종료된 뒤에도 저널로 복구
+        restarted = self.make_filter()
+        self.assertEqual(restarted.reserve(['e1', 'e2', 'e3']), [False, False, True])
+
+    def test_save_truncates_journal(self):
+        dedup = self.make_filter()
+        dedup.reserve(['e1'])
+        dedup.commit(['e1'])
+        dedup.sync_journal()
+        dedup.save(force=True)
+
+        self.assertEqual(os.path.getsize(dedup.journal_path), 0)
+        self.assertEqual(self.make_filter().reserve(['e1']), [False])
+
+
+class FlushStateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.state_dir = tempfile.mkdtemp()
+        self.fw = forwarder.KinesisSplunkForwarder.__new__(forwarder.KinesisSplunkForwarder)
+        self.fw.logger = logging.getLogger('test')
+        self.fw.checkpoints = forwarder.CheckpointStore(os.path.join(self.state_dir, 'checkpoints.json'))
+        self.fw.dedup = forwarder.DedupFilter(os.path.join(self.state_dir, 'dedup.bin'), capacity=1000)
+
+    def tearDown(self):
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+
+    def record_written(self, keys, sequence_number):
+        """_write_batch의 on_flushed와 같은 순서로 ID 확정 후 체크포인트 갱신"""
+        self.fw.dedup.reserve(keys)
+        self.fw.dedup.commit(keys)
+        self.fw.checkpoints.update('cloudtrail-stream', 'shardId-0', sequence_number)
+
+    def test_journal_synced_before_checkpoint(self):
+        self.record_written(['e1', 'e2'], '100')
+        order = []
+        journaled = []
+        sync_journal = self.fw.dedup.sync_journal
+        replace = os.replace
+
+        def recording_sync():
+            order.append('journal')
+            return sync_journal()
+
+        def recording_replace(src, dst):
+            order.append(os.path.basename(dst))
+            if dst == self.fw.checkpoints.path:
+                # 체크포인트 교체 시점에 저널에 이미 기록되어 있어야 함 (이후 save에서 비워짐)
+                with open(self.fw.dedup.journal_path, 'r', encoding='utf-8') as f:
+                    journaled.extend(json.loads(line)[1] for line in f)
+            return replace(src, dst)
+
+        with mock.patch.object(self.fw.dedup, 'sync_journal', recording_sync), \
+                mock.patch.object(forwarder.os, 'replace', recording_replace):
+            self.fw.flush_state()
+
+        self.assertEqual(order[:2], ['journal', 'checkpoints.json'])
+        self.assertEqual(sorted(journaled), ['e1', 'e2'])
+
+    def test_checkpoint_not_saved_when_journal_fails(self):
+        self.record_written(['e1'], '100')
+        with mock.patch.object(forwarder, 'open', side_effect=OSError('read-only'), create=True):
+            self.fw.flush_state()
+        self.assertFalse(os.path.exists(self.fw.checkpoints.path))
+
+        # 저널이 다시 써지면 체크포인트도 저장
+        self.fw.flush_state()
+        self.assertEqual(forwarder.CheckpointStore(self.fw.checkpoints.path)
+                         .get('cloudtrail-stream', 'shardId-0')['sequence_number'], '100')
+        restarted = forwarder.DedupFilter(self.fw.dedup.path, capacity=1000)
+        self.assertEqual(restarted.reserve(['e1']), [False])
+
+
+if __name__ == '__main__':
+    unittest.main()
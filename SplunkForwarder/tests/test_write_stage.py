@@ -0,0 +1,128 @@
+"""
+쓰기 단계 점검 - shard별 순번(seq) 순서 기록, 체크포인트 진행, 종료 중 포기한 shard 처리
+
+실행: python3 -m unittest discover -s SplunkForwarder/tests
+"""
+import collections
+import logging
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import kinesis_splunk_forwarder as forwarder  # noqa: E402
+
+STREAM = 'cloudtrail-stream'
+
+
+class RecordingWriter:
+    """LogFileWriter 대역 - 받은 줄을 순서대로 보관하고 flush 때 체크포인트 콜백 실행"""
+
+    def __init__(self, reject_shards=()):
+        self.lines = []
+        self.reject_shards = set(reject_shards)
+        self._callbacks = []
+
+    def write(self, lines, on_flushed=None):
+        if any(line.startswith(tuple(self.reject_shards)) for line in lines):
+            return False
+        self.lines.extend(lines)
+        if on_flushed is not None:
+            self._callbacks.append(on_flushed)
+        return True
+
+    def flush(self, force=False):
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def close(self):
+        self.flush(force=True)
+
+
+class WriteStageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.state_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+
+    def make_forwarder(self, writer):
+        fw = forwarder.KinesisSplunkForwarder.__new__(forwarder.KinesisSplunkForwarder)
+        fw.logger = logging.getLogger('test')
+        fw.running = True
+        fw.stage_stats = forwarder.StageStats()
+        fw.metrics = forwarder.ForwarderMetrics()
+        fw.checkpoints = forwarder.CheckpointStore(os.path.join(self.state_dir, 'checkpoints.json'))
+        fw.dedup = forwarder.DedupFilter(os.path.join(self.state_dir, 'dedup.bin'), capacity=1000)
+        fw.writers = {STREAM: writer}
+        fw.write_queues = {STREAM: queue.Queue()}
+        fw._parked = {STREAM: collections.deque()}
+        fw._parked_lock = threading.Lock()
+        fw._in_flight = 0
+        fw._in_flight_cond = threading.Condition()
+        return fw
+
+    def make_batch(self, fw, shard_id, seq):
+        batch = forwarder.RecordBatch(fw, STREAM, shard_id, seq, sequence_number=f'{seq + 1}00')
+        batch.lines = [f'{shard_id}:{seq}']
+        batch.keys = [f'{shard_id}-event-{seq}']
+        return batch
+
+    def run_stage(self, fw, batches):
+        for batch in batches:
+            fw.write_queues[STREAM].put(batch)
+        fw.write_queues[STREAM].put(None)
+        fw._run_write_stage(STREAM)
+
+    def test_batches_written_in_seq_order_per_shard(self):
+        writer = RecordingWriter()
+        fw = self.make_forwarder(writer)
+        checkpoints = []
+        update = fw.checkpoints.update
+
+        def recording_update(stream_name, shard_id, sequence_number):
+            checkpoints.append((shard_id, sequence_number))
+            update(stream_name, shard_id, sequence_number)
+
+        fw.checkpoints.update = recording_update
+        # 디코딩 스레드를 거치며 순서가 뒤섞여 도착
+        self.run_stage(fw, [self.make_batch(fw, 'shard-a', 2), self.make_batch(fw, 'shard-b', 0),
+                            self.make_batch(fw, 'shard-a', 0), self.make_batch(fw, 'shard-a', 1),
+                            self.make_batch(fw, 'shard-b', 1)])
+
+        self.assertEqual([line for line in writer.lines if line.startswith('shard-a')],
+                         ['shard-a:0', 'shard-a:1', 'shard-a:2'])
+        self.assertEqual([line for line in writer.lines if line.startswith('shard-b')], ['shard-b:0', 'shard-b:1'])
+        # 체크포인트는 앞 묶음을 건너뛰지 않고 순서대로 진행
+        self.assertEqual([sequence for shard_id, sequence in checkpoints if shard_id == 'shard-a'],
+                         ['100', '200', '300'])
+        self.assertEqual(fw.checkpoints.get(STREAM, 'shard-b')['sequence_number'], '200')
+
+    def test_abandoned_shard_stops_checkpointing(self):
+        # 첫 묶음만 거부 - 다음 묶음은 기록할 수 있어도 포기한 shard라 건너뛰어야 함
+        writer = RecordingWriter(reject_shards=['shard-a:0'])
+        fw = self.make_forwarder(writer)
+        fw.running = False  # 종료 중 - 재시도 3회 후 포기
+
+        with mock.patch.object(forwarder, 'jittered_backoff', return_value=0), \
+                mock.patch.object(forwarder.time, 'sleep'):
+            self.run_stage(fw, [self.make_batch(fw, 'shard-a', 0), self.make_batch(fw, 'shard-b', 0),
+                                self.make_batch(fw, 'shard-a', 1)])
+
+        self.assertEqual(writer.lines, ['shard-b:0'])
+        self.assertIsNone(fw.checkpoints.get(STREAM, 'shard-a'))
+        self.assertEqual(fw.checkpoints.get(STREAM, 'shard-b')['sequence_number'], '100')
+        # 포기한 묶음의 ID는 예약이 풀려 재시작 후 다시 받으면 기록됨
+        self.assertEqual(fw.dedup.reserve(['shard-a-event-0']), [True])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,14 +2,26 @@
 1.7 루트 계정 사용 체커
 AWS 루트 계정의 사용 현황을 점검합니다.
 """
-import boto3
+import glob
+import json
+import logging
+import os
+import time
 from botocore.exceptions import ClientError
 from datetime import datetime, timezone, timedelta
 from ..base_checker import BaseChecker
+from app.utils.data_store import get_config_value, get_data_path, load_json, save_json_atomic
+
+logger = logging.getLogger(__name__)
 
 class RootAccountUsageChecker(BaseChecker):
     """1.7 루트 계정 사용 체커"""
     
+    # lookup_events 지연 전달(최대 약 15분)을 고려한 증분 조회 겹침 구간
+    CURSOR_OVERLAP = timedelta(minutes=15)
+    # Forwarder 로그는 공백 없는 JSON으로 기록되므로 바이트 검색으로 후보 줄만 파싱
+    ROOT_IDENTITY_MARKER = b'"type":"Root"'
+    
     @property
     def item_code(self):
         return "1.7"
@@ -19,43 +31,45 @@ class RootAccountUsageChecker(BaseChecker):
         return "루트 계정 사용"
     
     def run_diagnosis(self):
-        """진단 실행 - 원본 1.7 로직 그대로 구현"""
+        """진단 실행 - 원본 1.7 로직 + 계정별 증분 커서"""
         try:
-            if self.session:
-                cloudtrail = self.session.client('cloudtrail')
-            else:
-                cloudtrail = self.session.client('cloudtrail')
+            cloudtrail = self.session.client('cloudtrail')
             
             # 원본 로직: 최근 90일 간 Root 계정 활동 내역 조회
             lookback_days = 90
             now = datetime.now(timezone.utc)
             start_time = now - timedelta(days=lookback_days)
             
-            root_events = set()  # 중복 제거를 위해 set 사용
+            account_id = self.get_account_id()
+            cursor = self._load_cursor(account_id)
             
+            # 캐시된 90일 윈도우에서 만료된 이벤트 제거 {eventName: 마지막 발생 시각}
+            root_events = {
+                name: seen_at for name, seen_at in cursor.get('events', {}).items()
+                if (self._parse_time(seen_at) or start_time) >= start_time
+            }
+            last_processed = self._parse_time(cursor.get('last_processed_time'))
+            
+            local_log = self._get_forwarder_log_path(account_id)
             try:
-                # Root 계정이 수행한 이벤트 목록 수집
-                paginator = cloudtrail.get_paginator('lookup_events')
-                pages = paginator.paginate(
-                    LookupAttributes=[
-                        {'AttributeKey': 'Username', 'AttributeValue': 'Root'}
-                    ],
-                    StartTime=start_time,
-                    EndTime=now
-                )
+                data_source = None
+                if last_processed and local_log and self._forwarder_log_covers(local_log, cursor):
+                    # Kinesis Forwarder가 같은 호스트에 기록한 CloudTrail 로그에서 증분만 읽기
+                    if self._read_forwarder_log(local_log, cursor, root_events):
+                        data_source = 'forwarder_log'
                 
-                for page in pages:
-                    for event in page['Events']:
-                        try:
-                            import json
-                            cloudtrail_event = json.loads(event['CloudTrailEvent'])  
-                            user_type = cloudtrail_event.get('userIdentity', {}).get('type', '')
-                            if user_type == 'Root':
-                                event_name = cloudtrail_event.get('eventName')
-                                if event_name:
-                                    root_events.add(event_name)
-                        except Exception:
-                            continue 
+                if data_source is None:
+                    # 커서 이후 구간만 조회 (지연 전달 이벤트를 위해 겹침 구간 포함)
+                    if last_processed:
+                        query_start = max(start_time, last_processed - self.CURSOR_OVERLAP)
+                        data_source = 'cloudtrail_api_incremental'
+                    else:
+                        query_start = start_time
+                        data_source = 'cloudtrail_api'
+                    self._lookup_root_events(cloudtrail, query_start, now, root_events)
+                    if local_log:
+                        # 여기까지는 API로 확인했으므로 다음 실행은 현재 로그 끝부터 이어 읽기
+                        self._mark_forwarder_log_end(local_log, cursor)
                 
             except ClientError as e:
                 return {
@@ -63,6 +77,10 @@ class RootAccountUsageChecker(BaseChecker):
                     'error_message': f'CloudTrail 이벤트 조회 중 오류 발생: {str(e)}'
                 }
             
+            cursor['events'] = root_events
+            cursor['last_processed_time'] = now.isoformat()
+            self._save_cursor(account_id, cursor)
+            
             # 결과 분석 (원본 로직)
             has_issues = len(root_events) > 0  # 이벤트가 있으면 수동 검토 필요
             
@@ -71,8 +89,9 @@ class RootAccountUsageChecker(BaseChecker):
                 'has_issues': has_issues,
                 'risk_level': 'medium' if has_issues else 'low',
                 'lookback_days': lookback_days,
-                'root_events': sorted(list(root_events)),
+                'root_events': sorted(root_events.keys()),
                 'events_count': len(root_events),
+                'data_source': data_source,
                 'recommendation': "[ⓘ MANUAL] 이 항목은 루트 계정이 서비스 용도로 사용되는지 여부를 수동으로 판별해야 합니다."
             }
             
@@ -87,6 +106,172 @@ class RootAccountUsageChecker(BaseChecker):
                 'error_message': f'진단 수행 중 예상치 못한 오류가 발생했습니다: {str(e)}'
             }
     
+    def _lookup_root_events(self, cloudtrail, start_time, end_time, root_events):
+        """lookup_events로 구간 내 Root 이벤트 수집 (초당 2회 제한 API이므로 구간 최소화)"""
+        paginator = cloudtrail.get_paginator('lookup_events')
+        pages = paginator.paginate(
+            LookupAttributes=[
+                {'AttributeKey': 'Username', 'AttributeValue': 'Root'}
+            ],
+            StartTime=start_time,
+            EndTime=end_time
+        )
+        
+        for page in pages:
+            for event in page['Events']:
+                if not self._is_root_identity(event.get('CloudTrailEvent', '')):
+                    continue
+                event_name = event.get('EventName')
+                event_time = event.get('EventTime')
+                if event_name and event_time:
+                    self._merge_event(root_events, event_name, event_time)
+    
+    def _forwarder_log_covers(self, log_path, cursor):
+        """로컬 로그가 마지막 처리 시점 이후 구간을 빠짐없이 담고 있는지 확인
+        
+        직전 실행에서 기록한 로그 위치가 있어야 하고, Forwarder가 중지됐거나 HEC 출력 모드라
+        파일이 더 이상 갱신되지 않는 경우를 걸러내기 위해 최근에 기록된 파일만 사용
+        """
+        if 'log_inode' not in cursor or 'log_offset' not in cursor:
+            return False
+        try:
+            age = time.time() - os.stat(log_path).st_mtime
+        except OSError:
+            return False
+        return age <= get_config_value('FORWARDER_LOG_MAX_AGE', 900)
+    
+    def _mark_forwarder_log_end(self, log_path, cursor):
+        """API로 조회를 마친 시점의 로그 끝 위치를 커서에 기록"""
+        try:
+            stat = os.stat(log_path)
+        except OSError:
+            return
+        cursor['log_offset'] = stat.st_size
+        cursor['log_inode'] = stat.st_ino
+    
+    def _read_forwarder_log(self, log_path, cursor, root_events):
+        """Forwarder 로그 파일에서 마지막 오프셋 이후 추가된 줄만 처리
+        
+        로테이션 전 파일을 찾지 못했거나 파일이 잘린 경우처럼 놓친 구간이 생기면 False 반환
+        (호출 측에서 lookup_events로 대신 조회)
+        """
+        stat = os.stat(log_path)
+        offset = cursor.get('log_offset', 0)
+        
+        if cursor.get('log_inode') != stat.st_ino:
+            # 로그 로테이션: 이전 파일의 남은 부분을 먼저 읽고 새 파일은 처음부터
+            rotated_path = self._find_rotated_log(log_path, cursor.get('log_inode'))
+            if rotated_path is None:
+                logger.info(f"로테이션된 Forwarder 로그를 찾지 못해 API로 조회: {log_path}")
+                return False
+            self._scan_log(rotated_path, offset, root_events, final=True)
+            offset = 0
+        elif stat.st_size < offset:
+            logger.info(f"Forwarder 로그가 잘려 API로 조회: {log_path}")
+            return False
+        
+        cursor['log_offset'] = self._scan_log(log_path, offset, root_events)
+        cursor['log_inode'] = stat.st_ino
+        return True
+    
+    @staticmethod
+    def _find_rotated_log(log_path, inode):
+        """cloudtrail.log.* 중 inode가 같은 로테이션 파일 경로 반환 (압축본은 제외)"""
+        if inode is None:
+            return None
+        for candidate in glob.glob(glob.escape(log_path) + '.*'):
+            if candidate.endswith('.gz'):
+                continue
+            try:
+                if os.stat(candidate).st_ino == inode:
+                    return candidate
+            except OSError:
+                continue
+        return None
+    
+    def _scan_log(self, log_path, offset, root_events, final=False):
+        """offset부터 줄 단위로 Root 이벤트를 수집하고 처리한 위치를 반환"""
+        with open(log_path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n') and not final:
+                    break  # 기록 중인 마지막 줄은 다음 실행에서 처리
+                offset += len(line)
+                if self.ROOT_IDENTITY_MARKER not in line:
+                    continue
+                try:
+                    cloudtrail_event = json.loads(line).get('data', {})
+                except ValueError:
+                    continue
+                if cloudtrail_event.get('userIdentity', {}).get('type') != 'Root':
+                    continue
+                event_name = cloudtrail_event.get('eventName')
+                event_time = self._parse_time(cloudtrail_event.get('eventTime'))
+                if event_name and event_time:
+                    self._merge_event(root_events, event_name, event_time)
+        return offset
+    
+    def _is_root_identity(self, raw_event):
+        """CloudTrailEvent 문자열이 Root 주체인지 확인 (대부분 json.loads 없이 판별)"""
+        if '"Root"' not in raw_event:
+            return False
+        if '"userIdentity":{"type":"Root"' in raw_event:
+            return True
+        # 필드 순서/공백이 다른 예외적인 경우에만 전체 파싱
+        try:
+            return json.loads(raw_event).get('userIdentity', {}).get('type') == 'Root'
+        except ValueError:
+            return False
+    
+    @staticmethod
+    def _merge_event(root_events, event_name, event_time):
+        """이벤트별 마지막 발생 시각 갱신"""
+        event_time = event_time.astimezone(timezone.utc).isoformat()
+        if event_name not in root_events or root_events[event_name] < event_time:
+            root_events[event_name] = event_time
+    
+    @staticmethod
+    def _parse_time(value):
+        """ISO 8601 문자열을 UTC datetime으로 변환"""
+        if not value:
+            return None
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except (TypeError, ValueError):
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.astimezone(timezone.utc)
+    
+    def _get_cursor_path(self, account_id):
+        return get_data_path('root_activity', f'{account_id}.json')
+    
+    def _load_cursor(self, account_id):
+        """계정별 Root 활동 커서 로드"""
+        if not account_id:
+            return {}
+        return load_json(self._get_cursor_path(account_id), default={}) or {}
+    
+    def _save_cursor(self, account_id, cursor):
+        """계정별 Root 활동 커서 저장"""
+        if not account_id:
+            return
+        try:
+            save_json_atomic(self._get_cursor_path(account_id), cursor)
+        except OSError as e:
+            # 커서 저장 실패 시 다음 실행에서 전체 구간을 다시 조회
+            logger.warning(f"1.7 Root 활동 커서 저장 실패 ({account_id}): {e}")
+    
+    def _get_forwarder_log_path(self, account_id):
+        """같은 호스트에 Kinesis Forwarder CloudTrail 로그가 있으면 경로 반환"""
+        if not account_id:
+            return None
+        log_dir = get_config_value('FORWARDER_LOG_DIR')
+        if not log_dir:
+            return None
+        log_path = os.path.join(log_dir, account_id, 'cloudtrail.log')
+        return log_path if os.path.isfile(log_path) else None
+    
     def _format_result_summary(self, result):
         """결과 요약 포맷팅"""
         events_count = result.get('events_count', 0)
@@ -112,6 +297,10 @@ class RootAccountUsageChecker(BaseChecker):
             'events_found': {
                 'count': result.get('events_count', 0),
                 'description': '발견된 루트 계정 이벤트 수'
+            },
+            'data_source': {
+                'source': result.get('data_source', 'cloudtrail_api'),
+                'description': '조회 방식 (전체 조회 / 커서 이후 증분 조회 / Forwarder 로컬 로그)'
             }
         }
         
@@ -2,9 +2,9 @@
 2.3 기타 서비스 정책 체커
 기타 서비스에 대한 과도한 권한 관리를 점검합니다.
 """
-import boto3
 from botocore.exceptions import ClientError
 from ..base_checker import BaseChecker
+from app.utils.iam_policy_analyzer import IAMPolicyAnalyzer
 
 class OtherServicePolicyChecker(BaseChecker):
     """2.3 기타 서비스 정책 체커"""
@@ -20,11 +20,6 @@ class OtherServicePolicyChecker(BaseChecker):
     def run_diagnosis(self):
         """진단 실행 - 원본 2.3 로직 그대로 구현"""
         try:
-            if self.session:
-                iam = self.session.client('iam')
-            else:
-                iam = self.session.client('iam')
-            
             # 원본 로직: 과도한 권한 정책 목록
             overly_permissive_policies = {
                 "arn:aws:iam::aws:policy/AWSOrganizationsFullAccess": "Organizations",
@@ -47,42 +42,35 @@ class OtherServicePolicyChecker(BaseChecker):
                 "arn:aws:iam::aws:policy/AmazonMSKFullAccess": "MSK",
                 "arn:aws:iam::aws:policy/AWSBackupFullAccess": "Backup",
             }
-            findings = []
+            # 고객 관리형/인라인 정책까지 서비스 전체 권한(<서비스>:*, *) 부여 여부를 점검할 Action 접두어
+            service_prefixes = {
+                "organizations": "Organizations",
+                "cloudwatch": "CloudWatch",
+                "autoscaling": "Auto Scaling",
+                "cloudformation": "CloudFormation",
+                "cloudtrail": "CloudTrail",
+                "config": "Config",
+                "ssm": "Systems Manager",
+                "guardduty": "GuardDuty",
+                "inspector": "Inspector",
+                "sso": "Single Sign-On",
+                "acm": "Certificate Manager",
+                "kms": "KMS",
+                "waf": "WAF",
+                "wafv2": "WAF",
+                "shield": "Shield",
+                "securityhub": "Security Hub",
+                "datapipeline": "Data Pipeline",
+                "glue": "Glue",
+                "kafka": "MSK",
+                "backup": "Backup",
+                "iam": "IAM"
+            }
             
             try:
-                for policy_arn, service_name in overly_permissive_policies.items():
-                    try:
-                        paginator = iam.get_paginator('list_entities_for_policy')
-                        for page in paginator.paginate(PolicyArn=policy_arn):
-                            for user in page.get('PolicyUsers', []):
-                                findings.append({
-                                    'type': 'user', 
-                                    'name': user['UserName'], 
-                                    'policy': policy_arn.split('/')[-1],
-                                    'service': service_name,
-                                    'policy_arn': policy_arn
-                                })
-                            for group in page.get('PolicyGroups', []):
-                                findings.append({
-                                    'type': 'group', 
-                                    'name': group['GroupName'], 
-                                    'policy': policy_arn.split('/')[-1],
-                                    'service': service_name,
-                                    'policy_arn': policy_arn
-                                })
-                            for role in page.get('PolicyRoles', []):
-                                findings.append({
-                                    'type': 'role', 
-                                    'name': role['RoleName'], 
-                                    'policy': policy_arn.split('/')[-1],
-                                    'service': service_name,
-                                    'policy_arn': policy_arn
-                                })
-                    except ClientError as e:
-                        if e.response['Error']['Code'] == 'NoSuchEntity':
-                            continue
-                        else:
-                            raise e
+                # get_account_authorization_details 일괄 조회 후 정책 문서 분석
+                analyzer = IAMPolicyAnalyzer(self.session, self.get_account_id())
+                findings = analyzer.find_overly_permissive(service_prefixes, overly_permissive_policies)
                 
                 # 결과 분석
                 has_issues = len(findings) > 0
@@ -95,6 +83,7 @@ class OtherServicePolicyChecker(BaseChecker):
                     'findings': findings,
                     'findings_count': len(findings),
                     'checked_policies': list(overly_permissive_policies.keys()),
+                    'checked_services': sorted(set(service_prefixes.values())),
                     'recommendation': "기타 주요 서비스에 과도한 권한(FullAccess/PowerUser)이 부여되지 않도록 최소 권한 원칙을 적용하세요."
                 }
                 
@@ -130,12 +119,15 @@ class OtherServicePolicyChecker(BaseChecker):
         if findings:
             details['findings'] = []
             for f in findings:
+                policy_label = '인라인 정책' if f.get('policy_type') == 'inline' else '정책'
                 details['findings'].append({
                     'entity_type': f['type'].capitalize(),
                     'entity_name': f['name'],
                     'policy_name': f['policy'],
+                    'policy_type': f.get('policy_type', 'aws_managed'),
                     'service': f['service'],
-                    'description': f"{f['type'].capitalize()} '{f['name']}'에 '{f['policy']}' 정책 연결됨"
+                    'matched_actions': f.get('matched_actions', []),
+                    'description': f"{f['type'].capitalize()} '{f['name']}'에 '{f['policy']}' {policy_label} 연결됨"
                 })
         
         return details
@@ -191,7 +183,12 @@ class OtherServicePolicyChecker(BaseChecker):
         # CLI 명령어 추가
         cli_commands = []
         for f in findings:
-            policy_arn = f"arn:aws:iam::aws:policy/{f['policy']}"
+            if f.get('policy_type') == 'inline':
+                cli_commands.append(
+                    f"aws iam delete-{f['type']}-policy --{f['type']}-name {f['name']} --policy-name {f['policy']}"
+                )
+                continue
+            policy_arn = f.get('policy_arn') or f"arn:aws:iam::aws:policy/{f['policy']}"
             if f['type'] == 'user':
                 cli_commands.append(f"aws iam detach-user-policy --user-name {f['name']} --policy-arn {policy_arn}")
             elif f['type'] == 'group':
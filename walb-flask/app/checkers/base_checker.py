@@ -7,8 +7,20 @@ from abc import ABC, abstractmethod
 class BaseChecker(ABC):
     """Flask용 진단 항목 베이스 클래스"""
     
+    # 진단 서비스가 등록 계정 정보로 채워주는 계정 ID (없으면 STS로 조회)
+    account_id = None
+    
     def __init__(self, session=None):
         self.session = session
+    
+    def get_account_id(self):
+        """진단 대상 계정 ID 반환 (STS 조회 결과는 인스턴스에 보관)"""
+        if not self.account_id and self.session is not None:
+            try:
+                self.account_id = self.session.client('sts').get_caller_identity()['Account']
+            except Exception:
+                return None
+        return self.account_id
         
     @abstractmethod
     def run_diagnosis(self):
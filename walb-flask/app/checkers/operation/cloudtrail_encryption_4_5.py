@@ -3,10 +3,10 @@
 원본: SHIELDUS-AWS-CHECKER/operation/4_5_cloudtrail_encryption.py
 """
 
-import boto3
 import json
 from botocore.exceptions import ClientError
 from app.checkers.base_checker import BaseChecker
+from app.utils.kms_cache import KmsKeyResolver
 
 
 class CloudtrailEncryptionChecker(BaseChecker):
@@ -30,6 +30,7 @@ class CloudtrailEncryptionChecker(BaseChecker):
         cloudtrail = self.session.client('cloudtrail')
         not_kms_encrypted_trails = []
         trail_details = []
+        kms_resolver = KmsKeyResolver(self.session, self.get_account_id())
 
         try:
             trails = cloudtrail.describe_trails().get('trailList', [])
@@ -53,6 +54,8 @@ class CloudtrailEncryptionChecker(BaseChecker):
                     'kms_key_id': trail.get('KmsKeyId', ''),
                     'is_multi_region': trail.get('IsMultiRegionTrail', False)
                 }
+                if trail.get('KmsKeyId'):
+                    trail_detail.update(kms_resolver.key_summary(trail['KmsKeyId']))
                 trail_details.append(trail_detail)
                 
                 if not trail.get('KmsKeyId'):
@@ -107,68 +110,17 @@ class CloudtrailEncryptionChecker(BaseChecker):
 
         not_kms_encrypted_trails = diagnosis_result['not_kms_encrypted_trails']
         cloudtrail = self.session.client('cloudtrail')
-        kms = self.session.client('kms')
         results = []
         
         print("[FIX] 4.5 CloudTrail SSE-KMS 암호화 조치를 시작합니다.")
 
         try:
-            account_id = self.session.client('sts').get_caller_identity()['Account']
-            region = boto3.session.Session().region_name
             alias_name = "alias/cloudtrail-autokey"
-            key_arn = None
 
-            # 1. 먼저 기존 alias 존재 여부 확인
-            existing_aliases = kms.list_aliases()['Aliases']
-            alias_dict = {a['AliasName']: a['TargetKeyId'] for a in existing_aliases if 'AliasName' in a and 'TargetKeyId' in a}
-
-            if alias_name in alias_dict:
-                print(f"[INFO] KMS 별칭 '{alias_name}'이 이미 존재합니다.")
-                key_id = alias_dict[alias_name]
-                key_arn = f"arn:aws:kms:{region}:{account_id}:key/{key_id}"
-                print(f"[INFO] 기존 키 ARN 사용: {key_arn}")
-            else:
-                # 새 KMS 키 생성
-                print(f"[INFO] 별칭 '{alias_name}'로 새 KMS 키를 생성합니다.")
-                response = kms.create_key(
-                    Description='CloudTrail 암호화를 위한 자동 생성 KMS 키',
-                    KeyUsage='ENCRYPT_DECRYPT',
-                    Origin='AWS_KMS'
-                )
-                key_id = response['KeyMetadata']['KeyId']
-                key_arn = f"arn:aws:kms:{region}:{account_id}:key/{key_id}"
-
-                policy = {
-                    "Version": "2012-10-17",
-                    "Id": "cloudtrail-access",
-                    "Statement": [
-                        {
-                            "Sid": "Allow CloudTrail",
-                            "Effect": "Allow",
-                            "Principal": { "Service": "cloudtrail.amazonaws.com" },
-                            "Action": ["kms:GenerateDataKey*", "kms:Decrypt"],
-                            "Resource": "*"
-                        },
-                        {
-                            "Sid": "Allow Admin",
-                            "Effect": "Allow",
-                            "Principal": { "AWS": f"arn:aws:iam::{account_id}:root" },
-                            "Action": "kms:*",
-                            "Resource": "*"
-                        }
-                    ]
-                }
-
-                kms.put_key_policy(
-                    KeyId=key_id,
-                    PolicyName='default',
-                    Policy=json.dumps(policy)
-                )
-
-                kms.create_alias(AliasName=alias_name, TargetKeyId=key_id)
-                print(f"[SUCCESS] 새 KMS 키 생성 완료")
-                print(f"[INFO] 별칭: {alias_name}")
-                print(f"[INFO] Key ARN: {key_arn}")
+            # 기존 alias가 있으면 재사용, 없으면 새 KMS 키 생성 (KMS 캐시 사용)
+            kms_resolver = KmsKeyResolver(self.session, self.get_account_id())
+            key_arn = kms_resolver.get_or_create_alias_key(alias_name, self._create_cloudtrail_key)
+            print(f"[INFO] 사용할 키 ARN: {key_arn}")
 
             # 3. 암수화 적용
             for trail_name in not_kms_encrypted_trails:
@@ -207,6 +159,50 @@ class CloudtrailEncryptionChecker(BaseChecker):
                 'error_message': f"KMS 키 생성 또는 설정 중 오류 발생: {str(e)}"
             }
 
+    def _create_cloudtrail_key(self, kms, account_id, region, alias_name):
+        """CloudTrail 전용 KMS 키 생성 후 (키 ID, 키 ARN) 반환"""
+        print(f"[INFO] 별칭 '{alias_name}'로 새 KMS 키를 생성합니다.")
+        response = kms.create_key(
+            Description='CloudTrail 암호화를 위한 자동 생성 KMS 키',
+            KeyUsage='ENCRYPT_DECRYPT',
+            Origin='AWS_KMS'
+        )
+        key_id = response['KeyMetadata']['KeyId']
+        key_arn = response['KeyMetadata'].get('Arn') or f"arn:aws:kms:{region}:{account_id}:key/{key_id}"
+
+        policy = {
+            "Version": "2012-10-17",
+            "Id": "cloudtrail-access",
+            "Statement": [
+                {
+                    "Sid": "Allow CloudTrail",
+                    "Effect": "Allow",
+                    "Principal": { "Service": "cloudtrail.amazonaws.com" },
+                    "Action": ["kms:GenerateDataKey*", "kms:Decrypt"],
+                    "Resource": "*"
+                },
+                {
+                    "Sid": "Allow Admin",
+                    "Effect": "Allow",
+                    "Principal": { "AWS": f"arn:aws:iam::{account_id}:root" },
+                    "Action": "kms:*",
+                    "Resource": "*"
+                }
+            ]
+        }
+
+        kms.put_key_policy(
+            KeyId=key_id,
+            PolicyName='default',
+            Policy=json.dumps(policy)
+        )
+
+        kms.create_alias(AliasName=alias_name, TargetKeyId=key_id)
+        print(f"[SUCCESS] 새 KMS 키 생성 완료")
+        print(f"[INFO] 별칭: {alias_name}")
+        print(f"[INFO] Key ARN: {key_arn}")
+        return key_id, key_arn
+
     def _get_manual_guide(self):
         """CloudTrail 암호화 수동 조치 가이드 반환"""
         return {
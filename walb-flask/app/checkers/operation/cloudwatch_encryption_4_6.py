@@ -3,10 +3,11 @@
 원본: SHIELDUS-AWS-CHECKER/operation/4_6_cloudwatch_encryption.py
 """
 
-import boto3
 import json
 from botocore.exceptions import ClientError
 from app.checkers.base_checker import BaseChecker
+from app.utils.kms_cache import KmsKeyResolver, KEY_MANAGER_AWS, KEY_MANAGER_CUSTOMER
+from app.utils.log_group_catalog import get_log_group_catalog
 
 
 class CloudwatchEncryptionChecker(BaseChecker):
@@ -27,19 +28,20 @@ class CloudwatchEncryptionChecker(BaseChecker):
         - CloudWatch Logs 로그 그룹이 KMS로 암호화되었는지 점검하고 미암호화 그룹 목록 반환
         """
         print("[INFO] 4.6 CloudWatch 암호화 설정 체크 중...")
-        logs = self.session.client('logs')
         unencrypted_log_groups = []
+        encrypted_details = []
+        kms_resolver = KmsKeyResolver(self.session, self.get_account_id())
 
         try:
-            paginator = logs.get_paginator('describe_log_groups')
-            log_groups_found = False
+            catalog = get_log_group_catalog(self.session, self.get_account_id())
+            log_groups_found = len(catalog) > 0
 
-            for page in paginator.paginate():
-                if 'logGroups' in page and page['logGroups']:
-                    log_groups_found = True
-                    for group in page['logGroups']:
-                        if 'kmsKeyId' not in group:
-                            unencrypted_log_groups.append(group['logGroupName'])
+            # kmsKeyId 유무 인덱스
+            unencrypted_log_groups = catalog.names_by_encryption(False)
+            for name in catalog.names_by_encryption(True):
+                detail = {'log_group': name}
+                detail.update(kms_resolver.key_summary(catalog.get(name)['kms_key_id']))
+                encrypted_details.append(detail)
 
             if not log_groups_found:
                 print("[INFO] 4.6 CloudWatch 로그 그룹이 존재하지 않습니다.")
@@ -77,10 +79,13 @@ class CloudwatchEncryptionChecker(BaseChecker):
                 'risk_level': risk_level,
                 'message': message,
                 'unencrypted_groups': unencrypted_log_groups,
+                'encrypted_details': encrypted_details,
                 'summary': f"미암호화 로그 그룹 {len(unencrypted_log_groups)}개" if has_issues else "모든 CloudWatch 로그 그룹이 암호화되어 있습니다.",
                 'details': {
                     'unencrypted_groups_count': len(unencrypted_log_groups),
-                    'total_groups': len(unencrypted_log_groups) if not has_issues else len(unencrypted_log_groups) + len(unencrypted_log_groups)  # 실제로는 암호화된 그룹 수를 계산해야 하지만 원본 그대로 유지
+                    'total_groups': len(unencrypted_log_groups) if not has_issues else len(unencrypted_log_groups) + len(unencrypted_log_groups),  # 실제로는 암호화된 그룹 수를 계산해야 하지만 원본 그대로 유지
+                    'customer_managed_key_count': len([d for d in encrypted_details if d['key_manager'] == KEY_MANAGER_CUSTOMER]),
+                    'aws_managed_key_count': len([d for d in encrypted_details if d['key_manager'] == KEY_MANAGER_AWS])
                 }
             }
 
@@ -106,84 +111,25 @@ class CloudwatchEncryptionChecker(BaseChecker):
 
         unencrypted_log_groups = diagnosis_result['unencrypted_groups']
         logs = self.session.client('logs')
-        kms = self.session.client('kms')
         results = []
         
         print("[FIX] 4.6 CloudWatch 로그 그룹 암호화 조치를 시작합니다.")
 
         try:
-            account_id = self.session.client('sts').get_caller_identity()['Account']
-            region = boto3.session.Session().region_name
+            catalog = get_log_group_catalog(self.session, self.get_account_id())
             alias_name = "alias/cloudwatch-autokey"
-            key_arn = None
-
-            # 기존 alias 있는지 확인
-            existing_aliases = kms.list_aliases()['Aliases']
-            alias_dict = {a['AliasName']: a['TargetKeyId'] for a in existing_aliases if 'AliasName' in a and 'TargetKeyId' in a}
-
-            if alias_name in alias_dict:
-                print(f"[INFO] KMS 별칭 '{alias_name}'이 이미 존재합니다.")
-                key_id = alias_dict[alias_name]
-                key_arn = f"arn:aws:kms:{region}:{account_id}:key/{key_id}"
-                print(f"[INFO] 기존 키 ARN 사용: {key_arn}")
-            else:
-                # 새 KMS 키 생성
-                print(f"[INFO] 별칭 '{alias_name}'로 새 KMS 키를 생성합니다.")
-                response = kms.create_key(
-                    Description='CloudWatch 로그 암호화를 위한 자동 생성 KMS 키',
-                    KeyUsage='ENCRYPT_DECRYPT',
-                    Origin='AWS_KMS'
-                )
-                key_id = response['KeyMetadata']['KeyId']
-                key_arn = f"arn:aws:kms:{region}:{account_id}:key/{key_id}"
-
-                policy = {
-                    "Version": "2012-10-17",
-                    "Id": "cloudwatch-access",
-                    "Statement": [
-                        {
-                            "Sid": "Allow CloudWatch Logs",
-                            "Effect": "Allow",
-                            "Principal": {
-                                "Service": f"logs.{region}.amazonaws.com"
-                            },
-                            "Action": [
-                                "kms:Encrypt",
-                                "kms:Decrypt",
-                                "kms:ReEncrypt*",
-                                "kms:GenerateDataKey*",
-                                "kms:DescribeKey"
-                            ],
-                            "Resource": "*",
-                            "Condition": {
-                                "ArnLike": {
-                                    "kms:EncryptionContext:aws:logs:arn": f"arn:aws:logs:{region}:{account_id}:*"
-                                }
-                            }
-                        },
-                        {
-                            "Sid": "Allow Admin Full Access",
-                            "Effect": "Allow",
-                            "Principal": {
-                                "AWS": f"arn:aws:iam::{account_id}:root"
-                            },
-                            "Action": "kms:*",
-                            "Resource": "*"
-                        }
-                    ]
-                }
 
-                kms.put_key_policy(KeyId=key_id, PolicyName='default', Policy=json.dumps(policy))
-                kms.create_alias(AliasName=alias_name, TargetKeyId=key_id)
-                print(f"[SUCCESS] 새 KMS 키 생성 완료")
-                print(f"[INFO] 별칭: {alias_name}")
-                print(f"[INFO] Key ARN: {key_arn}")
+            # 기존 alias가 있으면 재사용, 없으면 새 KMS 키 생성 (KMS 캐시 사용)
+            kms_resolver = KmsKeyResolver(self.session, self.get_account_id())
+            key_arn = kms_resolver.get_or_create_alias_key(alias_name, self._create_cloudwatch_key)
+            print(f"[INFO] 사용할 키 ARN: {key_arn}")
 
             for group_name in unencrypted_log_groups:
                 # 선택된 항목인지 확인
                 if any(group_name in str(item) for item in selected_items.values() for item in item):
                     try:
                         logs.associate_kms_key(logGroupName=group_name, kmsKeyId=key_arn)
+                        catalog.apply_update(group_name, kms_key_id=key_arn)
                         print(f"     [SUCCESS] 로그 그룹 '{group_name}'에 KMS 키를 연결했습니다.")
                         results.append({
                             'status': 'success',
@@ -215,6 +161,60 @@ class CloudwatchEncryptionChecker(BaseChecker):
                 'error_message': f"KMS 키 생성 또는 설정 중 오류 발생: {str(e)}"
             }
 
+    def _create_cloudwatch_key(self, kms, account_id, region, alias_name):
+        """CloudWatch Logs 전용 KMS 키 생성 후 (키 ID, 키 ARN) 반환"""
+        print(f"[INFO] 별칭 '{alias_name}'로 새 KMS 키를 생성합니다.")
+        response = kms.create_key(
+            Description='CloudWatch 로그 암호화를 위한 자동 생성 KMS 키',
+            KeyUsage='ENCRYPT_DECRYPT',
+            Origin='AWS_KMS'
+        )
+        key_id = response['KeyMetadata']['KeyId']
+        key_arn = response['KeyMetadata'].get('Arn') or f"arn:aws:kms:{region}:{account_id}:key/{key_id}"
+
+        policy = {
+            "Version": "2012-10-17",
+            "Id": "cloudwatch-access",
+            "Statement": [
+                {
+                    "Sid": "Allow CloudWatch Logs",
+                    "Effect": "Allow",
+                    "Principal": {
+                        "Service": f"logs.{region}.amazonaws.com"
+                    },
+                    "Action": [
+                        "kms:Encrypt",
+                        "kms:Decrypt",
+                        "kms:ReEncrypt*",
+                        "kms:GenerateDataKey*",
+                        "kms:DescribeKey"
+                    ],
+                    "Resource": "*",
+                    "Condition": {
+                        "ArnLike": {
+                            "kms:EncryptionContext:aws:logs:arn": f"arn:aws:logs:{region}:{account_id}:*"
+                        }
+                    }
+                },
+                {
+                    "Sid": "Allow Admin Full Access",
+                    "Effect": "Allow",
+                    "Principal": {
+                        "AWS": f"arn:aws:iam::{account_id}:root"
+                    },
+                    "Action": "kms:*",
+                    "Resource": "*"
+                }
+            ]
+        }
+
+        kms.put_key_policy(KeyId=key_id, PolicyName='default', Policy=json.dumps(policy))
+        kms.create_alias(AliasName=alias_name, TargetKeyId=key_id)
+        print(f"[SUCCESS] 새 KMS 키 생성 완료")
+        print(f"[INFO] 별칭: {alias_name}")
+        print(f"[INFO] Key ARN: {key_arn}")
+        return key_id, key_arn
+
     def _get_manual_guide(self, unencrypted_groups=None):
         """CloudWatch 로그 그룹 암호화 수동 조치 가이드 반환"""
         if unencrypted_groups is None:
@@ -3,9 +3,9 @@
 원본: SHIELDUS-AWS-CHECKER/operation/4_15_eks_cluster_encryption.py
 """
 
-import boto3
 from botocore.exceptions import ClientError
 from app.checkers.base_checker import BaseChecker
+from app.utils.kms_cache import KmsKeyResolver, KEY_MANAGER_CUSTOMER
 
 
 class EksClusterEncryptionChecker(BaseChecker):
@@ -47,11 +47,18 @@ class EksClusterEncryptionChecker(BaseChecker):
                 }
 
             unencrypted_clusters = []
+            encrypted_details = []
+            kms_resolver = KmsKeyResolver(self.session, self.get_account_id())
             for name in clusters:
                 try:
                     enc_config = eks.describe_cluster(name=name)['cluster'].get('encryptionConfig', [])
-                    if not any('secrets' in cfg.get('resources', []) for cfg in enc_config):
+                    secrets_config = next((cfg for cfg in enc_config if 'secrets' in cfg.get('resources', [])), None)
+                    if secrets_config is None:
                         unencrypted_clusters.append(name)
+                    else:
+                        detail = {'cluster': name}
+                        detail.update(kms_resolver.key_summary(secrets_config.get('provider', {}).get('keyArn')))
+                        encrypted_details.append(detail)
                 except ClientError as e:
                     print(f"[ERROR] 클러스터 '{name}' 정보 확인 중 오류: {e}")
 
@@ -71,12 +78,14 @@ class EksClusterEncryptionChecker(BaseChecker):
                 'risk_level': risk_level,
                 'message': f"시크릿 암호화가 비활성화된 클러스터 {total_issues}개 발견" if has_issues else "모든 EKS 클러스터의 시크릿 암호화가 활성화되어 있습니다",
                 'findings': unencrypted_clusters,
+                'encrypted_details': encrypted_details,
                 'summary': f"시크릿 암호화 비활성화 클러스터 {len(unencrypted_clusters)}개" if has_issues else "모든 EKS 클러스터의 시크릿 암호화가 정상적으로 설정되어 있습니다.",
                 'details': {
                     'total_clusters': len(clusters),
                     'encrypted_clusters': len(clusters) - len(unencrypted_clusters),
                     'unencrypted_clusters': len(unencrypted_clusters),
-                    'unencrypted_clusters_list': unencrypted_clusters
+                    'unencrypted_clusters_list': unencrypted_clusters,
+                    'customer_managed_key_count': len([d for d in encrypted_details if d['key_manager'] == KEY_MANAGER_CUSTOMER])
                 }
             }
 
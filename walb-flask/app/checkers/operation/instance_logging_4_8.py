@@ -3,9 +3,9 @@
 원본: SHIELDUS-AWS-CHECKER/operation/4_8_instance_logging.py
 """
 
-import boto3
 from botocore.exceptions import ClientError
 from app.checkers.base_checker import BaseChecker
+from app.utils.log_group_catalog import get_log_group_catalog
 
 
 class InstanceLoggingChecker(BaseChecker):
@@ -27,22 +27,10 @@ class InstanceLoggingChecker(BaseChecker):
         print("[INFO] 4.8 인스턴스 로깅 설정 체크 중...")
         
         try:
-            logs_client = self.session.client('logs')
             ec2_client = self.session.client('ec2')
 
-            # 1. 모든 CloudWatch 로그 그룹 이름 수집
-            log_groups = []
-            next_token = None
-            while True:
-                if next_token:
-                    response = logs_client.describe_log_groups(nextToken=next_token)
-                else:
-                    response = logs_client.describe_log_groups()
-                log_groups.extend(response.get('logGroups', []))
-                next_token = response.get('nextToken')
-                if not next_token:
-                    break
-            log_group_names = [lg['logGroupName'] for lg in log_groups]
+            # 1. CloudWatch 로그 그룹 카탈로그 (계정/리전 단위 공유)
+            catalog = get_log_group_catalog(self.session, self.get_account_id())
 
             # 2. EC2 인스턴스 ID 수집
             instances = ec2_client.describe_instances()
@@ -53,7 +41,11 @@ class InstanceLoggingChecker(BaseChecker):
             ]
 
             # 3. 로그 그룹 이름에 인스턴스 ID 포함 여부로 로깅 여부 확인
-            good = [iid for iid in instance_ids if any(iid in lg for lg in log_group_names)]
+            #    (토큰 인덱스 우선, 없으면 부분 문자열 조회)
+            good = [
+                iid for iid in instance_ids
+                if catalog.has_token(iid) or catalog.names_containing(iid)
+            ]
             bad = list(set(instance_ids) - set(good))
 
             # 결과 출력
@@ -78,7 +70,7 @@ class InstanceLoggingChecker(BaseChecker):
                     'good_instances_count': len(good),
                     'bad_instances_count': len(bad),
                     'total_instances': len(instance_ids),
-                    'total_log_groups': len(log_group_names)
+                    'total_log_groups': len(catalog)
                 }
             }
                 
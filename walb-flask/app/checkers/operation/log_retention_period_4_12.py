@@ -3,9 +3,9 @@
 원본: SHIELDUS-AWS-CHECKER/operation/4_12_log_retention_period.py
 """
 
-import boto3
 from botocore.exceptions import ClientError
 from app.checkers.base_checker import BaseChecker
+from app.utils.log_group_catalog import get_log_group_catalog
 
 
 class LogRetentionPeriodChecker(BaseChecker):
@@ -28,28 +28,26 @@ class LogRetentionPeriodChecker(BaseChecker):
         """
         print("[INFO] 4.12 주요 CloudWatch 로그 그룹의 보관 기간 점검 중...")
         
-        if self.session:
-            logs = self.session.client('logs')
-        else:
-            logs = self.session.client('logs')
-            
         short_retention_groups = []
 
         # 주요 키워드 (가이드 기준)
         target_keywords = ['cloudtrail', 'vpc-flow-logs', 'vpc/flowlogs', 'rds', 's3', 'efs', 'ebs', 'fsx', 'dynamodb']
 
         try:
-            paginator = logs.get_paginator('describe_log_groups')
-            for page in paginator.paginate():
-                for group in page['logGroups']:
-                    name = group['logGroupName'].lower()
-                    if any(keyword in name for keyword in target_keywords):
-                        retention = group.get('retentionInDays')
-                        if retention is None or retention < 365:
-                            short_retention_groups.append({
-                                'name': group['logGroupName'],
-                                'days': retention if retention is not None else '무제한'
-                            })
+            catalog = get_log_group_catalog(self.session, self.get_account_id())
+
+            # 보존 기간 구간 인덱스 ∩ 키워드 인덱스
+            target_names = set()
+            for keyword in target_keywords:
+                target_names.update(catalog.names_containing(keyword))
+
+            for name in catalog.names_with_retention_below(365):
+                if name in target_names:
+                    retention = catalog.get(name)['retention']
+                    short_retention_groups.append({
+                        'name': name,
+                        'days': retention if retention is not None else '무제한'
+                    })
 
             if not short_retention_groups:
                 print("[✓ COMPLIANT] 4.12 모든 주요 로그 그룹의 보관 기간이 1년 이상으로 설정되어 있습니다.")
@@ -98,12 +96,16 @@ class LogRetentionPeriodChecker(BaseChecker):
             return {'status': 'no_action', 'message': '로그 보존 기간 조치가 필요한 항목이 없습니다.'}
 
         short_retention_groups = diagnosis_result['short_retention_groups']
+        logs = self.session.client('logs')
+        try:
+            catalog = get_log_group_catalog(self.session, self.get_account_id())
+        except ClientError as e:
+            print(f"[ERROR] 로그 그룹 목록 조회 실패: {e}")
+            return {
+                'status': 'error',
+                'error_message': f"CloudWatch 로그 그룹 정보를 가져오는 중 오류 발생: {str(e)}"
+            }
         
-        if self.session:
-            logs = self.session.client('logs')
-        else:
-            logs = self.session.client('logs')
-            
         results = []
         
         print("[FIX] 4.12 로그 그룹 보관 기간 설정 조치를 시작합니다.")
@@ -115,6 +117,7 @@ class LogRetentionPeriodChecker(BaseChecker):
                 display_days = f"{group['days']}일" if isinstance(group['days'], int) else "무제한(설정되지 않음)"
                 try:
                     logs.put_retention_policy(logGroupName=group_name, retentionInDays=365)
+                    catalog.apply_update(group_name, retention=365)
                     print(f"     [SUCCESS] '{group_name}'의 보존 기간을 365일로 설정했습니다.")
                     results.append({
                         'status': 'success',
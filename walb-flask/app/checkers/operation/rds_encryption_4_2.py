@@ -3,9 +3,9 @@
 원본: SHIELDUS-AWS-CHECKER/operation/4_2_rds_encryption.py
 """
 
-import boto3
 from botocore.exceptions import ClientError
 from app.checkers.base_checker import BaseChecker
+from app.utils.kms_cache import KmsKeyResolver, KEY_MANAGER_AWS, KEY_MANAGER_CUSTOMER
 
 
 class RdsEncryptionChecker(BaseChecker):
@@ -29,7 +29,9 @@ class RdsEncryptionChecker(BaseChecker):
         rds = self.session.client('rds')
         unencrypted_resources = []
         unencrypted_details = []
+        encrypted_details = []
         total_resources = 0  # 전체 리소스 수 추적
+        kms_resolver = KmsKeyResolver(self.session, self.get_account_id())
 
         try:
             # DB 인스턴스 점검
@@ -45,6 +47,10 @@ class RdsEncryptionChecker(BaseChecker):
                         'engine': inst.get('Engine', 'unknown'),
                         'status': inst.get('DBInstanceStatus', 'unknown')
                     })
+                else:
+                    encrypted_details.append(self._build_encrypted_detail(
+                        kms_resolver, 'instance', inst['DBInstanceIdentifier'], inst.get('KmsKeyId')
+                    ))
 
             # DB 클러스터 점검
             clusters = rds.describe_db_clusters()['DBClusters']
@@ -59,6 +65,10 @@ class RdsEncryptionChecker(BaseChecker):
                         'engine': cluster.get('Engine', 'unknown'),
                         'status': cluster.get('Status', 'unknown')
                     })
+                else:
+                    encrypted_details.append(self._build_encrypted_detail(
+                        kms_resolver, 'cluster', cluster['DBClusterIdentifier'], cluster.get('KmsKeyId')
+                    ))
 
             # 출력 분기 처리
             if total_resources == 0:
@@ -80,12 +90,15 @@ class RdsEncryptionChecker(BaseChecker):
                 'message': f"암호화되지 않은 RDS 리소스 {len(unencrypted_resources)}개 발견" if has_issues else "모든 RDS 리소스가 암호화되어 있습니다" if total_resources > 0 else "점검할 RDS 리소스가 존재하지 않습니다",
                 'unencrypted_resources': unencrypted_resources,
                 'unencrypted_details': unencrypted_details,
+                'encrypted_details': encrypted_details,
                 'summary': f"총 {len(unencrypted_resources)}개의 미암호화 RDS 리소스가 발견되었습니다." if has_issues else "모든 RDS 리소스가 안전하게 암호화되어 있습니다." if total_resources > 0 else "RDS 리소스가 존재하지 않습니다.",
                 'details': {
                     'total_resources': total_resources,
                     'unencrypted_count': len(unencrypted_resources),
                     'instances_count': len([d for d in unencrypted_details if d['type'] == 'instance']),
-                    'clusters_count': len([d for d in unencrypted_details if d['type'] == 'cluster'])
+                    'clusters_count': len([d for d in unencrypted_details if d['type'] == 'cluster']),
+                    'customer_managed_key_count': len([d for d in encrypted_details if d['key_manager'] == KEY_MANAGER_CUSTOMER]),
+                    'aws_managed_key_count': len([d for d in encrypted_details if d['key_manager'] == KEY_MANAGER_AWS])
                 }
             }
 
@@ -96,6 +109,12 @@ class RdsEncryptionChecker(BaseChecker):
                 'error_message': f"RDS 정보를 가져오는 중 오류 발생: {str(e)}"
             }
     
+    def _build_encrypted_detail(self, kms_resolver, resource_type, identifier, kms_key_id):
+        """암호화된 리소스의 KMS 키 관리 주체 정보 생성"""
+        detail = {'type': resource_type, 'identifier': identifier}
+        detail.update(kms_resolver.key_summary(kms_key_id))
+        return detail
+    
     def execute_fix(self, selected_items):
         """
         [4.2] RDS 암호화 설정 조치
@@ -3,9 +3,9 @@
 원본: SHIELDUS-AWS-CHECKER/operation/4_3_s3_encryption.py
 """
 
-import boto3
 from botocore.exceptions import ClientError
 from app.checkers.base_checker import BaseChecker
+from app.utils.kms_cache import KmsKeyResolver, KEY_MANAGER_AWS, KEY_MANAGER_CUSTOMER, KEY_MANAGER_LABELS
 
 
 class S3EncryptionChecker(BaseChecker):
@@ -28,6 +28,8 @@ class S3EncryptionChecker(BaseChecker):
         print("[INFO] 4.3 S3 암호화 설정 체크 중...")
         s3 = self.session.client('s3')
         unencrypted_buckets = []
+        encrypted_details = []
+        kms_resolver = KmsKeyResolver(self.session, self.get_account_id())
 
         try:
             buckets = s3.list_buckets()['Buckets']
@@ -46,7 +48,9 @@ class S3EncryptionChecker(BaseChecker):
             for bucket in buckets:
                 bucket_name = bucket['Name']
                 try:
-                    s3.get_bucket_encryption(Bucket=bucket_name)
+                    encryption = s3.get_bucket_encryption(Bucket=bucket_name)
+                    rules = encryption.get('ServerSideEncryptionConfiguration', {}).get('Rules', [])
+                    encrypted_details.append(self._build_encrypted_detail(kms_resolver, bucket_name, rules))
                 except ClientError as e:
                     if e.response['Error']['Code'] == 'ServerSideEncryptionConfigurationNotFoundError':
                         unencrypted_buckets.append(bucket_name)
@@ -66,11 +70,14 @@ class S3EncryptionChecker(BaseChecker):
                 'risk_level': risk_level,
                 'message': f"기본 암호화가 설정되지 않은 S3 버킷 {len(unencrypted_buckets)}개 발견" if has_issues else "모든 S3 버킷에 기본 암호화가 설정되어 있습니다",
                 'unencrypted_buckets': unencrypted_buckets,
+                'encrypted_details': encrypted_details,
                 'summary': f"총 {len(unencrypted_buckets)}개의 미암호화 S3 버킷이 발견되었습니다." if has_issues else "모든 S3 버킷이 안전하게 암호화되어 있습니다.",
                 'details': {
                     'total_buckets': len(buckets),
                     'unencrypted_count': len(unencrypted_buckets),
-                    'encrypted_count': len(buckets) - len(unencrypted_buckets)
+                    'encrypted_count': len(buckets) - len(unencrypted_buckets),
+                    'customer_managed_key_count': len([d for d in encrypted_details if d['key_manager'] == KEY_MANAGER_CUSTOMER]),
+                    'aws_managed_key_count': len([d for d in encrypted_details if d['key_manager'] == KEY_MANAGER_AWS])
                 }
             }
 
@@ -81,6 +88,29 @@ class S3EncryptionChecker(BaseChecker):
                 'error_message': f"S3 버킷 목록을 가져오는 중 오류 발생: {str(e)}"
             }
 
+    def _build_encrypted_detail(self, kms_resolver, bucket_name, rules):
+        """버킷 기본 암호화 규칙의 알고리즘과 KMS 키 관리 주체 정보 생성"""
+        default_encryption = rules[0].get('ApplyServerSideEncryptionByDefault', {}) if rules else {}
+        sse_algorithm = default_encryption.get('SSEAlgorithm', '')
+        kms_key_id = default_encryption.get('KMSMasterKeyID')
+
+        detail = {'bucket': bucket_name, 'sse_algorithm': sse_algorithm}
+        if kms_key_id:
+            detail.update(kms_resolver.key_summary(kms_key_id))
+        elif sse_algorithm.startswith('aws:kms'):
+            # 키 ID 없이 SSE-KMS를 지정하면 AWS 관리형 키(aws/s3)가 사용됨
+            detail.update({
+                'kms_key_id': 'alias/aws/s3',
+                'key_manager': KEY_MANAGER_AWS,
+                'key_manager_label': KEY_MANAGER_LABELS[KEY_MANAGER_AWS],
+                'key_state': 'Enabled',
+                'rotation_enabled': True
+            })
+        else:
+            # SSE-S3(AES256)는 KMS 키를 사용하지 않음
+            detail.update({'kms_key_id': '', 'key_manager': None, 'key_manager_label': 'S3 관리형 키 (SSE-S3)'})
+        return detail
+
     def execute_fix(self, selected_items):
         """
         [4.3] S3 암호화 설정 조치
@@ -3,12 +3,15 @@
 원본: SHIELDUS-AWS-CHECKER/virtual_resources/3_10_elb_connection.py
 """
 
-import boto3
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import ClientError
 from app.checkers.base_checker import BaseChecker
 
 
 class ElbConnectionChecker(BaseChecker):
+    # LB별 속성/리스너 조회 동시 실행 수 (ELB API 스로틀링 한도 고려)
+    MAX_WORKERS = 8
+
     def __init__(self, session=None):
         super().__init__(session)
         
@@ -24,87 +27,45 @@ class ElbConnectionChecker(BaseChecker):
         """
         [3.10] ELB 제어 정책 점검
         - ALB/NLB/CLB의 다양한 보안 정책 준수 여부 점검
+        - 페이지 단위 LB 목록을 제한된 워커 풀에 넘겨 속성/리스너를 동시에 조회
         """
         print("[INFO] 3.10 ELB 제어 정책 점검을 시작합니다...")
         findings = []
+        # boto3 클라이언트는 스레드 안전하므로 메인 스레드에서 생성 후 워커와 공유
         elbv2 = self.session.client('elbv2')
         elb = self.session.client('elb')
         wafv2 = self.session.client('wafv2')
 
-        # ----------- ELBv2 (ALB, NLB) 점검 -----------
-        try:
-            for lb in elbv2.describe_load_balancers()['LoadBalancers']:
-                lb_arn, lb_name = lb['LoadBalancerArn'], lb['LoadBalancerName']
-                attrs = {a['Key']: a['Value'] for a in elbv2.describe_load_balancer_attributes(LoadBalancerArn=lb_arn)['Attributes']}
-
-                # ELB.1: HTTP 리스너 -> HTTPS 리디렉션
-                for l in elbv2.describe_listeners(LoadBalancerArn=lb_arn)['Listeners']:
-                    if l['Protocol'] == 'HTTP' and not any(a.get('Type') == 'redirect' and a.get('RedirectConfig', {}).get('Protocol') == 'HTTPS' for a in l.get('DefaultActions', [])):
-                        findings.append({'lb_name': lb_name, 'check_id': 'ELB.1', 'issue': 'HTTP 리스너가 HTTPS로 리디렉션되지 않음', 'lb_arn': lb_arn, 'listener_arn': l['ListenerArn']})
-
-                # ELB.4: 잘못된 HTTP 헤더 제거 설정
-                if lb['Type'] == 'application' and attrs.get('routing.http.drop_invalid_header_fields.enabled') != 'true':
-                    findings.append({'lb_name': lb_name, 'check_id': 'ELB.4', 'issue': '잘못된 HTTP 헤더 제거 비활성', 'lb_arn': lb_arn})
-
-                # ELB.5: 로깅 활성화
-                if attrs.get('access_logs.s3.enabled') != 'true':
-                    findings.append({'lb_name': lb_name, 'check_id': 'ELB.5', 'issue': 'ALB/NLB 로깅 비활성', 'lb_arn': lb_arn})
-                
-                # ELB.6: 삭제 방지
-                if attrs.get('deletion_protection.enabled') != 'true':
-                    findings.append({'lb_name': lb_name, 'check_id': 'ELB.6', 'issue': '삭제 방지 비활성', 'lb_arn': lb_arn})
-
-                # ELB.10/13: 최소 2개 AZ
-                if len(lb.get('AvailabilityZones', [])) < 2:
-                    findings.append({'lb_name': lb_name, 'check_id': 'ELB.10/13', 'issue': '2개 미만 가용영역에 연결됨', 'lb_arn': lb_arn})
-
-                # ELB.16: WAF 연결
-                if lb['Type'] == 'application':
-                    try:
-                        wafv2.get_web_acl_for_resource(ResourceArn=lb_arn)
-                    except wafv2.exceptions.WAFNonexistentItemException:
-                        findings.append({'lb_name': lb_name, 'check_id': 'ELB.16', 'issue': 'WAF 연결 안됨', 'lb_arn': lb_arn})
-        except ClientError as e: 
-            print(f"[ERROR] elbv2 점검 중 오류: {e}")
-
-        # ----------- Classic ELB 점검 -----------
-        try:
-            for clb in elb.describe_load_balancers()['LoadBalancerDescriptions']:
-                lb_name = clb['LoadBalancerName']
-                attrs = elb.describe_load_balancer_attributes(LoadBalancerName=lb_name)['LoadBalancerAttributes']
-                listeners = clb.get('ListenerDescriptions', [])
-
-                # ELB.2 & ELB.8: ACM 인증서 및 최신 보안 정책 사용
-                for l_desc in listeners:
-                    l = l_desc['Listener']
-                    if l['Protocol'] in ['HTTPS', 'SSL']:
-                        if 'arn:aws:acm' not in l.get('SSLCertificateId', ''):
-                            findings.append({'lb_name': lb_name, 'check_id': 'ELB.2', 'issue': 'ACM 인증서 미사용'})
-                        if not l_desc.get('PolicyNames'):
-                            findings.append({'lb_name': lb_name, 'check_id': 'ELB.8', 'issue': f"HTTPS 리스너(포트:{l['LoadBalancerPort']})에 보안 정책 없음"})
-
-                # ELB.3: HTTPS/SSL 리스너 존재
-                if not any(l['Listener']['Protocol'] in ['HTTPS', 'SSL'] for l in listeners):
-                    findings.append({'lb_name': lb_name, 'check_id': 'ELB.3', 'issue': 'HTTPS/SSL 리스너 없음'})
-
-                # ELB.5: 로깅 활성화
-                if not attrs.get('AccessLog', {}).get('Enabled', False):
-                    findings.append({'lb_name': lb_name, 'check_id': 'ELB.5', 'issue': 'CLB 로깅 비활성'})
-
-                # ELB.7: Connection Draining
-                if not attrs.get('ConnectionDraining', {}).get('Enabled', False):
-                    findings.append({'lb_name': lb_name, 'check_id': 'ELB.7', 'issue': 'Connection Draining 비활성'})
-
-                # ELB.9: Cross-Zone Load Balancing
-                if not attrs.get('CrossZoneLoadBalancing', {}).get('Enabled', False):
-                    findings.append({'lb_name': lb_name, 'check_id': 'ELB.9', 'issue': 'Cross-Zone LB 비활성'})
-
-                # ELB.10: 최소 2개 AZ
-                if len(clb['AvailabilityZones']) < 2:
-                    findings.append({'lb_name': lb_name, 'check_id': 'ELB.10', 'issue': '2개 미만 가용영역 연결'})
-
-        except ClientError as e: 
-            print(f"[ERROR] elb(Classic) 점검 중 오류: {e}")
+        # ELB.16: Web ACL별 1회 스윕으로 WAF 연결된 ALB 집합 구성 (실패 시 LB별 조회로 대체)
+        waf_protected_arns = self._collect_waf_protected_arns(wafv2)
+
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            futures = []
+
+            # ----------- ELBv2 (ALB, NLB) 점검 -----------
+            try:
+                for page in elbv2.get_paginator('describe_load_balancers').paginate():
+                    for lb in page['LoadBalancers']:
+                        futures.append(executor.submit(
+                            self._inspect_elbv2, elbv2, wafv2, lb, waf_protected_arns
+                        ))
+            except ClientError as e: 
+                print(f"[ERROR] elbv2 점검 중 오류: {e}")
+
+            # ----------- Classic ELB 점검 -----------
+            try:
+                for page in elb.get_paginator('describe_load_balancers').paginate():
+                    for clb in page['LoadBalancerDescriptions']:
+                        futures.append(executor.submit(self._inspect_classic_elb, elb, clb))
+            except ClientError as e: 
+                print(f"[ERROR] elb(Classic) 점검 중 오류: {e}")
+
+            # 제출 순서대로 결과 수집 (출력 순서 유지)
+            for future in futures:
+                try:
+                    findings.extend(future.result())
+                except ClientError as e:
+                    print(f"[ERROR] 로드 밸런서 점검 중 오류: {e}")
 
         if not findings: 
             print("[✓ COMPLIANT] 모든 ELB 리소스가 점검된 보안 정책을 준수합니다.")
@@ -131,6 +92,114 @@ class ElbConnectionChecker(BaseChecker):
             }
         }
 
+    def _collect_waf_protected_arns(self, wafv2):
+        """
+        REGIONAL Web ACL마다 list_resources_for_web_acl을 한 번씩 호출하여
+        WAF가 연결된 ALB ARN 집합 반환 (조회 권한이 없으면 None)
+        """
+        try:
+            web_acls = []
+            kwargs = {'Scope': 'REGIONAL', 'Limit': 100}
+            while True:
+                response = wafv2.list_web_acls(**kwargs)
+                web_acls.extend(response.get('WebACLs', []))
+                next_marker = response.get('NextMarker')
+                if not next_marker:
+                    break
+                kwargs['NextMarker'] = next_marker
+
+            protected = set()
+            for web_acl in web_acls:
+                response = wafv2.list_resources_for_web_acl(
+                    WebACLArn=web_acl['ARN'],
+                    ResourceType='APPLICATION_LOAD_BALANCER'
+                )
+                protected.update(response.get('ResourceArns', []))
+            return protected
+        except ClientError as e:
+            print(f"[WARN] WAF Web ACL 일괄 조회 실패, LB별 조회로 대체합니다: {e}")
+            return None
+
+    def _inspect_elbv2(self, elbv2, wafv2, lb, waf_protected_arns):
+        """ALB/NLB 1개 점검 (워커 스레드에서 실행)"""
+        findings = []
+        lb_arn, lb_name = lb['LoadBalancerArn'], lb['LoadBalancerName']
+        attrs = {a['Key']: a['Value'] for a in elbv2.describe_load_balancer_attributes(LoadBalancerArn=lb_arn)['Attributes']}
+
+        # ELB.1: HTTP 리스너 -> HTTPS 리디렉션
+        for page in elbv2.get_paginator('describe_listeners').paginate(LoadBalancerArn=lb_arn):
+            for l in page['Listeners']:
+                if l['Protocol'] == 'HTTP' and not any(a.get('Type') == 'redirect' and a.get('RedirectConfig', {}).get('Protocol') == 'HTTPS' for a in l.get('DefaultActions', [])):
+                    findings.append({'lb_name': lb_name, 'check_id': 'ELB.1', 'issue': 'HTTP 리스너가 HTTPS로 리디렉션되지 않음', 'lb_arn': lb_arn, 'listener_arn': l['ListenerArn']})
+
+        # ELB.4: 잘못된 HTTP 헤더 제거 설정
+        if lb['Type'] == 'application' and attrs.get('routing.http.drop_invalid_header_fields.enabled') != 'true':
+            findings.append({'lb_name': lb_name, 'check_id': 'ELB.4', 'issue': '잘못된 HTTP 헤더 제거 비활성', 'lb_arn': lb_arn})
+
+        # ELB.5: 로깅 활성화
+        if attrs.get('access_logs.s3.enabled') != 'true':
+            findings.append({'lb_name': lb_name, 'check_id': 'ELB.5', 'issue': 'ALB/NLB 로깅 비활성', 'lb_arn': lb_arn})
+
+        # ELB.6: 삭제 방지
+        if attrs.get('deletion_protection.enabled') != 'true':
+            findings.append({'lb_name': lb_name, 'check_id': 'ELB.6', 'issue': '삭제 방지 비활성', 'lb_arn': lb_arn})
+
+        # ELB.10/13: 최소 2개 AZ
+        if len(lb.get('AvailabilityZones', [])) < 2:
+            findings.append({'lb_name': lb_name, 'check_id': 'ELB.10/13', 'issue': '2개 미만 가용영역에 연결됨', 'lb_arn': lb_arn})
+
+        # ELB.16: WAF 연결
+        if lb['Type'] == 'application':
+            if waf_protected_arns is not None:
+                has_waf = lb_arn in waf_protected_arns
+            else:
+                try:
+                    has_waf = bool(wafv2.get_web_acl_for_resource(ResourceArn=lb_arn).get('WebACL'))
+                except wafv2.exceptions.WAFNonexistentItemException:
+                    has_waf = False
+            if not has_waf:
+                findings.append({'lb_name': lb_name, 'check_id': 'ELB.16', 'issue': 'WAF 연결 안됨', 'lb_arn': lb_arn})
+
+        return findings
+
+    def _inspect_classic_elb(self, elb, clb):
+        """Classic ELB 1개 점검 (워커 스레드에서 실행)"""
+        findings = []
+        lb_name = clb['LoadBalancerName']
+        attrs = elb.describe_load_balancer_attributes(LoadBalancerName=lb_name)['LoadBalancerAttributes']
+        listeners = clb.get('ListenerDescriptions', [])
+
+        # ELB.2 & ELB.8: ACM 인증서 및 최신 보안 정책 사용
+        for l_desc in listeners:
+            l = l_desc['Listener']
+            if l['Protocol'] in ['HTTPS', 'SSL']:
+                if 'arn:aws:acm' not in l.get('SSLCertificateId', ''):
+                    findings.append({'lb_name': lb_name, 'check_id': 'ELB.2', 'issue': 'ACM 인증서 미사용'})
+                if not l_desc.get('PolicyNames'):
+                    findings.append({'lb_name': lb_name, 'check_id': 'ELB.8', 'issue': f"HTTPS 리스너(포트:{l['LoadBalancerPort']})에 보안 정책 없음"})
+
+        # ELB.3: HTTPS/SSL 리스너 존재
+        if not any(l['Listener']['Protocol'] in ['HTTPS', 'SSL'] for l in listeners):
+            findings.append({'lb_name': lb_name, 'check_id': 'ELB.3', 'issue': 'HTTPS/SSL 리스너 없음'})
+
+        # ELB.5: 로깅 활성화
+        if not attrs.get('AccessLog', {}).get('Enabled', False):
+            findings.append({'lb_name': lb_name, 'check_id': 'ELB.5', 'issue': 'CLB 로깅 비활성'})
+
+        # ELB.7: Connection Draining
+        if not attrs.get('ConnectionDraining', {}).get('Enabled', False):
+            findings.append({'lb_name': lb_name, 'check_id': 'ELB.7', 'issue': 'Connection Draining 비활성'})
+
+        # ELB.9: Cross-Zone Load Balancing
+        if not attrs.get('CrossZoneLoadBalancing', {}).get('Enabled', False):
+            findings.append({'lb_name': lb_name, 'check_id': 'ELB.9', 'issue': 'Cross-Zone LB 비활성'})
+
+        # ELB.10: 최소 2개 AZ
+        if len(clb['AvailabilityZones']) < 2:
+            findings.append({'lb_name': lb_name, 'check_id': 'ELB.10', 'issue': '2개 미만 가용영역 연결'})
+
+        return findings
+
     def _group_findings_by_check_id(self, findings):
         """체크 ID별로 발견사항 그룹화"""
         grouped = {}
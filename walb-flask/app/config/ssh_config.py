@@ -51,18 +51,3 @@ class SSHConfig:
                 'key_path': 'C:\\Users\\User\\SplunkEc2.pem',  # Windows 키 경로
                 'script_path': './create_kinesis_service.sh'
             }
-    
-    @staticmethod
-    def get_ssh_command_base(config):
-        """SSH 기본 명령어 구성"""
-        ssh_cmd = [
-            "ssh",
-            "-o", "StrictHostKeyChecking=no",
-            "-o", "ConnectTimeout=10"
-        ]
-        
-        if config['key_path']:
-            ssh_cmd.extend(["-i", config['key_path']])
-            
-        ssh_cmd.append(f"{config['user']}@{config['host']}")
-        return ssh_cmd
\ No newline at end of file
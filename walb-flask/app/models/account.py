@@ -1,12 +1,11 @@
 """
-AWS 계정 모델 - JSON 기반 데이터 관리
-mainHub 구조와 호환되는 계정 데이터 관리
+AWS 계정 모델 - SQLite 계정 저장소 기반 데이터 관리
+mainHub 구조와 호환되는 계정 데이터 관리 (기존 JSONL 파일은 최초 사용 시 가져옴)
 """
-import json
-import os
 from typing import List, Dict, Optional
 from datetime import datetime
 from flask import current_app
+from app.models import account_store
 
 class AWSAccount:
     def __init__(self, data: Dict):
@@ -122,48 +121,24 @@ class AWSAccount:
     
     @classmethod
     def load_all(cls) -> List['AWSAccount']:
-        """모든 계정 로드 (mainHub 호환)"""
-        accounts = []
-        accounts_file = current_app.config['ACCOUNTS_FILE']
-        
-        if os.path.exists(accounts_file):
-            try:
-                with open(accounts_file, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        if line.strip():
-                            account_data = json.loads(line.strip())
-                            accounts.append(cls(account_data))
-            except Exception as e:
-                current_app.logger.error(f"계정 로드 오류: {e}")
-        
-        # 중복 제거 (account_id + cloud_name 조합으로)
-        seen = set()
-        unique_accounts = []
-        for account in accounts:
-            key = f"{account.account_id}_{account.cloud_name}"
-            if key not in seen:
-                seen.add(key)
-                unique_accounts.append(account)
-        
-        return unique_accounts
+        """모든 계정 로드 (등록 순서, (account_id, cloud_name) 기준 중복 없음)"""
+        try:
+            return [cls(account_data) for account_data in account_store.load_all()]
+        except Exception as e:
+            current_app.logger.error(f"계정 로드 오류: {e}")
+            return []
     
     @classmethod
     def find_by_id(cls, account_id: str) -> Optional['AWSAccount']:
         """계정 ID로 검색"""
-        accounts = cls.load_all()
-        for account in accounts:
-            if account.account_id == account_id:
-                return account
-        return None
+        account_data = account_store.find(account_id)
+        return cls(account_data) if account_data else None
     
     @classmethod
     def find_by_id_and_name(cls, account_id: str, cloud_name: str) -> Optional['AWSAccount']:
         """계정 ID와 클라우드 이름으로 검색"""
-        accounts = cls.load_all()
-        for account in accounts:
-            if account.account_id == account_id and account.cloud_name == cloud_name:
-                return account
-        return None
+        account_data = account_store.find(account_id, cloud_name)
+        return cls(account_data) if account_data else None
     
     @classmethod
     def get_statistics(cls) -> Dict:
@@ -182,88 +157,23 @@ class AWSAccount:
         }
     
     def save(self):
-        """계정 저장 (mainHub 호환)"""
-        accounts_file = current_app.config['ACCOUNTS_FILE']
-        
-        # 기존 계정들 로드
-        existing_accounts = []
-        if os.path.exists(accounts_file):
-            with open(accounts_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip():
-                        existing_accounts.append(json.loads(line.strip()))
-        
-        # 중복 제거 (account_id + cloud_name 기준)
-        key = f"{self.account_id}_{self.cloud_name}"
-        existing_accounts = [
-            acc for acc in existing_accounts 
-            if f"{acc.get('account_id', '')}_{acc.get('cloud_name', '')}" != key
-        ]
-        
+        """계정 저장 (같은 account_id + cloud_name 항목은 교체)"""
         # 생성 시간 업데이트
         if not self.created_at:
             self.created_at = datetime.now().isoformat()
         
-        # 새 계정 추가
-        existing_accounts.append(self.to_dict())
-        
-        # 파일에 저장 (mainHub와 동일한 형식)
-        os.makedirs(os.path.dirname(accounts_file), exist_ok=True)
-        with open(accounts_file, 'w', encoding='utf-8') as f:
-            for account in existing_accounts:
-                f.write(json.dumps(account, ensure_ascii=False) + '\n')
+        account_store.upsert(self.to_dict())
+    
+    @classmethod
+    def update_statuses(cls, updates: List[tuple]) -> int:
+        """여러 계정 상태를 한 번에 갱신 - [(account_id, cloud_name, status), ...]"""
+        return account_store.update_statuses(updates)
     
     def delete(self):
         """계정 삭제"""
-        accounts_file = current_app.config['ACCOUNTS_FILE']
-        
-        # 기존 계정들 로드
-        existing_accounts = []
-        if os.path.exists(accounts_file):
-            with open(accounts_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip():
-                        existing_accounts.append(json.loads(line.strip()))
-        
-        # 현재 계정 제거
-        key = f"{self.account_id}_{self.cloud_name}"
-        existing_accounts = [
-            acc for acc in existing_accounts 
-            if f"{acc.get('account_id', '')}_{acc.get('cloud_name', '')}" != key
-        ]
-        
-        # 파일에 저장
-        with open(accounts_file, 'w', encoding='utf-8') as f:
-            for account in existing_accounts:
-                f.write(json.dumps(account, ensure_ascii=False) + '\n')
+        account_store.delete(self.account_id, self.cloud_name)
 
     @classmethod
     def delete_by_account_id(cls, account_id: str) -> bool:
         """계정 ID로 계정 삭제"""
-        accounts_file = current_app.config['ACCOUNTS_FILE']
-        
-        if not os.path.exists(accounts_file):
-            return False
-        
-        # 기존 계정들 로드
-        existing_accounts = []
-        found = False
-        
-        with open(accounts_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                if line.strip():
-                    account_data = json.loads(line.strip())
-                    if account_data.get('account_id') != account_id:
-                        existing_accounts.append(account_data)
-                    else:
-                        found = True
-        
-        if not found:
-            return False
-        
-        # 파일에 저장
-        with open(accounts_file, 'w', encoding='utf-8') as f:
-            for account in existing_accounts:
-                f.write(json.dumps(account, ensure_ascii=False) + '\n')
-        
-        return True
\ No newline at end of file
+        return account_store.delete(account_id)
@@ -0,0 +1,148 @@
+"""
+계정 저장소 - SQLite(WAL) 기반
+registered_accounts.json(JSONL) 전체 재작성 방식을 대체하는 인덱스 저장소
+
+- (account_id, cloud_name) 기본 키 → 조회 O(log n)
+- 저장/삭제/상태 변경은 단일 행 트랜잭션 (gunicorn 워커 간 갱신 유실 없음)
+- WAL 모드로 읽기와 쓰기가 서로를 막지 않음
+- 최초 사용 시 기존 JSONL 파일을 한 번만 가져옴 (원본 파일은 그대로 보존)
+"""
+import json
+import os
+from typing import Dict, List, Optional
+
+from app.utils import sqlite_store
+from app.utils.data_store import get_config_value
+from app.utils.sqlite_store import resolve_db_path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    account_id  TEXT NOT NULL,
+    cloud_name  TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'active',
+    position    INTEGER NOT NULL,
+    data        TEXT NOT NULL,
+    PRIMARY KEY (account_id, cloud_name)
+);
+CREATE INDEX IF NOT EXISTS idx_accounts_position ON accounts (position);
+CREATE TABLE IF NOT EXISTS store_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _get_db_path():
+    return resolve_db_path('ACCOUNTS_DB', 'registered_accounts.db')
+
+
+def _import_jsonl(conn):
+    """기존 JSONL 계정 파일 일회성 가져오기 (먼저 나온 항목 우선, 기존 load_all 중복 제거 규칙과 동일)"""
+    accounts_file = get_config_value('ACCOUNTS_FILE')
+    imported = 0
+    if accounts_file and os.path.exists(accounts_file):
+        with open(accounts_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line.strip())
+                except ValueError:
+                    continue
+                cursor = conn.execute(
+                    'INSERT OR IGNORE INTO accounts (account_id, cloud_name, status, position, data) '
+                    'VALUES (?, ?, ?, (SELECT COALESCE(MAX(position), 0) + 1 FROM accounts), ?)',
+                    (data.get('account_id', ''), data.get('cloud_name', ''),
+                     data.get('status', 'active'), json.dumps(data, ensure_ascii=False))
+                )
+                imported += cursor.rowcount
+    conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES ('jsonl_imported', ?)", (str(imported),))
+    return imported
+
+
+def _initialize(conn):
+    """최초 1회 기존 JSONL 가져오기 (BEGIN IMMEDIATE로 다른 워커와 가져오기가 겹치지 않도록 직렬화)"""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        row = conn.execute("SELECT value FROM store_meta WHERE key = 'jsonl_imported'").fetchone()
+        if row is None:
+            _import_jsonl(conn)
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+
+
+def get_connection():
+    """스키마 준비 및 JSONL 가져오기가 끝난 연결 반환"""
+    return sqlite_store.get_connection(_get_db_path(), _SCHEMA, _initialize)
+
+
+def _row_to_dict(row) -> Dict:
+    data = json.loads(row['data'])
+    data['status'] = row['status']
+    return data
+
+
+def load_all() -> List[Dict]:
+    """등록 순서대로 전체 계정 반환"""
+    rows = get_connection().execute('SELECT status, data FROM accounts ORDER BY position').fetchall()
+    return [_row_to_dict(row) for row in rows]
+
+
+def find(account_id: str, cloud_name: Optional[str] = None) -> Optional[Dict]:
+    """계정 ID(및 클라우드 이름)로 조회 - 기본 키 인덱스 사용"""
+    conn = get_connection()
+    if cloud_name is None:
+        row = conn.execute(
+            'SELECT status, data FROM accounts WHERE account_id = ? ORDER BY position LIMIT 1',
+            (account_id,)
+        ).fetchone()
+    else:
+        row = conn.execute(
+            'SELECT status, data FROM accounts WHERE account_id = ? AND cloud_name = ?',
+            (account_id, cloud_name)
+        ).fetchone()
+    return _row_to_dict(row) if row else None
+
+
+def upsert(data: Dict):
+    """계정 저장 (같은 키가 있으면 교체 후 목록 맨 뒤로 이동 - 기존 JSONL 저장 순서와 동일)"""
+    get_connection().execute(
+        'INSERT OR REPLACE INTO accounts (account_id, cloud_name, status, position, data) '
+        'VALUES (?, ?, ?, (SELECT COALESCE(MAX(position), 0) + 1 FROM accounts), ?)',
+        (data.get('account_id', ''), data.get('cloud_name', ''),
+         data.get('status', 'active'), json.dumps(data, ensure_ascii=False))
+    )
+
+
+def update_statuses(updates: List[tuple]) -> int:
+    """여러 계정 상태를 한 트랜잭션으로 갱신 - [(account_id, cloud_name, status), ...]"""
+    if not updates:
+        return 0
+    conn = get_connection()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.executemany(
+            'UPDATE accounts SET status = ? WHERE account_id = ? AND cloud_name = ?',
+            [(status, account_id, cloud_name) for account_id, cloud_name, status in updates]
+        )
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    return len(updates)
+
+
+def delete(account_id: str, cloud_name: Optional[str] = None) -> bool:
+    """계정 삭제 (cloud_name이 없으면 해당 계정 ID의 모든 항목 삭제)"""
+    conn = get_connection()
+    if cloud_name is None:
+        cursor = conn.execute('DELETE FROM accounts WHERE account_id = ?', (account_id,))
+    else:
+        cursor = conn.execute(
+            'DELETE FROM accounts WHERE account_id = ? AND cloud_name = ?',
+            (account_id, cloud_name)
+        )
+    return cursor.rowcount > 0
+
@@ -0,0 +1,206 @@
+"""
+GuardDuty 탐지 결과(findings) 저장소 - SQLite(WAL) 기반
+모니터링 대시보드의 최근 탐지 결과/추이 표시용 로컬 사본
+
+- (계정 ID, 탐지기 ID) 단위로 finding 요약(심각도, 유형, 리소스, 시각)만 보관 (원본 JSON 미보관)
+- updatedAt 워터마크를 함께 저장하여 다음 수집은 그 이후 변경분만 조회
+- 심각도 구간/유형별 히스토그램을 finding 반영 시 증감으로 유지 (전체 재집계 없음)
+- 보관(archived)된 finding은 목록에는 남기되 히스토그램에서는 제외
+"""
+from typing import Dict, List, Optional
+
+from app.utils import sqlite_store
+from app.utils.sqlite_store import resolve_db_path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS findings (
+    account_id     TEXT NOT NULL,
+    detector_id    TEXT NOT NULL,
+    finding_id     TEXT NOT NULL,
+    region         TEXT,
+    type           TEXT NOT NULL,
+    title          TEXT,
+    severity       REAL NOT NULL,
+    severity_label TEXT NOT NULL,
+    resource_type  TEXT,
+    resource_id    TEXT,
+    occurrences    INTEGER NOT NULL DEFAULT 1,
+    archived       INTEGER NOT NULL DEFAULT 0,
+    created_at     TEXT,
+    updated_at     TEXT,
+    updated_ms     INTEGER NOT NULL,
+    PRIMARY KEY (account_id, detector_id, finding_id)
+);
+CREATE INDEX IF NOT EXISTS idx_findings_updated ON findings (account_id, updated_ms);
+CREATE TABLE IF NOT EXISTS finding_histograms (
+    account_id  TEXT NOT NULL,
+    detector_id TEXT NOT NULL,
+    dimension   TEXT NOT NULL,
+    bucket      TEXT NOT NULL,
+    count       INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (account_id, detector_id, dimension, bucket)
+);
+CREATE TABLE IF NOT EXISTS finding_watermarks (
+    account_id  TEXT NOT NULL,
+    detector_id TEXT NOT NULL,
+    region      TEXT,
+    updated_ms  INTEGER NOT NULL DEFAULT 0,
+    synced_at   TEXT,
+    PRIMARY KEY (account_id, detector_id)
+);
+"""
+
+# GuardDuty 심각도 구간 (하한, 라벨) - 높은 구간부터
+SEVERITY_LEVELS = ((9.0, 'Critical'), (7.0, 'High'), (4.0, 'Medium'), (0.0, 'Low'))
+
+_HISTOGRAM_DIMENSIONS = ('severity', 'type')
+
+
+def severity_label(severity: float) -> str:
+    """GuardDuty 심각도 점수를 구간 라벨로 변환"""
+    for lower, label in SEVERITY_LEVELS:
+        if severity >= lower:
+            return label
+    return 'Low'
+
+
+def _get_db_path():
+    return resolve_db_path('FINDINGS_DB', 'guardduty_findings.db')
+
+
+def get_connection():
+    """스키마 준비가 끝난 연결 반환"""
+    return sqlite_store.get_connection(_get_db_path(), _SCHEMA)
+
+
+def get_watermark(account_id: str, detector_id: str) -> int:
+    """마지막으로 반영한 finding의 updatedAt (epoch ms, 없으면 0)"""
+    row = get_connection().execute(
+        'SELECT updated_ms FROM finding_watermarks WHERE account_id = ? AND detector_id = ?',
+        (account_id, detector_id)
+    ).fetchone()
+    return row['updated_ms'] if row else 0
+
+
+def _histogram_buckets(row) -> List[tuple]:
+    """finding 하나가 기여하는 (dimension, bucket) 목록 - 보관된 finding은 기여하지 않음"""
+    if row['archived']:
+        return []
+    return [('severity', row['severity_label']), ('type', row['type'])]
+
+
+def _bump(conn, account_id: str, detector_id: str, buckets: List[tuple], delta: int):
+    for dimension, bucket in buckets:
+        conn.execute(
+            'INSERT INTO finding_histograms (account_id, detector_id, dimension, bucket, count) '
+            'VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT (account_id, detector_id, dimension, bucket) DO UPDATE SET count = count + excluded.count',
+            (account_id, detector_id, dimension, bucket, delta)
+        )
+
+
+def apply_findings(account_id: str, detector_id: str, region: Optional[str],
+                   findings: List[Dict], watermark_ms: int, synced_at: str) -> Dict:
+    """
+    finding 묶음 반영 및 워터마크 전진 (한 트랜잭션)
+
+    이미 있는 finding은 이전 값의 히스토그램 기여분을 빼고 새 값으로 다시 더합니다.
+
+    Args:
+        findings (list): id, type, title, severity, resource_type, resource_id,
+                         occurrences, archived, created_at, updated_at, updated_ms 키를 가진 요약
+        watermark_ms (int): 반영 후 저장할 워터마크 (기존보다 작으면 유지)
+
+    Returns:
+        dict: added, updated 건수
+    """
+    conn = get_connection()
+    added = updated = 0
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        for finding in findings:
+            previous = conn.execute(
+                'SELECT severity_label, type, archived FROM findings '
+                'WHERE account_id = ? AND detector_id = ? AND finding_id = ?',
+                (account_id, detector_id, finding['id'])
+            ).fetchone()
+            if previous is None:
+                added += 1
+            else:
+                updated += 1
+                _bump(conn, account_id, detector_id, _histogram_buckets(previous), -1)
+
+            label = severity_label(finding['severity'])
+            conn.execute(
+                'INSERT OR REPLACE INTO findings (account_id, detector_id, finding_id, region, type, title, '
+                'severity, severity_label, resource_type, resource_id, occurrences, archived, '
+                'created_at, updated_at, updated_ms) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (account_id, detector_id, finding['id'], region, finding['type'], finding.get('title'),
+                 finding['severity'], label, finding.get('resource_type'), finding.get('resource_id'),
+                 finding.get('occurrences', 1), int(bool(finding.get('archived'))),
+                 finding.get('created_at'), finding.get('updated_at'), finding['updated_ms'])
+            )
+            _bump(conn, account_id, detector_id,
+                  _histogram_buckets({'archived': finding.get('archived'), 'severity_label': label,
+                                      'type': finding['type']}), 1)
+
+        conn.execute(
+            'INSERT INTO finding_watermarks (account_id, detector_id, region, updated_ms, synced_at) '
+            'VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT (account_id, detector_id) DO UPDATE SET '
+            'region = excluded.region, synced_at = excluded.synced_at, '
+            'updated_ms = MAX(updated_ms, excluded.updated_ms)',
+            (account_id, detector_id, region, watermark_ms, synced_at)
+        )
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    return {'added': added, 'updated': updated}
+
+
+def get_histograms(account_id: str) -> Dict[str, Dict[str, int]]:
+    """계정 전체(모든 탐지기) 심각도/유형 히스토그램 - {'severity': {...}, 'type': {...}}"""
+    rows = get_connection().execute(
+        'SELECT dimension, bucket, SUM(count) AS count FROM finding_histograms '
+        'WHERE account_id = ? GROUP BY dimension, bucket HAVING SUM(count) > 0 ORDER BY count DESC',
+        (account_id,)
+    ).fetchall()
+    histograms = {dimension: {} for dimension in _HISTOGRAM_DIMENSIONS}
+    for row in rows:
+        histograms.setdefault(row['dimension'], {})[row['bucket']] = row['count']
+    return histograms
+
+
+def get_recent(account_id: str, limit: int = 20) -> List[Dict]:
+    """최근 변경된 finding (updatedAt 역순)"""
+    rows = get_connection().execute(
+        'SELECT detector_id, finding_id, region, type, title, severity, severity_label, resource_type, '
+        'resource_id, occurrences, archived, created_at, updated_at FROM findings '
+        'WHERE account_id = ? ORDER BY updated_ms DESC LIMIT ?',
+        (account_id, limit)
+    ).fetchall()
+    return [dict(row, archived=bool(row['archived'])) for row in rows]
+
+
+def get_daily_trend(account_id: str, since_ms: int) -> List[Dict]:
+    """since_ms 이후 변경된 finding의 일자(UTC)별 심각도 구간 건수"""
+    rows = get_connection().execute(
+        "SELECT date(updated_ms / 1000, 'unixepoch') AS day, severity_label, COUNT(*) AS count "
+        'FROM findings WHERE account_id = ? AND updated_ms >= ? AND archived = 0 '
+        'GROUP BY day, severity_label ORDER BY day',
+        (account_id, since_ms)
+    ).fetchall()
+    trend = {}
+    for row in rows:
+        trend.setdefault(row['day'], {'day': row['day']})[row['severity_label']] = row['count']
+    return list(trend.values())
+
+
+def get_sync_state(account_id: str) -> List[Dict]:
+    """탐지기별 워터마크/마지막 수집 시각"""
+    rows = get_connection().execute(
+        'SELECT detector_id, region, updated_ms, synced_at FROM finding_watermarks WHERE account_id = ?',
+        (account_id,)
+    ).fetchall()
+    return [dict(row) for row in rows]
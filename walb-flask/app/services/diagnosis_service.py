@@ -7,6 +7,7 @@ from datetime import datetime
 from botocore.exceptions import ClientError, NoCredentialsError # type: ignore
 from app.config.diagnosis_config import DiagnosisConfig
 from app.utils.aws_handler import AWSConnectionHandler
+from app.utils.iam_policy_analyzer import invalidate_authorization_details
 # 진단 로거 제거됨
 
 class DiagnosisService:
@@ -91,7 +92,7 @@ class DiagnosisService:
                 'error_message': str(e)
             }
     
-    def run_single_diagnosis(self, account, item_code, enable_logging=True):
+    def run_single_diagnosis(self, account, item_code, enable_logging=True, reuse_scan_cache=False):
         """
         개별 진단 항목 실행
         
@@ -99,6 +100,8 @@ class DiagnosisService:
             account: AWSAccount 모델 인스턴스
             item_code (str): 진단 항목 코드 (예: "1.1")
             enable_logging (bool): 로깅 활성화 여부
+            reuse_scan_cache (bool): 일괄 진단 중 수집한 IAM 권한 정보 재사용 여부
+                                     (False면 이전 진단의 수집 결과를 버리고 새로 수집)
             
         Returns:
             dict: 진단 결과
@@ -130,8 +133,11 @@ class DiagnosisService:
                     pass  # 로깅 제거됨
                 return result
             
+            if not reuse_scan_cache:
+                invalidate_authorization_details(getattr(account, 'account_id', None))
+            
             # 체커 인스턴스 생성 및 진단 실행
-            checker = self._get_checker_instance(item_code, aws_session)
+            checker = self._get_checker_instance(item_code, aws_session, getattr(account, 'account_id', None))
             if not checker:
                 result = {
                     'status': 'error',
@@ -216,13 +222,15 @@ class DiagnosisService:
                     pass  # 로깅 제거됨
                 return result
             
-            # 각 항목별 진단 실행
+            # 각 항목별 진단 실행 (IAM 권한 정보는 이번 진단 시작 시점에 한 번만 수집하여 2.1 ~ 2.3이 공유)
             results = {}
             success_count = 0
             failed_count = 0
+            invalidate_authorization_details(getattr(account, 'account_id', None))
             
             for item_code in item_codes:
-                result = self.run_single_diagnosis(account, item_code, enable_logging=enable_logging)
+                result = self.run_single_diagnosis(account, item_code, enable_logging=enable_logging,
+                                                   reuse_scan_cache=True)
                 results[item_code] = result
                 
                 if result['status'] == 'success':
@@ -280,8 +288,11 @@ class DiagnosisService:
                     'message': 'AWS 세션 생성에 실패했습니다.'
                 }
             
+            # 조치 대상은 현재 권한 정보로 다시 진단 (이전 진단의 수집 결과 사용 안 함)
+            invalidate_authorization_details(getattr(account, 'account_id', None))
+            
             # 체커 인스턴스 생성
-            checker = self._get_checker_instance(item_code, aws_session)
+            checker = self._get_checker_instance(item_code, aws_session, getattr(account, 'account_id', None))
             if not checker:
                 return {
                     'status': 'error',
@@ -310,13 +321,14 @@ class DiagnosisService:
                 'message': f'조치 실행 중 오류 발생: {str(e)}'
             }
     
-    def _get_checker_instance(self, item_code, aws_session):
+    def _get_checker_instance(self, item_code, aws_session, account_id=None):
         """
         진단 항목 코드로 체커 인스턴스 반환
         
         Args:
             item_code (str): 진단 항목 코드
             aws_session: AWS 세션 객체
+            account_id (str): 등록 계정 ID (체커의 STS 조회 생략용)
             
         Returns:
             BaseChecker instance or None: 체커 인스턴스
@@ -390,7 +402,10 @@ class DiagnosisService:
                 print(f"[DEBUG] 모듈 임포트 성공: {module_path}")
                 checker_class = getattr(module, class_name)
                 print(f"[DEBUG] 클래스 조회 성공: {class_name}")
-                return checker_class(session=aws_session)
+                checker = checker_class(session=aws_session)
+                if account_id:
+                    checker.account_id = account_id
+                return checker
             except ImportError as e:
                 print(f"체커 모듈 임포트 실패 ({module_path}): {str(e)}")
                 return None
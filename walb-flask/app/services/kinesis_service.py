@@ -2,6 +2,7 @@
 Splunk 로그 파이프라인 관리 모듈
 splunk-forwarder 인스턴스의 create_kinesis_service.sh 스크립트를 통해
 계정별 Splunk 통합 로그 파이프라인을 원격으로 관리
+(통합 서비스가 설치된 인스턴스에서는 계정 목록 파일 항목을 추가/제외하고 reload)
 """
 
 import subprocess
@@ -10,6 +11,9 @@ import json
 from typing import Dict, List, Optional, Any, Tuple
 from app.models.account import AWSAccount
 from app.config.ssh_config import SSHConfig
+from app.utils.ssh_pool import get_ssh_connection
+from app.utils.forwarder_manifest import (CONSOLIDATED_SERVICE_NAME, build_manifest_entry,
+                                          is_consolidated, update_manifest)
 
 logger = logging.getLogger(__name__)
 
@@ -27,24 +31,11 @@ class KinesisServiceManager:
         logger.info(f"SSH Config loaded - Host: {self.splunk_forwarder_host}, User: {self.ssh_user}")
         
     def _run_ssh_command(self, command: str, timeout: int = 60) -> Tuple[bool, str, str]:
-        """SSH를 통해 원격 명령어 실행"""
-        # SSH 설정 사용
-        config = {
-            'host': self.splunk_forwarder_host,
-            'user': self.ssh_user,
-            'key_path': self.ssh_key_path
-        }
-        
-        ssh_cmd = SSHConfig.get_ssh_command_base(config)
-        ssh_cmd.append(command)
+        """SSH를 통해 원격 명령어 실행 (다중화된 마스터 연결 재사용)"""
+        connection = get_ssh_connection(self.splunk_forwarder_host, self.ssh_user, self.ssh_key_path)
         
         try:
-            result = subprocess.run(
-                ssh_cmd,
-                capture_output=True,
-                text=True,
-                timeout=timeout
-            )
+            result = connection.run(command, timeout=timeout)
             
             success = result.returncode == 0
             return success, result.stdout, result.stderr
@@ -56,9 +47,52 @@ class KinesisServiceManager:
             logger.error(f"SSH command error: {e}")
             return False, "", str(e)
     
+    def _is_consolidated(self) -> bool:
+        """forwarder 인스턴스가 통합 서비스(계정 목록 파일)로 운영 중인지 확인"""
+        connection = get_ssh_connection(self.splunk_forwarder_host, self.ssh_user, self.ssh_key_path)
+        try:
+            return is_consolidated(connection)
+        except Exception as e:
+            logger.warning(f"통합 서비스 확인 실패, 계정별 서비스로 처리: {e}")
+            return False
+    
+    def _update_manifest(self, account_id: str, action: str, entry: Optional[Dict] = None) -> Tuple[bool, str, str]:
+        """통합 서비스 계정 목록 항목 변경 후 reload"""
+        connection = get_ssh_connection(self.splunk_forwarder_host, self.ssh_user, self.ssh_key_path)
+        
+        try:
+            result = update_manifest(connection, account_id, action, entry)
+            return result.returncode == 0, result.stdout, result.stderr
+        except subprocess.TimeoutExpired:
+            logger.error(f"Manifest update timeout: {account_id} {action}")
+            return False, "", "Command timeout"
+        except Exception as e:
+            logger.error(f"Manifest update error: {e}")
+            return False, "", str(e)
+    
     def create_kinesis_service(self, account: AWSAccount) -> Dict[str, Any]:
         """계정에 대한 Splunk 로그 파이프라인 구축"""
         try:
+            if self._is_consolidated():
+                # 통합 서비스: 계정별 서비스를 설치하지 않고 계정 목록에 추가
+                logger.info(f"Adding account {account.account_id} to consolidated Kinesis service")
+                success, stdout, stderr = self._update_manifest(account.account_id, 'enable',
+                                                                build_manifest_entry(account))
+                if success:
+                    return {
+                        "success": True,
+                        "message": f"통합 Splunk 로그 파이프라인에 계정이 추가되었습니다 (계정: {account.account_id})",
+                        "output": stdout,
+                        "service_name": CONSOLIDATED_SERVICE_NAME
+                    }
+                logger.error(f"Failed to add {account.account_id} to consolidated service: {stderr}")
+                return {
+                    "success": False,
+                    "message": f"Splunk 로그 파이프라인 구축 실패: {stderr}",
+                    "output": stdout,
+                    "error": stderr
+                }
+            
             # 스크립트 실행 명령어 구성 (sudo 권한 필요)
             if account.connection_type == 'role':
                 command = f"sudo bash {self.script_path} role {account.account_id} {account.role_arn} {account.primary_region}"
@@ -94,10 +128,13 @@ class KinesisServiceManager:
             }
     
     def start_kinesis_service(self, account_id: str) -> Dict[str, Any]:
-        """Kinesis 서비스 시작"""
+        """Kinesis 서비스 시작 (통합 서비스면 계정 목록에서 다시 포함)"""
         service_name = f"kinesis-splunk-forwarder-{account_id}"
         
         try:
+            if self._is_consolidated():
+                return self._toggle_consolidated_account(account_id, 'enable')
+            
             # systemctl enable 후 start
             enable_cmd = f"sudo systemctl enable {service_name}"
             start_cmd = f"sudo systemctl start {service_name}"
@@ -137,10 +174,13 @@ class KinesisServiceManager:
             }
     
     def stop_kinesis_service(self, account_id: str) -> Dict[str, Any]:
-        """Kinesis 서비스 중지"""
+        """Kinesis 서비스 중지 (통합 서비스면 계정 목록에서 제외, 다른 계정은 계속 포워딩)"""
         service_name = f"kinesis-splunk-forwarder-{account_id}"
         
         try:
+            if self._is_consolidated():
+                return self._toggle_consolidated_account(account_id, 'disable')
+            
             command = f"sudo systemctl stop {service_name}"
             success, stdout, stderr = self._run_ssh_command(command)
             
@@ -167,6 +207,24 @@ class KinesisServiceManager:
                 "error": str(e)
             }
     
+    def _toggle_consolidated_account(self, account_id: str, action: str) -> Dict[str, Any]:
+        """통합 서비스에서 계정 하나만 포함(enable)/제외(disable)"""
+        label = '시작' if action == 'enable' else '중지'
+        success, stdout, stderr = self._update_manifest(account_id, action)
+        if success:
+            logger.info(f"Consolidated Kinesis service {action}d account {account_id}")
+            return {
+                "success": True,
+                "message": f"Kinesis 서비스가 {label}되었습니다 (계정: {account_id}, 통합 서비스)",
+                "output": stdout
+            }
+        logger.error(f"Failed to {action} {account_id} in consolidated service: {stderr}")
+        return {
+            "success": False,
+            "message": f"서비스 {label} 실패: {stderr}",
+            "error": stderr
+        }
+    
     def get_service_status(self, account_id: str) -> Dict[str, Any]:
         """Kinesis 서비스 상태 확인"""
         service_name = f"kinesis-splunk-forwarder-{account_id}"
@@ -279,10 +337,23 @@ class KinesisServiceManager:
             return []
     
     def remove_kinesis_service(self, account_id: str) -> Dict[str, Any]:
-        """Kinesis 서비스 완전 제거"""
+        """Kinesis 서비스 완전 제거 (통합 서비스면 계정 목록에서 항목 삭제)"""
         service_name = f"kinesis-splunk-forwarder-{account_id}"
         
         try:
+            if self._is_consolidated():
+                success, stdout, stderr = self._update_manifest(account_id, 'remove')
+                if success:
+                    logger.info(f"Account {account_id} removed from consolidated Kinesis service")
+                    return {
+                        "success": True,
+                        "message": f"통합 Kinesis 서비스에서 계정이 제거되었습니다 (계정: {account_id})"
+                    }
+                return {
+                    "success": False,
+                    "message": f"서비스 제거 중 일부 오류 발생: {stderr}"
+                }
+            
             # 서비스 중지
             stop_result = self.stop_kinesis_service(account_id)
             
@@ -4,18 +4,227 @@ AWS 계정의 모니터링 상태를 관리합니다.
 SSH 연결을 통한 서비스 관리 기능을 포함합니다.
 """
 
+import ast
 import boto3
+import functools
 import logging
+import os
 import subprocess
 import json
-import os
-from datetime import datetime
+import shlex
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from typing import Dict, List, Optional, Tuple
 from botocore.exceptions import ClientError, NoCredentialsError
+from app.models import findings_store
 from app.models.account import AWSAccount
+from app.utils.region_cache import get_enabled_regions
+from app.utils.ssh_pool import get_ssh_connection
+from app.utils.data_store import get_config_value
+from app.utils.forwarder_manifest import (CONSOLIDATED_SERVICE_NAME, build_manifest_entry,
+                                          is_consolidated, update_manifest)
 
 logger = logging.getLogger(__name__)
 
+# 트레일/탐지기별 AWS 호출 최대 동시 실행 수
+_PROBE_MAX_WORKERS = 8
+
+# get_findings 한 번에 조회할 수 있는 최대 finding 수
+_GUARDDUTY_FINDINGS_BATCH = 50
+
+
+class _ThreadSafeSession:
+    """
+    여러 점검 스레드가 공유하는 boto3 세션 래퍼
+    
+    boto3 세션의 client() 생성은 스레드 안전하지 않으므로 잠금으로 직렬화합니다.
+    (생성된 클라이언트 자체는 스레드 간 공유 가능)
+    """
+    
+    def __init__(self, session):
+        self._session = session
+        self._lock = threading.Lock()
+    
+    def client(self, *args, **kwargs):
+        with self._lock:
+            return self._session.client(*args, **kwargs)
+    
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
+def _map_concurrently(func, items):
+    """항목별 호출을 병렬 실행하고 입력 순서대로 결과 반환 (항목이 1개 이하면 직접 호출)"""
+    items = list(items)
+    if len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(_PROBE_MAX_WORKERS, len(items))) as executor:
+        return list(executor.map(func, items))
+
+# Forwarder가 계정별로 기록하는 로그 종류 (/var/log/splunk/<계정 ID>/<종류>.log)
+FORWARDER_LOG_TYPES = ['cloudtrail', 'guardduty', 'security-hub']
+
+# 상태 에이전트(SplunkForwarder/forwarder_status_agent.py)에서 원격 스크립트로 옮겨 쓰는 함수/상수
+# 에이전트가 없을 때의 대체 스크립트도 같은 코드로 tail/follow 하도록 사본 대신 에이전트 소스에서 가져옴
+_STATUS_AGENT_SOURCE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    'SplunkForwarder', 'forwarder_status_agent.py'
+)
+_AGENT_SHARED_NAMES = ('_TAIL_BLOCK', '_MAX_FOLLOW_BYTES', 'tail_lines', 'complete_end', 'read_tail')
+_AGENT_HELPERS_MARKER = '# @AGENT_HELPERS@'
+
+
+@functools.lru_cache(maxsize=1)
+def _agent_helpers_source() -> str:
+    """
+    상태 에이전트 소스에서 공통 함수/상수 정의만 추출 (모듈을 import하지 않음)
+    
+    Raises:
+        OSError: 에이전트 소스 파일을 읽을 수 없을 때
+        ValueError: 필요한 정의가 없을 때
+    """
+    path = get_config_value('FORWARDER_STATUS_AGENT_SOURCE') or _STATUS_AGENT_SOURCE
+    with open(path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    
+    segments = {}
+    for node in ast.parse(source).body:
+        if isinstance(node, ast.FunctionDef):
+            name = node.name
+        elif isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            name = node.targets[0].id
+        else:
+            continue
+        if name in _AGENT_SHARED_NAMES:
+            segments[name] = ast.get_source_segment(source, node)
+    
+    missing = [name for name in _AGENT_SHARED_NAMES if name not in segments]
+    if missing:
+        raise ValueError(f"상태 에이전트 소스에 정의 없음: {', '.join(missing)}")
+    return '\n\n\n'.join(segments[name] for name in _AGENT_SHARED_NAMES)
+
+
+def _build_remote_script(template: str) -> str:
+    """원격 스크립트 템플릿의 표시 위치에 에이전트 공통 함수를 넣어 반환"""
+    return template.replace(_AGENT_HELPERS_MARKER, _agent_helpers_source())
+
+
+# splunk-forwarder 인스턴스에서 실행하는 상태 수집기 (인자: 계정 ID, tail 줄 수, 로그 종류 목록)
+# 원격 python3 표준 라이브러리만 사용하며 결과를 JSON 문서 하나로 출력
+_FORWARDER_STATUS_COLLECTOR = r'''
+import json, os, subprocess, sys, time, urllib.request
+
+account_id, tail_count, log_types = sys.argv[1], int(sys.argv[2]), [t for t in sys.argv[3].split(',') if t]
+service_name = 'kinesis-splunk-forwarder-' + account_id
+consolidated = not os.path.isfile('/etc/systemd/system/%s.service' % service_name) \
+    and os.path.isfile('/etc/systemd/system/kinesis-splunk-forwarder.service')
+if consolidated:
+    # 통합 모드 (한 프로세스가 여러 계정 포워딩)
+    service_name = 'kinesis-splunk-forwarder'
+log_dir = '/var/log/splunk/' + account_id
+script_path = '/opt/kinesis_splunk_forwarder.py'
+metrics_endpoint_files = ['/var/lib/kinesis-splunk-forwarder/metrics-endpoint-%s.json' % account_id,
+                          '%s/metrics-endpoint-%s.json' % (log_dir, account_id)]
+
+
+def run(*cmd):
+    try:
+        return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                              universal_newlines=True, timeout=10).stdout
+    except Exception:
+        return ''
+
+
+# @AGENT_HELPERS@
+
+
+def read_metrics():
+    # Forwarder 지표 엔드포인트 (주소는 Forwarder가 기록한 파일에서 찾음)
+    for path in metrics_endpoint_files:
+        try:
+            with open(path) as f:
+                endpoint = json.load(f)
+            url = endpoint.get('json_url') or endpoint['url'] + '/metrics.json'
+            with urllib.request.urlopen(url, timeout=3) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except Exception:
+            continue
+    return None
+
+
+props = {}
+for line in run('systemctl', 'show', service_name, '--no-pager',
+                '-p', 'LoadState', '-p', 'ActiveState', '-p', 'SubState',
+                '-p', 'UnitFileState', '-p', 'MainPID').splitlines():
+    key, _, value = line.partition('=')
+    props[key] = value.strip()
+
+service = {
+    'name': service_name,
+    'unit_file_exists': os.path.isfile('/etc/systemd/system/%s.service' % service_name),
+    'load_state': props.get('LoadState', ''),
+    'active_state': props.get('ActiveState', '') or 'inactive',
+    'sub_state': props.get('SubState', ''),
+    'unit_file_state': props.get('UnitFileState', '') or 'disabled',
+    'main_pid': int(props.get('MainPID') or 0),
+}
+
+logs = {}
+for log_type in log_types:
+    path = '%s/%s.log' % (log_dir, log_type)
+    # 줄 수는 증분으로 세는 상태 에이전트만 제공 (매 조회마다 파일 전체를 읽지 않도록 None)
+    log = {'path': path, 'exists': False, 'size': 0, 'mtime': 0, 'lines': None, 'tail': []}
+    try:
+        st = os.stat(path)
+        log.update(exists=True, size=st.st_size, mtime=int(st.st_mtime))
+        with open(path, 'rb') as f:
+            log['tail'] = tail_lines(f, st.st_size, tail_count)
+    except OSError:
+        pass
+    logs[log_type] = log
+
+recent_logs = []
+if service['active_state'] == 'active' and consolidated:
+    lines = run('journalctl', '-u', service_name, '--no-pager', '-n', '500').splitlines()
+    recent_logs = [line for line in lines if '[%s]' % account_id in line][-5:]
+elif service['active_state'] == 'active':
+    recent_logs = run('journalctl', '-u', service_name, '--no-pager', '-n', '5').splitlines()
+
+print(json.dumps({
+    'collected_at': time.time(),
+    'account_id': account_id,
+    'service': service,
+    'script': {'path': script_path, 'exists': os.path.isfile(script_path)},
+    'log_dir': {'path': log_dir, 'exists': os.path.isdir(log_dir)},
+    'logs': logs,
+    'recent_logs': recent_logs,
+    'metrics': read_metrics() if service['active_state'] == 'active' else None,
+}))
+'''
+
+# 로그 tail/follow 원격 스크립트 (상태 에이전트가 없을 때 사용, 에이전트 /tail과 같은 JSON 형식)
+# 인자: 파일 경로, 줄 수, 오프셋(없으면 -1), inode(없으면 -1), 최대 바이트
+_LOG_TAIL_SCRIPT = r'''
+import json, os, sys
+
+# @AGENT_HELPERS@
+
+
+path, lines, offset, inode, max_bytes = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4]), int(sys.argv[5])
+try:
+    result = read_tail(path, lines, None if offset < 0 else offset, None if inode < 0 else inode, max_bytes)
+except OSError:
+    result = {'path': path, 'exists': False}
+else:
+    result['total_lines'] = None
+print(json.dumps(result))
+'''
+
+# follow 조회 1회에 전송할 최대 바이트
+_LOG_FOLLOW_MAX_BYTES = 256 * 1024
+
 class MonitoringService:
     """AWS 리소스 모니터링을 담당하는 서비스 클래스"""
     
@@ -58,13 +267,36 @@ class MonitoringService:
             logger.error(f"Failed to create AWS session: {e}")
             raise
     
+    def _run_ssh_script(self, instance_ip: str, ssh_key_path: str, script: str,
+                        timeout: int = 60, **kwargs) -> subprocess.CompletedProcess:
+        """
+        원격 인스턴스에서 명령/스크립트 실행 (인스턴스별 다중화 SSH 연결 재사용)
+        
+        Raises:
+            subprocess.TimeoutExpired: 제한 시간 초과 시
+        """
+        connection = get_ssh_connection(instance_ip, 'ec2-user', ssh_key_path)
+        return connection.run(script, timeout=timeout, **kwargs)
+    
+    def _update_consolidated_account(self, instance_ip: str, ssh_key_path: str, account_id: str,
+                                     action: str, entry: Optional[Dict] = None,
+                                     timeout: int = 60) -> Optional[subprocess.CompletedProcess]:
+        """
+        통합 서비스가 설치된 인스턴스면 계정 목록 항목을 변경하고 reload
+        
+        Returns:
+            CompletedProcess or None: 계정별 서비스 인스턴스면 None (호출자가 기존 방식으로 처리)
+        """
+        connection = get_ssh_connection(instance_ip, 'ec2-user', ssh_key_path)
+        if not is_consolidated(connection):
+            return None
+        logger.info(f"Consolidated Kinesis service: {action} account {account_id}")
+        return update_manifest(connection, account_id, action, entry, timeout=timeout)
+    
     def create_service_account_via_ssh(self, instance_ip: str, ssh_key_path: str, 
                                      service_name: str, account_id: str) -> Dict:
         """SSH를 통해 원격 인스턴스에서 서비스 계정 생성"""
         try:
-            # SSH 키 권한 설정
-            os.chmod(ssh_key_path, 0o600)
-            
             # 서비스 계정 생성 스크립트
             create_script = f"""
 #!/bin/bash
@@ -113,20 +345,7 @@ echo "Service File: /etc/systemd/system/{service_name}.service"
 """
             
             # SSH로 스크립트 실행
-            ssh_command = [
-                'ssh', '-i', ssh_key_path,
-                '-o', 'StrictHostKeyChecking=no',
-                '-o', 'UserKnownHostsFile=/dev/null',
-                f'ec2-user@{instance_ip}',
-                create_script
-            ]
-            
-            result = subprocess.run(
-                ssh_command,
-                capture_output=True,
-                text=True,
-                timeout=300
-            )
+            result = self._run_ssh_script(instance_ip, ssh_key_path, create_script, timeout=300)
             
             if result.returncode == 0:
                 return {
@@ -280,12 +499,27 @@ echo "Service File: /etc/systemd/system/{service_name}.service"
     
     def remove_kinesis_service(self, instance_ip: str, ssh_key_path: str, 
                                  account_id: str) -> Dict:
-        """SSH를 통해 기존 Kinesis 서비스 완전 제거"""
+        """SSH를 통해 기존 Kinesis 서비스 완전 제거 (통합 서비스면 계정 목록 항목만 삭제)"""
         try:
-            os.chmod(ssh_key_path, 0o600)
-            
             service_name = f"kinesis-splunk-forwarder-{account_id}"
             
+            # 통합 서비스는 다른 계정도 포워딩하므로 서비스/스크립트를 지우지 않음
+            result = self._update_consolidated_account(instance_ip, ssh_key_path, account_id, 'remove')
+            if result is not None:
+                if result.returncode == 0:
+                    return {
+                        'success': True,
+                        'message': '통합 Kinesis 서비스에서 계정 제거 완료 (로그 데이터는 보존됨)',
+                        'output': result.stdout,
+                        'service_name': CONSOLIDATED_SERVICE_NAME,
+                        'logs_preserved': True
+                    }
+                return {
+                    'success': False,
+                    'message': f'Kinesis 서비스 제거 실패: {result.stderr}',
+                    'error': result.stderr
+                }
+            
             # 서비스 제거 스크립트
             remove_script = f"""
 #!/bin/bash
@@ -327,20 +561,7 @@ sudo systemctl daemon-reload
 echo "=== Kinesis Service Removal Completed ==="
 """
             
-            ssh_command = [
-                'ssh', '-i', ssh_key_path,
-                '-o', 'StrictHostKeyChecking=no', 
-                '-o', 'UserKnownHostsFile=/dev/null',
-                f'ec2-user@{instance_ip}',
-                remove_script
-            ]
-            
-            result = subprocess.run(
-                ssh_command,
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
+            result = self._run_ssh_script(instance_ip, ssh_key_path, remove_script, timeout=60)
             
             if result.returncode == 0:
                 return {
@@ -367,10 +588,31 @@ echo "=== Kinesis Service Removal Completed ==="
 
     def execute_kinesis_service_script(self, instance_ip: str, ssh_key_path: str, 
                                      account: 'AWSAccount', reinstall: bool = False) -> Dict:
-        """SSH를 통해 실제 create_kinesis_service.sh 스크립트 실행"""
+        """SSH를 통해 실제 create_kinesis_service.sh 스크립트 실행 (통합 서비스면 계정 목록에 추가)"""
         try:
-            # SSH 키 권한 설정
-            os.chmod(ssh_key_path, 0o600)
+            # 통합 서비스: 계정별 서비스를 설치하지 않고 계정 목록 항목 추가/교체 (재설치도 교체로 처리)
+            result = self._update_consolidated_account(instance_ip, ssh_key_path, account.account_id,
+                                                       'enable', build_manifest_entry(account))
+            if result is not None:
+                if result.returncode == 0:
+                    return {
+                        'success': True,
+                        'message': '통합 Kinesis 서비스에 계정 추가 완료',
+                        'actual_output': result.stdout + result.stderr,
+                        'service_details': {
+                            'service_name': CONSOLIDATED_SERVICE_NAME,
+                            'service_file': f'/etc/systemd/system/{CONSOLIDATED_SERVICE_NAME}.service',
+                            'python_script': '/opt/kinesis_splunk_forwarder.py',
+                            'status': 'reloaded',
+                            'log_destination': f'/var/log/splunk/{account.account_id}/ (cloudtrail.log, guardduty.log, security-hub.log)'
+                        }
+                    }
+                return {
+                    'success': False,
+                    'message': '통합 Kinesis 서비스 계정 추가 실패',
+                    'error': result.stderr or result.stdout,
+                    'return_code': result.returncode
+                }
             
             # 재설치인 경우 기존 서비스 먼저 제거
             if reinstall:
@@ -386,22 +628,9 @@ echo "=== Kinesis Service Removal Completed ==="
                 script_command = f"sudo ./create_kinesis_service.sh accesskey {account.account_id} {account.access_key_id} {account.secret_access_key} {account.primary_region}"
             
             # SSH로 스크립트 실행
-            ssh_command = [
-                'ssh', '-i', ssh_key_path,
-                '-o', 'StrictHostKeyChecking=no',
-                '-o', 'UserKnownHostsFile=/dev/null',
-                f'ec2-user@{instance_ip}',
-                script_command
-            ]
-            
-            logger.info(f"Executing SSH command: {' '.join(ssh_command[:-1])} [SCRIPT_COMMAND]")
+            logger.info(f"Executing SSH command: ec2-user@{instance_ip} [SCRIPT_COMMAND]")
             
-            result = subprocess.run(
-                ssh_command,
-                capture_output=True,
-                text=True,
-                timeout=120  # 2분 타임아웃
-            )
+            result = self._run_ssh_script(instance_ip, ssh_key_path, script_command, timeout=120)  # 2분 타임아웃
             
             # 결과 파싱 및 반환
             service_name = f"kinesis-splunk-forwarder-{account.account_id}"
@@ -456,8 +685,6 @@ echo "=== Kinesis Service Removal Completed ==="
                                  service_name: str) -> Dict:
         """SSH를 통해 리눅스 서비스 상태 확인"""
         try:
-            os.chmod(ssh_key_path, 0o600)
-            
             # 서비스 상태 확인 스크립트
             status_script = f"""
 #!/bin/bash
@@ -485,20 +712,7 @@ echo "--- Process Check ---"
 ps aux | grep {service_name} | grep -v grep || echo "No process found"
 """
             
-            ssh_command = [
-                'ssh', '-i', ssh_key_path,
-                '-o', 'StrictHostKeyChecking=no',
-                '-o', 'UserKnownHostsFile=/dev/null',
-                f'ec2-user@{instance_ip}',
-                status_script
-            ]
-            
-            result = subprocess.run(
-                ssh_command,
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
+            result = self._run_ssh_script(instance_ip, ssh_key_path, status_script, timeout=60)
             
             if result.returncode == 0:
                 output_lines = result.stdout.strip().split('\n')
@@ -532,13 +746,14 @@ ps aux | grep {service_name} | grep -v grep || echo "No process found"
                 'error': str(e)
             }
     
-    def check_cloudwatch_status(self, account: AWSAccount) -> Dict:
-        """CloudWatch 로그 그룹 상태 확인"""
+    def check_cloudwatch_status(self, account: AWSAccount, session=None,
+                                region: Optional[str] = None) -> Dict:
+        """CloudWatch 로그 그룹 상태 확인 (region 미지정 시 세션 기본 리전)"""
         try:
-            session = self.create_aws_session(account)
-            logs_client = session.client('logs')
+            session = session or self.create_aws_session(account)
+            logs_client = session.client('logs', region_name=region)
             
-            # 주요 로그 그룹들 확인
+            # 주요 로그 그룹들 확인 (접두어별 limit=1 조회 4회면 충분하므로 전체 카탈로그는 만들지 않음)
             log_groups = [
                 '/aws/lambda/security-function',
                 '/aws/apigateway/access-logs',
@@ -586,11 +801,12 @@ ps aux | grep {service_name} | grep -v grep || echo "No process found"
                 'error': str(e)
             }
     
-    def check_cloudtrail_status(self, account: AWSAccount) -> Dict:
-        """CloudTrail 상태 확인"""
+    def check_cloudtrail_status(self, account: AWSAccount, session=None,
+                                region: Optional[str] = None) -> Dict:
+        """CloudTrail 상태 확인 (region 미지정 시 세션 기본 리전)"""
         try:
-            session = self.create_aws_session(account)
-            cloudtrail_client = session.client('cloudtrail')
+            session = session or self.create_aws_session(account)
+            cloudtrail_client = session.client('cloudtrail', region_name=region)
             
             # 활성 CloudTrail 조회
             response = cloudtrail_client.describe_trails()
@@ -604,11 +820,13 @@ ps aux | grep {service_name} | grep -v grep || echo "No process found"
                 'total_trails': len(trails)
             }
             
-            for trail in trails:
-                trail_status = cloudtrail_client.get_trail_status(
-                    Name=trail['TrailARN']
-                )
-                
+            # 트레일별 get_trail_status 병렬 조회
+            trail_statuses = _map_concurrently(
+                lambda trail: cloudtrail_client.get_trail_status(Name=trail['TrailARN']),
+                trails
+            )
+            
+            for trail, trail_status in zip(trails, trail_statuses):
                 trail_info = {
                     'name': trail['Name'],
                     'is_logging': trail_status['IsLogging'],
@@ -632,11 +850,12 @@ ps aux | grep {service_name} | grep -v grep || echo "No process found"
                 'error': str(e)
             }
     
-    def check_guardduty_status(self, account: AWSAccount) -> Dict:
-        """GuardDuty 상태 확인"""
+    def check_guardduty_status(self, account: AWSAccount, session=None,
+                               region: Optional[str] = None) -> Dict:
+        """GuardDuty 상태 확인 (region 미지정 시 세션 기본 리전)"""
         try:
-            session = self.create_aws_session(account)
-            guardduty_client = session.client('guardduty')
+            session = session or self.create_aws_session(account)
+            guardduty_client = session.client('guardduty', region_name=region)
             
             # GuardDuty 탐지기 목록 조회
             response = guardduty_client.list_detectors()
@@ -649,13 +868,11 @@ ps aux | grep {service_name} | grep -v grep || echo "No process found"
                 'finding_counts': {'High': 0, 'Medium': 0, 'Low': 0}
             }
             
-            for detector_id in detector_ids:
+            def describe_detector(detector_id):
                 detector_response = guardduty_client.get_detector(
                     DetectorId=detector_id
                 )
                 
-                detector_status = detector_response.get('Status', 'DISABLED')
-                
                 # 최근 findings 개수 확인
                 try:
                     findings_response = guardduty_client.get_findings_statistics(
@@ -667,20 +884,22 @@ ps aux | grep {service_name} | grep -v grep || echo "No process found"
                     logger.warning(f"Error getting GuardDuty findings statistics: {e}")
                     findings_stats = {}
                 
-                detector_info = {
+                return {
                     'id': detector_id,
-                    'status': detector_status,
+                    'status': detector_response.get('Status', 'DISABLED'),
                     'service_role': detector_response.get('ServiceRole'),
                     'data_sources': detector_response.get('DataSources', {}),
                     'findings_stats': findings_stats
                 }
-                
+            
+            # 탐지기별 get_detector / get_findings_statistics 병렬 조회
+            for detector_info in _map_concurrently(describe_detector, detector_ids):
                 status['detectors'].append(detector_info)
-                if detector_status == 'ENABLED':
+                if detector_info['status'] == 'ENABLED':
                     status['active'] = True
                     
                     # Findings 통계 집계
-                    count_by_severity = findings_stats.get('CountBySeverity', [])
+                    count_by_severity = detector_info['findings_stats'].get('CountBySeverity', [])
                     if isinstance(count_by_severity, list):
                         for stat in count_by_severity:
                             severity = stat.get('Severity')
@@ -698,11 +917,167 @@ ps aux | grep {service_name} | grep -v grep || echo "No process found"
                 'error': str(e)
             }
     
-    def check_security_hub_status(self, account: AWSAccount) -> Dict:
-        """Security Hub 상태 확인"""
+    @staticmethod
+    def _to_epoch_ms(timestamp: str) -> int:
+        """GuardDuty ISO 8601 시각 문자열(예: 2024-01-01T00:00:00.000Z)을 epoch ms로 변환"""
+        parsed = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return int(parsed.timestamp() * 1000)
+    
+    @classmethod
+    def _summarize_finding(cls, finding: Dict) -> Dict:
+        """저장소에 보관할 finding 요약 (원본의 대부분은 Splunk로 수집되므로 보관하지 않음)"""
+        resource = finding.get('Resource', {})
+        resource_id = (
+            resource.get('InstanceDetails', {}).get('InstanceId')
+            or resource.get('AccessKeyDetails', {}).get('UserName')
+            or next((bucket.get('Name') for bucket in resource.get('S3BucketDetails', [])), None)
+            or resource.get('EksClusterDetails', {}).get('Name')
+        )
+        service = finding.get('Service', {})
+        return {
+            'id': finding['Id'],
+            'type': finding.get('Type', 'Unknown'),
+            'title': finding.get('Title'),
+            'severity': float(finding.get('Severity', 0)),
+            'resource_type': resource.get('ResourceType'),
+            'resource_id': resource_id,
+            'occurrences': service.get('Count', 1),
+            'archived': bool(service.get('Archived', False)),
+            'created_at': finding.get('CreatedAt'),
+            'updated_at': finding.get('UpdatedAt'),
+            'updated_ms': cls._to_epoch_ms(finding['UpdatedAt']),
+        }
+    
+    def sync_guardduty_findings(self, account: AWSAccount, session=None,
+                                region: Optional[str] = None) -> Dict:
+        """
+        GuardDuty findings 증분 수집 (탐지기는 리전 단위이므로 활성화된 모든 리전을 동시에 수집)
+        
+        탐지기별로 저장된 updatedAt 워터마크 이후 변경된 finding만 list_findings로 조회하고
+        (updatedAt 오름차순) get_findings를 50개씩 호출하여 로컬 저장소에 반영합니다.
+        묶음마다 워터마크를 전진시키므로 중간에 실패하거나 한도(GUARDDUTY_FINDINGS_MAX_PER_SYNC)에
+        걸려도 다음 수집이 이어서 진행합니다. 워터마크가 없으면 최근
+        GUARDDUTY_FINDINGS_BACKFILL_DAYS일 분량부터 시작합니다.
+        
+        Args:
+            region (str): 지정하면 해당 리전만 수집 (기본: 계정의 활성 리전 전체)
+        
+        Returns:
+            dict: success, regions, detectors([{region, detector_id, fetched, added, updated, complete}]),
+                  errors({리전: 오류}) - 일부 리전만 실패하면 success는 True
+        """
         try:
-            session = self.create_aws_session(account)
-            securityhub_client = session.client('securityhub')
+            session = _ThreadSafeSession(session or self.create_aws_session(account))
+            regions = [region] if region else get_enabled_regions(session, account.account_id)
+        except Exception as e:
+            logger.error(f"Error syncing GuardDuty findings: {e}")
+            return {'success': False, 'error': str(e)}
+        
+        detectors = []
+        errors = {}
+        for region_name, result in zip(regions, _map_concurrently(
+                lambda region_name: self._sync_guardduty_region(account, session, region_name), regions)):
+            if 'error' in result:
+                errors[region_name] = result['error']
+            else:
+                detectors.extend(result['detectors'])
+        
+        response = {'success': len(errors) < len(regions), 'regions': regions, 'detectors': detectors}
+        if errors:
+            response['errors'] = errors
+            if not response['success']:
+                response['error'] = next(iter(errors.values()))
+        return response
+    
+    def _sync_guardduty_region(self, account: AWSAccount, session, region: str) -> Dict:
+        """리전 하나의 탐지기별 findings 증분 수집 (sync_guardduty_findings 참고)"""
+        try:
+            guardduty_client = session.client('guardduty', region_name=region)
+            detector_ids = guardduty_client.list_detectors().get('DetectorIds', [])
+            
+            backfill_days = get_config_value('GUARDDUTY_FINDINGS_BACKFILL_DAYS', 30)
+            max_per_sync = get_config_value('GUARDDUTY_FINDINGS_MAX_PER_SYNC', 2000)
+            paginator = guardduty_client.get_paginator('list_findings')
+            results = []
+            
+            for detector_id in detector_ids:
+                watermark = findings_store.get_watermark(account.account_id, detector_id)
+                if not watermark:
+                    watermark = int((time.time() - backfill_days * 86400) * 1000)
+                
+                # 같은 ms에 갱신된 finding을 놓치지 않도록 워터마크 자체도 포함 (재반영은 멱등)
+                pages = paginator.paginate(
+                    DetectorId=detector_id,
+                    FindingCriteria={'Criterion': {'updatedAt': {'GreaterThanOrEqual': watermark}}},
+                    SortCriteria={'AttributeName': 'updatedAt', 'OrderBy': 'ASC'},
+                    PaginationConfig={'PageSize': _GUARDDUTY_FINDINGS_BATCH}
+                )
+                
+                detector_result = {'region': region, 'detector_id': detector_id, 'fetched': 0, 'added': 0,
+                                   'updated': 0, 'complete': True}
+                for page in pages:
+                    finding_ids = page.get('FindingIds', [])
+                    for start in range(0, len(finding_ids), _GUARDDUTY_FINDINGS_BATCH):
+                        batch = finding_ids[start:start + _GUARDDUTY_FINDINGS_BATCH]
+                        findings = guardduty_client.get_findings(
+                            DetectorId=detector_id, FindingIds=batch
+                        ).get('Findings', [])
+                        summaries = [self._summarize_finding(finding) for finding in findings]
+                        if not summaries:
+                            continue
+                        applied = findings_store.apply_findings(
+                            account.account_id, detector_id, region, summaries,
+                            watermark_ms=max(summary['updated_ms'] for summary in summaries),
+                            synced_at=datetime.now().isoformat()
+                        )
+                        detector_result['fetched'] += len(summaries)
+                        detector_result['added'] += applied['added']
+                        detector_result['updated'] += applied['updated']
+                    
+                    if detector_result['fetched'] >= max_per_sync:
+                        detector_result['complete'] = False
+                        break
+                
+                results.append(detector_result)
+            
+            return {'detectors': results}
+            
+        except Exception as e:
+            logger.error(f"Error syncing GuardDuty findings ({region}): {e}")
+            return {'error': str(e)}
+    
+    def get_guardduty_findings_overview(self, account: AWSAccount, recent_limit: int = 20,
+                                        trend_days: int = 14) -> Dict:
+        """
+        GuardDuty findings 대시보드 데이터 (증분 수집 후 로컬 저장소에서 조회)
+        
+        수집이 실패해도 이미 저장된 결과는 그대로 반환합니다. (sync에 오류 포함)
+        
+        Returns:
+            dict: sync, histograms(severity/type), trend(일자별 심각도 건수), recent, detectors
+        """
+        sync = self.sync_guardduty_findings(account)
+        account_id = account.account_id
+        since_ms = int((time.time() - trend_days * 86400) * 1000)
+        
+        return {
+            'account_id': account_id,
+            'sync': sync,
+            'histograms': findings_store.get_histograms(account_id),
+            'trend': findings_store.get_daily_trend(account_id, since_ms),
+            'recent': findings_store.get_recent(account_id, recent_limit),
+            'detectors': findings_store.get_sync_state(account_id),
+            'last_checked': datetime.now().isoformat()
+        }
+    
+    def check_security_hub_status(self, account: AWSAccount, session=None,
+                                  region: Optional[str] = None) -> Dict:
+        """Security Hub 상태 확인 (region 미지정 시 세션 기본 리전)"""
+        try:
+            session = session or self.create_aws_session(account)
+            securityhub_client = session.client('securityhub', region_name=region)
             
             # Security Hub 활성화 상태 확인
             try:
@@ -748,209 +1123,245 @@ ps aux | grep {service_name} | grep -v grep || echo "No process found"
                 'error': str(e)
             }
     
-    def check_log_files_status(self, instance_ip: str, ssh_key_path: str, 
-                             account_id: str) -> Dict:
-        """SSH를 통해 실제 로그 파일들의 수집 상태 확인"""
-        try:
-            os.chmod(ssh_key_path, 0o600)
-            
-            log_base_path = f"/var/log/splunk/{account_id}"
-            log_files = {
-                'cloudtrail': f'{log_base_path}/cloudtrail.log',
-                'guardduty': f'{log_base_path}/guardduty.log', 
-                'security-hub': f'{log_base_path}/security-hub.log'
-            }
-            
-            # 로그 파일 상태 확인 스크립트
-            check_script = f"""
-#!/bin/bash
-echo "=== Log Files Status Check ==="
-cd {log_base_path} 2>/dev/null || {{ echo "Directory not found: {log_base_path}"; exit 1; }}
-
-for log_file in cloudtrail.log guardduty.log security-hub.log; do
-    echo "--- $log_file ---"
-    if [ -f "$log_file" ]; then
-        # 파일 크기 (바이트)
-        size=$(stat -c%s "$log_file" 2>/dev/null || echo "0")
-        echo "SIZE:$size"
+    def collect_forwarder_status(self, instance_ip: str, ssh_key_path: str, account_id: str,
+                                 log_types: Optional[List[str]] = None, tail_lines: int = 3) -> Dict:
+        """
+        SSH 한 번으로 계정의 Forwarder 상태 스냅샷 수집
         
-        # 최근 수정 시간 (Unix timestamp)
-        mtime=$(stat -c%Y "$log_file" 2>/dev/null || echo "0")
-        echo "MTIME:$mtime"
+        Forwarder 호스트의 상태 에이전트(forwarder_status_agent.py)에 먼저 질의하고,
+        에이전트가 없거나 응답하지 않으면 같은 SSH 명령 안에서 원격 수집기로 대신 수집합니다.
+        둘 다 서비스 상태, 부팅 시 실행 여부, 스크립트 존재 여부,
+        로그 파일별 stat/라인 수/마지막 N줄을 같은 형식의 JSON 문서로 반환합니다.
+        (에이전트는 라인 수를 증분으로 유지하므로 파일 크기와 무관하게 응답)
         
-        # 라인 수
-        lines=$(wc -l < "$log_file" 2>/dev/null || echo "0")
-        echo "LINES:$lines"
+        Args:
+            log_types (list): 수집할 로그 종류 (기본: cloudtrail, guardduty, security-hub)
+            tail_lines (int): 로그 파일별로 가져올 마지막 줄 수
         
-        # 마지막 3줄 (로그 내용 샘플)
-        echo "LAST_LINES:"
-        tail -n 3 "$log_file" 2>/dev/null || echo "No content"
-        echo "END_LAST_LINES"
+        Returns:
+            dict: success, snapshot(원격 수집 결과) 또는 error
+        """
+        log_types = [log_type for log_type in (log_types or FORWARDER_LOG_TYPES) if log_type in FORWARDER_LOG_TYPES]
+        try:
+            collector = _build_remote_script(_FORWARDER_STATUS_COLLECTOR)
+        except (OSError, ValueError, SyntaxError) as e:
+            logger.error(f"Cannot build forwarder status collector: {e}")
+            return {'success': False, 'error': f'원격 수집기 준비 실패: {e}'}
+        command = (
+            f"sudo python3 - {shlex.quote(account_id)} {int(tail_lines)} {shlex.quote(','.join(log_types))}"
+            f" <<'WALB_COLLECTOR_EOF'\n{collector}\nWALB_COLLECTOR_EOF"
+        )
+        agent_port = get_config_value('FORWARDER_STATUS_AGENT_PORT', 8765)
+        if agent_port:
+            agent_url = (
+                f"http://127.0.0.1:{int(agent_port)}/status?account={account_id}"
+                f"&tail={int(tail_lines)}&logs={','.join(log_types)}"
+            )
+            command = f"curl -sf --max-time 5 {shlex.quote(agent_url)} || {command}"
         
-        echo "STATUS:EXISTS"
-    else
-        echo "SIZE:0"
-        echo "MTIME:0"
-        echo "LINES:0"
-        echo "LAST_LINES:"
-        echo "File not found"
-        echo "END_LAST_LINES"
-        echo "STATUS:NOT_FOUND"
-    fi
-    echo ""
-done
-"""
-            
-            ssh_command = [
-                'ssh', '-i', ssh_key_path,
-                '-o', 'StrictHostKeyChecking=no',
-                '-o', 'UserKnownHostsFile=/dev/null',
-                f'ec2-user@{instance_ip}',
-                check_script
-            ]
-            
-            result = subprocess.run(
-                ssh_command,
-                capture_output=True,
-                text=True,
+        try:
+            result = self._run_ssh_script(
+                instance_ip, ssh_key_path, command,
                 encoding='utf-8',
-                errors='ignore',  # 인코딩 에러 무시
-                timeout=60
+                errors='ignore',
+                timeout=30
             )
-            
-            if result.returncode == 0:
-                # 결과 파싱
-                return self._parse_log_status_output(result.stdout, log_files)
-            else:
-                return {
-                    'success': False,
-                    'message': '로그 파일 상태 확인 실패',
-                    'error': result.stderr
-                }
-                
-        except Exception as e:
-            logger.error(f"Error checking log files status: {e}")
-            return {
-                'success': False,
-                'message': f'로그 파일 상태 확인 중 오류: {str(e)}',
-                'error': str(e)
-            }
-    
-    def _parse_log_status_output(self, output: str, log_files: Dict) -> Dict:
-        """로그 상태 체크 출력 파싱"""
-        from datetime import datetime, timezone
-        import re
+        except subprocess.TimeoutExpired:
+            return {'success': False, 'error': 'Forwarder 상태 수집 시간 초과'}
+        
+        if result.returncode != 0:
+            return {'success': False, 'error': result.stderr.strip() or f'exit code {result.returncode}'}
         
-        # 계정 ID 안전하게 추출
-        account_id = 'unknown'
         try:
-            log_files_str = str(log_files.values())
-            if '/' in log_files_str:
-                path_parts = log_files_str.split('/')
-                if len(path_parts) >= 2:
-                    # /var/log/splunk/253157413163/cloudtrail.log 형태에서 계정 ID 추출 (다중 로그 파일 지원)
-                    for part in path_parts:
-                        if part.isdigit() and len(part) == 12:  # AWS 계정 ID는 12자리 숫자
-                            account_id = part
-                            break
-        except Exception:
-            account_id = 'unknown'
+            snapshot = json.loads(result.stdout)
+        except ValueError as e:
+            logger.error(f"Invalid forwarder status output for {account_id}: {e}")
+            return {'success': False, 'error': f'상태 수집 결과 형식 오류: {e}'}
+        
+        return {'success': True, 'snapshot': snapshot}
+    
+    @staticmethod
+    def _score_stream_metrics(stream: Dict, lag_warn_ms: float, stall_seconds: float) -> Dict:
+        """
+        Forwarder 지표 → 로그 파일 건강도
+        
+        - 소비 중인 shard가 있으면 40점
+        - 뒤처진 정도(MillisBehindLatest)가 기준 이하이면 30점
+        - 따라잡았거나 체크포인트가 최근에 전진했고 디코딩 실패가 없으면 30점
+          (새 이벤트가 없는 스트림은 파일이 오래 갱신되지 않아도 정상)
+        """
+        lag_ms = stream.get('millis_behind_latest')
+        checkpoint_age = stream.get('checkpoint_age_seconds')
+        caught_up = lag_ms is not None and lag_ms <= lag_warn_ms
+        progressing = caught_up or (checkpoint_age is not None and checkpoint_age <= stall_seconds)
+        
+        health = 0
+        if stream.get('active_shards'):
+            health += 40
+            if caught_up:
+                health += 30
+            # HEC 출력에서 spill이 쌓여 있으면 체크포인트는 전진해도 Splunk에는 도착하지 않은 상태
+            if progressing and not stream.get('decode_errors_per_second') and not stream.get('spill_bytes'):
+                health += 30
+        return {
+            'health_score': health,
+            'is_recent': bool(stream.get('active_shards')) and caught_up,
+            'metrics': {
+                'active_shards': stream.get('active_shards', 0),
+                'records_per_second': stream.get('records_per_second', 0.0),
+                'events_per_second': stream.get('events_per_second', 0.0),
+                'lag_seconds': round(lag_ms / 1000, 1) if lag_ms is not None else None,
+                'checkpoint_age_seconds': checkpoint_age,
+                'decode_errors_total': stream.get('decode_errors_total', 0),
+                'duplicates_suppressed_total': stream.get('duplicates_suppressed_total', 0),
+                'write_bytes_per_second': stream.get('write_bytes_per_second', 0.0),
+                'output': stream.get('output', 'file'),
+                'spill_bytes': stream.get('spill_bytes', 0),
+            }
+        }
+    
+    def build_log_files_status(self, snapshot: Dict) -> Dict:
+        """
+        수집 스냅샷 → 로그 파일 수집 상태 (파일별 크기/최근 갱신/건강도)
         
+        Forwarder 지표(snapshot['metrics'])가 있으면 처리량/지연/체크포인트로 건강도를 판단하고,
+        없으면(지표 엔드포인트 이전 버전, 서비스 중지) 파일 수정 시각으로 판단합니다.
+        """
+        collected_at = snapshot['collected_at']
+        account_id = snapshot['account_id']
+        stream_metrics = {
+            stream['log_type']: stream
+            for stream in ((snapshot.get('metrics') or {}).get('streams') or {}).values()
+        }
+        lag_warn_ms = get_config_value('FORWARDER_LAG_WARN_SECONDS', 300) * 1000
+        stall_seconds = get_config_value('FORWARDER_STALL_SECONDS', 600)
         result = {
             'success': True,
             'account_id': account_id,
             'log_files': {},
             'overall_health': 0,
             'total_size': 0,
-            'last_checked': datetime.now().isoformat()
+            'metrics_available': bool(stream_metrics),
+            'last_checked': datetime.fromtimestamp(collected_at).isoformat()
         }
         
-        # 각 로그 파일별로 파싱
-        current_file = None
-        current_data = {}
-        lines = output.split('\n')
+        for log_type, log in snapshot['logs'].items():
+            file_name = f'{log_type}.log'
+            file_data = {
+                'file_name': file_name,
+                'file_path': log['path'],
+                'exists': log['exists'],
+                'size': log['size'],
+                'size_mb': round(log['size'] / 1024 / 1024, 2),
+                'lines': log['lines'],
+                'last_modified': None,
+                'last_modified_ago': 'Unknown',
+                'is_recent': False,
+                'sample_lines': log['tail'],
+                'health_score': 0,
+                'health_source': 'mtime',
+                'metrics': None
+            }
+            if log['mtime']:
+                # 원격 호스트 시각 기준으로 경과 시간 계산 (로컬/원격 시계 차이 영향 없음)
+                minutes_ago = max(collected_at - log['mtime'], 0) / 60
+                file_data['last_modified'] = datetime.fromtimestamp(log['mtime']).isoformat()
+                file_data['last_modified_ago'] = self._format_time_ago(minutes_ago)
+                file_data['is_recent'] = minutes_ago <= 10
+            
+            if log_type in stream_metrics:
+                file_data.update(self._score_stream_metrics(stream_metrics[log_type], lag_warn_ms, stall_seconds))
+                file_data['health_source'] = 'metrics'
+            else:
+                health = 0
+                if file_data['exists']:
+                    health += 40  # 파일 존재
+                    if file_data['size'] > 0:
+                        health += 30  # 내용 있음
+                    if file_data['is_recent']:
+                        health += 30  # 최근 업데이트됨
+                file_data['health_score'] = health
+            
+            result['log_files'][file_name] = file_data
+            result['total_size'] += file_data['size']
         
-        for line in lines:
-            line = line.strip()
-            
-            if line.startswith('--- ') and line.endswith(' ---'):
-                # 새로운 파일 섹션 시작
-                if current_file and current_data:
-                    result['log_files'][current_file] = current_data
-                
-                current_file = line[4:-4]  # '--- cloudtrail.log ---' -> 'cloudtrail.log'
-                file_key = current_file.replace('.log', '')
-                current_data = {
-                    'file_name': current_file,
-                    'file_path': log_files.get(file_key, f'/var/log/splunk/{result["account_id"]}/{current_file}'),
-                    'exists': False,
-                    'size': 0,
-                    'size_mb': 0.0,
-                    'lines': 0,
-                    'last_modified': None,
-                    'last_modified_ago': 'Unknown',
-                    'is_recent': False,
-                    'sample_lines': [],
-                    'health_score': 0
+        file_count = len(result['log_files'])
+        result['overall_health'] = round(
+            sum(f['health_score'] for f in result['log_files'].values()) / max(file_count, 1)
+        )
+        result['total_size_mb'] = round(result['total_size'] / 1024 / 1024, 2)
+        return result
+    
+    def build_kinesis_service_status(self, snapshot: Dict) -> Dict:
+        """수집 스냅샷 → Kinesis 서비스 설치/실행 상태"""
+        service = snapshot['service']
+        result = {
+            'success': True,
+            'service_name': service['name'],
+            'account_id': snapshot['account_id'],
+            'service_exists': service['unit_file_exists'],
+            'service_running': service['active_state'] == 'active',
+            'service_enabled': service['unit_file_state'] == 'enabled',
+            'has_process': service['main_pid'] > 0,
+            'python_script_exists': snapshot['script']['exists'],
+            'log_directory_exists': snapshot['log_dir']['exists'],
+            'log_files': {
+                log_type: {
+                    'exists': log['exists'],
+                    'size': log['size'],
+                    'size_mb': round(log['size'] / 1024 / 1024, 2)
                 }
-                
-            elif line.startswith('SIZE:'):
-                current_data['size'] = int(line[5:])
-                current_data['size_mb'] = round(current_data['size'] / 1024 / 1024, 2)
-                result['total_size'] += current_data['size']
-                
-            elif line.startswith('MTIME:'):
-                mtime = int(line[6:])
-                if mtime > 0:
-                    current_data['last_modified'] = datetime.fromtimestamp(mtime).isoformat()
-                    # 최근 업데이트 여부 계산 (10분 이내면 최근)
-                    minutes_ago = (datetime.now().timestamp() - mtime) / 60
-                    current_data['last_modified_ago'] = self._format_time_ago(minutes_ago)
-                    current_data['is_recent'] = minutes_ago <= 10
-                    
-            elif line.startswith('LINES:'):
-                current_data['lines'] = int(line[6:])
-                
-            elif line.startswith('STATUS:'):
-                current_data['exists'] = line[7:] == 'EXISTS'
-                
-            elif line == 'LAST_LINES:':
-                # 다음 라인들부터 END_LAST_LINES까지 수집
-                current_data['sample_lines'] = []
-                
-            elif line == 'END_LAST_LINES':
-                pass  # 샘플 라인 수집 종료
-                
-            elif current_data and 'sample_lines' in current_data and line != 'LAST_LINES:':
-                if len(current_data['sample_lines']) < 3:
-                    current_data['sample_lines'].append(line)
-        
-        # 마지막 파일 데이터 추가
-        if current_file and current_data:
-            result['log_files'][current_file] = current_data
-        
-        # 건강도 점수 계산
-        total_health = 0
-        file_count = 0
+                for log_type, log in snapshot['logs'].items()
+            },
+            'recent_logs': snapshot['recent_logs'],
+            'installation_complete': False,
+            'status_summary': 'not_installed'
+        }
         
-        for file_key, file_data in result['log_files'].items():
-            health = 0
-            if file_data['exists']:
-                health += 40  # 파일 존재
-                if file_data['size'] > 0:
-                    health += 30  # 내용 있음
-                if file_data['is_recent']:
-                    health += 30  # 최근 업데이트됨
-            
-            file_data['health_score'] = health
-            total_health += health
-            file_count += 1
+        # 설치 완료 여부 판단
+        result['installation_complete'] = (
+            result['service_exists'] and 
+            result['python_script_exists'] and 
+            result['log_directory_exists']
+        )
         
-        result['overall_health'] = round(total_health / max(file_count, 1))
-        result['total_size_mb'] = round(result['total_size'] / 1024 / 1024, 2)
+        # 상태 요약 결정
+        if result['installation_complete']:
+            if result['service_running']:
+                result['status_summary'] = 'running'
+            elif result['service_enabled']:
+                result['status_summary'] = 'installed_stopped'
+            else:
+                result['status_summary'] = 'installed_disabled'
         
         return result
     
+    def build_service_status(self, snapshot: Dict) -> Dict:
+        """수집 스냅샷 → 모니터링 페이지 상단 서비스 상태 (KinesisServiceManager.get_service_status와 같은 형태)"""
+        service = snapshot['service']
+        running = service['active_state'] == 'active'
+        return {
+            'service_name': service['name'],
+            'exists': service['load_state'] == 'loaded',
+            'active': running,
+            'enabled': service['unit_file_state'] == 'enabled',
+            'running': running,
+            'last_output': '\n'.join(snapshot['recent_logs']),
+            'error': 'Service failed' if service['active_state'] == 'failed' else None
+        }
+    
+    def check_log_files_status(self, instance_ip: str, ssh_key_path: str, 
+                             account_id: str) -> Dict:
+        """SSH를 통해 실제 로그 파일들의 수집 상태 확인"""
+        collected = self.collect_forwarder_status(instance_ip, ssh_key_path, account_id)
+        if not collected['success']:
+            return {
+                'success': False,
+                'message': '로그 파일 상태 확인 실패',
+                'error': collected['error']
+            }
+        return self.build_log_files_status(collected['snapshot'])
+    
     def _format_time_ago(self, minutes: float) -> str:
         """시간 경과를 사용자 친화적 형태로 변환"""
         if minutes < 1:
@@ -967,310 +1378,103 @@ done
     def check_kinesis_service_exists(self, instance_ip: str, ssh_key_path: str, 
                                    account_id: str) -> Dict:
         """SSH를 통해 Kinesis 서비스가 이미 존재하는지 확인"""
-        try:
-            os.chmod(ssh_key_path, 0o600)
-            
-            service_name = f"kinesis-splunk-forwarder-{account_id}"
-            
-            # Kinesis 서비스 존재 여부 확인 스크립트
-            check_script = f"""
-#!/bin/bash
-echo "=== Kinesis Service Check ==="
-
-# 서비스 파일 존재 확인
-SERVICE_FILE="/etc/systemd/system/{service_name}.service"
-if [ -f "$SERVICE_FILE" ]; then
-    echo "SERVICE_FILE_EXISTS:true"
-    echo "SERVICE_FILE_PATH:$SERVICE_FILE"
-else
-    echo "SERVICE_FILE_EXISTS:false"
-fi
-
-# 서비스 상태 확인
-SERVICE_STATUS=$(sudo systemctl is-active {service_name} 2>/dev/null || echo "inactive")
-echo "SERVICE_STATUS:$SERVICE_STATUS"
-
-SERVICE_ENABLED=$(sudo systemctl is-enabled {service_name} 2>/dev/null || echo "disabled")
-echo "SERVICE_ENABLED:$SERVICE_ENABLED"
-
-# Python 스크립트 파일 확인
-PYTHON_SCRIPT="/opt/kinesis_splunk_forwarder.py"
-if [ -f "$PYTHON_SCRIPT" ]; then
-    echo "PYTHON_SCRIPT_EXISTS:true"
-    echo "PYTHON_SCRIPT_PATH:$PYTHON_SCRIPT"
-else
-    echo "PYTHON_SCRIPT_EXISTS:false"
-fi
-
-# 프로세스 확인
-PROCESS_COUNT=$(ps aux | grep kinesis_splunk_forwarder | grep -v grep | wc -l)
-echo "PROCESS_COUNT:$PROCESS_COUNT"
-
-# 로그 디렉토리 확인
-LOG_DIR="/var/log/splunk/{account_id}"
-if [ -d "$LOG_DIR" ]; then
-    echo "LOG_DIR_EXISTS:true"
-    echo "LOG_DIR_PATH:$LOG_DIR"
-    
-    # 로그 파일들 확인
-    for log_file in cloudtrail.log guardduty.log security-hub.log; do
-        if [ -f "$LOG_DIR/$log_file" ]; then
-            size=$(stat -c%s "$LOG_DIR/$log_file" 2>/dev/null || echo "0")
-            echo "LOG_FILE_${{log_file%.*}}_EXISTS:true"
-            echo "LOG_FILE_${{log_file%.*}}_SIZE:$size"
-        else
-            echo "LOG_FILE_${{log_file%.*}}_EXISTS:false"
-            echo "LOG_FILE_${{log_file%.*}}_SIZE:0"
-        fi
-    done
-else
-    echo "LOG_DIR_EXISTS:false"
-fi
-
-# 최근 로그 확인 (서비스가 활성화되어 있는 경우)
-if [ "$SERVICE_STATUS" == "active" ]; then
-    echo "RECENT_LOGS:"
-    sudo journalctl -u {service_name} --no-pager -n 5 2>/dev/null | tail -n 5 || echo "No recent logs"
-    echo "END_RECENT_LOGS"
-fi
-"""
-            
-            ssh_command = [
-                'ssh', '-i', ssh_key_path,
-                '-o', 'StrictHostKeyChecking=no',
-                '-o', 'UserKnownHostsFile=/dev/null',
-                f'ec2-user@{instance_ip}',
-                check_script
-            ]
-            
-            result = subprocess.run(
-                ssh_command,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
-            if result.returncode == 0:
-                return self._parse_kinesis_service_check(result.stdout, service_name, account_id)
-            else:
-                return {
-                    'success': False,
-                    'message': 'Kinesis 서비스 상태 확인 실패',
-                    'error': result.stderr
-                }
-                
-        except Exception as e:
-            logger.error(f"Error checking Kinesis service exists: {e}")
+        collected = self.collect_forwarder_status(instance_ip, ssh_key_path, account_id)
+        if not collected['success']:
             return {
                 'success': False,
-                'message': f'Kinesis 서비스 확인 중 오류: {str(e)}',
-                'error': str(e)
+                'message': 'Kinesis 서비스 상태 확인 실패',
+                'error': collected['error']
             }
-    
-    def _parse_kinesis_service_check(self, output: str, service_name: str, account_id: str) -> Dict:
-        """Kinesis 서비스 체크 출력 파싱"""
-        result = {
-            'success': True,
-            'service_name': service_name,
-            'account_id': account_id,
-            'service_exists': False,
-            'service_running': False,
-            'service_enabled': False,
-            'has_process': False,
-            'python_script_exists': False,
-            'log_directory_exists': False,
-            'log_files': {},
-            'recent_logs': [],
-            'installation_complete': False,
-            'status_summary': 'not_installed'
-        }
+        return self.build_kinesis_service_status(collected['snapshot'])
+
+    def get_log_file_tail(self, instance_ip: str, ssh_key_path: str, account_id: str, log_type: str,
+                          lines: int = 50, offset: Optional[int] = None, inode: Optional[int] = None) -> Dict:
+        """
+        로그 파일 tail / follow (SSH 1회)
         
-        lines = output.split('\n')
-        in_recent_logs = False
+        offset이 없으면 파일 끝에서 블록 단위로 거슬러 읽은 마지막 lines줄을 반환하고,
+        offset과 inode를 넘기면 그 이후 추가된 완결된 줄만 반환합니다. (최대 256KB, more=True면 남은 데이터 있음)
+        inode가 바뀌었거나 파일이 줄었으면(로테이션/truncate) rotated=True와 함께 새 파일의 tail을 반환합니다.
+        응답의 offset/inode를 다음 조회에 넘기면 됩니다.
         
-        for line in lines:
-            line = line.strip()
-            
-            if line.startswith('SERVICE_FILE_EXISTS:'):
-                result['service_exists'] = line.split(':')[1] == 'true'
-            elif line.startswith('SERVICE_STATUS:'):
-                status = line.split(':')[1]
-                result['service_running'] = status == 'active'
-            elif line.startswith('SERVICE_ENABLED:'):
-                enabled = line.split(':')[1]
-                result['service_enabled'] = enabled == 'enabled'
-            elif line.startswith('PYTHON_SCRIPT_EXISTS:'):
-                result['python_script_exists'] = line.split(':')[1] == 'true'
-            elif line.startswith('PROCESS_COUNT:'):
-                count = int(line.split(':')[1])
-                result['has_process'] = count > 0
-            elif line.startswith('LOG_DIR_EXISTS:'):
-                result['log_directory_exists'] = line.split(':')[1] == 'true'
-            elif line.startswith('LOG_FILE_') and '_EXISTS:' in line:
-                # LOG_FILE_cloudtrail_EXISTS:true
-                parts = line.split('_')
-                if len(parts) >= 3:
-                    log_type = parts[2]  # cloudtrail, guardduty, security-hub 등
-                    exists = line.split(':')[1] == 'true'
-                    if log_type not in result['log_files']:
-                        result['log_files'][log_type] = {}
-                    result['log_files'][log_type]['exists'] = exists
-            elif line.startswith('LOG_FILE_') and '_SIZE:' in line:
-                # LOG_FILE_cloudtrail_SIZE:12345
-                parts = line.split('_')
-                if len(parts) >= 3:
-                    log_type = parts[2]
-                    size = int(line.split(':')[1])
-                    if log_type not in result['log_files']:
-                        result['log_files'][log_type] = {}
-                    result['log_files'][log_type]['size'] = size
-                    result['log_files'][log_type]['size_mb'] = round(size / 1024 / 1024, 2)
-            elif line == 'RECENT_LOGS:':
-                in_recent_logs = True
-            elif line == 'END_RECENT_LOGS':
-                in_recent_logs = False
-            elif in_recent_logs and line:
-                result['recent_logs'].append(line)
+        Returns:
+            dict: success, mode(tail/follow), lines, offset, inode, size, rotated, more, total_lines
+        """
+        if log_type not in FORWARDER_LOG_TYPES:
+            return {
+                'success': False,
+                'message': f'지원하지 않는 로그 타입입니다: {log_type}',
+                'error': f'Invalid log type: {log_type}'
+            }
         
-        # 설치 완료 여부 판단
-        result['installation_complete'] = (
-            result['service_exists'] and 
-            result['python_script_exists'] and 
-            result['log_directory_exists']
+        path = f"/var/log/splunk/{account_id}/{log_type}.log"
+        try:
+            tail_script = _build_remote_script(_LOG_TAIL_SCRIPT)
+        except (OSError, ValueError, SyntaxError) as e:
+            logger.error(f"Cannot build log tail script: {e}")
+            return {'success': False, 'message': '로그 조회 스크립트 준비 실패', 'error': str(e)}
+        command = (
+            f"sudo python3 - {shlex.quote(path)} {int(lines)} "
+            f"{-1 if offset is None else int(offset)} {-1 if inode is None else int(inode)} {_LOG_FOLLOW_MAX_BYTES}"
+            f" <<'WALB_TAIL_EOF'\n{tail_script}\nWALB_TAIL_EOF"
         )
+        agent_port = get_config_value('FORWARDER_STATUS_AGENT_PORT', 8765)
+        if agent_port:
+            agent_url = f"http://127.0.0.1:{int(agent_port)}/tail?account={account_id}&log={log_type}&lines={int(lines)}"
+            if offset is not None and inode is not None:
+                agent_url += f"&offset={int(offset)}&inode={int(inode)}"
+            command = f"curl -sf --max-time 5 {shlex.quote(agent_url)} || {command}"
         
-        # 상태 요약 결정
-        if result['installation_complete']:
-            if result['service_running']:
-                result['status_summary'] = 'running'
-            elif result['service_enabled']:
-                result['status_summary'] = 'installed_stopped'
-            else:
-                result['status_summary'] = 'installed_disabled'
-        else:
-            result['status_summary'] = 'not_installed'
-        
-        return result
-
-    def get_log_file_preview(self, instance_ip: str, ssh_key_path: str, 
-                           account_id: str, log_type: str, lines: int = 50) -> Dict:
-        """SSH를 통해 특정 로그 파일의 최근 내용 가져오기"""
         try:
-            os.chmod(ssh_key_path, 0o600)
-            
-            log_file_path = f"/var/log/splunk/{account_id}/{log_type}.log"
-            
-            # 로그 파일 미리보기 스크립트 (UTF-8 처리 개선)
-            preview_script = f"""
-#!/bin/bash
-export LANG=en_US.UTF-8
-export LC_ALL=en_US.UTF-8
-
-echo "=== Log File Preview: {log_type}.log ==="
-if [ -f "{log_file_path}" ]; then
-    echo "FILE_EXISTS:true"
-    echo "FILE_SIZE:$(stat -c%s '{log_file_path}' 2>/dev/null || echo '0')"
-    echo "LAST_MODIFIED:$(stat -c%Y '{log_file_path}' 2>/dev/null || echo '0')"
-    echo "TOTAL_LINES:$(wc -l < '{log_file_path}' 2>/dev/null || echo '0')"
-    echo "PREVIEW_CONTENT:"
-    # UTF-8 강제 및 비-ASCII 문자 필터링
-    tail -n {lines} "{log_file_path}" 2>/dev/null | iconv -f utf-8 -t utf-8//IGNORE 2>/dev/null || echo "Content encoding error"
-    echo "END_PREVIEW_CONTENT"
-else
-    echo "FILE_EXISTS:false"
-    echo "ERROR:File not found: {log_file_path}"
-fi
-"""
-            
-            ssh_command = [
-                'ssh', '-i', ssh_key_path,
-                '-o', 'StrictHostKeyChecking=no',
-                '-o', 'UserKnownHostsFile=/dev/null',
-                f'ec2-user@{instance_ip}',
-                preview_script
-            ]
-            
-            result = subprocess.run(
-                ssh_command,
-                capture_output=True,
-                text=True,
+            result = self._run_ssh_script(
+                instance_ip, ssh_key_path, command,
                 encoding='utf-8',
-                errors='ignore',  # 인코딩 오류 무시
+                errors='ignore',
                 timeout=30
             )
-            
-            if result.returncode == 0:
-                return self._parse_log_preview_output(result.stdout, log_type, account_id)
-            else:
-                return {
-                    'success': False,
-                    'message': '로그 파일 미리보기 실패',
-                    'error': result.stderr
-                }
-                
-        except Exception as e:
-            logger.error(f"Error getting log file preview: {e}")
+        except subprocess.TimeoutExpired:
+            return {'success': False, 'message': '로그 조회 시간 초과', 'error': 'timeout'}
+        
+        if result.returncode != 0:
             return {
                 'success': False,
-                'message': f'로그 파일 미리보기 중 오류: {str(e)}',
-                'error': str(e)
+                'message': '로그 조회 실패',
+                'error': result.stderr.strip() or f'exit code {result.returncode}'
             }
+        
+        try:
+            tail = json.loads(result.stdout)
+        except ValueError as e:
+            logger.error(f"Invalid log tail output for {account_id}/{log_type}: {e}")
+            return {'success': False, 'message': '로그 조회 실패', 'error': f'결과 형식 오류: {e}'}
+        
+        return dict(tail, success=True, log_type=log_type, account_id=account_id)
     
-    def _parse_log_preview_output(self, output: str, log_type: str, account_id: str) -> Dict:
-        """로그 미리보기 출력 파싱"""
-        from datetime import datetime
+    def get_log_file_preview(self, instance_ip: str, ssh_key_path: str, 
+                           account_id: str, log_type: str, lines: int = 50) -> Dict:
+        """SSH를 통해 특정 로그 파일의 최근 내용 가져오기 (응답의 offset/inode로 follow 조회 가능)"""
+        tail = self.get_log_file_tail(instance_ip, ssh_key_path, account_id, log_type, lines=lines)
+        if not tail['success']:
+            return {
+                'success': False,
+                'message': tail.get('message', '로그 파일 미리보기 실패'),
+                'error': tail['error']
+            }
         
-        result = {
+        exists = tail.get('exists', False)
+        return {
             'success': True,
             'log_type': log_type,
             'account_id': account_id,
-            'file_exists': False,
-            'file_size': 0,
-            'total_lines': 0,
-            'last_modified': None,
-            'content': [],
-            'formatted_content': ''
+            'file_exists': exists,
+            'file_size': tail.get('size', 0),
+            'total_lines': tail.get('total_lines'),
+            'last_modified': datetime.fromtimestamp(tail['mtime']).isoformat() if exists else None,
+            'content': tail.get('lines', []),
+            'formatted_content': '\n'.join(tail.get('lines', [])),
+            'offset': tail.get('offset'),
+            'inode': tail.get('inode')
         }
-        
-        lines = output.split('\n')
-        in_content = False
-        
-        for line in lines:
-            line = line.strip()
-            
-            try:
-                if line.startswith('FILE_EXISTS:'):
-                    parts = line.split(':', 1)
-                    if len(parts) > 1:
-                        result['file_exists'] = parts[1] == 'true'
-                elif line.startswith('FILE_SIZE:'):
-                    parts = line.split(':', 1)
-                    if len(parts) > 1 and parts[1].isdigit():
-                        result['file_size'] = int(parts[1])
-                elif line.startswith('LAST_MODIFIED:'):
-                    parts = line.split(':', 1)
-                    if len(parts) > 1 and parts[1].isdigit():
-                        timestamp = int(parts[1])
-                        result['last_modified'] = datetime.fromtimestamp(timestamp).isoformat()
-                elif line.startswith('TOTAL_LINES:'):
-                    parts = line.split(':', 1)
-                    if len(parts) > 1 and parts[1].isdigit():
-                        result['total_lines'] = int(parts[1])
-                elif line == 'PREVIEW_CONTENT:':
-                    in_content = True
-                elif line == 'END_PREVIEW_CONTENT':
-                    in_content = False
-                elif in_content:
-                    result['content'].append(line)
-            except (ValueError, IndexError, OSError) as e:
-                # 파싱 오류가 발생해도 계속 진행
-                logger.warning(f"Log preview parsing warning for line '{line}': {e}")
-                continue
-        
-        # 내용을 하나의 문자열로 합치기
-        result['formatted_content'] = '\n'.join(result['content'])
-        
-        return result
 
     def _convert_datetime_to_string(self, obj):
         """재귀적으로 datetime 객체를 문자열로 변환"""
@@ -1284,12 +1488,28 @@ fi
             return obj
 
     def get_comprehensive_monitoring_status(self, account: AWSAccount) -> Dict:
-        """종합 모니터링 상태 확인"""
+        """
+        종합 모니터링 상태 확인
+        
+        세션(AssumeRole)을 한 번만 만들어 공유하고 4개 서비스 점검을 동시에 실행하므로
+        전체 소요 시간은 가장 느린 점검 하나와 비슷합니다.
+        """
         try:
-            cloudwatch_status = self.check_cloudwatch_status(account)
-            cloudtrail_status = self.check_cloudtrail_status(account)
-            guardduty_status = self.check_guardduty_status(account)
-            security_hub_status = self.check_security_hub_status(account)
+            session = _ThreadSafeSession(self.create_aws_session(account))
+            probes = {
+                'cloudwatch': self.check_cloudwatch_status,
+                'cloudtrail': self.check_cloudtrail_status,
+                'guardduty': self.check_guardduty_status,
+                'security_hub': self.check_security_hub_status
+            }
+            with ThreadPoolExecutor(max_workers=len(probes)) as executor:
+                futures = {name: executor.submit(probe, account, session) for name, probe in probes.items()}
+                results = {name: future.result() for name, future in futures.items()}
+            
+            cloudwatch_status = results['cloudwatch']
+            cloudtrail_status = results['cloudtrail']
+            guardduty_status = results['guardduty']
+            security_hub_status = results['security_hub']
             
             # 전체 상태 요약
             overall_status = {
@@ -1325,14 +1545,106 @@ fi
                 'last_checked': datetime.now().isoformat()
             }
 
+    def get_multi_region_security_status(self, account: AWSAccount,
+                                         regions: Optional[List[str]] = None) -> Dict:
+        """
+        활성화된 모든 리전의 서비스 상태 점검 (리전 × 서비스 매트릭스)
+        
+        GuardDuty/Security Hub는 리전 단위 서비스이므로 주 리전만 보면
+        다른 리전에서 비활성화된 탐지기를 알 수 없습니다.
+        (리전, 서비스) 점검을 하나의 스레드 풀에서 동시에 실행하여
+        전체 소요 시간을 단일 리전 점검과 비슷하게 유지합니다.
+        CloudWatch는 리전별 접두어 조회(limit=1)만 하므로 리전마다 로그 그룹 카탈로그를 만들지 않습니다.
+        
+        Args:
+            regions (list): 점검할 리전 (기본: 계정의 활성 리전 전체, 계정별 캐시)
+        
+        Returns:
+            dict: regions, matrix({리전: {서비스: 상태}}), summary({서비스: 활성/비활성 리전})
+        """
+        started = time.time()
+        try:
+            session = _ThreadSafeSession(self.create_aws_session(account))
+            regions = regions or get_enabled_regions(session, account.account_id)
+        except Exception as e:
+            logger.error(f"Error preparing multi-region sweep: {e}")
+            return {
+                'account_id': account.account_id,
+                'error': str(e),
+                'overall_health': 'error',
+                'last_checked': datetime.now().isoformat()
+            }
+        
+        probes = {
+            'cloudwatch': self.check_cloudwatch_status,
+            'cloudtrail': self.check_cloudtrail_status,
+            'guardduty': self.check_guardduty_status,
+            'security_hub': self.check_security_hub_status
+        }
+        max_workers = get_config_value('MONITORING_SWEEP_MAX_WORKERS', 16)
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(regions) * len(probes)))) as executor:
+            futures = {
+                (region, name): executor.submit(probe, account, session, region)
+                for region in regions
+                for name, probe in probes.items()
+            }
+            matrix = {region: {} for region in regions}
+            for (region, name), future in futures.items():
+                matrix[region][name] = future.result()
+        
+        summary = {
+            name: {
+                'active_regions': [region for region in regions if matrix[region][name].get('active')],
+                'inactive_regions': [region for region in regions if not matrix[region][name].get('active')]
+            }
+            for name in probes
+        }
+        
+        sweep = {
+            'account_id': account.account_id,
+            'account_name': account.cloud_name,
+            'primary_region': account.primary_region,
+            'regions': regions,
+            'services': list(probes),
+            'matrix': matrix,
+            'summary': summary,
+            # 리전 서비스(GuardDuty/Security Hub)가 모든 리전에서 켜져 있어야 정상
+            'overall_health': 'healthy' if not (
+                summary['guardduty']['inactive_regions'] or summary['security_hub']['inactive_regions']
+            ) else 'degraded',
+            'elapsed_seconds': round(time.time() - started, 2),
+            'last_checked': datetime.now().isoformat()
+        }
+        return self._convert_datetime_to_string(sweep)
+
     def manage_kinesis_service(self, instance_ip: str, ssh_key_path: str, 
                              account_id: str, action: str) -> Dict:
-        """SSH를 통해 Kinesis 서비스 관리 (start/stop/restart)"""
+        """SSH를 통해 Kinesis 서비스 관리 (start/stop/restart, 통합 서비스면 계정 목록 포함/제외 후 reload)"""
         try:
-            os.chmod(ssh_key_path, 0o600)
-            
             service_name = f"kinesis-splunk-forwarder-{account_id}"
             
+            if action in ('start', 'stop', 'restart'):
+                # 통합 서비스는 계정 하나 때문에 프로세스 전체를 멈추거나 재시작하지 않음
+                result = self._update_consolidated_account(instance_ip, ssh_key_path, account_id,
+                                                           'disable' if action == 'stop' else 'enable',
+                                                           timeout=30)
+                if result is not None:
+                    if result.returncode == 0:
+                        return {
+                            'success': True,
+                            'message': f'Kinesis 서비스 {action} 완료 (통합 서비스 계정 목록 반영)',
+                            'action': action,
+                            'service_name': CONSOLIDATED_SERVICE_NAME,
+                            'output': result.stdout,
+                            'return_code': result.returncode
+                        }
+                    return {
+                        'success': False,
+                        'message': f'Kinesis 서비스 {action} 실패',
+                        'error': result.stderr or result.stdout,
+                        'return_code': result.returncode
+                    }
+            
             # 액션에 따른 명령어 결정
             action_commands = {
                 'start': f'sudo systemctl start {service_name}',
@@ -1373,20 +1685,7 @@ sudo systemctl status {service_name} --no-pager -l || echo "Service status unava
 echo "=== Service {action.upper()} Completed ==="
 """
             
-            ssh_command = [
-                'ssh', '-i', ssh_key_path,
-                '-o', 'StrictHostKeyChecking=no',
-                '-o', 'UserKnownHostsFile=/dev/null',
-                f'ec2-user@{instance_ip}',
-                manage_script
-            ]
-            
-            result = subprocess.run(
-                ssh_command,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
+            result = self._run_ssh_script(instance_ip, ssh_key_path, manage_script, timeout=30)
             
             # 결과 파싱
             success_indicators = {
@@ -10,12 +10,29 @@ import boto3
 import json
 import time
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config as BotoConfig
 from botocore.exceptions import ClientError, NoCredentialsError
 from flask import current_app
 
 class AWSConnectionHandler:
     """AWS 연결 및 권한 테스트를 담당하는 클래스"""
     
+    # 권한 테스트 호출 목록 (표시명, 서비스, API, 파라미터)
+    PERMISSION_PROBES = [
+        ('EC2', 'ec2', 'describe_instances', {'MaxResults': 5}),
+        ('S3', 's3', 'list_buckets', {}),
+        ('IAM', 'iam', 'list_users', {'MaxItems': 5}),
+        ('CloudTrail', 'cloudtrail', 'describe_trails', {}),
+        ('CloudWatch', 'cloudwatch', 'list_metrics', {}),
+        ('RDS', 'rds', 'describe_db_instances', {'MaxRecords': 20}),
+        ('EKS', 'eks', 'list_clusters', {'maxResults': 5}),
+    ]
+    # 실패 시 경고 로그를 남기는 항목
+    LOGGED_PROBE_FAILURES = {'CloudWatch', 'RDS'}
+    # 연결 테스트용 클라이언트 설정 (응답 없는 계정이 전체 테스트를 붙잡지 않도록 제한)
+    PROBE_CLIENT_CONFIG = BotoConfig(connect_timeout=5, read_timeout=10, retries={'max_attempts': 2})
+    
     def __init__(self):
         """
         핸들러 초기화
@@ -111,7 +128,8 @@ class AWSConnectionHandler:
             # EC2 인스턴스 Role을 사용해서 STS 클라이언트 생성
             try:
                 # EC2 인스턴스의 Role 자격증명을 자동으로 사용
-                sts_client = boto3.client('sts', region_name=region)
+                # (여러 계정을 동시에 테스트하므로 공유 기본 세션 대신 호출별 세션 사용)
+                sts_client = boto3.session.Session().client('sts', region_name=region)
                 
                 current_app.logger.info("EC2 인스턴스 Role로 STS 클라이언트 생성 성공")
                 
@@ -278,7 +296,7 @@ class AWSConnectionHandler:
     def _test_service_permissions(self, session):
         """
         각 AWS 서비스별 권한 테스트 수행
-        - 실제 API 호출을 통해 권한 확인
+        - 실제 API 호출을 통해 권한 확인 (서비스별 호출은 병렬 실행)
         - 에러 발생 시 권한 없음으로 판단
         
         Args:
@@ -287,65 +305,30 @@ class AWSConnectionHandler:
         Returns:
             dict: 서비스별 권한 테스트 결과 (True/False)
         """
-        results = {}
-        
-        # EC2 권한 테스트
-        try:
-            ec2 = session.client('ec2')
-            ec2.describe_instances(MaxResults=5)
-            results['EC2'] = True
-        except:
-            results['EC2'] = False
-        
-        # S3 권한 테스트
-        try:
-            s3 = session.client('s3')
-            s3.list_buckets()
-            results['S3'] = True
-        except:
-            results['S3'] = False
-        
-        # IAM 권한 테스트
-        try:
-            iam = session.client('iam')
-            iam.list_users(MaxItems=5)
-            results['IAM'] = True
-        except:
-            results['IAM'] = False
-        
-        # CloudTrail 권한 테스트
-        try:
-            cloudtrail = session.client('cloudtrail')
-            cloudtrail.describe_trails()
-            results['CloudTrail'] = True
-        except:
-            results['CloudTrail'] = False
+        # boto3 Session은 스레드 안전하지 않으므로 클라이언트는 현재 스레드에서 미리 생성
+        clients = {}
+        for name, service, _, _ in self.PERMISSION_PROBES:
+            clients[name] = session.client(service, config=self.PROBE_CLIENT_CONFIG)
         
-        # CloudWatch 권한 테스트
-        try:
-            cloudwatch = session.client('cloudwatch')
-            cloudwatch.list_metrics()
-            results['CloudWatch'] = True
-        except Exception as e:
-            current_app.logger.warning(f"CloudWatch 테스트 실패: {str(e)}")
-            results['CloudWatch'] = False
+        def probe(name, operation, params):
+            try:
+                getattr(clients[name], operation)(**params)
+                return True, None
+            except Exception as e:
+                return False, e
         
-        # RDS 권한 테스트
-        try:
-            rds = session.client('rds')
-            rds.describe_db_instances(MaxRecords=20)
-            results['RDS'] = True
-        except Exception as e:
-            current_app.logger.warning(f"RDS 테스트 실패: {str(e)}")
-            results['RDS'] = False
+        with ThreadPoolExecutor(max_workers=len(self.PERMISSION_PROBES)) as executor:
+            futures = {
+                name: executor.submit(probe, name, operation, params)
+                for name, _, operation, params in self.PERMISSION_PROBES
+            }
         
-        # EKS 권한 테스트
-        try:
-            eks = session.client('eks')
-            eks.list_clusters(maxResults=5)
-            results['EKS'] = True
-        except:
-            results['EKS'] = False
+        results = {}
+        for name, _, _, _ in self.PERMISSION_PROBES:
+            allowed, error = futures[name].result()
+            results[name] = allowed
+            if error is not None and name in self.LOGGED_PROBE_FAILURES:
+                current_app.logger.warning(f"{name} 테스트 실패: {str(error)}")
         
         return results
     
@@ -361,7 +344,7 @@ class AWSConnectionHandler:
             int: 접근 가능한 리전 수
         """
         try:
-            ec2 = session.client('ec2')
+            ec2 = session.client('ec2', config=self.PROBE_CLIENT_CONFIG)
             regions = ec2.describe_regions()
             return len(regions['Regions'])
         except:
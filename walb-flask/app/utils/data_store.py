@@ -0,0 +1,56 @@
+"""
+로컬 데이터 파일 저장 유틸리티
+진단/모니터링 상태(커서, 캐시 등)를 DATA_DIR 아래 JSON 파일로 보관
+
+- get_config_value: Flask 앱 컨텍스트 밖(체커, 백그라운드 스레드)에서도 설정값 조회
+- load_json / save_json_atomic: 임시 파일 + rename 방식의 원자적 저장
+"""
+import json
+import os
+import tempfile
+from flask import current_app, has_app_context
+
+
+def get_config_value(key, default=None):
+    """앱 설정값 조회 (앱 컨텍스트가 없으면 config.Config 기본값 사용)"""
+    if has_app_context():
+        return current_app.config.get(key, default)
+    try:
+        from config import Config
+        return getattr(Config, key, default)
+    except ImportError:
+        return default
+
+
+def get_data_path(*parts):
+    """DATA_DIR 기준 파일 경로 반환 (상위 디렉토리 자동 생성)"""
+    data_dir = get_config_value('DATA_DIR') or os.path.join(os.getcwd(), 'data')
+    path = os.path.join(data_dir, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def load_json(path, default=None):
+    """JSON 파일 로드 (없거나 손상된 경우 default 반환)"""
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json_atomic(path, data):
+    """JSON 파일 원자적 저장 - 쓰는 도중 다른 워커가 읽어도 깨진 파일을 보지 않음"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,87 @@
+"""
+Kinesis Splunk Forwarder 통합 모드 계정 목록 관리
+kinesis_service와 monitoring_service가 공통으로 사용
+
+- forwarder 인스턴스에 통합 서비스(create_kinesis_multi_service.sh)가 설치되어 있으면
+  계정별 서비스를 설치/제어하지 않고 계정 목록 파일(accounts.json)의 항목을 추가/제외/삭제
+- 파일 수정은 원격에서 임시 파일 기록 → fsync → rename으로 교체 (소유자/권한 유지)
+- 수정 후 systemctl reload로 통합 서비스에 반영 (프로세스 재시작 없음, 중지 상태면 시작)
+- Access Key는 명령 인자가 아닌 표준 입력으로 전달
+"""
+import json
+import shlex
+import subprocess
+from typing import Dict, Optional
+
+CONSOLIDATED_SERVICE_NAME = 'kinesis-splunk-forwarder'
+ACCOUNTS_MANIFEST_PATH = '/etc/kinesis-splunk-forwarder/accounts.json'
+
+# 통합 서비스 unit 파일과 계정 목록 파일이 모두 있으면 통합 모드
+_DETECT_COMMAND = (f"sudo test -f /etc/systemd/system/{CONSOLIDATED_SERVICE_NAME}.service "
+                   f"&& sudo test -f {ACCOUNTS_MANIFEST_PATH}")
+
+# 원격에서 실행할 계정 목록 수정 스크립트 (표준 입력: {"account_id", "action", "entry", "enabled"})
+_MANIFEST_UPDATE_SCRIPT = r'''
+import json, os, sys, tempfile
+path = sys.argv[1]
+change = json.load(sys.stdin)
+with open(path, encoding="utf-8") as f:
+    data = json.load(f)
+entries = data.get("accounts", [])
+previous = [entry for entry in entries if str(entry.get("account_id")) == change["account_id"]]
+accounts = [entry for entry in entries if str(entry.get("account_id")) != change["account_id"]]
+if change["action"] != "remove":
+    entry = change.get("entry") or (previous[-1] if previous else None)
+    if entry is None:
+        print("account not in manifest: " + change["account_id"], file=sys.stderr)
+        sys.exit(3)
+    entry["enabled"] = change["enabled"]
+    accounts.append(entry)
+elif not previous:
+    print("account not in manifest: " + change["account_id"])
+data["accounts"] = accounts
+st = os.stat(path)
+fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".accounts.")
+with os.fdopen(fd, "w", encoding="utf-8") as f:
+    json.dump(data, f, indent=2)
+    f.flush()
+    os.fsync(f.fileno())
+os.chown(tmp, st.st_uid, st.st_gid)
+os.chmod(tmp, st.st_mode & 0o7777)
+os.replace(tmp, path)
+print("manifest updated: " + change["account_id"] + " " + change["action"])
+'''
+
+
+def is_consolidated(connection, timeout: int = 30) -> bool:
+    """forwarder 인스턴스가 통합 모드(계정 목록 파일 + 단일 서비스)인지 확인"""
+    return connection.run(_DETECT_COMMAND, timeout=timeout).returncode == 0
+
+
+def build_manifest_entry(account) -> Dict:
+    """AWSAccount → 계정 목록 항목 (create_kinesis_multi_service.sh 형식)"""
+    entry = {'account_id': account.account_id, 'region': account.primary_region}
+    if account.connection_type == 'role':
+        entry.update({'auth_mode': 'role', 'role_arn': account.role_arn})
+    else:
+        entry.update({'auth_mode': 'accesskey', 'access_key_id': account.access_key_id,
+                      'secret_access_key': account.secret_access_key})
+    return entry
+
+
+def update_manifest(connection, account_id: str, action: str, entry: Optional[Dict] = None,
+                    timeout: int = 60) -> subprocess.CompletedProcess:
+    """
+    계정 목록 항목 변경 후 통합 서비스에 반영
+
+    Args:
+        action (str): 'enable'(추가/재개, entry가 있으면 교체), 'disable'(제외, 항목은 유지), 'remove'(삭제)
+        entry (dict): 추가/교체할 항목 (build_manifest_entry 결과)
+
+    Raises:
+        subprocess.TimeoutExpired: 제한 시간 초과 시
+    """
+    change = {'account_id': str(account_id), 'action': action, 'entry': entry, 'enabled': action == 'enable'}
+    command = (f"sudo python3 -c {shlex.quote(_MANIFEST_UPDATE_SCRIPT)} {ACCOUNTS_MANIFEST_PATH} "
+               f"&& sudo systemctl reload-or-restart {CONSOLIDATED_SERVICE_NAME}")
+    return connection.run(command, timeout=timeout, input=json.dumps(change))
@@ -0,0 +1,398 @@
+"""
+IAM 정책 문서 분석 엔진
+2.1 ~ 2.3 권한 관리 체커가 공통으로 사용하는 정책 분석기
+
+- get_account_authorization_details 로 사용자/그룹/역할/정책 문서를 일괄 수집
+- 정책 Statement를 정규화하여 Action/Resource 와일드카드 매처로 컴파일
+- 수집 결과는 계정 단위로 짧은 TTL 동안 프로세스 전역에 보관
+  → 한 번의 진단에서 2.1 ~ 2.3이 같은 목록을 세 번 페이지네이션하지 않음
+  → 진단 시작/조치 후에는 invalidate_authorization_details로 비워 이전 진단 결과를 쓰지 않음
+- 관리형 정책은 (정책 ARN, DefaultVersionId) 키로 파싱 결과를 프로세스 전역에 캐시
+  → 변경되지 않은 정책은 다음 진단에서 다시 파싱하지 않음
+"""
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from urllib.parse import unquote
+
+# 파싱 캐시 최대 항목 수 (AWS 관리형 정책 전체 + 고객 관리형 정책 여유분)
+_PARSE_CACHE_MAX_ENTRIES = 4096
+
+# 계정별 권한 정보 수집 결과 유효 시간 (초) - 진단 한 번 동안 재사용
+_DETAILS_TTL_SECONDS = 120
+
+_parse_cache = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+_details_cache = {}
+_details_cache_lock = threading.Lock()
+_details_load_locks = {}
+
+
+def _as_list(value):
+    """문자열/리스트 형태의 정책 필드를 리스트로 정규화"""
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+def _is_service_wide_resource(pattern, service_prefix: str) -> bool:
+    """
+    Resource 패턴이 서비스의 모든 리소스를 덮는지 확인
+
+    '*' 외에 서비스 ARN 전체를 덮는 패턴(arn:aws:s3:::*, arn:aws:ec2:*:*:* 등)도 포함합니다.
+    리전/계정 부분은 값과 관계없이 허용하며, 리소스 부분이 '*'뿐일 때만 서비스 전체로 봅니다.
+    """
+    pattern = str(pattern)
+    if pattern and set(pattern) == {'*'}:
+        return True
+    # 'arn:aws:s3:*'처럼 뒤쪽 구간을 생략하면 마지막 '*'가 나머지 구간 전체를 덮음
+    parts = pattern.split(':', 5)
+    if not parts[-1] or set(parts[-1]) != {'*'}:
+        return False
+    checks = [('arn', 0), (service_prefix, 2)]
+    return all(_compile_patterns([parts[index]], ignore_case=True).match(value)
+               for value, index in checks if index < len(parts) - 1)
+
+
+def _compile_patterns(patterns, ignore_case):
+    """IAM 와일드카드(*, ?) 패턴 목록을 하나의 정규식으로 컴파일"""
+    if not patterns:
+        return None
+    parts = []
+    for pattern in patterns:
+        escaped = re.escape(str(pattern)).replace(r'\*', '.*').replace(r'\?', '.')
+        parts.append(f'(?:{escaped})')
+    flags = re.IGNORECASE if ignore_case else 0
+    return re.compile(r'\A(?:' + '|'.join(parts) + r')\Z', flags | re.DOTALL)
+
+
+class PolicyStatement:
+    """정규화 및 컴파일된 정책 Statement"""
+
+    __slots__ = ('effect', 'actions', 'not_actions', 'resources', 'not_resources',
+                 '_action_re', '_not_action_re',
+                 '_resource_re', '_not_resource_re',
+                 '_action_pattern_res', '_not_action_service_res')
+
+    def __init__(self, statement: Dict):
+        self.effect = statement.get('Effect', 'Deny')
+        self.actions = _as_list(statement.get('Action'))
+        self.not_actions = _as_list(statement.get('NotAction'))
+        self.resources = _as_list(statement.get('Resource'))
+        self.not_resources = _as_list(statement.get('NotResource'))
+
+        # Action은 대소문자 구분 없음, Resource(ARN)는 대소문자 구분
+        self._action_re = _compile_patterns(self.actions, ignore_case=True)
+        self._not_action_re = _compile_patterns(self.not_actions, ignore_case=True)
+        self._resource_re = _compile_patterns(self.resources, ignore_case=False)
+        self._not_resource_re = _compile_patterns(self.not_resources, ignore_case=False)
+
+        # 서비스 전체 권한 판정용 개별 패턴 매처 (Action 패턴 / NotAction 서비스 접두어)
+        self._action_pattern_res = [
+            (pattern, _compile_patterns([pattern], ignore_case=True))
+            for pattern in self.actions
+        ]
+        self._not_action_service_res = [
+            _compile_patterns([str(pattern).split(':', 1)[0]], ignore_case=True)
+            for pattern in self.not_actions
+        ]
+
+    @property
+    def is_allow(self) -> bool:
+        return self.effect == 'Allow'
+
+    def matches_action(self, action: str) -> bool:
+        """Statement가 해당 Action에 적용되는지 확인"""
+        if self._action_re is not None:
+            return bool(self._action_re.match(action))
+        if self._not_action_re is not None:
+            return not self._not_action_re.match(action)
+        return False
+
+    def matches_resource(self, resource: str) -> bool:
+        """Statement가 해당 Resource에 적용되는지 확인"""
+        if self._resource_re is not None:
+            return bool(self._resource_re.match(resource))
+        if self._not_resource_re is not None:
+            return not self._not_resource_re.match(resource)
+        return False
+
+    def covers_service_resources(self, service_prefix: str) -> bool:
+        """Statement의 Resource가 서비스의 모든 리소스('*', 'arn:aws:s3:::*' 등)에 적용되는지 확인"""
+        if self._resource_re is not None:
+            return any(_is_service_wide_resource(pattern, service_prefix) for pattern in self.resources)
+        return self.matches_resource('*')
+
+    def grants_service_wildcard(self, service_prefix: str) -> Optional[str]:
+        """
+        서비스 전체 권한(<prefix>:*)을 서비스의 모든 리소스에 허용하는지 확인
+
+        패턴을 리터럴 문자열 '<prefix>:*' 에 매칭시켜, 해당 서비스의 임의 Action을
+        모두 덮는 패턴('*', 'ec2:*', 'ec*:*' 등)만 과도한 권한으로 판정합니다.
+
+        Returns:
+            str or None: 권한을 부여한 Action 패턴 (없으면 None)
+        """
+        if not self.is_allow or not self.covers_service_resources(service_prefix):
+            return None
+
+        probe = f'{service_prefix}:*'
+        if self._action_re is not None:
+            for pattern, pattern_re in self._action_pattern_res:
+                if pattern_re.match(probe):
+                    return pattern
+            return None
+
+        if self._not_action_re is not None:
+            # NotAction 허용: 서비스 접두어가 제외 목록에 걸리지 않으면 전체 권한
+            for service_re in self._not_action_service_res:
+                if service_re.match(service_prefix):
+                    return None
+            return f'NotAction:{",".join(str(p) for p in self.not_actions)}'
+
+        return None
+
+
+class CompiledPolicy:
+    """파싱 완료된 정책 문서"""
+
+    __slots__ = ('statements',)
+
+    def __init__(self, document):
+        statements = []
+        if isinstance(document, str):
+            # botocore가 디코딩하지 못한 URL 인코딩 JSON 문서 대비
+            try:
+                document = json.loads(unquote(document))
+            except ValueError:
+                document = None
+        if isinstance(document, dict):
+            for statement in _as_list(document.get('Statement')):
+                if isinstance(statement, dict):
+                    statements.append(PolicyStatement(statement))
+        self.statements = statements
+
+    def wildcard_grants(self, service_prefixes) -> Dict[str, str]:
+        """
+        서비스 접두어별 전체 권한 부여 여부 확인
+
+        Returns:
+            dict: {서비스 접두어: 권한을 부여한 Action 패턴}
+        """
+        grants = {}
+        for prefix in service_prefixes:
+            for statement in self.statements:
+                matched = statement.grants_service_wildcard(prefix)
+                if matched:
+                    grants[prefix] = matched
+                    break
+        return grants
+
+
+def get_cached_policy(policy_arn: str, version_id: str) -> Optional[CompiledPolicy]:
+    """(정책 ARN, 버전 ID) 키로 캐시된 파싱 결과 조회"""
+    key = (policy_arn, version_id)
+    with _parse_cache_lock:
+        compiled = _parse_cache.get(key)
+        if compiled is not None:
+            _parse_cache.move_to_end(key)
+        return compiled
+
+
+def compile_managed_policy(policy_arn: str, version_id: str, document) -> CompiledPolicy:
+    """
+    관리형 정책 문서 컴파일 (버전 키 캐시 사용)
+
+    (정책 ARN, DefaultVersionId)가 같으면 이전 진단에서 파싱한 결과를 재사용합니다.
+    """
+    compiled = get_cached_policy(policy_arn, version_id)
+    if compiled is not None:
+        return compiled
+
+    key = (policy_arn, version_id)
+    compiled = CompiledPolicy(document)
+
+    with _parse_cache_lock:
+        _parse_cache[key] = compiled
+        _parse_cache.move_to_end(key)
+        while len(_parse_cache) > _PARSE_CACHE_MAX_ENTRIES:
+            _parse_cache.popitem(last=False)
+    return compiled
+
+
+def invalidate_authorization_details(account_id: Optional[str] = None):
+    """계정(없으면 전체)의 권한 정보 수집 결과 무효화 (진단 시작/조치 전 호출)"""
+    with _details_cache_lock:
+        if not account_id:
+            _details_cache.clear()
+        else:
+            _details_cache.pop(account_id, None)
+
+
+def get_parse_cache_stats() -> Dict:
+    """파싱 캐시 상태 반환"""
+    with _parse_cache_lock:
+        return {'entries': len(_parse_cache), 'max_entries': _PARSE_CACHE_MAX_ENTRIES}
+
+
+class IAMPolicyAnalyzer:
+    """계정 단위 IAM 정책 분석기"""
+
+    ENTITY_FILTERS = ['User', 'Group', 'Role', 'LocalManagedPolicy', 'AWSManagedPolicy']
+
+    def __init__(self, session, account_id: Optional[str] = None):
+        self.session = session
+        self.account_id = account_id
+        self._details = None
+
+    def load(self) -> Dict:
+        """
+        get_account_authorization_details로 계정의 권한 정보 일괄 수집
+
+        계정 ID가 있으면 _DETAILS_TTL_SECONDS 동안 캐시된 결과를 재사용하며,
+        같은 계정을 여러 체커가 동시에 요청해도 수집은 한 번만 수행합니다.
+
+        Returns:
+            dict: users, groups, roles, policies(ARN 키) 목록
+        """
+        if self._details is not None:
+            return self._details
+        if not self.account_id:
+            self._details = self._fetch()
+            return self._details
+
+        with _details_cache_lock:
+            cached = _details_cache.get(self.account_id)
+            if cached is not None and time.time() - cached[0] <= _DETAILS_TTL_SECONDS:
+                self._details = cached[1]
+                return self._details
+            load_lock = _details_load_locks.setdefault(self.account_id, threading.Lock())
+
+        with load_lock:
+            # 대기하는 동안 다른 체커가 수집을 마쳤을 수 있음
+            with _details_cache_lock:
+                cached = _details_cache.get(self.account_id)
+            if cached is None or time.time() - cached[0] > _DETAILS_TTL_SECONDS:
+                cached = (time.time(), self._fetch())
+                with _details_cache_lock:
+                    # 만료된 다른 계정의 수집 결과는 여기서 정리 (계정 목록이 바뀌어도 쌓이지 않음)
+                    for account_id in [key for key, (fetched_at, _) in _details_cache.items()
+                                       if cached[0] - fetched_at > _DETAILS_TTL_SECONDS]:
+                        del _details_cache[account_id]
+                    _details_cache[self.account_id] = cached
+        self._details = cached[1]
+        return self._details
+
+    def _fetch(self) -> Dict:
+        """get_account_authorization_details 전체 페이지네이션"""
+        iam = self.session.client('iam')
+        details = {'users': [], 'groups': [], 'roles': [], 'policies': {}}
+
+        paginator = iam.get_paginator('get_account_authorization_details')
+        for page in paginator.paginate(Filter=self.ENTITY_FILTERS):
+            details['users'].extend(page.get('UserDetailList', []))
+            details['groups'].extend(page.get('GroupDetailList', []))
+            details['roles'].extend(page.get('RoleDetailList', []))
+            for policy in page.get('Policies', []):
+                details['policies'][policy['Arn']] = policy
+        return details
+
+    def _get_compiled_managed_policy(self, policy_arn: str) -> Optional[CompiledPolicy]:
+        """ARN으로 관리형 정책의 기본 버전을 컴파일하여 반환"""
+        policy = self._details['policies'].get(policy_arn)
+        if not policy:
+            return None
+
+        version_id = policy.get('DefaultVersionId')
+        # 캐시 적중 시 버전 목록을 훑을 필요도 없음
+        compiled = get_cached_policy(policy_arn, version_id)
+        if compiled is not None:
+            return compiled
+
+        document = None
+        for version in policy.get('PolicyVersionList', []):
+            if version.get('IsDefaultVersion') or version.get('VersionId') == version_id:
+                document = version.get('Document')
+                break
+        return compile_managed_policy(policy_arn, version_id, document)
+
+    def _iter_entities(self):
+        """(유형, 이름, 엔티티 상세) 순회"""
+        for user in self._details['users']:
+            yield 'user', user['UserName'], user, user.get('UserPolicyList', [])
+        for group in self._details['groups']:
+            yield 'group', group['GroupName'], group, group.get('GroupPolicyList', [])
+        for role in self._details['roles']:
+            yield 'role', role['RoleName'], role, role.get('RolePolicyList', [])
+
+    def find_overly_permissive(self, service_prefixes: Dict[str, str],
+                               flagged_policy_arns: Optional[Dict[str, str]] = None) -> List[Dict]:
+        """
+        과도한 권한이 부여된 주체 탐지
+
+        Args:
+            service_prefixes (dict): {Action 서비스 접두어: 표시명} (예: {'ec2': 'EC2'})
+            flagged_policy_arns (dict): 연결만으로 과도한 권한으로 보는 AWS 관리형 정책 {ARN: 표시명}
+
+        Returns:
+            list: 주체/정책 조합별 탐지 결과
+        """
+        self.load()
+        flagged_policy_arns = flagged_policy_arns or {}
+        findings = []
+
+        for entity_type, entity_name, entity, inline_policies in self._iter_entities():
+            # 관리형 정책 (AWS 관리형 + 고객 관리형)
+            for attached in entity.get('AttachedManagedPolicies', []):
+                policy_arn = attached['PolicyArn']
+                services = set()
+                actions = set()
+
+                if policy_arn in flagged_policy_arns:
+                    services.add(flagged_policy_arns[policy_arn])
+
+                compiled = self._get_compiled_managed_policy(policy_arn)
+                if compiled is not None:
+                    for prefix, action in compiled.wildcard_grants(service_prefixes).items():
+                        services.add(service_prefixes[prefix])
+                        actions.add(action)
+
+                if services:
+                    policy_type = 'aws_managed' if ':aws:policy/' in policy_arn else 'customer_managed'
+                    findings.append(self._build_finding(
+                        entity_type, entity_name, attached['PolicyName'],
+                        policy_arn, policy_type, services, actions
+                    ))
+
+            # 인라인 정책 (버전이 없으므로 캐시하지 않고 매번 컴파일)
+            for inline in inline_policies:
+                compiled = CompiledPolicy(inline.get('PolicyDocument'))
+                grants = compiled.wildcard_grants(service_prefixes)
+                if grants:
+                    services = {service_prefixes[prefix] for prefix in grants}
+                    findings.append(self._build_finding(
+                        entity_type, entity_name, inline['PolicyName'],
+                        None, 'inline', services, set(grants.values())
+                    ))
+
+        return findings
+
+    @staticmethod
+    def _build_finding(entity_type, entity_name, policy_name, policy_arn,
+                       policy_type, services, actions):
+        """탐지 결과 항목 생성"""
+        return {
+            'type': entity_type,
+            'name': entity_name,
+            'policy': policy_name,
+            'service': ', '.join(sorted(services)),
+            'policy_arn': policy_arn,
+            'policy_type': policy_type,
+            'matched_actions': sorted(actions)
+        }
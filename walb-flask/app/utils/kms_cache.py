@@ -0,0 +1,329 @@
+"""
+KMS 키/별칭 메타데이터 캐시
+4.2, 4.3, 4.5, 4.6, 4.15 암호화 체커가 공통으로 사용하는 계정 단위 캐시
+
+- (계정 ID, 리전) 단위로 list_keys / list_aliases 페이지네이션 호출 1회로 인덱스 구축
+- 키 ID, 키 ARN, 별칭 이름, 별칭 ARN → 키 ID 인덱스로 O(1) 조회
+- 키 관리 주체(CUSTOMER/AWS)는 'alias/aws/' 별칭으로 판정 (키별 describe_key 불필요)
+- 키 상태/교체(rotation) 여부는 키별 최초 요청 시 한 번만 조회하여 캐시에 보관
+- 체커마다 세션이 새로 생성되므로 캐시는 프로세스 전역에 TTL과 함께 보관
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+from botocore.exceptions import ClientError
+
+# 캐시 유효 시간 (초)
+_KMS_CACHE_TTL_SECONDS = 300
+
+# AWS 관리형 키 별칭 접두어
+AWS_MANAGED_ALIAS_PREFIX = 'alias/aws/'
+
+KEY_MANAGER_CUSTOMER = 'CUSTOMER'
+KEY_MANAGER_AWS = 'AWS'
+KEY_MANAGER_UNKNOWN = 'UNKNOWN'
+
+KEY_MANAGER_LABELS = {
+    KEY_MANAGER_CUSTOMER: '고객 관리형 키',
+    KEY_MANAGER_AWS: 'AWS 관리형 키',
+    KEY_MANAGER_UNKNOWN: '확인 불가',
+}
+
+_cache = {}
+_cache_lock = threading.Lock()
+_build_locks = {}
+
+
+def _parse_kms_arn(value):
+    """KMS ARN에서 (리전, 계정 ID) 추출 (ARN이 아니면 None)"""
+    if not value or not value.startswith('arn:'):
+        return None
+    parts = value.split(':', 5)
+    if len(parts) < 6 or parts[2] != 'kms':
+        return None
+    return parts[3], parts[4]
+
+
+class KmsMetadata:
+    """(계정, 리전) 단위 KMS 키/별칭 인덱스"""
+
+    def __init__(self, account_id: str, region: str):
+        self.account_id = account_id
+        self.region = region
+        self.built_at = 0.0
+        self.keys = {}          # 키 ID → 키 정보
+        self.aliases = {}       # 별칭 이름 → 대상 키 ID
+        self._index = {}        # 키 ID / 키 ARN / 별칭 이름 / 별칭 ARN → 키 ID
+        self._status_lock = threading.Lock()
+
+    @property
+    def is_expired(self) -> bool:
+        return time.time() - self.built_at > _KMS_CACHE_TTL_SECONDS
+
+    def build(self, kms):
+        """list_keys / list_aliases 페이지네이션으로 인덱스 구축"""
+        keys = {}
+        index = {}
+        for page in kms.get_paginator('list_keys').paginate():
+            for key in page.get('Keys', []):
+                key_id = key['KeyId']
+                keys[key_id] = {
+                    'key_id': key_id,
+                    'key_arn': key.get('KeyArn') or self._build_key_arn(key_id),
+                    'aliases': [],
+                    'key_manager': KEY_MANAGER_CUSTOMER,
+                    'key_state': None,
+                    'rotation_enabled': None,
+                }
+                index[key_id] = key_id
+                index[keys[key_id]['key_arn']] = key_id
+
+        aliases = {}
+        for page in kms.get_paginator('list_aliases').paginate():
+            for alias in page.get('Aliases', []):
+                alias_name = alias.get('AliasName')
+                target_key_id = alias.get('TargetKeyId')
+                if not alias_name or not target_key_id:
+                    continue
+                aliases[alias_name] = target_key_id
+                index[alias_name] = target_key_id
+                if alias.get('AliasArn'):
+                    index[alias['AliasArn']] = target_key_id
+
+                key_info = keys.get(target_key_id)
+                if key_info is None:
+                    continue
+                key_info['aliases'].append(alias_name)
+                if alias_name.startswith(AWS_MANAGED_ALIAS_PREFIX):
+                    # AWS 관리형 키는 항상 alias/aws/<서비스> 별칭을 가지며 자동 교체됨
+                    key_info['key_manager'] = KEY_MANAGER_AWS
+                    key_info['rotation_enabled'] = True
+
+        self.keys = keys
+        self.aliases = aliases
+        self._index = index
+        self.built_at = time.time()
+        return self
+
+    def _build_key_arn(self, key_id):
+        return f"arn:aws:kms:{self.region}:{self.account_id}:key/{key_id}"
+
+    def resolve(self, key_ref: str) -> Optional[Dict]:
+        """키 ID/키 ARN/별칭 이름/별칭 ARN으로 키 정보 조회"""
+        if not key_ref:
+            return None
+        key_id = self._index.get(key_ref)
+        if key_id is None:
+            return None
+        return self.keys.get(key_id)
+
+    def resolve_alias(self, alias_name: str) -> Optional[Dict]:
+        """별칭 이름으로 대상 키 정보 조회"""
+        key_id = self.aliases.get(alias_name)
+        if key_id is None:
+            return None
+        return self.keys.get(key_id) or {'key_id': key_id, 'key_arn': self._build_key_arn(key_id)}
+
+    def ensure_key_status(self, kms, key_info: Dict) -> Dict:
+        """키 상태/교체 여부를 키당 한 번만 조회하여 캐시에 기록"""
+        if key_info.get('key_state') is not None:
+            return key_info
+
+        with self._status_lock:
+            if key_info.get('key_state') is not None:
+                return key_info
+            if key_info['key_manager'] == KEY_MANAGER_AWS:
+                # AWS 관리형 키는 비활성화/삭제할 수 없으므로 조회 생략
+                key_info['key_state'] = 'Enabled'
+                return key_info
+            try:
+                metadata = kms.describe_key(KeyId=key_info['key_id'])['KeyMetadata']
+                key_info['key_manager'] = metadata.get('KeyManager', key_info['key_manager'])
+                key_info['key_state'] = metadata.get('KeyState', KEY_MANAGER_UNKNOWN)
+                if key_info['key_manager'] == KEY_MANAGER_AWS:
+                    key_info['rotation_enabled'] = True
+                elif key_info['key_state'] == 'Enabled':
+                    rotation = kms.get_key_rotation_status(KeyId=key_info['key_id'])
+                    key_info['rotation_enabled'] = rotation.get('KeyRotationEnabled', False)
+            except ClientError as e:
+                print(f"[WARN] KMS 키 '{key_info['key_id']}' 상태 조회 실패: {e}")
+                key_info['key_state'] = KEY_MANAGER_UNKNOWN
+        return key_info
+
+    def register_key(self, key_id: str, key_arn: Optional[str] = None,
+                     alias_name: Optional[str] = None) -> Dict:
+        """조치 과정에서 새로 생성한 키/별칭을 캐시에 반영"""
+        key_info = self.keys.get(key_id)
+        if key_info is None:
+            key_info = {
+                'key_id': key_id,
+                'key_arn': key_arn or self._build_key_arn(key_id),
+                'aliases': [],
+                'key_manager': KEY_MANAGER_CUSTOMER,
+                'key_state': None,
+                'rotation_enabled': None,
+            }
+            self.keys[key_id] = key_info
+            self._index[key_id] = key_id
+            self._index[key_info['key_arn']] = key_id
+        if alias_name:
+            self.aliases[alias_name] = key_id
+            self._index[alias_name] = key_id
+            if alias_name not in key_info['aliases']:
+                key_info['aliases'].append(alias_name)
+        return key_info
+
+
+def get_kms_metadata(session, account_id: str, region: Optional[str] = None) -> Optional[KmsMetadata]:
+    """
+    (계정, 리전) 단위 KMS 메타데이터 조회 (캐시가 없거나 만료되었으면 구축)
+
+    같은 계정/리전을 여러 체커가 동시에 요청해도 구축은 한 번만 수행합니다.
+
+    Returns:
+        KmsMetadata or None: 권한 부족 등으로 구축에 실패하면 None
+    """
+    region = region or session.region_name
+    if not account_id or not region:
+        return None
+
+    key = (account_id, region)
+    with _cache_lock:
+        metadata = _cache.get(key)
+        if metadata is not None and not metadata.is_expired:
+            return metadata
+        build_lock = _build_locks.setdefault(key, threading.Lock())
+
+    with build_lock:
+        # 대기하는 동안 다른 스레드가 구축을 마쳤을 수 있음
+        with _cache_lock:
+            metadata = _cache.get(key)
+        if metadata is not None and not metadata.is_expired:
+            return metadata
+        try:
+            metadata = KmsMetadata(account_id, region).build(session.client('kms', region_name=region))
+        except ClientError as e:
+            print(f"[WARN] KMS 키/별칭 목록 조회 실패 ({region}): {e}")
+            return None
+        with _cache_lock:
+            _cache[key] = metadata
+        return metadata
+
+
+def invalidate_kms_metadata(account_id: str, region: Optional[str] = None):
+    """계정(및 리전)의 KMS 캐시 무효화"""
+    with _cache_lock:
+        for key in list(_cache):
+            if key[0] == account_id and (region is None or key[1] == region):
+                del _cache[key]
+
+
+class KmsKeyResolver:
+    """
+    체커용 KMS 키 분류기
+
+    리소스에 기록된 키 참조(ARN/별칭/키 ID)의 리전을 따라 해당 리전 캐시에서 조회합니다.
+    """
+
+    def __init__(self, session, account_id: Optional[str]):
+        self.session = session
+        self.account_id = account_id
+        self._clients = {}
+
+    def _get_client(self, region):
+        if region not in self._clients:
+            self._clients[region] = self.session.client('kms', region_name=region)
+        return self._clients[region]
+
+    def describe(self, key_ref: Optional[str], region: Optional[str] = None,
+                 include_status: bool = False) -> Dict:
+        """
+        키 참조를 분류하여 반환
+
+        Args:
+            key_ref (str): 키 ID, 키 ARN, 별칭 이름 또는 별칭 ARN
+            region (str): 키 참조가 ARN이 아닐 때 사용할 리전 (기본: 세션 리전)
+            include_status (bool): 키 상태/교체 여부까지 조회할지 여부
+
+        Returns:
+            dict: key_id, key_arn, key_manager, key_manager_label, key_state, rotation_enabled, aliases
+        """
+        result = {
+            'key_id': None,
+            'key_arn': key_ref,
+            'key_manager': KEY_MANAGER_UNKNOWN,
+            'key_state': None,
+            'rotation_enabled': None,
+            'aliases': [],
+        }
+        if not key_ref:
+            result['key_manager_label'] = KEY_MANAGER_LABELS[KEY_MANAGER_UNKNOWN]
+            return result
+
+        parsed = _parse_kms_arn(key_ref)
+        if parsed:
+            region, key_account_id = parsed
+            if key_account_id != self.account_id:
+                # 다른 계정의 키는 이 계정에서 메타데이터를 조회할 수 없음
+                result['key_manager'] = KEY_MANAGER_CUSTOMER
+                result['key_manager_label'] = '외부 계정 키'
+                return result
+
+        region = region or self.session.region_name
+        metadata = get_kms_metadata(self.session, self.account_id, region)
+        key_info = metadata.resolve(key_ref) if metadata else None
+        if key_info is not None:
+            if include_status:
+                metadata.ensure_key_status(self._get_client(region), key_info)
+            result.update(key_info)
+            result['aliases'] = list(key_info['aliases'])
+
+        result['key_manager_label'] = KEY_MANAGER_LABELS.get(result['key_manager'], result['key_manager'])
+        return result
+
+    def key_summary(self, key_ref: Optional[str], region: Optional[str] = None) -> Dict:
+        """진단 결과에 포함할 키 요약 정보 (관리 주체, 상태, 교체 여부)"""
+        key_info = self.describe(key_ref, region, include_status=True)
+        return {
+            'kms_key_id': key_ref or '',
+            'key_manager': key_info['key_manager'],
+            'key_manager_label': key_info['key_manager_label'],
+            'key_state': key_info['key_state'],
+            'rotation_enabled': key_info['rotation_enabled'],
+        }
+
+    def get_or_create_alias_key(self, alias_name: str, create_key) -> str:
+        """
+        별칭이 가리키는 키 ARN 반환, 없으면 create_key(kms, account_id, region, alias_name) 호출 후 캐시에 반영
+
+        KMS 목록 캐시를 만들지 못했으면 describe_key로 별칭을 확인하고 NotFoundException일 때만 생성합니다.
+
+        Returns:
+            str: 키 ARN
+
+        Raises:
+            ClientError: 별칭 확인 실패 (권한 부족 등)
+        """
+        region = self.session.region_name
+        kms = self._get_client(region)
+        metadata = get_kms_metadata(self.session, self.account_id, region)
+        if metadata is not None:
+            key_info = metadata.resolve_alias(alias_name)
+            if key_info is not None:
+                print(f"[INFO] KMS 별칭 '{alias_name}'이 이미 존재합니다.")
+                return key_info['key_arn']
+        else:
+            # 목록 조회 실패 시 별칭을 직접 확인 (없다고 단정하고 키를 만들면 중복 CMK가 남음)
+            try:
+                key_arn = kms.describe_key(KeyId=alias_name)['KeyMetadata']['Arn']
+                print(f"[INFO] KMS 별칭 '{alias_name}'이 이미 존재합니다.")
+                return key_arn
+            except ClientError as e:
+                if e.response.get('Error', {}).get('Code') != 'NotFoundException':
+                    raise
+
+        key_id, key_arn = create_key(kms, self.account_id, region, alias_name)
+        if metadata is not None:
+            metadata.register_key(key_id, key_arn, alias_name)
+        return key_arn
@@ -0,0 +1,269 @@
+"""
+CloudWatch Logs 로그 그룹 카탈로그
+4.6(KMS 암호화), 4.8(인스턴스 로깅), 4.12(보존 기간) 체커와 모니터링 서비스가 공통으로 사용
+
+- (계정 ID, 리전) 단위로 describe_log_groups 전체 목록을 한 번 수집하여 프로세스 전역에 보관
+- 보조 인덱스
+  * 이름 정렬 배열 + bisect 기반 접두어 조회
+  * 이름 토큰(/, _, . 구분) 인덱스 및 부분 문자열 키워드 조회 결과 메모
+  * 보존 기간 구간(미설정/30/90/180/365일 미만/이상)별 인덱스
+  * kmsKeyId 유무 인덱스
+- TTL 만료 후 갱신은 목록 전체를 다시 페이지네이션하되, 기존 항목과 비교하여
+  추가/삭제/변경된 그룹만 인덱스에 반영 (인덱스 전체 재구축 없음)
+  creationTime 워터마크는 직전 갱신 이후 생성된 그룹 수 통계에만 사용
+- 조치(보존 기간 변경, KMS 키 연결) 결과는 apply_update로 카탈로그에 즉시 반영
+"""
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional
+
+# 카탈로그 유효 시간 (초)
+_CATALOG_TTL_SECONDS = 120
+
+# 보존 기간 구간 경계 (일)
+RETENTION_BUCKETS = (30, 90, 180, 365)
+RETENTION_UNSET = 'unset'
+RETENTION_LONG = 'long'
+
+_TOKEN_SPLIT_RE = re.compile(r'[/_.:\s]+')
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+_refresh_locks = {}
+
+
+def _retention_bucket(retention):
+    """보존 기간(일)을 구간 키로 변환"""
+    if retention is None:
+        return RETENTION_UNSET
+    for bound in RETENTION_BUCKETS:
+        if retention < bound:
+            return bound
+    return RETENTION_LONG
+
+
+def _tokenize(name):
+    return {token for token in _TOKEN_SPLIT_RE.split(name.lower()) if token}
+
+
+class LogGroupCatalog:
+    """(계정, 리전) 단위 로그 그룹 카탈로그"""
+
+    def __init__(self, account_id: str, region: str):
+        self.account_id = account_id
+        self.region = region
+        self.refreshed_at = 0.0
+        self.latest_creation_time = 0
+        self.last_refresh_stats = {}
+        self.groups = {}                     # 로그 그룹 이름 → 항목
+        self._sorted_names = []              # 이름 정렬 배열 (접두어 bisect)
+        self._token_index = {}               # 토큰 → 이름 집합
+        self._retention_index = {}           # 보존 기간 구간 → 이름 집합
+        self._kms_index = {True: set(), False: set()}
+        self._keyword_memo = {}              # 소문자 키워드 → 이름 목록
+        self._lock = threading.RLock()
+
+    @property
+    def is_expired(self) -> bool:
+        return time.time() - self.refreshed_at > _CATALOG_TTL_SECONDS
+
+    # ------------------------------------------------------------------
+    # 수집 / 갱신
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _to_entry(group: Dict) -> Dict:
+        return {
+            'name': group['logGroupName'],
+            'arn': group.get('arn'),
+            'creation_time': group.get('creationTime', 0),
+            'retention': group.get('retentionInDays'),
+            'kms_key_id': group.get('kmsKeyId'),
+            'stored_bytes': group.get('storedBytes', 0),
+        }
+
+    def refresh(self, logs):
+        """
+        describe_log_groups 페이지네이션으로 카탈로그 갱신
+
+        기존 항목과 비교하여 추가/삭제/변경된 그룹만 인덱스에 반영합니다.
+        """
+        fetched = {}
+        for page in logs.get_paginator('describe_log_groups').paginate():
+            for group in page.get('logGroups', []):
+                fetched[group['logGroupName']] = self._to_entry(group)
+
+        with self._lock:
+            watermark = self.latest_creation_time
+            added = changed = 0
+            for name in list(self.groups):
+                if name not in fetched:
+                    self._remove(name)
+
+            for name, entry in fetched.items():
+                current = self.groups.get(name)
+                if current is None:
+                    self._add(entry)
+                    added += 1
+                elif (current['retention'], current['kms_key_id'], current['creation_time']) != \
+                        (entry['retention'], entry['kms_key_id'], entry['creation_time']):
+                    self._remove(name)
+                    self._add(entry)
+                    changed += 1
+                else:
+                    current['stored_bytes'] = entry['stored_bytes']
+
+            self.latest_creation_time = max(
+                (entry['creation_time'] for entry in fetched.values()), default=0
+            )
+            self.last_refresh_stats = {
+                'total': len(fetched),
+                'added': added,
+                'changed': changed,
+                'created_since_last_refresh': len([
+                    e for e in fetched.values() if watermark and e['creation_time'] > watermark
+                ]),
+            }
+            self.refreshed_at = time.time()
+        return self
+
+    def _add(self, entry: Dict):
+        name = entry['name']
+        self.groups[name] = entry
+        insort(self._sorted_names, name)
+        for token in _tokenize(name):
+            self._token_index.setdefault(token, set()).add(name)
+        self._retention_index.setdefault(_retention_bucket(entry['retention']), set()).add(name)
+        self._kms_index[bool(entry['kms_key_id'])].add(name)
+        self._keyword_memo.clear()
+
+    def _remove(self, name: str):
+        entry = self.groups.pop(name, None)
+        if entry is None:
+            return
+        pos = bisect_left(self._sorted_names, name)
+        if pos < len(self._sorted_names) and self._sorted_names[pos] == name:
+            del self._sorted_names[pos]
+        for token in _tokenize(name):
+            names = self._token_index.get(token)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self._token_index[token]
+        self._retention_index.get(_retention_bucket(entry['retention']), set()).discard(name)
+        self._kms_index[bool(entry['kms_key_id'])].discard(name)
+        self._keyword_memo.clear()
+
+    def apply_update(self, name: str, **changes):
+        """조치 결과(retention, kms_key_id)를 카탈로그에 반영"""
+        with self._lock:
+            entry = self.groups.get(name)
+            if entry is None:
+                return
+            updated = dict(entry)
+            updated.update(changes)
+            self._remove(name)
+            self._add(updated)
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+    def all_groups(self) -> List[Dict]:
+        """이름 순 전체 로그 그룹"""
+        with self._lock:
+            return [self.groups[name] for name in self._sorted_names]
+
+    def names_with_prefix(self, prefix: str) -> List[str]:
+        """접두어로 시작하는 로그 그룹 이름 (정렬 배열 bisect)"""
+        with self._lock:
+            start = bisect_left(self._sorted_names, prefix)
+            names = []
+            for name in self._sorted_names[start:]:
+                if not name.startswith(prefix):
+                    break
+                names.append(name)
+            return names
+
+    def names_with_token(self, token: str) -> List[str]:
+        """이름을 /, _, . 로 나눈 토큰 중 하나가 일치하는 로그 그룹 (예: 인스턴스 ID)"""
+        with self._lock:
+            return sorted(self._token_index.get(token.lower(), ()))
+
+    def has_token(self, token: str) -> bool:
+        with self._lock:
+            return token.lower() in self._token_index
+
+    def names_containing(self, keyword: str) -> List[str]:
+        """이름(소문자)에 키워드가 포함된 로그 그룹 (결과는 카탈로그 변경 전까지 메모)"""
+        keyword = keyword.lower()
+        with self._lock:
+            names = self._keyword_memo.get(keyword)
+            if names is None:
+                names = [name for name in self._sorted_names if keyword in name.lower()]
+                self._keyword_memo[keyword] = names
+            return names
+
+    def names_with_retention_below(self, days: int) -> List[str]:
+        """보존 기간이 미설정이거나 days일 미만인 로그 그룹 (days는 RETENTION_BUCKETS 경계값)"""
+        with self._lock:
+            if days not in RETENTION_BUCKETS:
+                return [
+                    name for name in self._sorted_names
+                    if self.groups[name]['retention'] is None or self.groups[name]['retention'] < days
+                ]
+            names = set(self._retention_index.get(RETENTION_UNSET, ()))
+            for bound in RETENTION_BUCKETS:
+                if bound > days:
+                    break
+                names.update(self._retention_index.get(bound, ()))
+            return sorted(names)
+
+    def names_by_encryption(self, encrypted: bool) -> List[str]:
+        """kmsKeyId 유무별 로그 그룹 이름"""
+        with self._lock:
+            return sorted(self._kms_index[encrypted])
+
+    def get(self, name: str) -> Optional[Dict]:
+        with self._lock:
+            return self.groups.get(name)
+
+    def __len__(self):
+        return len(self.groups)
+
+
+def get_log_group_catalog(session, account_id: Optional[str], region: Optional[str] = None) -> LogGroupCatalog:
+    """
+    (계정, 리전) 단위 로그 그룹 카탈로그 조회 (없거나 만료되었으면 수집/갱신)
+
+    계정 ID를 알 수 없으면 캐시하지 않고 일회성 카탈로그를 반환합니다.
+
+    Raises:
+        ClientError: describe_log_groups 호출 실패 시
+    """
+    region = region or session.region_name
+    if not account_id:
+        return LogGroupCatalog(account_id, region).refresh(session.client('logs', region_name=region))
+
+    key = (account_id, region)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is not None and not catalog.is_expired:
+            return catalog
+        if catalog is None:
+            catalog = _catalogs[key] = LogGroupCatalog(account_id, region)
+        refresh_lock = _refresh_locks.setdefault(key, threading.Lock())
+
+    with refresh_lock:
+        # 대기하는 동안 다른 스레드가 갱신을 마쳤을 수 있음
+        if catalog.is_expired:
+            catalog.refresh(session.client('logs', region_name=region))
+    return catalog
+
+
+def invalidate_log_group_catalog(account_id: str, region: Optional[str] = None):
+    """계정(및 리전)의 카탈로그 무효화"""
+    with _catalogs_lock:
+        for key in list(_catalogs):
+            if key[0] == account_id and (region is None or key[1] == region):
+                del _catalogs[key]
@@ -0,0 +1,45 @@
+"""
+계정별 활성 리전 목록 캐시
+다중 리전 모니터링 점검에서 사용
+
+- describe_regions(기본 옵션)는 계정에서 활성화(옵트인 포함)된 리전만 반환
+- 리전 활성화 상태는 거의 바뀌지 않으므로 계정 단위로 프로세스 전역에 TTL과 함께 보관
+"""
+import threading
+import time
+from typing import List, Optional
+
+# 캐시 유효 시간 (초)
+_REGION_CACHE_TTL_SECONDS = 6 * 60 * 60
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def get_enabled_regions(session, account_id: Optional[str]) -> List[str]:
+    """
+    계정에서 활성화된 리전 목록 (이름 순)
+
+    Raises:
+        ClientError: describe_regions 호출 실패 시
+    """
+    if account_id:
+        with _cache_lock:
+            cached = _cache.get(account_id)
+        if cached is not None and time.time() - cached[0] <= _REGION_CACHE_TTL_SECONDS:
+            return list(cached[1])
+
+    ec2 = session.client('ec2', region_name=session.region_name or 'us-east-1')
+    regions = sorted(region['RegionName'] for region in ec2.describe_regions()['Regions'])
+
+    if account_id:
+        with _cache_lock:
+            _cache[account_id] = (time.time(), regions)
+    return list(regions)
+
+
+def invalidate_enabled_regions(account_id: str):
+    """계정의 리전 캐시 무효화"""
+    with _cache_lock:
+        _cache.pop(account_id, None)
+
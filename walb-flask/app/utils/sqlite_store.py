@@ -0,0 +1,66 @@
+"""
+SQLite(WAL) 연결 공통 헬퍼
+계정 저장소(account_store)와 GuardDuty findings 저장소(findings_store)가 공통으로 사용
+
+- 스레드/프로세스별 연결 재사용 (gunicorn fork 이후 연결을 공유하지 않음)
+- WAL 모드 + synchronous=NORMAL로 읽기와 쓰기가 서로를 막지 않음
+- DB 파일별 스키마 준비(및 저장소별 일회성 초기화)는 프로세스당 한 번만 수행
+"""
+import os
+import sqlite3
+import threading
+from typing import Callable, Optional
+
+from app.utils.data_store import get_config_value
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized_paths = set()
+
+
+def resolve_db_path(config_key: str, default_name: str) -> str:
+    """설정값(config_key)의 DB 경로, 없으면 DATA_DIR/default_name"""
+    db_path = get_config_value(config_key)
+    if not db_path:
+        data_dir = get_config_value('DATA_DIR') or os.path.join(os.getcwd(), 'data')
+        db_path = os.path.join(data_dir, default_name)
+    return db_path
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """스레드/프로세스별 연결 반환 (gunicorn fork 이후 연결을 공유하지 않음)"""
+    key = (db_path, os.getpid())
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(key)
+    if conn is None:
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        connections[key] = conn
+    return conn
+
+
+def get_connection(db_path: str, schema: str,
+                   initialize: Optional[Callable[[sqlite3.Connection], None]] = None) -> sqlite3.Connection:
+    """
+    스키마 준비가 끝난 연결 반환
+
+    Args:
+        schema (str): 최초 연결 시 실행할 CREATE ... IF NOT EXISTS 스크립트
+        initialize (callable): 스키마 준비 직후 한 번 실행할 저장소별 초기화 (예: 기존 파일 가져오기)
+    """
+    conn = connect(db_path)
+    if db_path in _initialized_paths:
+        return conn
+
+    with _init_lock:
+        if db_path not in _initialized_paths:
+            conn.executescript(schema)
+            if initialize is not None:
+                initialize(conn)
+            _initialized_paths.add(db_path)
+    return conn
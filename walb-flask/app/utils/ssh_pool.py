@@ -0,0 +1,276 @@
+"""
+SSH 연결 재사용(멀티플렉싱) 관리
+splunk-forwarder 인스턴스로 보내는 원격 명령을 OpenSSH ControlMaster 소켓 하나로 다중화
+
+- (사용자, 호스트, 포트, 키) 단위로 마스터 연결 1개를 백그라운드에 유지 (ControlPersist)
+- 이후 명령은 마스터 소켓 위에 채널만 새로 열어 실행 → 명령마다 TCP 연결/키 교환/인증 생략
+- 제어 소켓 경로는 연결 대상 기준이므로 같은 서버의 gunicorn 워커들이 마스터 하나를 공유
+- 일정 주기마다 `ssh -O check`로 상태 확인, 마스터가 끊겼으면 재연결 후 명령을 한 번 재시도
+- ControlMaster를 지원하지 않는 환경(Windows OpenSSH)이나 마스터 수립 실패 시 기존 단발 연결로 동작
+"""
+import hashlib
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+from app.utils.data_store import get_config_value
+
+logger = logging.getLogger(__name__)
+
+# 모든 SSH 호출에 공통으로 적용하는 옵션
+SSH_COMMON_OPTIONS = [
+    '-o', 'StrictHostKeyChecking=no',
+    '-o', 'UserKnownHostsFile=/dev/null',
+    '-o', 'ConnectTimeout=10',
+    '-o', 'BatchMode=yes',
+    '-o', 'LogLevel=ERROR',
+]
+
+# 마스터 연결 유지 확인 (30초 간격, 3회 무응답 시 끊김으로 판단)
+_MASTER_KEEPALIVE_OPTIONS = [
+    '-o', 'ServerAliveInterval=30',
+    '-o', 'ServerAliveCountMax=3',
+]
+
+_MASTER_START_TIMEOUT = 20
+_CONTROL_COMMAND_TIMEOUT = 5
+
+# 멀티플렉싱 세션 자체가 실패했을 때 ssh가 남기는 메시지 (원격 명령의 종료 코드 255와 구분)
+_MUX_FAILURE_MARKERS = ('mux_client', 'control socket', 'controlsocket', 'master is dead')
+
+_connections = {}
+_connections_lock = threading.Lock()
+
+
+def _multiplex_enabled() -> bool:
+    if os.name == 'nt':
+        return False
+    return bool(get_config_value('SSH_MULTIPLEX', True))
+
+
+def _get_control_dir() -> str:
+    control_dir = get_config_value('SSH_CONTROL_DIR') or os.path.join(tempfile.gettempdir(), 'walb-ssh')
+    # 제어 소켓을 통하면 인증 없이 원격 명령을 실행할 수 있으므로 소유자만 접근 가능하게 생성
+    os.makedirs(control_dir, mode=0o700, exist_ok=True)
+    return control_dir
+
+
+class SSHConnection:
+    """대상 호스트 하나에 대한 다중화 SSH 연결"""
+
+    def __init__(self, host: str, user: str, key_path: Optional[str] = None, port: Optional[int] = None):
+        self.host = host
+        self.user = user
+        self.key_path = key_path
+        self.port = port
+        self.multiplex = _multiplex_enabled()
+        self.control_path = None
+        self.stats = {'commands': 0, 'masters_started': 0, 'reconnects': 0, 'fallbacks': 0}
+        self._master_alive = False
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        if key_path:
+            try:
+                # ssh는 다른 사용자가 읽을 수 있는 키 파일을 거부함
+                os.chmod(key_path, 0o600)
+            except OSError as e:
+                logger.warning(f"SSH key permission update failed ({key_path}): {e}")
+
+        if self.multiplex:
+            digest = hashlib.sha1(f"{user}@{host}:{port or 22}:{key_path}".encode('utf-8')).hexdigest()
+            # 유닉스 소켓 경로 길이 제한(약 100자)을 넘지 않도록 짧은 해시 사용
+            self.control_path = os.path.join(_get_control_dir(), f"{digest[:16]}.sock")
+
+    @property
+    def target(self) -> str:
+        return f"{self.user}@{self.host}"
+
+    def _base_args(self):
+        args = ['ssh', *SSH_COMMON_OPTIONS]
+        if self.key_path:
+            args.extend(['-i', self.key_path])
+        if self.port:
+            args.extend(['-p', str(self.port)])
+        return args
+
+    def _control_args(self, master: str):
+        return ['-o', f'ControlMaster={master}', '-o', f'ControlPath={self.control_path}']
+
+    def _control_command(self, operation: str) -> bool:
+        """마스터 제어 명령 실행 (check / exit)"""
+        try:
+            result = subprocess.run(
+                self._base_args() + self._control_args('no') + ['-O', operation, self.target],
+                capture_output=True,
+                text=True,
+                timeout=_CONTROL_COMMAND_TIMEOUT
+            )
+            return result.returncode == 0
+        except (subprocess.TimeoutExpired, OSError):
+            return False
+
+    def _start_master(self) -> bool:
+        """백그라운드 마스터 연결 수립 (-f -N: 인증 후 분리, 원격 명령 없음)"""
+        persist = get_config_value('SSH_CONTROL_PERSIST', 600)
+        command = (
+            self._base_args()
+            + self._control_args('yes')
+            + ['-o', f'ControlPersist={persist}']
+            + _MASTER_KEEPALIVE_OPTIONS
+            + ['-f', '-N', self.target]
+        )
+        # 분리된 마스터 프로세스가 출력 파이프를 물고 있으면 subprocess.run이 반환되지 않으므로
+        # 표준 출력은 버리고 오류는 임시 파일로 받음
+        with tempfile.TemporaryFile() as stderr_file:
+            try:
+                result = subprocess.run(
+                    command,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=stderr_file,
+                    timeout=_MASTER_START_TIMEOUT
+                )
+            except (subprocess.TimeoutExpired, OSError) as e:
+                logger.warning(f"SSH master connection to {self.target} failed: {e}")
+                return False
+            if result.returncode != 0:
+                stderr_file.seek(0)
+                error = stderr_file.read().decode('utf-8', errors='ignore').strip()
+                logger.warning(f"SSH master connection to {self.target} failed: {error}")
+                return False
+
+        self._count('masters_started')
+        logger.info(f"SSH master connection established: {self.target} ({self.control_path})")
+        return True
+
+    def _discard_socket(self):
+        """끊긴 마스터의 제어 소켓 정리"""
+        try:
+            os.remove(self.control_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Stale SSH control socket removal failed ({self.control_path}): {e}")
+
+    def ensure_master(self) -> bool:
+        """
+        마스터 연결 상태 확인 및 필요 시 재연결
+
+        상태 확인은 SSH_HEALTH_CHECK_INTERVAL 간격으로만 수행합니다.
+
+        Returns:
+            bool: 다중화 연결을 사용할 수 있으면 True
+        """
+        if not self.multiplex:
+            return False
+
+        interval = get_config_value('SSH_HEALTH_CHECK_INTERVAL', 30)
+        if self._master_alive and time.time() - self._last_check < interval:
+            return True
+
+        with self._lock:
+            if self._master_alive and time.time() - self._last_check < interval:
+                return True
+
+            alive = self._control_command('check')
+            if not alive:
+                if self._master_alive:
+                    self._count('reconnects')
+                    logger.warning(f"SSH master connection to {self.target} lost, reconnecting")
+                self._discard_socket()
+                # 다른 워커가 먼저 마스터를 띄웠으면 시작은 실패하지만 확인은 통과함
+                alive = self._start_master() or self._control_command('check')
+
+            self._master_alive = alive
+            self._last_check = time.time()
+            return alive
+
+    def invalidate(self):
+        """다음 명령 전에 마스터 상태를 다시 확인하도록 표시"""
+        with self._lock:
+            self._last_check = 0.0
+
+    def run(self, command: str, timeout: int = 60, **kwargs) -> subprocess.CompletedProcess:
+        """
+        원격 명령 실행 (subprocess.run과 같은 결과/예외)
+
+        Args:
+            command (str): 원격에서 실행할 명령 또는 스크립트
+            timeout (int): 명령 제한 시간 (초)
+            **kwargs: subprocess.run 추가 인자 (encoding, errors 등)
+
+        Raises:
+            subprocess.TimeoutExpired: 제한 시간 초과 시
+        """
+        kwargs.setdefault('capture_output', True)
+        kwargs.setdefault('text', True)
+        self._count('commands')
+
+        multiplexed = self.ensure_master()
+        result = subprocess.run(self._build_command(command, multiplexed), timeout=timeout, **kwargs)
+
+        if multiplexed and result.returncode == 255 and self._is_mux_failure(result.stderr):
+            # 상태 확인 이후 마스터가 끊긴 경우 재연결하여 한 번만 재시도
+            self.invalidate()
+            multiplexed = self.ensure_master()
+            if not multiplexed:
+                self._count('fallbacks')
+            result = subprocess.run(self._build_command(command, multiplexed), timeout=timeout, **kwargs)
+        return result
+
+    def _count(self, name: str):
+        """통계 증가 (여러 요청 스레드가 같은 연결을 공유)"""
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _build_command(self, command: str, multiplexed: bool):
+        args = self._base_args()
+        if multiplexed:
+            args.extend(self._control_args('no'))
+        args.extend([self.target, command])
+        return args
+
+    @staticmethod
+    def _is_mux_failure(stderr) -> bool:
+        if isinstance(stderr, bytes):
+            stderr = stderr.decode('utf-8', errors='ignore')
+        stderr = (stderr or '').lower()
+        return any(marker in stderr for marker in _MUX_FAILURE_MARKERS)
+
+    def close(self):
+        """마스터 연결 종료"""
+        if self.multiplex and self._control_command('exit'):
+            logger.info(f"SSH master connection closed: {self.target}")
+        with self._lock:
+            self._master_alive = False
+            self._last_check = 0.0
+
+    def get_status(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {
+            'target': self.target,
+            'multiplex': self.multiplex,
+            'master_alive': self._master_alive,
+            'control_path': self.control_path,
+            **stats,
+        }
+
+
+def get_ssh_connection(host: str, user: str, key_path: Optional[str] = None,
+                       port: Optional[int] = None) -> SSHConnection:
+    """대상별 SSHConnection 조회 (프로세스 내에서 공유)"""
+    # fork 이후 부모 프로세스의 잠금 상태를 물려받지 않도록 pid를 키에 포함
+    key = (os.getpid(), user, host, port, key_path)
+    with _connections_lock:
+        connection = _connections.get(key)
+        if connection is None:
+            connection = _connections[key] = SSHConnection(host, user, key_path, port)
+        return connection
+
@@ -0,0 +1,279 @@
+"""
+상태 조회 결과 캐시 (stale-while-revalidate)
+모니터링 페이지의 주기 조회(SSH/AWS)를 열린 브라우저 탭 수와 무관하게 일정한 부하로 유지
+
+- 키(예: ('forwarder', 계정 ID))별로 마지막 조회 결과와 수집 시각을 보관
+- 최초 요청만 동기로 조회하고, 같은 키를 동시에 요청하면 진행 중인 조회 하나를 함께 기다림
+- 이후 요청은 항상 캐시 값을 나이(age)와 함께 즉시 반환
+- 백그라운드 워커가 refresh_interval 주기로 만료된 키를 갱신 (키당 동시 갱신 1개)
+- idle_timeout 동안 아무도 조회하지 않은 키는 갱신을 멈추고 제거
+- 조회 결과는 SQLite(WAL) 스냅샷으로 gunicorn 워커들이 공유
+  → 갱신 전 키별 임대(lease)를 잡은 워커 하나만 조회하고, 나머지 워커는 그 스냅샷을 읽음
+  → 워커 수와 무관하게 호스트당 키별 갱신 1회 (SSH, GuardDuty 동기화 등이 워커 수만큼 반복되지 않음)
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from app.utils import sqlite_store
+from app.utils.sqlite_store import resolve_db_path
+
+logger = logging.getLogger(__name__)
+
+# 백그라운드 워커 점검 간격 (초)
+_WORKER_TICK_SECONDS = 5
+
+# 다른 워커가 최초 조회 중일 때 스냅샷 확인 간격 (초)
+_SNAPSHOT_POLL_SECONDS = 0.5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS status_snapshots (
+    cache_name   TEXT NOT NULL,
+    cache_key    TEXT NOT NULL,
+    value        TEXT,
+    error        TEXT,
+    fetched_at   REAL NOT NULL DEFAULT 0,
+    attempted_at REAL NOT NULL DEFAULT 0,
+    lease_owner  INTEGER,
+    lease_until  REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (cache_name, cache_key)
+);
+"""
+
+
+def _get_connection():
+    return sqlite_store.get_connection(resolve_db_path('STATUS_CACHE_DB', 'status_cache.db'), _SCHEMA)
+
+
+class _Entry:
+    __slots__ = ('loader', 'value', 'error', 'fetched_at', 'attempted_at',
+                 'last_access', 'refreshing', 'ready')
+
+    def __init__(self, loader: Callable[[], Any]):
+        self.loader = loader
+        self.value = None
+        self.error = None
+        self.fetched_at = 0.0       # 마지막 성공 조회 시각
+        self.attempted_at = 0.0     # 마지막 조회 시도 시각 (실패 포함, 갱신 주기 기준)
+        self.last_access = time.time()
+        self.refreshing = False
+        self.ready = threading.Event()
+
+
+class StatusCache:
+    """키별 상태 조회 결과 캐시"""
+
+    def __init__(self, name: str, refresh_interval: float = 30, idle_timeout: float = 300,
+                 load_timeout: float = 60, max_workers: int = 4, shared: bool = True):
+        self.name = name
+        self.refresh_interval = refresh_interval
+        self.idle_timeout = idle_timeout
+        self.load_timeout = load_timeout
+        self.max_workers = max_workers
+        self.shared = shared
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._worker_pid = None
+        self._executor = None
+
+    def _ensure_worker(self):
+        """현재 프로세스의 백그라운드 워커 시작 (gunicorn fork 이후 워커별로 한 번)"""
+        pid = os.getpid()
+        if self._worker_pid == pid:
+            return
+        self._worker_pid = pid
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix=f'{self.name}-refresh')
+        threading.Thread(target=self._run_worker, name=f'{self.name}-worker', daemon=True).start()
+
+    def _run_worker(self):
+        while True:
+            time.sleep(_WORKER_TICK_SECONDS)
+            now = time.time()
+            with self._lock:
+                for key, entry in list(self._entries.items()):
+                    if now - entry.last_access > self.idle_timeout:
+                        # 보는 사람이 없는 키는 더 이상 갱신하지 않음
+                        del self._entries[key]
+                    elif now - entry.attempted_at >= self.refresh_interval:
+                        self._schedule(key, entry)
+
+    def _schedule(self, key: Hashable, entry: _Entry):
+        """백그라운드 갱신 예약 (이미 갱신 중이면 무시) - self._lock 보유 상태에서 호출"""
+        if entry.refreshing:
+            return
+        entry.refreshing = True
+        self._executor.submit(self._load, key, entry)
+
+    def _load(self, key: Hashable, entry: _Entry):
+        try:
+            if self.shared and not self._claim_or_adopt(key, entry):
+                return
+            try:
+                value = entry.loader()
+                entry.value = value
+                entry.error = None
+                entry.fetched_at = time.time()
+            except Exception as e:
+                logger.error(f"[{self.name}] status refresh failed for {key}: {e}")
+                entry.error = str(e)
+            entry.attempted_at = time.time()
+            if self.shared:
+                self._store_snapshot(key, entry)
+        finally:
+            entry.refreshing = False
+            entry.ready.set()
+
+    @staticmethod
+    def _snapshot_key(key: Hashable) -> str:
+        return json.dumps(key, default=str)
+
+    def _claim_or_adopt(self, key: Hashable, entry: _Entry) -> bool:
+        """
+        공유 스냅샷 확인 후 이 워커가 조회할지 결정
+
+        다른 워커가 갱신 주기 안에 조회했으면 그 스냅샷을 가져오고,
+        아니면 임대(lease_until)를 잡아 이 워커만 조회합니다.
+
+        Returns:
+            bool: 이 워커가 loader를 호출해야 하면 True
+        """
+        deadline = time.time() + self.load_timeout
+        while True:
+            now = time.time()
+            try:
+                conn = _get_connection()
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    row = conn.execute(
+                        'SELECT value, error, fetched_at, attempted_at, lease_owner, lease_until '
+                        'FROM status_snapshots WHERE cache_name = ? AND cache_key = ?',
+                        (self.name, self._snapshot_key(key))
+                    ).fetchone()
+                    fresh = row is not None and now - row['attempted_at'] < self.refresh_interval
+                    leased = row is not None and row['lease_until'] > now and row['lease_owner'] != os.getpid()
+                    if not fresh and not leased:
+                        conn.execute(
+                            'INSERT INTO status_snapshots (cache_name, cache_key, lease_owner, lease_until) '
+                            'VALUES (?, ?, ?, ?) ON CONFLICT (cache_name, cache_key) DO UPDATE SET '
+                            'lease_owner = excluded.lease_owner, lease_until = excluded.lease_until',
+                            (self.name, self._snapshot_key(key), os.getpid(), now + self.load_timeout)
+                        )
+                    conn.execute('COMMIT')
+                except Exception:
+                    conn.execute('ROLLBACK')
+                    raise
+            except (sqlite3.Error, OSError) as e:
+                # 공유 저장소를 쓸 수 없으면 이 워커에서 직접 조회
+                logger.warning(f"[{self.name}] status snapshot unavailable for {key}: {e}")
+                return True
+
+            if not fresh and not leased:
+                return True
+            if fresh:
+                self._adopt(entry, row)
+                return False
+            # 다른 워커가 조회 중 - 보여줄 값이 있으면 그대로 두고 다음 점검 때 다시 확인
+            if entry.value is not None or now >= deadline:
+                entry.attempted_at = now - self.refresh_interval + _WORKER_TICK_SECONDS
+                return False
+            time.sleep(_SNAPSHOT_POLL_SECONDS)
+
+    @staticmethod
+    def _adopt(entry: _Entry, row):
+        """다른 워커가 저장한 스냅샷을 이 워커의 항목에 반영"""
+        if row['value'] is not None:
+            entry.value = json.loads(row['value'])
+            entry.fetched_at = row['fetched_at']
+        entry.error = row['error']
+        entry.attempted_at = row['attempted_at']
+
+    def _store_snapshot(self, key: Hashable, entry: _Entry):
+        """조회 결과를 공유 스냅샷에 저장하고 임대 해제 (실패 시 이전 값은 유지)"""
+        try:
+            value = json.dumps(entry.value, default=str) if entry.error is None else None
+            _get_connection().execute(
+                'INSERT INTO status_snapshots (cache_name, cache_key, value, error, fetched_at, attempted_at, '
+                'lease_owner, lease_until) VALUES (?, ?, ?, ?, ?, ?, NULL, 0) '
+                'ON CONFLICT (cache_name, cache_key) DO UPDATE SET '
+                'value = COALESCE(excluded.value, value), error = excluded.error, '
+                'fetched_at = CASE WHEN excluded.value IS NULL THEN fetched_at ELSE excluded.fetched_at END, '
+                'attempted_at = excluded.attempted_at, lease_owner = NULL, lease_until = 0',
+                (self.name, self._snapshot_key(key), value, entry.error, entry.fetched_at, entry.attempted_at)
+            )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"[{self.name}] status snapshot save failed for {key}: {e}")
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Tuple[Optional[Any], Dict]:
+        """
+        캐시 값과 메타 정보 반환
+
+        캐시가 비어 있으면 loader를 동기로 호출하고(동시 요청은 하나의 조회를 공유),
+        만료되었으면 캐시 값을 그대로 반환하면서 백그라운드 갱신을 예약합니다.
+
+        Returns:
+            tuple: (값 또는 None, {'age_seconds', 'fetched_at', 'stale', 'refreshing', 'error'})
+        """
+        with self._lock:
+            self._ensure_worker()
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry(loader)
+            entry.loader = loader
+            entry.last_access = time.time()
+
+            # 값이 없으면 동기 조회 (직전 조회가 실패했으면 갱신 주기가 지난 뒤에만 재시도)
+            load_now = (entry.value is None and not entry.refreshing
+                        and time.time() - entry.attempted_at >= self.refresh_interval)
+            if load_now:
+                entry.refreshing = True
+                entry.ready.clear()
+            elif entry.value is not None and time.time() - entry.attempted_at >= self.refresh_interval:
+                self._schedule(key, entry)
+
+        if load_now:
+            self._load(key, entry)
+        elif entry.value is None and entry.refreshing:
+            # 다른 요청이 진행 중인 최초 조회 결과를 기다림
+            entry.ready.wait(self.load_timeout)
+
+        return entry.value, self._build_meta(entry)
+
+    def _build_meta(self, entry: _Entry) -> Dict:
+        now = time.time()
+        age = round(now - entry.fetched_at, 1) if entry.fetched_at else None
+        return {
+            'age_seconds': age,
+            'fetched_at': datetime.fromtimestamp(entry.fetched_at).isoformat() if entry.fetched_at else None,
+            'stale': age is None or age > self.refresh_interval,
+            'refreshing': entry.refreshing,
+            'error': entry.error,
+        }
+
+    def invalidate(self, key: Hashable):
+        """키 삭제 - 상태를 바꾸는 조치 후 다음 조회가 새로 수집하도록 함 (공유 스냅샷 포함)"""
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.shared:
+            try:
+                _get_connection().execute(
+                    'DELETE FROM status_snapshots WHERE cache_name = ? AND cache_key = ?',
+                    (self.name, self._snapshot_key(key))
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"[{self.name}] status snapshot invalidate failed for {key}: {e}")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'name': self.name,
+                'entries': len(self._entries),
+                'refreshing': sum(1 for entry in self._entries.values() if entry.refreshing),
+                'refresh_interval': self.refresh_interval,
+            }
@@ -1,11 +1,12 @@
 """
 메인 페이지 뷰
 """
-from flask import Blueprint, render_template, request, jsonify, current_app # type: ignore
+from flask import Blueprint, render_template, request, jsonify, current_app, Response, stream_with_context # type: ignore
 from app.models.account import AWSAccount
 from app.utils.aws_handler import AWSConnectionHandler
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import json
-import os
+import time
 
 main_bp = Blueprint('main', __name__)
 
@@ -21,7 +22,12 @@ def index():
 
 @main_bp.route('/api/test-all-connections', methods=['POST'])
 def test_all_connections():
-    """모든 계정의 연결 상태 테스트"""
+    """
+    모든 계정의 연결 상태 테스트
+    - 계정별 테스트를 제한된 스레드 풀에서 병렬 실행 (계정당 제한 시간 적용)
+    - 상태 변경은 모든 테스트가 끝난 뒤 한 번에 저장
+    - ?stream=1 이면 완료되는 순서대로 NDJSON으로 결과 전송
+    """
     try:
         # 모든 계정 로드
         accounts = AWSAccount.load_all()
@@ -33,65 +39,20 @@ def test_all_connections():
                 'results': {}
             })
         
-        aws_handler = AWSConnectionHandler()
-        results = {}
-        
-        for account in accounts:
-            account_key = f"{account.account_id}_{account.cloud_name}"
+        if request.args.get('stream') == '1':
+            def generate():
+                for account_key, result in _run_connection_tests(accounts):
+                    yield json.dumps(dict(result, type='result', account_key=account_key), ensure_ascii=False) + '\n'
+                yield json.dumps({
+                    'type': 'done',
+                    'success': True,
+                    'message': f'{len(accounts)}개 계정의 연결 상태를 확인했습니다.',
+                    'total_accounts': len(accounts)
+                }, ensure_ascii=False) + '\n'
             
-            try:
-                # 연결 방식에 따라 테스트 수행
-                if account.connection_type == 'role':
-                    # Cross-Account Role 테스트
-                    test_result = aws_handler.test_cross_account_connection(
-                        role_arn=account.role_arn,
-                        external_id=account.external_id,
-                        region=account.primary_region
-                    )
-                else:
-                    # Access Key 테스트
-                    test_result = aws_handler.test_access_key_connection(
-                        access_key_id=account.access_key_id,
-                        secret_access_key=account.secret_access_key,
-                        region=account.primary_region
-                    )
-                
-                # 연결 상태 업데이트
-                if test_result.get('status') == 'success':
-                    new_status = 'active'
-                    status_message = '연결됨'
-                else:
-                    new_status = 'failed'
-                    status_message = '연결실패'
-                
-                # 계정 상태 업데이트 (파일에 저장)
-                _update_account_status(account, new_status)
-                
-                results[account_key] = {
-                    'account_id': account.account_id,
-                    'cloud_name': account.cloud_name,
-                    'connection_type': account.connection_type,
-                    'old_status': account.status,
-                    'new_status': new_status,
-                    'status_message': status_message,
-                    'test_success': test_result.get('status') == 'success',
-                    'error_message': test_result.get('error_message') if test_result.get('status') != 'success' else None
-                }
-                
-            except Exception as e:
-                # 개별 계정 테스트 실패
-                _update_account_status(account, 'failed')
-                
-                results[account_key] = {
-                    'account_id': account.account_id,
-                    'cloud_name': account.cloud_name,
-                    'connection_type': account.connection_type,
-                    'old_status': account.status,
-                    'new_status': 'failed',
-                    'status_message': '연결실패',
-                    'test_success': False,
-                    'error_message': str(e)
-                }
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+        results = dict(_run_connection_tests(accounts))
         
         return jsonify({
             'success': True,
@@ -107,31 +68,92 @@ def test_all_connections():
             'error': f'연결 테스트 중 오류가 발생했습니다: {str(e)}'
         }), 500
 
-def _update_account_status(account, new_status):
-    """계정 상태를 파일에 업데이트"""
+def _test_account_connection(aws_handler, account):
+    """연결 방식에 따라 단일 계정 연결 테스트 수행"""
+    if account.connection_type == 'role':
+        # Cross-Account Role 테스트
+        return aws_handler.test_cross_account_connection(
+            role_arn=account.role_arn,
+            external_id=account.external_id,
+            region=account.primary_region
+        )
+    # Access Key 테스트
+    return aws_handler.test_access_key_connection(
+        access_key_id=account.access_key_id,
+        secret_access_key=account.secret_access_key,
+        region=account.primary_region
+    )
+
+def _build_connection_result(account, test_success, error_message=None):
+    """계정별 연결 테스트 결과 항목 생성"""
+    return {
+        'account_id': account.account_id,
+        'cloud_name': account.cloud_name,
+        'connection_type': account.connection_type,
+        'old_status': account.status,
+        'new_status': 'active' if test_success else 'failed',
+        'status_message': '연결됨' if test_success else '연결실패',
+        'test_success': test_success,
+        'error_message': None if test_success else error_message
+    }
+
+def _run_connection_tests(accounts):
+    """
+    계정 연결 테스트 병렬 실행 - 완료 순서대로 (account_key, 결과) 반환
+    
+    제한 시간을 넘긴 계정은 실패로 처리하고, 상태 변경은 마지막에 일괄 저장합니다.
+    """
+    app = current_app._get_current_object()
+    max_workers = min(app.config.get('CONNECTION_TEST_MAX_WORKERS', 8), len(accounts))
+    timeout = app.config.get('CONNECTION_TEST_TIMEOUT', 45)
+    aws_handler = AWSConnectionHandler()
+    started_at = {}
+    
+    def worker(account_key, account):
+        started_at[account_key] = time.monotonic()
+        with app.app_context():
+            return _test_account_connection(aws_handler, account)
+    
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {}
+    for account in accounts:
+        account_key = f"{account.account_id}_{account.cloud_name}"
+        futures[executor.submit(worker, account_key, account)] = (account_key, account)
+    
+    pending = set(futures)
+    status_updates = []
     try:
-        accounts_file = current_app.config['ACCOUNTS_FILE']
-        
-        # 기존 계정들 로드
-        existing_accounts = []
-        if os.path.exists(accounts_file):
-            with open(accounts_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip():
-                        account_data = json.loads(line.strip())
-                        # 현재 계정과 일치하면 상태 업데이트
-                        if (account_data.get('account_id') == account.account_id and 
-                            account_data.get('cloud_name') == account.cloud_name):
-                            account_data['status'] = new_status
-                        existing_accounts.append(account_data)
-        
-        # 파일에 다시 저장
-        with open(accounts_file, 'w', encoding='utf-8') as f:
-            for account_data in existing_accounts:
-                f.write(json.dumps(account_data, ensure_ascii=False) + '\n')
-                
-    except Exception as e:
-        current_app.logger.error(f"계정 상태 업데이트 실패: {str(e)}")
+        while pending:
+            done, pending = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                account_key, account = futures[future]
+                try:
+                    test_result = future.result()
+                    result = _build_connection_result(
+                        account, test_result.get('status') == 'success', test_result.get('error_message')
+                    )
+                except Exception as e:
+                    # 개별 계정 테스트 실패
+                    result = _build_connection_result(account, False, str(e))
+                status_updates.append((account.account_id, account.cloud_name, result['new_status']))
+                yield account_key, result
+            
+            # 실행 시작 후 제한 시간을 넘긴 계정은 실패 처리 (대기열에 있는 계정은 제외)
+            now = time.monotonic()
+            for future in list(pending):
+                account_key, account = futures[future]
+                if account_key in started_at and now - started_at[account_key] > timeout:
+                    pending.discard(future)
+                    result = _build_connection_result(account, False, f'연결 테스트 시간 초과 ({timeout}초)')
+                    status_updates.append((account.account_id, account.cloud_name, result['new_status']))
+                    yield account_key, result
+    finally:
+        executor.shutdown(wait=False)
+        try:
+            AWSAccount.update_statuses(status_updates)
+        except Exception as e:
+            current_app.logger.error(f"계정 상태 업데이트 실패: {str(e)}")
 
 @main_bp.route('/api/accounts/delete', methods=['POST'])
 def delete_account():
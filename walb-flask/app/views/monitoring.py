@@ -9,6 +9,8 @@ from app.services.kinesis_service import KinesisServiceManager
 from app.services.splunk_service import SplunkService
 from app.services.monitoring_service import MonitoringService
 from app.config.ssh_config import SSHConfig
+from app.utils.data_store import get_config_value
+from app.utils.status_cache import StatusCache
 import logging
 from datetime import datetime
 
@@ -31,6 +33,51 @@ kinesis_manager = KinesisServiceManager()
 splunk_service = SplunkService()
 monitoring_service = MonitoringService()
 
+# 계정별 모니터링 상태 캐시 (열린 탭 수와 무관하게 주기적으로 한 번씩만 SSH/AWS 조회)
+status_cache = StatusCache(
+    'monitoring-status',
+    refresh_interval=get_config_value('MONITORING_STATUS_REFRESH_INTERVAL', 30),
+    idle_timeout=get_config_value('MONITORING_STATUS_IDLE_TIMEOUT', 300)
+)
+
+# 전체 리전 점검 결과 캐시 (리전 × 서비스 호출 수가 많으므로 더 긴 주기로 갱신)
+region_sweep_cache = StatusCache(
+    'region-sweep',
+    refresh_interval=get_config_value('MONITORING_SWEEP_REFRESH_INTERVAL', 300),
+    idle_timeout=get_config_value('MONITORING_SWEEP_IDLE_TIMEOUT', 900),
+    max_workers=1
+)
+
+# GuardDuty findings 대시보드 캐시 (갱신 시 워터마크 이후 변경분만 증분 수집)
+findings_cache = StatusCache(
+    'guardduty-findings',
+    refresh_interval=get_config_value('GUARDDUTY_FINDINGS_SYNC_INTERVAL', 120),
+    idle_timeout=get_config_value('MONITORING_SWEEP_IDLE_TIMEOUT', 900),
+    max_workers=1
+)
+
+def get_cached_forwarder_status(account_id):
+    """캐시된 Forwarder 상태 (cache: 수집 시각/나이 정보 포함)"""
+    value, meta = status_cache.get(('forwarder', account_id), lambda: get_forwarder_status(account_id))
+    if value is None:
+        value = {'success': False, 'error': meta['error'] or '상태 수집 실패'}
+    return dict(value, cache=meta)
+
+def get_cached_comprehensive_status(account):
+    """캐시된 AWS 종합 모니터링 상태"""
+    value, meta = status_cache.get(
+        ('comprehensive', account.account_id),
+        lambda: monitoring_service.get_comprehensive_monitoring_status(account)
+    )
+    if value is None:
+        value = {'account_id': account.account_id, 'error': meta['error'], 'overall_health': 'error'}
+    return dict(value, cache=meta)
+
+def invalidate_forwarder_status(account_id):
+    """서비스 상태를 바꾸는 조치 후 다음 조회가 새로 수집하도록 캐시 삭제"""
+    if account_id:
+        status_cache.invalidate(('forwarder', account_id))
+
 @bp.route('/')
 def index():
     """모니터링 메인 페이지"""
@@ -44,34 +91,52 @@ def index():
     selected_account = None
     service_status = None
     monitoring_status = None
-    
-    service_status = None
-    monitoring_status = None
+    forwarder_status = None
     
     if account_id:
         selected_account = AWSAccount.find_by_id(account_id)
         if selected_account:
-            # Kinesis 서비스 상태 확인
-            service_status = kinesis_manager.get_service_status(account_id)
+            # Forwarder 서비스/로그 파일 상태를 SSH 한 번으로 수집
+            forwarder_status = get_cached_forwarder_status(account_id)
+            service_status = forwarder_status.get('service_status')
             # Splunk 모니터링 상태 확인
             monitoring_status = splunk_service.get_account_monitoring_status(account_id)
             # 종합 모니터링 상태 확인
-            comprehensive_status = monitoring_service.get_comprehensive_monitoring_status(selected_account)
-        if selected_account:
-            # Kinesis 서비스 상태 확인
-            service_status = kinesis_manager.get_service_status(account_id)
-            # Splunk 모니터링 상태 확인
-            monitoring_status = splunk_service.get_account_monitoring_status(account_id)
-            # 종합 모니터링 상태 확인
-            comprehensive_status = monitoring_service.get_comprehensive_monitoring_status(selected_account)
+            comprehensive_status = get_cached_comprehensive_status(selected_account)
     
     return render_template('pages/monitoring.html', 
                          accounts=accounts,
                          selected_account=selected_account,
                          service_status=service_status,
                          monitoring_status=monitoring_status,
+                         forwarder_status=forwarder_status if account_id and selected_account else None,
                          comprehensive_status=comprehensive_status if account_id and selected_account else None)
 
+def get_forwarder_status(account_id):
+    """
+    Forwarder 상태 스냅샷 1회 수집 후 페이지에서 쓰는 형태로 변환
+    
+    Returns:
+        dict: success, service_status, kinesis_status, log_files_status (실패 시 success=False, error)
+    """
+    ssh_config = get_ssh_config()
+    collected = monitoring_service.collect_forwarder_status(
+        instance_ip=ssh_config['host'],
+        ssh_key_path=ssh_config['key_path'],
+        account_id=account_id
+    )
+    if not collected['success']:
+        logger.error(f"Forwarder status collection failed for {account_id}: {collected['error']}")
+        return {'success': False, 'error': collected['error']}
+    
+    snapshot = collected['snapshot']
+    return {
+        'success': True,
+        'service_status': monitoring_service.build_service_status(snapshot),
+        'kinesis_status': monitoring_service.build_kinesis_service_status(snapshot),
+        'log_files_status': monitoring_service.build_log_files_status(snapshot)
+    }
+
 @bp.route('/service/create', methods=['POST'])
 def create_service():
     """Kinesis 서비스 생성"""
@@ -86,6 +151,7 @@ def create_service():
     
     try:
         result = kinesis_manager.create_kinesis_service(account)
+        invalidate_forwarder_status(account_id)
         return jsonify(result)
     except Exception as e:
         logger.error(f"Error creating service: {e}")
@@ -101,6 +167,7 @@ def start_service():
     
     try:
         result = kinesis_manager.start_kinesis_service(account_id)
+        invalidate_forwarder_status(account_id)
         return jsonify(result)
     except Exception as e:
         logger.error(f"Error starting service: {e}")
@@ -116,6 +183,7 @@ def stop_service():
     
     try:
         result = kinesis_manager.stop_kinesis_service(account_id)
+        invalidate_forwarder_status(account_id)
         return jsonify(result)
     except Exception as e:
         logger.error(f"Error stopping service: {e}")
@@ -131,6 +199,7 @@ def remove_service():
     
     try:
         result = kinesis_manager.remove_kinesis_service(account_id)
+        invalidate_forwarder_status(account_id)
         return jsonify(result)
     except Exception as e:
         logger.error(f"Error removing service: {e}")
@@ -231,6 +300,7 @@ def execute_kinesis_script():
                 ssh_key_path=ssh_config['key_path'],
                 account=account
             )
+            invalidate_forwarder_status(account_id)
             
             if ssh_result.get('success'):
                 # SSH 실행 성공 시 실제 결과 반환
@@ -369,12 +439,63 @@ def get_comprehensive_status(account_id):
         return jsonify({"error": "계정을 찾을 수 없습니다"}), 404
     
     try:
-        status = monitoring_service.get_comprehensive_monitoring_status(account)
+        status = get_cached_comprehensive_status(account)
         return jsonify(status)
     except Exception as e:
         logger.error(f"Error getting comprehensive status: {e}")
         return jsonify({"error": str(e)}), 500
 
+@bp.route('/aws/region-matrix/<account_id>')
+def get_region_matrix(account_id):
+    """활성화된 모든 리전의 서비스 상태 매트릭스 조회 (AJAX, 캐시)"""
+    account = AWSAccount.find_by_id(account_id)
+    if not account:
+        return jsonify({"error": "계정을 찾을 수 없습니다"}), 404
+    
+    try:
+        value, meta = region_sweep_cache.get(
+            ('region_sweep', account_id),
+            lambda: monitoring_service.get_multi_region_security_status(account)
+        )
+        if value is None:
+            return jsonify({"error": meta['error'] or '전체 리전 점검 실패', "cache": meta}), 500
+        return jsonify(dict(value, cache=meta))
+    except Exception as e:
+        logger.error(f"Error getting region matrix: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/aws/guardduty-findings/<account_id>')
+def get_guardduty_findings(account_id):
+    """GuardDuty 최근 탐지 결과 및 심각도/유형 추이 조회 (AJAX, 캐시)"""
+    account = AWSAccount.find_by_id(account_id)
+    if not account:
+        return jsonify({"error": "계정을 찾을 수 없습니다"}), 404
+    
+    try:
+        value, meta = findings_cache.get(
+            ('guardduty_findings', account_id),
+            lambda: monitoring_service.get_guardduty_findings_overview(account)
+        )
+        if value is None:
+            return jsonify({"error": meta['error'] or 'GuardDuty findings 조회 실패', "cache": meta}), 500
+        return jsonify(dict(value, cache=meta))
+    except Exception as e:
+        logger.error(f"Error getting GuardDuty findings: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/forwarder/status/<account_id>')
+def get_forwarder_status_api(account_id):
+    """Forwarder 서비스 및 로그 파일 상태 통합 조회 (AJAX, 캐시)"""
+    account = AWSAccount.find_by_id(account_id)
+    if not account:
+        return jsonify({"error": "계정을 찾을 수 없습니다"}), 404
+    
+    try:
+        return jsonify(get_cached_forwarder_status(account_id))
+    except Exception as e:
+        logger.error(f"Error getting forwarder status: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @bp.route('/log-files/status/<account_id>')
 def get_log_files_status(account_id):
     """실제 로그 파일 수집 상태 조회 (AJAX)"""
@@ -383,21 +504,23 @@ def get_log_files_status(account_id):
         return jsonify({"error": "계정을 찾을 수 없습니다"}), 404
     
     try:
-        # SSH를 통해 실제 로그 파일 상태 확인
-        ssh_config = get_ssh_config()
-        log_status = monitoring_service.check_log_files_status(
-            instance_ip=ssh_config['host'],
-            ssh_key_path=ssh_config['key_path'],
-            account_id=account_id
-        )
-        return jsonify(log_status)
+        # 캐시된 Forwarder 상태에서 로그 파일 상태 추출
+        forwarder_status = get_cached_forwarder_status(account_id)
+        if not forwarder_status['success']:
+            return jsonify({
+                'success': False,
+                'message': '로그 파일 상태 확인 실패',
+                'error': forwarder_status['error'],
+                'cache': forwarder_status['cache']
+            })
+        return jsonify(dict(forwarder_status['log_files_status'], cache=forwarder_status['cache']))
     except Exception as e:
         logger.error(f"Error getting log files status: {e}")
         return jsonify({"error": str(e)}), 500
 
 @bp.route('/log-files/preview/<account_id>/<log_type>')
 def get_log_preview(account_id, log_type):
-    """특정 로그 파일의 최근 내용 미리보기 (AJAX)"""
+    """특정 로그 파일의 최근 내용 미리보기 (AJAX, offset/inode 지정 시 추가된 줄만)"""
     account = AWSAccount.find_by_id(account_id)
     if not account:
         return jsonify({"error": "계정을 찾을 수 없습니다"}), 404
@@ -406,8 +529,24 @@ def get_log_preview(account_id, log_type):
         return jsonify({"error": "잘못된 로그 타입입니다"}), 400
     
     try:
-        # SSH로 로그 파일의 최근 내용 가져오기
+        offset = request.args.get('offset', type=int)
+        inode = request.args.get('inode', type=int)
         ssh_config = get_ssh_config()
+        
+        if offset is not None and inode is not None:
+            # follow 모드: 마지막으로 받은 오프셋 이후 추가된 줄만 전송
+            result = monitoring_service.get_log_file_tail(
+                instance_ip=ssh_config['host'],
+                ssh_key_path=ssh_config['key_path'],
+                account_id=account_id,
+                log_type=log_type,
+                lines=50,
+                offset=offset,
+                inode=inode
+            )
+            return jsonify(result)
+        
+        # SSH로 로그 파일의 최근 내용 가져오기
         result = monitoring_service.get_log_file_preview(
             instance_ip=ssh_config['host'],
             ssh_key_path=ssh_config['key_path'],
@@ -428,14 +567,16 @@ def check_kinesis_service_status(account_id):
         return jsonify({"error": "계정을 찾을 수 없습니다"}), 404
     
     try:
-        # SSH를 통해 Kinesis 서비스 상태 확인
-        ssh_config = get_ssh_config()
-        result = monitoring_service.check_kinesis_service_exists(
-            instance_ip=ssh_config['host'],
-            ssh_key_path=ssh_config['key_path'],
-            account_id=account_id
-        )
-        return jsonify(result)
+        # 캐시된 Forwarder 상태에서 Kinesis 서비스 상태 추출
+        forwarder_status = get_cached_forwarder_status(account_id)
+        if not forwarder_status['success']:
+            return jsonify({
+                'success': False,
+                'message': 'Kinesis 서비스 상태 확인 실패',
+                'error': forwarder_status['error'],
+                'cache': forwarder_status['cache']
+            })
+        return jsonify(dict(forwarder_status['kinesis_status'], cache=forwarder_status['cache']))
     except Exception as e:
         logger.error(f"Error checking Kinesis service status: {e}")
         return jsonify({"error": str(e)}), 500
@@ -467,6 +608,7 @@ def reinstall_kinesis_service():
             account=account,
             reinstall=True  # 재설치 모드
         )
+        invalidate_forwarder_status(account_id)
         
         if result.get('success'):
             result['message'] = 'Kinesis 서비스 재설치 완료 (기존 서비스 제거 후 새로 설치됨)'
@@ -490,7 +632,7 @@ def get_service_details_html(account_id):
     
     try:
         # 종합 모니터링 상태 가져오기
-        status = monitoring_service.get_comprehensive_monitoring_status(account)
+        status = get_cached_comprehensive_status(account)
         
         # HTML 템플릿 렌더링
         return render_template('components/service_details.html', 
@@ -534,6 +676,7 @@ def manage_kinesis_service():
             account_id=account_id,
             action=action
         )
+        invalidate_forwarder_status(account_id)
         
         return jsonify(result)
         
@@ -12,9 +12,35 @@ class Config:
     
     # 데이터 파일 경로
     DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
-    ACCOUNTS_FILE = os.path.join(DATA_DIR, 'registered_accounts.json')
+    ACCOUNTS_FILE = os.path.join(DATA_DIR, 'registered_accounts.json')  # 기존 JSONL (최초 1회 가져오기용)
+    ACCOUNTS_DB = os.path.join(DATA_DIR, 'registered_accounts.db')
+    FINDINGS_DB = os.path.join(DATA_DIR, 'guardduty_findings.db')  # GuardDuty findings 로컬 사본
+    STATUS_CACHE_DB = os.path.join(DATA_DIR, 'status_cache.db')  # 모니터링 상태 스냅샷 (gunicorn 워커 간 공유)
     DIAGNOSIS_HISTORY_FILE = os.path.join(DATA_DIR, 'diagnosis_history.json')
     
+    # Kinesis Splunk Forwarder 로컬 로그 경로 (같은 호스트에서 실행되는 경우 1.7 진단에 사용)
+    FORWARDER_LOG_DIR = os.environ.get('FORWARDER_LOG_DIR', '/var/log/splunk')
+    FORWARDER_LOG_MAX_AGE = 900  # 로그가 이 시간(초) 이상 갱신되지 않으면 1.7 진단은 CloudTrail API로 조회
+    
+    # splunk-forwarder SSH 연결 재사용 설정 (OpenSSH ControlMaster)
+    SSH_MULTIPLEX = os.environ.get('SSH_MULTIPLEX', 'true').lower() == 'true'
+    SSH_CONTROL_DIR = os.environ.get('SSH_CONTROL_DIR')  # 미설정 시 <임시 디렉토리>/walb-ssh
+    SSH_CONTROL_PERSIST = 600  # 마지막 명령 후 마스터 연결 유지 시간 (초)
+    SSH_HEALTH_CHECK_INTERVAL = 30  # 마스터 연결 상태 확인 간격 (초)
+    FORWARDER_STATUS_AGENT_PORT = int(os.environ.get('FORWARDER_STATUS_AGENT_PORT', '8765'))  # 0이면 에이전트 미사용
+    FORWARDER_LAG_WARN_SECONDS = 300  # Forwarder 지표 기준 지연 경고 (MillisBehindLatest)
+    FORWARDER_STALL_SECONDS = 600  # 뒤처진 상태에서 체크포인트가 이 시간 동안 전진하지 않으면 정체로 판단
+    
+    # 모니터링 페이지 상태 캐시 설정
+    MONITORING_STATUS_REFRESH_INTERVAL = 30  # 백그라운드 갱신 주기 (초)
+    MONITORING_STATUS_IDLE_TIMEOUT = 300  # 이 시간 동안 조회가 없으면 갱신 중단 (초)
+    MONITORING_SWEEP_REFRESH_INTERVAL = 300  # 전체 리전 점검 갱신 주기 (초)
+    MONITORING_SWEEP_IDLE_TIMEOUT = 900
+    MONITORING_SWEEP_MAX_WORKERS = 16  # (리전, 서비스) 점검 동시 실행 수
+    GUARDDUTY_FINDINGS_SYNC_INTERVAL = 120  # findings 증분 수집 주기 (초)
+    GUARDDUTY_FINDINGS_BACKFILL_DAYS = 30  # 최초 수집 시 가져올 기간 (일)
+    GUARDDUTY_FINDINGS_MAX_PER_SYNC = 2000  # 탐지기별 1회 수집 최대 건수 (나머지는 다음 수집에서 이어받음)
+    
     # AWS 설정
     AWS_DEFAULT_REGION = 'ap-northeast-2'
     
@@ -29,6 +55,10 @@ class Config:
     DIAGNOSIS_TIMEOUT = 60  # 초 (30→60으로 증가)
     MAX_CONCURRENT_DIAGNOSIS = 5
     
+    # 전체 계정 연결 테스트 설정
+    CONNECTION_TEST_MAX_WORKERS = 8
+    CONNECTION_TEST_TIMEOUT = 45  # 계정당 초
+    
     # 로깅 설정
     LOG_LEVEL = 'INFO'
 